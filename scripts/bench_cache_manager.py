@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CacheManager get/set ops/sec — legacy vs persistent backend.
+
+  * legacy     — `sqlite3.connect()` на каждую операцию, default journal,
+                 commit() на каждый write (поведение до WAL-бэкенда);
+  * persistent — текущий CacheManager: одно WAL-соединение, statement cache;
+  * async      — `aget`/`aset` через выделенный executor (стоимость hop'а).
+
+База создаётся во временной директории, ~/.openclaw не трогается.
+
+Запуск:
+    venv/bin/python scripts/bench_cache_manager.py [--ops 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import src.cache_manager as cm  # noqa: E402
+
+
+class _LegacyCacheManager(cm.CacheManager):
+    """Воспроизводит прежний бэкенд: новое соединение на каждую операцию."""
+
+    def _backend_get(self, key):  # noqa: ANN001, ANN202
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            return (row[0], row[1]) if row else None
+
+    def _backend_set(self, key, value, expires_at):  # noqa: ANN001, ANN202
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.commit()
+
+
+def _bench_sync(manager: cm.CacheManager, ops: int, payload: str) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    for i in range(ops):
+        manager.set(f"k{i}", payload, ttl=600)
+    set_rate = ops / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for i in range(ops):
+        manager.get(f"k{i}")
+    get_rate = ops / (time.perf_counter() - t0)
+    return set_rate, get_rate
+
+
+async def _bench_async(manager: cm.CacheManager, ops: int, payload: str) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    for i in range(ops):
+        await manager.aset(f"a{i}", payload, ttl=600)
+    set_rate = ops / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for i in range(ops):
+        await manager.aget(f"a{i}")
+    get_rate = ops / (time.perf_counter() - t0)
+    return set_rate, get_rate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CacheManager ops/sec benchmark")
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--value-size", type=int, default=2048)
+    args = parser.parse_args()
+    payload = "x" * args.value_size
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cm._CACHE_DIR = Path(tmp)
+        legacy = _LegacyCacheManager("legacy.db")
+        current = cm.CacheManager("current.db")
+
+        rows = [
+            ("legacy", *_bench_sync(legacy, args.ops, payload)),
+            ("persistent", *_bench_sync(current, args.ops, payload)),
+            ("async", *asyncio.run(_bench_async(current, args.ops, payload))),
+        ]
+        current.close()
+
+    print(f"CacheManager benchmark: ops={args.ops} value={args.value_size}B")
+    print(f"{'backend':>11} {'set ops/s':>11} {'get ops/s':>11}")
+    for name, set_rate, get_rate in rows:
+        print(f"{name:>11} {set_rate:>11.0f} {get_rate:>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
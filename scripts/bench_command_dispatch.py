@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message overhead командной маршрутизации userbot'а.
+
+Сравнивает на синтетической ленте группового чата (по умолчанию 10k сообщений):
+
+  * legacy   — ~140 Pyrogram-хендлеров group=-1 вида
+               `filters.command(name) & <sync ACL filter>`; dispatcher
+               вызывает `handler.check()` по очереди до первого совпадения
+               (sync ACL уходит в executor, как в Pyrogram);
+  * single   — один хендлер с async-фильтром `CommandDispatcher.match`
+               + одна ACL/blocklist проверка (текущий `_setup_handlers`).
+
+Таблица команд берётся из реального `KraabUserbot._setup_handlers`
+(клиент подменён регистратором, сеть не нужна).
+
+Запуск:
+    venv/bin/python scripts/bench_command_dispatch.py [--messages 10000] [--command-share 0.1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import concurrent.futures
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pyrogram import filters  # noqa: E402
+from pyrogram.handlers.handler import Handler  # noqa: E402
+
+from src.config import config  # noqa: E402
+from src.userbot_bridge import KraabUserbot  # noqa: E402
+
+_WORDS = "привет как дела сегодня завтра краб модель ответ group chat ok да нет".split()
+
+
+def percentile(data: list[float], p: float) -> float:
+    """Простой percentile без numpy."""
+    if not data:
+        return 0.0
+    sorted_data = sorted(data)
+    idx = (len(sorted_data) - 1) * p / 100.0
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_data) - 1)
+    frac = idx - lo
+    return sorted_data[lo] + frac * (sorted_data[hi] - sorted_data[lo])
+
+
+class _RecordingClient:
+    """Вместо Pyrogram Client: собирает on_message-регистрации."""
+
+    def __init__(self) -> None:
+        self.handlers: list[tuple[object, int]] = []
+
+    def on_message(self, flt=None, group: int = 0):  # noqa: ANN001, ANN202
+        def deco(fn):  # noqa: ANN001, ANN202
+            self.handlers.append((Handler(fn, flt), group))
+            return fn
+
+        return deco
+
+    def __getattr__(self, name: str):  # noqa: ANN204
+        return lambda *a, **k: lambda fn: fn
+
+
+def _build_bot() -> KraabUserbot:
+    bot = KraabUserbot.__new__(KraabUserbot)
+    bot.client = _RecordingClient()
+    # ACL: всё разрешено — меряем маршрутизацию, а не access_control.
+    bot._has_command_access = lambda user, command: True  # type: ignore[method-assign]
+    bot._setup_handlers()
+    return bot
+
+
+def _legacy_handlers(bot: KraabUserbot, prefixes: list[str]) -> list[Handler]:
+    routes = bot._command_dispatcher._routes  # noqa: SLF001
+    by_handler: dict[tuple[object, str], list[str]] = {}
+    for name, route in routes.items():
+        by_handler.setdefault((route.handler, route.acl_name), []).append(name)
+
+    def make_acl(acl_name: str):  # noqa: ANN202
+        # Прежний _make_command_filter: sync filter (blocklist + ACL).
+        def check_access(_, __, m):  # noqa: ANN001, ANN202
+            if not m.from_user:
+                return False
+            return bot._has_command_access(m.from_user, acl_name)
+
+        return filters.create(check_access)
+
+    async def _noop(c, m):  # noqa: ANN001, ANN202
+        return None
+
+    return [
+        Handler(_noop, filters.command(names, prefixes=prefixes) & make_acl(acl))
+        for (_, acl), names in by_handler.items()
+    ]
+
+
+def _feed(n: int, command_share: float, names: list[str], rng: random.Random) -> list[str]:
+    out: list[str] = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < command_share:
+            out.append(f"!{rng.choice(names)} {rng.choice(_WORDS)}")
+        elif roll < command_share * 1.5:
+            out.append(f"!{rng.choice(_WORDS)}x {rng.choice(_WORDS)}")  # неизвестная команда
+        else:
+            out.append(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 14))))
+    return out
+
+
+async def _run(handlers: list[Handler], client, texts: list[str]) -> list[float]:  # noqa: ANN001
+    user = SimpleNamespace(id=1, username="u")
+    chat = SimpleNamespace(id=-100)
+    lat: list[float] = []
+    for text in texts:
+        m = SimpleNamespace(text=text, caption=None, command=None, from_user=user, chat=chat)
+        start = time.perf_counter()
+        for handler in handlers:
+            if await handler.check(client, m):
+                break
+        lat.append((time.perf_counter() - start) * 1e6)
+    return lat
+
+
+async def _main_async(args: argparse.Namespace) -> None:
+    bot = _build_bot()
+    prefixes = config.TRIGGER_PREFIXES + ["/", "!", "."]
+    single = [h for h, group in bot.client.handlers if group == -1]
+    legacy = _legacy_handlers(bot, prefixes)
+    names = sorted(bot._command_dispatcher._routes)  # noqa: SLF001
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    client = SimpleNamespace(
+        me=SimpleNamespace(username="krab", usernames=None),
+        loop=asyncio.get_running_loop(),
+        executor=executor,
+    )
+    texts = _feed(args.messages, args.command_share, names, random.Random(args.seed))
+
+    print(
+        f"feed: {args.messages} msgs, commands≈{args.command_share:.0%}; "
+        f"legacy handlers={len(legacy)}, single handlers={len(single)}"
+    )
+    print(f"{'mode':>7} {'total ms':>10} {'mean us':>9} {'p50 us':>8} {'p95 us':>8}")
+    results = {}
+    for mode, handlers in (("legacy", legacy), ("single", single)):
+        lat = await _run(handlers, client, texts)
+        results[mode] = lat
+        print(
+            f"{mode:>7} {sum(lat) / 1000:>10.1f} {statistics.mean(lat):>9.1f} "
+            f"{percentile(lat, 50):>8.1f} {percentile(lat, 95):>8.1f}"
+        )
+    executor.shutdown(wait=False)
+    ratio = statistics.mean(results["legacy"]) / max(statistics.mean(results["single"]), 1e-9)
+    print(f"speedup x{ratio:.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="command dispatch overhead benchmark")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--command-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(_main_async(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
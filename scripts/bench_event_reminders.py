@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message стоимость `RemindersQueue.check_event_match`.
+
+Синтетика: N event reminders (по умолчанию 1000), равномерно по M чатам
+(по умолчанию 200), pattern'ы — слова/короткие regex'ы; лента сообщений из
+случайных чатов, малая доля которых реально совпадает.
+
+Сравнивает:
+
+  * legacy — прежний линейный проход по всем reminders со сравнением
+             `str(watch_chat_id)` и `re.search(pattern, ...)` на каждый;
+  * index  — текущий `check_event_match`: chat_id → предкомпилированный
+             matcher с префильтром-альтернацией.
+
+Запуск:
+    venv/bin/python scripts/bench_event_reminders.py [--reminders 1000] [--chats 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.reminders_queue import (  # noqa: E402
+    Reminder,
+    RemindersQueue,
+    ReminderStatus,
+    ReminderTrigger,
+)
+
+_WORDS = (
+    "bitcoin ethereum rally dump краб модель релиз деплой ошибка завтра встреча "
+    "отчёт дедлайн баг фикс тест прод ссылка цена курс новости"
+).split()
+
+
+def percentile(data: list[float], p: float) -> float:
+    """Простой percentile без numpy."""
+    if not data:
+        return 0.0
+    sorted_data = sorted(data)
+    idx = (len(sorted_data) - 1) * p / 100.0
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_data) - 1)
+    frac = idx - lo
+    return sorted_data[lo] + frac * (sorted_data[hi] - sorted_data[lo])
+
+
+def legacy_check_event_match(
+    queue: RemindersQueue, chat_id: str, message_text: str
+) -> list[Reminder]:
+    """Копия прежней реализации (линейный проход + re.search на лету)."""
+    matched: list[Reminder] = []
+    for r in queue._reminders.values():
+        if r.status != ReminderStatus.PENDING or r.trigger_type != ReminderTrigger.EVENT:
+            continue
+        if str(r.watch_chat_id) != str(chat_id):
+            continue
+        if not r.match_pattern:
+            continue
+        try:
+            if re.search(r.match_pattern, message_text, re.IGNORECASE):
+                matched.append(r)
+        except re.error:
+            continue
+    return matched
+
+
+def _pattern(rng: random.Random) -> str:
+    word = rng.choice(_WORDS)
+    kind = rng.random()
+    if kind < 0.6:
+        return word
+    if kind < 0.8:
+        return rf"\b{word}\w*"
+    return rf"{word}.{{0,20}}{rng.choice(_WORDS)}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reminders", type=int, default=1000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = RemindersQueue(state_path=Path(tmp) / "reminders_queue.json")
+        # _save на каждый add — не то, что меряем: наполняем без записи на диск.
+        queue._save = lambda: None  # type: ignore[method-assign]
+        chats = [str(-1000000000000 - i) for i in range(args.chats)]
+        for i in range(args.reminders):
+            queue.add_event_reminder(
+                owner_id="42",
+                chat_id=chats[i % args.chats],
+                pattern=_pattern(rng),
+                action=f"action {i}",
+            )
+
+        messages: list[tuple[str, str]] = []
+        for _ in range(args.messages):
+            n_words = rng.randint(3, 15)
+            text_words = [f"w{rng.randint(0, 9999)}" for _ in range(n_words)]
+            if rng.random() < 0.05:
+                text_words.insert(rng.randint(0, n_words), rng.choice(_WORDS))
+            messages.append((rng.choice(chats), " ".join(text_words)))
+
+        # Корректность: обе реализации возвращают одни и те же reminders.
+        for chat, text in messages[:2000]:
+            assert [r.id for r in queue.check_event_match(chat, text)] == [
+                r.id for r in legacy_check_event_match(queue, chat, text)
+            ]
+
+        results: dict[str, list[float]] = {}
+        for name, fn in (
+            ("legacy", lambda c, t: legacy_check_event_match(queue, c, t)),
+            ("index", queue.check_event_match),
+        ):
+            timings: list[float] = []
+            hits = 0
+            for chat, text in messages:
+                t0 = time.perf_counter()
+                hits += len(fn(chat, text))
+                timings.append((time.perf_counter() - t0) * 1e6)
+            results[name] = timings
+            print(
+                f"{name:>6}: p50={percentile(timings, 50):8.2f}us "
+                f"p99={percentile(timings, 99):8.2f}us "
+                f"total={sum(timings) / 1000:8.1f}ms hits={hits}"
+            )
+
+        speedup = sum(results["legacy"]) / max(sum(results["index"]), 1e-9)
+        print(
+            f"reminders={args.reminders} chats={args.chats} messages={args.messages} "
+            f"speedup={speedup:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark: micro-batching LLMIntentClassifier на replay группового трафика.
+
+Проигрывает trace borderline-сообщений (ts, chat_id, text) в реальном
+времени против фейкового LM Studio и сравнивает batching off/on:
+  1. Requests: число HTTP-запросов к LM Studio и сколько сэкономлено.
+  2. Latency: p50/p99 end-to-end (ms) classify_intent_for_krab и
+     среднее/максимальное добавленное ожидание в очереди batcher'а.
+
+Фейковый LM Studio обслуживает запросы последовательно (одна локальная
+модель) и тратит ``--base-ms`` на запрос (prompt prefill + overhead)
+плюс ``--per-item-ms`` на каждый вердикт в ответе. Клиентский timeout
+моделируется как в проде: ответ позже ``timeout`` (2s, у батча больше) →
+httpx.ReadTimeout, но модель всё равно дорабатывает запрос (очередь не
+разгружается). Timeout'ы считаются отдельно от успешных ответов.
+
+Trace: ``--trace PATH`` — JSONL с полями ts/chat_id/text (подходит
+trigger_decisions.jsonl); без него — синтетический bursty trace.
+
+Запуск:
+    venv/bin/python scripts/bench_intent_batching.py [--trace PATH] [--chats 6] \\
+        [--messages 300] [--window-ms 25] [--base-ms 180] [--per-item-ms 25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import structlog
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.chat_response_policy import ChatMode, ChatResponsePolicy  # noqa: E402
+from src.core.llm_intent_classifier import LM_STUDIO_TIMEOUT, LLMIntentClassifier  # noqa: E402
+
+# Timeout'ы считаются в отчёте — warning на каждый не нужен.
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+_SAMPLE_TEXTS = [
+    "а кто-нибудь знает, как это починить?",
+    "интересно, что думает бот",
+    "может спросить у ассистента?",
+    "ну и погода сегодня",
+    "кто подскажет хороший ноутбук",
+    "есть идеи по этому вопросу?",
+    "а что если попробовать по-другому",
+    "это вообще нормально работает?",
+]
+
+
+def percentile(data: list[float], q: float) -> float:
+    if not data:
+        return 0.0
+    ordered = sorted(data)
+    return ordered[min(int(len(ordered) * q + 1e-9), len(ordered) - 1)]
+
+
+def synthetic_trace(chats: int, messages: int, seed: int) -> list[tuple[float, str, str]]:
+    """Bursty trace: чаты «вспыхивают» пачками по 2-6 сообщений с шагом 20-300 ms."""
+    rnd = random.Random(seed)
+    trace: list[tuple[float, str, str]] = []
+    t = 0.0
+    while len(trace) < messages:
+        t += rnd.expovariate(0.5)  # паузы между всплесками ~2s
+        for chat in rnd.sample(range(chats), rnd.randint(1, min(3, chats))):
+            burst_t = t
+            for _ in range(rnd.randint(2, 6)):
+                burst_t += rnd.uniform(0.02, 0.3)
+                trace.append((burst_t, f"-100{chat}", rnd.choice(_SAMPLE_TEXTS)))
+    trace.sort()
+    return trace[:messages]
+
+
+def load_trace(path: Path, messages: int) -> list[tuple[float, str, str]]:
+    rows = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+            rows.append((float(rec["ts"]), str(rec["chat_id"]), str(rec["text"])))
+        except (ValueError, KeyError, TypeError):
+            continue
+    rows.sort()
+    rows = rows[-messages:]
+    if not rows:
+        return []
+    t0 = rows[0][0]
+    return [(ts - t0, chat, text) for ts, chat, text in rows]
+
+
+def _make_fake_lm(clf: LLMIntentClassifier, base_ms: float, per_item_ms: float, counter: dict):
+    gate = asyncio.Semaphore(1)  # одна локальная модель — запросы последовательны
+
+    async def serve(n_items: int) -> None:
+        async with gate:
+            await asyncio.sleep((base_ms + per_item_ms * n_items) / 1000.0)
+
+    async def fake_post(prompt: str, *, max_tokens: int, timeout: float | None = None) -> str:
+        ids = [int(m) for m in re.findall(r"^### #(\d+)", prompt, flags=re.M)]
+        counter["requests"] += 1
+        job = asyncio.ensure_future(serve(max(1, len(ids))))
+        try:
+            await asyncio.wait_for(asyncio.shield(job), timeout or LM_STUDIO_TIMEOUT)
+        except asyncio.TimeoutError:
+            counter["timeouts"] += 1
+            raise httpx.ReadTimeout("fake LM Studio: timed out") from None
+        verdict = {"should_respond": True, "confidence": 0.8, "reasoning": "bench"}
+        if ids:
+            return json.dumps([{"id": i, **verdict} for i in ids])
+        return json.dumps(verdict)
+
+    clf._post_prompt = fake_post  # type: ignore[method-assign]
+
+
+async def replay(trace, *, window_ms: float, speed: float, base_ms: float, per_item_ms: float):
+    clf = LLMIntentClassifier(batch_window_ms=window_ms, cache_max_size=0)
+    counter = {"requests": 0, "timeouts": 0, "errors": 0}
+    _make_fake_lm(clf, base_ms, per_item_ms, counter)
+    policy = ChatResponsePolicy(chat_id="bench", mode=ChatMode.NORMAL)
+    latencies: list[float] = []
+
+    async def one(idx: int, ts: float, chat: str, text: str) -> None:
+        await asyncio.sleep(ts / speed)
+        start = time.perf_counter()
+        # Уникальный текст — иначе cache key совпадёт и замер пойдёт мимо LLM.
+        result = await clf.classify_intent_for_krab(f"{text} #{idx}", [], chat, policy)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if result.error:
+            counter["errors"] += 1  # caller ушёл на regex fallback
+
+    await asyncio.gather(*(one(i, ts, chat, text) for i, (ts, chat, text) in enumerate(trace)))
+    return counter, latencies, clf.batch_stats()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLMIntentClassifier micro-batching replay")
+    parser.add_argument("--trace", type=Path, default=None)
+    parser.add_argument("--chats", type=int, default=6)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--speed", type=float, default=1.0, help="ускорение replay")
+    parser.add_argument("--window-ms", type=float, default=25.0)
+    parser.add_argument("--base-ms", type=float, default=180.0)
+    parser.add_argument("--per-item-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    trace = (
+        load_trace(args.trace, args.messages)
+        if args.trace
+        else synthetic_trace(args.chats, args.messages, args.seed)
+    )
+    if not trace:
+        print("empty trace")
+        return 1
+    span = trace[-1][0] / args.speed
+    print(f"trace: {len(trace)} messages over {span:.1f}s replay")
+
+    results = {}
+    for label, window in (("unbatched", 0.0), (f"batched {args.window_ms:g}ms", args.window_ms)):
+        counter, lat, stats = asyncio.run(
+            replay(
+                trace,
+                window_ms=window,
+                speed=args.speed,
+                base_ms=args.base_ms,
+                per_item_ms=args.per_item_ms,
+            )
+        )
+        results[label] = counter["requests"]
+        print(
+            f"{label:>16}: requests={counter['requests']:4d} timeouts={counter['timeouts']:3d} "
+            f"regex fallbacks={counter['errors']:3d}  "
+            f"e2e p50={percentile(lat, 0.5):7.1f}ms p99={percentile(lat, 0.99):7.1f}ms"
+        )
+        if stats:
+            print(
+                f"{'':>16}  batches={stats['batches']} fallbacks={stats['fallbacks']}  "
+                f"queue wait avg={stats['queue_wait_ms_avg']:.1f}ms "
+                f"max={stats['queue_wait_ms_max']:.1f}ms"
+            )
+    base, batched = results.values()
+    print(f"requests saved: {base - batched} ({(base - batched) / base:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tiered detect_language vs прежний «langdetect на каждый вызов».
+
+Измеряет на смешанном ru/en/es корпусе (короткие реплики, абзацы, эмодзи,
+ссылки, повторы как в живом трафике auto-translate):
+  1. Throughput: сообщений/сек, baseline vs tiered.
+  2. Agreement: доля совпадений кода языка с baseline.
+  3. Разбивка tiered-пути: script fast path / LRU hit / langdetect.
+
+Запуск:
+    venv/bin/python scripts/bench_language_detect.py [--messages 5000] \\
+        [--repeat-ratio 0.3] [--show-diff 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from langdetect import detect  # noqa: E402
+
+from src.core import language_detect  # noqa: E402
+
+_RU = [
+    "Привет, как дела?",
+    "Слушай, а ты завтра будешь на встрече?",
+    "Я вчера смотрел новый фильм, очень понравился",
+    "Скинь, пожалуйста, ссылку на документ",
+    "Кто-нибудь знает, где купить хороший кофе в центре?",
+    "Напомни мне позвонить маме вечером",
+    "Сегодня отличная погода для прогулки по набережной",
+    "Ребята, созвон переносится на пять часов",
+    "Спасибо большое, всё получилось",
+    "Не могу открыть файл, пишет ошибку доступа",
+    "Давай встретимся у метро через полчаса",
+    "Это было самое странное собрание в моей жизни",
+]
+_EN = [
+    "Hey, how is it going?",
+    "Can you send me the link to the document please",
+    "I watched a new movie yesterday and loved it",
+    "Does anyone know a good coffee place downtown?",
+    "The meeting has been moved to five o'clock",
+    "Thanks a lot, everything worked out",
+    "I can't open the file, it says access denied",
+    "Let's meet at the station in half an hour",
+    "What do you think about the new release?",
+    "Remind me to call my mom tonight",
+    "This was the strangest meeting of my life",
+    "The weather is great for a walk by the river today",
+]
+_ES = [
+    "Hola, ¿qué tal estás?",
+    "¿Me puedes enviar el enlace del documento, por favor?",
+    "Ayer vi una película nueva y me encantó",
+    "¿Alguien conoce un buen café en el centro?",
+    "La reunión se cambió a las cinco de la tarde",
+    "Muchas gracias, todo salió bien",
+    "No puedo abrir el archivo, dice acceso denegado",
+    "Nos vemos en la estación en media hora",
+    "¿Qué opinas de la nueva versión?",
+    "Recuérdame llamar a mi mamá esta noche",
+    "Fue la reunión más extraña de mi vida",
+    "Hoy hace un tiempo estupendo para pasear junto al río",
+]
+_DECOR = ["", " 🙂", " 😂😂", " https://example.com/x", " @alice", " !!!", " #work"]
+
+
+def build_corpus(n: int, repeat_ratio: float, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    corpus: list[str] = []
+    for _ in range(n):
+        if corpus and rnd.random() < repeat_ratio:
+            corpus.append(rnd.choice(corpus))  # эхо / пересылка / повторный запрос
+            continue
+        pool = rnd.choice((_RU, _EN, _ES))
+        parts = rnd.sample(pool, rnd.choice((1, 1, 2, 3)))
+        corpus.append(" ".join(parts) + rnd.choice(_DECOR))
+    return corpus
+
+
+def baseline(text: str) -> str:
+    """Прежняя реализация detect_language (без fast path и кэша)."""
+    if not text or len(text.strip()) < 5:
+        return ""
+    try:
+        return detect(text.strip())
+    except Exception:
+        return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="detect_language benchmark")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--show-diff", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.repeat_ratio, args.seed)
+
+    start = time.perf_counter()
+    expected = [baseline(t) for t in corpus]
+    base_sec = time.perf_counter() - start
+
+    language_detect.clear_language_cache()
+    start = time.perf_counter()
+    got = [language_detect.detect_language(t) for t in corpus]
+    tiered_sec = time.perf_counter() - start
+    stats = language_detect.language_cache_stats()
+
+    agree = sum(a == b for a, b in zip(expected, got))
+    fast = len(corpus) - stats["hits"] - stats["misses"]
+    print(f"corpus: {len(corpus)} messages (ru/en/es, repeat ratio {args.repeat_ratio:.0%})")
+    print(f"baseline: {len(corpus) / base_sec:10.0f} msg/s  ({base_sec:.2f}s)")
+    print(f"tiered:   {len(corpus) / tiered_sec:10.0f} msg/s  ({tiered_sec:.2f}s)")
+    print(f"speedup:  {base_sec / tiered_sec:.1f}x")
+    print(f"agreement with baseline: {agree}/{len(corpus)} ({agree / len(corpus):.2%})")
+    print(f"paths: script fast path {fast}, LRU hits {stats['hits']}, langdetect {stats['misses']}")
+    diffs = [(t, a, b) for t, a, b in zip(corpus, expected, got) if a != b]
+    for text, old, new in diffs[: args.show_diff]:
+        print(f"  diff: baseline={old!r} tiered={new!r} text={text[:60]!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
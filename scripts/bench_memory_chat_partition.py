@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chat-scoped vector search — legacy global-KNN filter vs per-chat партиции.
+
+Строит синтетический archive.db (N чатов, M chunks, dim=256) во временной
+директории, прогоняет `HybridRetriever._vector_search(chat_id=...)` в двух
+режимах и сравнивает с точным brute-force top-k внутри чата:
+
+  * legacy    — KRAB_RAG_CHAT_PARTITION_ENABLED=0: `limit*3` глобальных
+                соседей из vec_chunks, затем фильтр по chat_id;
+  * partition — vec_chunks_chat с chat_id partition key (точный KNN).
+
+Печатает recall@k, долю запросов с нулём vector hits и latency p50/p95.
+
+Запуск:
+    venv/bin/python scripts/bench_memory_chat_partition.py [--chats 200] [--chunks 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.memory_archive import ArchivePaths, create_schema, open_archive  # noqa: E402
+from src.core.memory_embedder import (  # noqa: E402
+    backfill_chat_partitions,
+    create_vec_table,
+    serialize_f32,
+)
+from src.core.memory_retrieval import HybridRetriever  # noqa: E402
+
+
+def percentile(data: list[float], p: float) -> float:
+    """Простой percentile без numpy."""
+    if not data:
+        return 0.0
+    sorted_data = sorted(data)
+    idx = (len(sorted_data) - 1) * p / 100.0
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_data) - 1)
+    frac = idx - lo
+    return sorted_data[lo] + frac * (sorted_data[hi] - sorted_data[lo])
+
+
+class _LookupModel:
+    """Fake Model2Vec: encode(["q17"]) → заранее сгенерированный вектор запроса."""
+
+    def __init__(self, vectors: dict[str, np.ndarray]) -> None:
+        self._vectors = vectors
+
+    def encode(self, texts):  # noqa: ANN001
+        return np.stack([self._vectors[t] for t in texts])
+
+
+def _build_archive(paths: ArchivePaths, chats: int, chunks: int, dim: int, rng) -> tuple:
+    conn = open_archive(paths)
+    create_schema(conn)
+    create_vec_table(conn, dim=dim)
+    chat_ids = [f"-100{i:05d}" for i in range(chats)]
+    conn.executemany(
+        "INSERT INTO chats(chat_id, title, chat_type) VALUES (?, ?, 'group');",
+        [(c, c) for c in chat_ids],
+    )
+    # Zipf-подобное распределение: несколько больших чатов и длинный хвост.
+    weights = 1.0 / np.arange(1, chats + 1)
+    owner = rng.choice(chats, size=chunks, p=weights / weights.sum())
+    vecs = rng.standard_normal((chunks, dim)).astype("float32")
+    ts = "2026-04-01T10:00:00Z"
+    conn.executemany(
+        """
+        INSERT INTO chunks(chunk_id, chat_id, start_ts, end_ts,
+                           message_count, char_len, text_redacted)
+        VALUES (?, ?, ?, ?, 1, 4, 'text');
+        """,
+        [(f"c{i}", chat_ids[owner[i]], ts, ts) for i in range(chunks)],
+    )
+    ids = conn.execute("SELECT id FROM chunks ORDER BY id;").fetchall()
+    conn.executemany(
+        "INSERT INTO vec_chunks(rowid, vector) VALUES (?, ?);",
+        [(ids[i][0], serialize_f32(vecs[i])) for i in range(chunks)],
+    )
+    conn.commit()
+    conn.close()
+    return chat_ids, owner, vecs
+
+
+def _exact_topk(vecs, owner, chat_idx: int, q: np.ndarray, k: int) -> set[str]:
+    idx = np.nonzero(owner == chat_idx)[0]
+    sub = vecs[idx]
+    sims = sub @ q / (np.linalg.norm(sub, axis=1) * np.linalg.norm(q) + 1e-12)
+    best = idx[np.argsort(-sims)[:k]]
+    return {f"c{i}" for i in best}
+
+
+def _run(retriever, conn, queries, k: int) -> tuple[list[float], list[list[str]]]:
+    latencies: list[float] = []
+    outputs: list[list[str]] = []
+    for qtext, chat_id in queries:
+        start = time.perf_counter()
+        out = retriever._vector_search(conn, qtext, chat_id, limit=k)  # noqa: SLF001
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        outputs.append(out)
+    return latencies, outputs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="chat-scoped vector search benchmark")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = ArchivePaths.under(Path(tmp) / "mem")
+        t0 = time.perf_counter()
+        chat_ids, owner, vecs = _build_archive(paths, args.chats, args.chunks, args.dim, rng)
+        print(
+            f"archive: {args.chunks} chunks / {args.chats} chats ({time.perf_counter() - t0:.1f}s)"
+        )
+
+        q_vectors: dict[str, np.ndarray] = {}
+        queries: list[tuple[str, str]] = []
+        truth: list[set[str]] = []
+        for i in range(args.queries):
+            chat_idx = int(rng.integers(0, args.chats))
+            q = rng.standard_normal(args.dim).astype("float32")
+            q_vectors[f"q{i}"] = q
+            queries.append((f"q{i}", chat_ids[chat_idx]))
+            truth.append(_exact_topk(vecs, owner, chat_idx, q, args.k))
+
+        os.environ["KRAB_RAG_PHASE2_ENABLED"] = "1"
+        retriever = HybridRetriever(archive_paths=paths, model_name=None)
+        retriever._model = _LookupModel(q_vectors)  # noqa: SLF001
+        retriever._model_name = "bench"  # noqa: SLF001
+        conn = retriever._ensure_connection()  # noqa: SLF001
+
+        os.environ["KRAB_RAG_CHAT_PARTITION_ENABLED"] = "0"
+        legacy_lat, legacy_out = _run(retriever, conn, queries, args.k)
+
+        t0 = time.perf_counter()
+        copied = backfill_chat_partitions(conn)
+        print(f"backfill: {copied} vectors ({time.perf_counter() - t0:.1f}s)")
+        os.environ["KRAB_RAG_CHAT_PARTITION_ENABLED"] = "1"
+        part_lat, part_out = _run(retriever, conn, queries, args.k)
+        retriever.close()
+
+    print(f"{'mode':>10} {'recall@k':>9} {'zero-hit':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode, lat, outs in (("legacy", legacy_lat, legacy_out), ("partition", part_lat, part_out)):
+        recalls = [len(set(o) & t) / max(1, min(args.k, len(t))) for o, t in zip(outs, truth)]
+        zero = sum(1 for o, t in zip(outs, truth) if not o and t) / len(outs)
+        print(
+            f"{mode:>10} {statistics.mean(recalls):>9.3f} {zero:>9.1%} "
+            f"{percentile(lat, 50):>9.2f} {percentile(lat, 95):>9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
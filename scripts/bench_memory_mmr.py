@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NumPy MMR vs pure-Python MMR (memory retrieval hot path).
+
+Измеряет:
+  1. Latency: p50, p95, mean (ms) на один rerank, pure vs numpy.
+  2. Parity: доля прогонов, где порядок top-K совпал побайтно.
+
+Кандидаты генерируются синтетически и проходят float32 round-trip через
+serialize_f32 → decode_f32_blob — ровно как в `_materialize_results`.
+
+Запуск:
+    venv/bin/python scripts/bench_memory_mmr.py [--dim 256] [--top-k 10] [--runs 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.memory_embedder import serialize_f32  # noqa: E402
+from src.core.memory_mmr import decode_f32_blob, mmr_rerank  # noqa: E402
+
+
+def percentile(data: list[float], p: float) -> float:
+    """Простой percentile без numpy."""
+    if not data:
+        return 0.0
+    sorted_data = sorted(data)
+    idx = (len(sorted_data) - 1) * p / 100.0
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_data) - 1)
+    frac = idx - lo
+    return sorted_data[lo] + frac * (sorted_data[hi] - sorted_data[lo])
+
+
+def _make_case(rng: random.Random, n: int, dim: int) -> tuple[list[float], list[bytes]]:
+    query = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    blobs = [serialize_f32([rng.gauss(0.0, 1.0) for _ in range(dim)]) for _ in range(n)]
+    return query, blobs
+
+
+def _run(mode: str, query, blobs: list[bytes], ids: list[str], top_k: int) -> tuple[float, list]:
+    os.environ["KRAB_RAG_MMR_NUMPY"] = "1" if mode == "numpy" else "0"
+    start = time.perf_counter()
+    # Декодирование входит в замер: это часть стоимости в _materialize_results.
+    vecs = [decode_f32_blob(b) for b in blobs]
+    out = mmr_rerank(query, vecs, ids, top_k=top_k, lambda_=0.7)
+    return (time.perf_counter() - start) * 1000.0, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # _materialize_results отдаёт в MMR top_k*2 кандидатов; *4 — запас для fused.
+    sizes = [args.top_k * 2, args.top_k * 4, args.top_k * 8]
+
+    print(f"MMR benchmark: dim={args.dim} top_k={args.top_k} runs={args.runs}")
+    print(f"{'n':>5} {'mode':>7} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    for n in sizes:
+        ids = [f"c{i}" for i in range(n)]
+        lat: dict[str, list[float]] = {"pure": [], "numpy": []}
+        matches = 0
+        for _ in range(args.runs):
+            query, blobs = _make_case(rng, n, args.dim)
+            t_pure, out_pure = _run("pure", query, blobs, ids, args.top_k)
+            t_np, out_np = _run("numpy", query, blobs, ids, args.top_k)
+            lat["pure"].append(t_pure)
+            lat["numpy"].append(t_np)
+            matches += int(out_pure == out_np)
+        for mode in ("pure", "numpy"):
+            data = lat[mode]
+            print(
+                f"{n:>5} {mode:>7} {percentile(data, 50):>9.3f} "
+                f"{percentile(data, 95):>9.3f} {statistics.mean(data):>9.3f}"
+            )
+        speedup = statistics.mean(lat["pure"]) / max(statistics.mean(lat["numpy"]), 1e-9)
+        print(f"{n:>5} speedup x{speedup:.1f}, parity {matches}/{args.runs}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: промежуточные edit'ы N параллельных streaming-ответов.
+
+Синтетика: N стримов (по умолчанию 20) выдают chunk'и по ~8 символов раз
+в 50мс; каждый edit и каждый «настоящий» send проходят через
+`GlobalTelegramRateLimiter` (20 req/s) и fake client (латентность вызова).
+Параллельно фоновый отправитель шлёт обычное сообщение раз в 250мс —
+меряем, сколько оно ждёт слот в лимитере.
+
+Сравнивает:
+
+  * legacy    — edit каждого стрима по фиксированному интервалу 0.75с;
+  * coalescer — `StreamEditCoalescer` (бюджет делится между стримами,
+                tiny-diff edit'ы пропускаются).
+
+Запуск:
+    venv/bin/python scripts/bench_stream_edits.py [--streams 20] [--duration 6]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.stream_edit_coalescer import StreamEditCoalescer  # noqa: E402
+from src.core.telegram_rate_limiter import GlobalTelegramRateLimiter  # noqa: E402
+
+_LEGACY_INTERVAL_SEC = 0.75
+
+
+def percentile(data: list[float], p: float) -> float:
+    """Простой percentile без numpy."""
+    if not data:
+        return 0.0
+    sorted_data = sorted(data)
+    idx = (len(sorted_data) - 1) * p / 100.0
+    lo = int(idx)
+    hi = min(lo + 1, len(sorted_data) - 1)
+    frac = idx - lo
+    return sorted_data[lo] + frac * (sorted_data[hi] - sorted_data[lo])
+
+
+class FakeClient:
+    """Fake Telegram client: каждый вызов — слот лимитера + фиксированная латентность."""
+
+    def __init__(self, limiter: GlobalTelegramRateLimiter, latency_sec: float) -> None:
+        self._limiter = limiter
+        self._latency = latency_sec
+        self.edits = 0
+        self.sends = 0
+
+    async def edit(self, text: str) -> None:
+        await self._limiter.acquire(purpose="edit")
+        await asyncio.sleep(self._latency)
+        self.edits += 1
+
+    async def send(self, text: str) -> None:
+        await self._limiter.acquire(purpose="send")
+        await asyncio.sleep(self._latency)
+        self.sends += 1
+
+
+async def _run(mode: str, streams: int, duration: float, latency: float) -> dict[str, float]:
+    limiter = GlobalTelegramRateLimiter(max_per_sec=20, window_sec=1.0)
+    client = FakeClient(limiter, latency)
+    coalescer = StreamEditCoalescer(rate_limiter=limiter)
+    send_wait: list[float] = []
+    final_lag: list[float] = []
+    deadline = time.monotonic() + duration
+
+    async def stream(idx: int) -> None:
+        stream_id = f"s{idx}"
+        coalescer.open_stream(stream_id, min_interval_sec=_LEGACY_INTERVAL_SEC)
+        text = ""
+        last_edit = 0.0
+        await asyncio.sleep(idx * 0.01)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            text += f" w{idx}x{len(text) % 97:02d}"
+            if mode == "legacy":
+                if time.monotonic() - last_edit > _LEGACY_INTERVAL_SEC:
+                    last_edit = time.monotonic()
+                    await client.edit(text)
+            elif coalescer.offer(stream_id, text):
+                coalescer.mark_edited(stream_id, text)
+                await client.edit(text)
+        coalescer.close_stream(stream_id)
+        # Финал — сразу, без coalescer'а.
+        t0 = time.monotonic()
+        await client.edit(text)
+        final_lag.append(time.monotonic() - t0)
+
+    async def sender() -> None:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+            t0 = time.monotonic()
+            await client.send("reply")
+            send_wait.append(time.monotonic() - t0 - latency)
+
+    await asyncio.gather(sender(), *(stream(i) for i in range(streams)))
+    stats = coalescer.stats()
+    return {
+        "edits": client.edits,
+        "dropped": stats["total_dropped"] if mode == "coalescer" else 0,
+        "limiter_waits": limiter.stats()["total_waited"],
+        "send_wait_p50_ms": percentile(send_wait, 50) * 1000,
+        "send_wait_p99_ms": percentile(send_wait, 99) * 1000,
+        "final_p99_ms": percentile(final_lag, 99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=6.0)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for mode in ("legacy", "coalescer"):
+        r = asyncio.run(_run(mode, args.streams, args.duration, args.latency_ms / 1000))
+        print(
+            f"{mode:>9}: edits={int(r['edits']):4d} dropped={int(r['dropped']):4d} "
+            f"limiter_waits={int(r['limiter_waits']):4d} "
+            f"send_wait p50={r['send_wait_p50_ms']:7.1f}ms p99={r['send_wait_p99_ms']:7.1f}ms "
+            f"final p99={r['final_p99_ms']:7.1f}ms"
+        )
+    print(f"streams={args.streams} duration={args.duration}s latency={args.latency_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
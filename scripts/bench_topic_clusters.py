@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: topic clustering (Feature G) на синтетических embedding'ах.
+
+Режимы:
+  * python      — прежний pure-Python `_kmeans_cosine` (только на малом n:
+                  10k × 256 × k=30 на списках идёт десятки минут);
+  * lloyd       — `_kmeans_cosine_np`, полный Lloyd блочными matmul;
+  * minibatch   — `_kmeans_cosine_np(batch_size=4096)` (авто в recluster
+                  для архивов от 50k chunks);
+  * incremental — `_assign_np` 1000 новых chunks к готовым центроидам.
+
+Данные — гауссовы облака на сфере (k истинных тем, dim=256 как у Model2Vec),
+качество — доля точек, чья истинная тема целиком попала в один кластер
+(purity).
+
+Запуск:
+    venv/bin/python scripts/bench_topic_clusters.py [--sizes 10000,100000,500000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import src.core.memory_topic_clusters as mtc  # noqa: E402
+
+
+def _synthetic(n: int, topics: int, dim: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    truth = rng.integers(0, topics, size=n)
+    points = centers[truth] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return mtc._normalize_rows(points), truth
+
+
+def _purity(labels: np.ndarray, truth: np.ndarray, k: int) -> float:
+    hits = 0
+    for cluster in range(k):
+        members = truth[labels == cluster]
+        if members.size:
+            hits += int(np.bincount(members).max())
+    return hits / max(1, len(truth))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Topic clustering benchmark")
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--clusters", type=int, default=30)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--python-n", type=int, default=2000, help="n для pure-Python baseline")
+    args = parser.parse_args()
+    k = args.clusters
+
+    print(f"k={k} dim={args.dim}")
+    print(f"{'n':>8} {'mode':>12} {'seconds':>9} {'purity':>7}")
+
+    matrix, truth = _synthetic(args.python_n, k, args.dim, seed=1)
+    started = time.perf_counter()
+    labels, _ = _python_kmeans(matrix, k)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.python_n:>8} {'python':>12} {elapsed:>9.2f} "
+        f"{_purity(np.asarray(labels), truth, k):>7.3f}"
+    )
+
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        matrix, truth = _synthetic(n, k, args.dim, seed=2)
+        modes = [("lloyd", None), ("minibatch", mtc._KMEANS_MINIBATCH_SIZE)]
+        centroids = None
+        for mode, batch_size in modes:
+            started = time.perf_counter()
+            labels, centroids = mtc._kmeans_cosine_np(matrix, k, batch_size=batch_size)
+            elapsed = time.perf_counter() - started
+            print(f"{n:>8} {mode:>12} {elapsed:>9.2f} {_purity(labels, truth, k):>7.3f}")
+        fresh, _ = _synthetic(1000, k, args.dim, seed=2)
+        started = time.perf_counter()
+        mtc._assign_np(fresh, centroids)
+        print(f"{n:>8} {'incremental':>12} {time.perf_counter() - started:>9.4f} {'-':>7}")
+    return 0
+
+
+def _python_kmeans(matrix: np.ndarray, k: int) -> tuple[list[int], list[list[float]]]:
+    """Прежний pure-Python путь: `_kmeans_cosine` без numpy-делегирования."""
+    saved = mtc.np
+    mtc.np = None
+    try:
+        return mtc._kmeans_cosine(matrix.tolist(), k)
+    finally:
+        mtc.np = saved
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load-benchmark: латентность TranslationCache.store — legacy vs write-behind.
+
+  * legacy       — прежнее поведение: полный JSON-снимок OrderedDict
+                   (до 5000 entries) + tempfile/os.replace на каждый store();
+  * write-behind — текущий TranslationCache: строка в буфер, journal и
+                   периодический snapshot пишет отдельный writer-thread.
+
+Гоняет N store() с уникальными фразами (по умолчанию 10k, т.е. кэш
+переполняется и работает LRU eviction), печатает p50/p99/max латентности
+и время до полного flush. Файлы — во временной директории, ~/.openclaw
+не трогается.
+
+Запуск:
+    venv/bin/python scripts/bench_translation_cache.py [--stores 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("KRAB_TRANSLATION_CACHE_ENABLED", "1")
+
+import src.core.translation_cache as tc  # noqa: E402
+
+
+class _LegacyTranslationCache(tc.TranslationCache):
+    """Воспроизводит прежний persist: полный snapshot на каждое событие."""
+
+    def _journal_locked(self, record):  # noqa: ANN001, ANN202
+        if self._storage_path is None or record.get("op") != "put":
+            return
+        payload = {"version": 1, "entries": dict(self._entries)}
+        self._write_snapshot(self._storage_path, payload)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _run(cache: tc.TranslationCache, stores: int) -> tuple[list[float], float]:
+    lat: list[float] = []
+    t0 = time.perf_counter()
+    for i in range(stores):
+        start = time.perf_counter()
+        cache.store(f"phrase number {i} to translate", "ru", f"фраза номер {i}")
+        lat.append((time.perf_counter() - start) * 1e6)
+    cache.flush(timeout=120.0)
+    return lat, (time.perf_counter() - t0) * 1000.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="TranslationCache store latency benchmark")
+    parser.add_argument("--stores", type=int, default=10000)
+    parser.add_argument("--max-entries", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"stores={args.stores} max_entries={args.max_entries}")
+    print(f"{'mode':>12} {'p50 us':>9} {'p99 us':>9} {'max us':>10} {'total ms':>10}")
+    results: dict[str, list[float]] = {}
+    for mode, cls in (("legacy", _LegacyTranslationCache), ("write-behind", tc.TranslationCache)):
+        with tempfile.TemporaryDirectory(prefix="krab_bench_tc_") as tmp:
+            cache = cls(
+                storage_path=Path(tmp) / "translation_cache.json",
+                max_entries=args.max_entries,
+            )
+            lat, total_ms = _run(cache, args.stores)
+            # Проверка: state восстанавливается из snapshot + journal.
+            restored = tc.TranslationCache(
+                storage_path=Path(tmp) / "translation_cache.json",
+                max_entries=args.max_entries,
+            )
+            assert restored.stats()["size"] == cache.stats()["size"]
+        results[mode] = lat
+        print(
+            f"{mode:>12} {percentile(lat, 50):>9.1f} {percentile(lat, 99):>9.1f} "
+            f"{max(lat):>10.1f} {total_ms:>10.1f}"
+        )
+    ratio = percentile(results["legacy"], 99) / max(percentile(results["write-behind"], 99), 1e-9)
+    print(f"p99 speedup x{ratio:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark: квантизованная первая стадия KNN (vec_chunks_q) vs float32 vec_chunks.
+
+Для каждого режима (float32 / int8 / binary) на одном и том же синтетическом
+архиве (гауссовы темы на сфере, dim=256 как у Model2Vec) печатает:
+
+  * index MB   — размер таблицы, которую сканирует первая стадия KNN
+                 (прирост файла БД после её заполнения);
+  * p50/p99 ms — латентность `HybridRetriever` глобального vector search
+                 (float32 KNN или квантизованный KNN + float32 rescoring);
+  * recall@10  — пересечение top-10 с точным float32 KNN.
+
+Использует production-код: `create_vec_table`, `backfill_quantized_vectors`,
+`HybridRetriever._vector_search`-пути. Нужен Python, чей sqlite3 умеет
+`enable_load_extension` (pyenv-сборки без него не подойдут).
+
+Запуск:
+    venv/bin/python scripts/bench_vec_quantization.py [--chunks 100000] [--queries 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.memory_archive import ArchivePaths  # noqa: E402
+from src.core.memory_embedder import (  # noqa: E402
+    backfill_quantized_vectors,
+    create_vec_table,
+    drop_quantized_vectors,
+)
+from src.core.memory_retrieval import HybridRetriever  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, topics: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    points = centers[rng.integers(0, topics, size=n)]
+    points = points + 0.8 * rng.normal(size=(n, dim)).astype(np.float32)
+    return points.astype(np.float32)
+
+
+def _build(db: Path, vectors: np.ndarray) -> sqlite3.Connection:
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE chunks(id INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL);")
+    conn.execute("CREATE TABLE vec_chunks_meta(key TEXT PRIMARY KEY, value TEXT NOT NULL);")
+    create_vec_table(conn, dim=vectors.shape[1])
+    conn.executemany(
+        "INSERT INTO chunks(id, chunk_id) VALUES (?, ?);",
+        ((i + 1, f"c{i + 1}") for i in range(len(vectors))),
+    )
+    conn.executemany(
+        "INSERT INTO vec_chunks(rowid, vector) VALUES (?, ?);",
+        ((i + 1, vec.tobytes()) for i, vec in enumerate(vectors)),
+    )
+    conn.commit()
+    return conn
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="vec_chunks quantization benchmark")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--rescore-factor", type=int, default=8)
+    args = parser.parse_args()
+    os.environ["KRAB_RAG_PHASE2_ENABLED"] = "1"
+    os.environ["KRAB_VEC_RESCORE_FACTOR"] = str(args.rescore_factor)
+
+    vectors = _synthetic(args.chunks, args.dim, topics=64, seed=1)
+    queries = _synthetic(args.queries, args.dim, topics=64, seed=1)[: args.queries]
+    queries = queries + 0.1 * np.random.default_rng(2).normal(size=queries.shape)
+    queries = queries.astype(np.float32)
+
+    with tempfile.TemporaryDirectory(prefix="krab_bench_vecq_") as tmp:
+        db = Path(tmp) / "archive.db"
+        conn = _build(db, vectors)
+        float_bytes = db.stat().st_size
+        retriever = HybridRetriever(archive_paths=ArchivePaths.under(Path(tmp)), model_name=None)
+
+        def _run(mode: str) -> tuple[list[list[str]], list[float]]:
+            retriever._vec_quantization = mode
+            results: list[list[str]] = []
+            lat: list[float] = []
+            for q in queries:
+                blob = q.tobytes()
+                started = time.perf_counter()
+                if mode == "none":
+                    rows = conn.execute(
+                        "SELECT c.chunk_id FROM vec_chunks AS v JOIN chunks AS c "
+                        "ON c.id = v.rowid WHERE v.vector MATCH ? AND k = ? ORDER BY v.distance;",
+                        (blob, 10),
+                    ).fetchall()
+                    ids = [r[0] for r in rows]
+                else:
+                    ids = retriever._quantized_vector_search(conn, blob, 10)
+                lat.append((time.perf_counter() - started) * 1000.0)
+                results.append(ids)
+            return results, lat
+
+        print(
+            f"chunks={args.chunks} dim={args.dim} queries={args.queries} "
+            f"rescore_factor={args.rescore_factor}"
+        )
+        print(f"{'mode':>8} {'index MB':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall@10':>10}")
+        baseline, lat = _run("none")
+        print(
+            f"{'float32':>8} {float_bytes / 1e6:>9.1f} {_percentile(lat, 50):>8.2f} "
+            f"{_percentile(lat, 99):>8.2f} {1.0:>10.3f}"
+        )
+        for mode in ("int8", "binary"):
+            # Освободить страницы прошлого режима, чтобы прирост файла = размер таблицы.
+            drop_quantized_vectors(conn)
+            conn.execute("VACUUM;")
+            before = db.stat().st_size
+            backfill_quantized_vectors(conn, mode, dim=args.dim)
+            index_bytes = db.stat().st_size - before
+            results, lat = _run(mode)
+            recall = float(
+                np.mean([len(set(a) & set(b)) / 10.0 for a, b in zip(results, baseline)])
+            )
+            print(
+                f"{mode:>8} {index_bytes / 1e6:>9.1f} {_percentile(lat, 50):>8.2f} "
+                f"{_percentile(lat, 99):>8.2f} {recall:>10.3f}"
+            )
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -77,6 +77,7 @@ if str(_PROJECT_ROOT) not in sys.path:
 
 from structlog import get_logger  # noqa: E402
 
+from src.core.memory_activity_rollup import backfill_activity_rollup  # noqa: E402
 from src.core.memory_archive import (  # noqa: E402
     ArchivePaths,
     create_schema,
@@ -776,6 +777,10 @@ def run_bootstrap(
                 dry_run=dry_run,
                 stats=stats,
             )
+        # Activity rollup (heatmap/stats) — полный пересчёт после импорта.
+        if conn is not None:
+            rollup_rows = backfill_activity_rollup(conn)
+            log.info("activity_rollup_backfilled", rows=rollup_rows)
     finally:
         # Применяем permissions только когда писали на диск.
         if (
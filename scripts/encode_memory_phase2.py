@@ -28,11 +28,13 @@ if str(_PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(_PROJECT_ROOT))
 
 from src.core.memory_embedder import (  # noqa: E402
+    CHAT_VEC_TABLE,
     DEFAULT_BATCH_SIZE,
     DEFAULT_DIM,
     MemoryEmbedder,
     create_vec_table,
-    serialize_f32,
+    insert_chunk_vectors,
+    stored_quantization,
 )
 from src.core.memory_embeddings import get_embedding_model  # noqa: E402
 
@@ -67,15 +69,24 @@ def _encode_limited(limit: int, batch_size: int) -> tuple[int, float]:
     """
     Ручной encode с ограничением limit — для throughput-измерений.
 
+    Пишет те же таблицы, что MemoryEmbedder: vec_chunks, vec_chunks_chat и
+    (если квантизация уже покрывает vec_chunks) vec_chunks_q.
     Возвращает (processed, elapsed_seconds).
     """
     conn = sqlite3.connect(DB_PATH)
     _load_vec_extension(conn)
     create_vec_table(conn, dim=DEFAULT_DIM)
+    chat_partition = (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ? LIMIT 1", (CHAT_VEC_TABLE,)
+        ).fetchone()
+        is not None
+    )
+    quant_mode = stored_quantization(conn)
 
     rows = conn.execute(
         """
-        SELECT c.id, c.chunk_id, c.text_redacted
+        SELECT c.id, c.chunk_id, c.text_redacted, c.chat_id
         FROM chunks AS c
         LEFT JOIN vec_chunks AS v ON v.rowid = c.id
         WHERE v.rowid IS NULL
@@ -99,8 +110,9 @@ def _encode_limited(limit: int, batch_size: int) -> tuple[int, float]:
         batch = rows[start : start + batch_size]
         texts = [r[2] or "" for r in batch]
         vecs = model.encode(texts)
-        payload = [(batch[i][0], serialize_f32(vecs[i])) for i in range(len(batch))]
-        conn.executemany("INSERT INTO vec_chunks(rowid, vector) VALUES (?, ?)", payload)
+        insert_chunk_vectors(
+            conn, batch, vecs, chat_partition=chat_partition, quant_mode=quant_mode
+        )
         conn.commit()
         processed += len(batch)
         elapsed = time.perf_counter() - t0
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Offline-оценка embedding-классификатора Smart Routing Stage 4.
+
+Берёт залогированные вердикты LLM (``trigger_decisions.jsonl``), обучает
+логистическую регрессию на старых записях и проверяет на свежих
+(хронологический holdout). Печатает:
+  1. Agreement с LLM: на всём holdout, на уверенной части, hybrid
+     (уверенные → классификатор, остальные → LLM).
+  2. Coverage: доля borderline-сообщений, решённых без LLM-вызова.
+  3. Latency: p50/p99 (ms) классификатора (encode + score) vs LLM из лога.
+
+Запуск:
+    venv/bin/python scripts/eval_trigger_classifier.py [--holdout 0.2] \\
+        [--confidence 0.85] [--log PATH] [--json] [--save]
+
+``--save`` — переобучить и сохранить модель (те же гейты, что у periodic job).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Корень проекта в sys.path
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.core.trigger_embedding_classifier import (  # noqa: E402
+    DECISIONS_LOG,
+    DEFAULT_CONFIDENCE,
+    HOLDOUT_FRACTION,
+    TriggerEmbeddingClassifier,
+    evaluate,
+    retriever_encoder,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--log", type=Path, default=DECISIONS_LOG)
+    parser.add_argument("--holdout", type=float, default=HOLDOUT_FRACTION)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--json", action="store_true", help="вывести отчёт JSON")
+    parser.add_argument("--save", action="store_true", help="переобучить и сохранить модель")
+    args = parser.parse_args()
+
+    encoder = retriever_encoder(load=True)
+    classifier = TriggerEmbeddingClassifier(
+        encoder=encoder, log_path=args.log, confidence=args.confidence
+    )
+    # Как в retrain(): без uncertain-записей, отобранных активной моделью.
+    records = classifier.read_decisions(unbiased_only=True)
+    report = evaluate(records, encoder, holdout_fraction=args.holdout, confidence=args.confidence)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"records:            {len(records)} (train {report.train_samples}, "
+            f"holdout {report.holdout_samples})"
+        )
+        if report.extra.get("reason"):
+            print(f"skipped:            {report.extra['reason']}")
+        print(f"agreement (all):    {report.agreement_all:.1%}")
+        print(f"coverage @{args.confidence:.2f}:    {report.coverage:.1%}")
+        print(f"agreement (conf.):  {report.agreement_confident:.1%}")
+        print(f"agreement (hybrid): {report.agreement_hybrid:.1%}")
+        print(
+            f"classifier p50/p99: {report.classifier_p50_ms:.3f} / "
+            f"{report.classifier_p99_ms:.3f} ms"
+        )
+        print(f"llm p50/p99:        {report.llm_p50_ms:.1f} / {report.llm_p99_ms:.1f} ms")
+        print(f"gate passed:        {report.passed}")
+
+    if args.save:
+        saved = classifier.retrain()
+        print(f"retrain: active={saved.passed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
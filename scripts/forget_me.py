@@ -15,6 +15,10 @@
   * ``response_feedback`` (опционально, ``--also-feedback``) — фидбэк
                                       по ответам Краба в этом чате/у этого юзера
 
+Вне archive.db: ``trigger_decisions.jsonl`` (+ закрытые сегменты) — лог
+вердиктов Smart Routing с текстами сообщений. Для ``--user-id`` удаляются
+и записи без ``sender_id`` (до его появления в логе — не атрибутируемы).
+
 Audit-log: append-only ``~/.openclaw/krab_runtime_state/forget_me_audit.log``.
 
 Примеры:
@@ -28,8 +32,11 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import re
 import sqlite3
 import sys
+import tempfile
 from collections.abc import Iterable
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -42,6 +49,7 @@ from typing import Any
 _DEFAULT_RUNTIME_DIR = Path.home() / ".openclaw" / "krab_runtime_state"
 _DEFAULT_DB_PATH = _DEFAULT_RUNTIME_DIR / "archive.db"
 _DEFAULT_AUDIT_LOG = _DEFAULT_RUNTIME_DIR / "forget_me_audit.log"
+_DEFAULT_DECISIONS_LOG = _DEFAULT_RUNTIME_DIR / "trigger_decisions.jsonl"
 
 
 # ---------------------------------------------------------------------------
@@ -77,6 +85,7 @@ class ForgetPlan:
     media_summary_count: int = 0
     vec_chunks_count: int = 0  # учитывается при --also-vec-chunks
     response_feedback_count: int = 0  # учитывается при --also-feedback
+    decision_log_count: int = 0  # записи trigger_decisions.jsonl
 
     def to_audit_dict(self, *, applied: bool, dry_run: bool) -> dict[str, Any]:
         return {
@@ -91,6 +100,7 @@ class ForgetPlan:
             "media_summary_count": self.media_summary_count,
             "vec_chunks_count": self.vec_chunks_count,
             "response_feedback_count": self.response_feedback_count,
+            "decision_log_count": self.decision_log_count,
         }
 
 
@@ -211,6 +221,70 @@ def _count_response_feedback(
     return 0
 
 
+def _decision_log_segments(log_path: Path) -> list[Path]:
+    """Сегменты EventLog: закрытые ``<stem>.000001.jsonl`` ... и активный."""
+    pattern = re.compile(rf"^{re.escape(log_path.stem)}\.\d{{6,}}{re.escape(log_path.suffix)}$")
+    try:
+        names = sorted(n for n in os.listdir(log_path.parent) if pattern.match(n))
+    except OSError:
+        return []
+    paths = [log_path.with_name(n) for n in names]
+    if log_path.exists():
+        paths.append(log_path)
+    return paths
+
+
+def _decision_matches(raw: bytes, *, user_id: str | None, chat_id: str | None) -> bool:
+    try:
+        rec = json.loads(raw)
+    except ValueError:
+        return False
+    if not isinstance(rec, dict):
+        return False
+    if chat_id is not None:
+        return str(rec.get("chat_id")) == str(chat_id)
+    sender = rec.get("sender_id")
+    return sender is None or str(sender) == str(user_id)
+
+
+def count_decision_records(log_path: Path, *, user_id: str | None, chat_id: str | None) -> int:
+    """Сколько записей лога вердиктов относится к цели."""
+    total = 0
+    for path in _decision_log_segments(log_path):
+        try:
+            with path.open("rb") as fh:
+                total += sum(_decision_matches(raw, user_id=user_id, chat_id=chat_id) for raw in fh)
+        except OSError:
+            continue
+    return total
+
+
+def purge_decision_log(log_path: Path, *, user_id: str | None, chat_id: str | None) -> int:
+    """Переписывает сегменты без записей цели (tmp + os.replace); → число удалённых.
+
+    Sidecar-индекс удаляется: EventLog пересканирует сегменты при следующем чтении.
+    """
+    removed = 0
+    for path in _decision_log_segments(log_path):
+        try:
+            lines = path.read_bytes().splitlines(keepends=True)
+        except OSError:
+            continue
+        kept = [
+            raw for raw in lines if not _decision_matches(raw, user_id=user_id, chat_id=chat_id)
+        ]
+        if len(kept) == len(lines):
+            continue
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        with os.fdopen(fd, "wb") as fh:
+            fh.writelines(kept)
+        os.replace(tmp, path)
+        removed += len(lines) - len(kept)
+    if removed:
+        log_path.with_name(f"{log_path.stem}.index.json").unlink(missing_ok=True)
+    return removed
+
+
 def build_plan(
     conn: sqlite3.Connection,
     *,
@@ -218,6 +292,7 @@ def build_plan(
     chat_id: str | None,
     also_vec_chunks: bool,
     also_feedback: bool,
+    decisions_log: Path | None = None,
 ) -> ForgetPlan:
     """Собрать план удаления, ничего не меняя в БД."""
     if (user_id is None) == (chat_id is None):
@@ -226,6 +301,10 @@ def build_plan(
     target_kind = "user_id" if user_id is not None else "chat_id"
     target_value = user_id if user_id is not None else chat_id  # type: ignore[assignment]
     plan = ForgetPlan(target_kind=target_kind, target_value=str(target_value))
+    if decisions_log is not None:
+        plan.decision_log_count = count_decision_records(
+            decisions_log, user_id=user_id, chat_id=chat_id
+        )
 
     if not _table_exists(conn, "messages"):
         # БД пустая или ещё не инициализирована — план просто пустой.
@@ -284,13 +363,17 @@ def apply_plan(
     try:
         with conn:  # transaction
             # 1) vec_chunks по rowid (если есть таблица и флаг).
-            if also_vec_chunks and plan.chunk_rowids and _table_exists(conn, "vec_chunks"):
+            # vec_chunks_chat — per-chat партиции того же вектора,
+            # vec_chunks_q — его квантизованная копия (если квантизация включена).
+            for vec_table in ("vec_chunks", "vec_chunks_chat", "vec_chunks_q"):
+                if not (also_vec_chunks and plan.chunk_rowids and _table_exists(conn, vec_table)):
+                    continue
                 batch = 500
                 for i in range(0, len(plan.chunk_rowids), batch):
                     slc = plan.chunk_rowids[i : i + batch]
                     placeholders = ",".join("?" for _ in slc)
                     conn.execute(
-                        f"DELETE FROM vec_chunks WHERE rowid IN ({placeholders});",
+                        f"DELETE FROM {vec_table} WHERE rowid IN ({placeholders});",
                         slc,
                     )
 
@@ -327,6 +410,17 @@ def apply_plan(
             elif chat_id is not None:
                 conn.execute("DELETE FROM messages WHERE chat_id = ?;", (chat_id,))
 
+            # 4b) activity rollup (message_activity_hourly): чат — удаляем его
+            # строки; sender — точно не вычесть, сбрасываем флаг готовности
+            # (heatmap/stats вернутся к messages до следующего backfill'а).
+            if _table_exists(conn, "message_activity_hourly"):
+                if user_id is not None:
+                    conn.execute("DELETE FROM meta WHERE key = 'activity_rollup_ready';")
+                elif chat_id is not None:
+                    conn.execute(
+                        "DELETE FROM message_activity_hourly WHERE chat_id = ?;", (chat_id,)
+                    )
+
             # 5) message_media_summaries — нет FK на messages, чистим явно.
             if _table_exists(conn, "message_media_summaries"):
                 if user_id is not None:
@@ -388,6 +482,7 @@ def _format_report(plan: ForgetPlan, *, applied: bool) -> str:
         f"message_media_summaries:  {plan.media_summary_count}",
         f"vec_chunks:               {plan.vec_chunks_count}",
         f"response_feedback:        {plan.response_feedback_count}",
+        f"trigger_decisions.jsonl:  {plan.decision_log_count}",
     ]
     return "\n".join(lines)
 
@@ -411,6 +506,11 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default=str(_DEFAULT_AUDIT_LOG),
         help=f"Audit-log файл (по умолчанию: {_DEFAULT_AUDIT_LOG})",
     )
+    p.add_argument(
+        "--decisions-log",
+        default=str(_DEFAULT_DECISIONS_LOG),
+        help=f"Лог вердиктов Smart Routing (по умолчанию: {_DEFAULT_DECISIONS_LOG})",
+    )
     p.add_argument(
         "--apply",
         action="store_true",
@@ -448,6 +548,7 @@ def main(argv: list[str] | None = None) -> int:
             chat_id=args.chat_id,
             also_vec_chunks=args.also_vec_chunks,
             also_feedback=args.also_feedback,
+            decisions_log=Path(args.decisions_log),
         )
 
         print(_format_report(plan, applied=False))
@@ -469,6 +570,8 @@ def main(argv: list[str] | None = None) -> int:
             also_vec_chunks=args.also_vec_chunks,
             also_feedback=args.also_feedback,
         )
+        if plan.decision_log_count:
+            purge_decision_log(Path(args.decisions_log), user_id=args.user_id, chat_id=args.chat_id)
         append_audit(
             audit_log_path,
             plan.to_audit_dict(applied=True, dry_run=False),
@@ -237,19 +237,25 @@ def apply_prune(
         chat_msg_count = int(msg_count_row[0]) if msg_count_row else 0
 
         if chunk_ids:
-            # vec_chunks (vec0) cleanup. В тестах extension не загружен — swallow.
+            # vec_chunks (vec0) cleanup. В тестах extension не загружен — swallow;
+            # vec_chunks_q нет, пока квантизация выключена — тоже swallow.
             id_ph = ",".join("?" for _ in chunk_ids)
-            try:
-                conn.execute(
-                    f"DELETE FROM vec_chunks WHERE rowid IN ({id_ph})",
-                    chunk_ids,
-                )
-            except sqlite3.OperationalError:
-                pass
+            for vec_table in ("vec_chunks", "vec_chunks_chat", "vec_chunks_q"):
+                try:
+                    conn.execute(
+                        f"DELETE FROM {vec_table} WHERE rowid IN ({id_ph})",
+                        chunk_ids,
+                    )
+                except sqlite3.OperationalError:
+                    pass
 
         # Порядок важен: chunks/messages → chats (FK target).
         conn.execute("DELETE FROM chunks WHERE chat_id = ?", (chat_id,))
         conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+        try:
+            conn.execute("DELETE FROM message_activity_hourly WHERE chat_id = ?", (chat_id,))
+        except sqlite3.OperationalError:
+            pass  # БД без activity rollup'а
         conn.execute("DELETE FROM chats WHERE chat_id = ?", (chat_id,))
 
         total_deleted_msgs += chat_msg_count
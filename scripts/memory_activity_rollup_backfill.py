@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Backfill: activity rollup ``message_activity_hourly`` в ``archive.db``.
+
+Пересчитывает (chat_id, час) → число сообщений одним проходом по
+``messages`` и выставляет ``meta.activity_rollup_ready=1``. После этого
+``/api/memory/heatmap`` и memory stats читают rollup вместо ``GROUP BY`` по
+всем сообщениям, а ``MemoryIndexerWorker`` поддерживает его инкрементально.
+
+Идемпотентно: повторный запуск пересчитывает таблицу целиком (нужен после
+удалений, сбросивших флаг готовности, например ``forget_me.py --user``).
+
+Usage:
+    venv/bin/python scripts/memory_activity_rollup_backfill.py [--db PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from src.core.memory_activity_rollup import (  # noqa: E402
+    backfill_activity_rollup,
+    is_rollup_ready,
+)
+
+DB_PATH = Path("~/.openclaw/krab_memory/archive.db").expanduser()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill message_activity_hourly rollup")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"[ERR] DB not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA busy_timeout = 30000;")
+    try:
+        already = is_rollup_ready(conn)
+        t0 = time.perf_counter()
+        rows = backfill_activity_rollup(conn)
+        elapsed = time.perf_counter() - t0
+
+        messages = conn.execute(
+            "SELECT COALESCE(SUM(msg_count), 0) FROM message_activity_hourly"
+        ).fetchone()[0]
+        chats = conn.execute(
+            "SELECT COUNT(DISTINCT chat_id) FROM message_activity_hourly"
+        ).fetchone()[0]
+        print(f"[OK] message_activity_hourly ready (was_ready={already})")
+        print(f"     rollup.rows      = {rows} ({elapsed:.1f}s)")
+        print(f"     messages         = {messages}")
+        print(f"     chats            = {chats}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
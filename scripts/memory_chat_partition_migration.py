@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Миграция: per-chat партиции векторов (``vec_chunks_chat``) в ``archive.db``.
+
+Создаёт vec0-таблицу ``vec_chunks_chat`` с ``chat_id text partition key``
+(если её нет) и копирует в неё уже посчитанные векторы из ``vec_chunks`` —
+без повторного encode. После завершения в ``vec_chunks_meta`` выставляется
+``chat_partition_ready=1`` и ``HybridRetriever`` переключает chat-scoped
+поиск на точный KNN внутри партиции.
+
+Идемпотентно и резюмируемо: повторный запуск копирует только недостающие
+векторы (commit после каждого batch'а). Embedder сам делает то же самое
+при следующем ``embed_all_unindexed()``; скрипт нужен, чтобы провести
+миграцию заранее и увидеть итог.
+
+Usage:
+    venv/bin/python scripts/memory_chat_partition_migration.py [--db PATH] [--batch 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from src.core.memory_embedder import (  # noqa: E402
+    CHAT_VEC_TABLE,
+    DEFAULT_DIM,
+    backfill_chat_partitions,
+    chat_partition_ready,
+    create_vec_table,
+)
+
+DB_PATH = Path("~/.openclaw/krab_memory/archive.db").expanduser()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill vec_chunks_chat partitions")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"[ERR] DB not found: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA busy_timeout = 30000;")
+    try:
+        # create_vec_table грузит sqlite-vec и создаёт vec_chunks_chat.
+        create_vec_table(conn, dim=args.dim)
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;",
+            (CHAT_VEC_TABLE,),
+        ).fetchone():
+            print("[ERR] sqlite-vec без partition key (нужен >= 0.1.6)")
+            return 2
+
+        already = chat_partition_ready(conn)
+        t0 = time.perf_counter()
+        copied = backfill_chat_partitions(conn, batch_size=args.batch)
+        elapsed = time.perf_counter() - t0
+
+        vec_rows = conn.execute("SELECT COUNT(*) FROM vec_chunks").fetchone()[0]
+        part_rows = conn.execute(f"SELECT COUNT(*) FROM {CHAT_VEC_TABLE}").fetchone()[0]
+        chats = conn.execute("SELECT COUNT(DISTINCT chat_id) FROM chunks").fetchone()[0]
+        print(f"[OK] {CHAT_VEC_TABLE} ready (was_ready={already})")
+        print(f"     copied           = {copied} ({elapsed:.1f}s)")
+        print(f"     vec_chunks.rows  = {vec_rows}")
+        print(f"     partition.rows   = {part_rows}")
+        print(f"     chats            = {chats}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,13 @@ Feature G — CLI для batch reclustering chunks по semantic clusters.
 Usage:
     venv/bin/python scripts/memory_recluster.py --num-clusters 30
     venv/bin/python scripts/memory_recluster.py --num-clusters 30 --dry-run
+    venv/bin/python scripts/memory_recluster.py --incremental
 
-Читает embedding'и chunks из archive.db (vec_chunks) и перезаписывает
-chunk_clusters/cluster_meta. Не трогает основные таблицы.
+Читает embedding'и chunks из archive.db (vec_chunks) одной float32 матрицей
+и перезаписывает chunk_clusters/cluster_meta. Не трогает основные таблицы.
+
+--incremental: новые chunks приписываются к существующим центроидам; полный
+recluster — только если центроидов нет или incremental-хвост > 25%.
 
 В dry-run просто печатает statistics без записи.
 """
@@ -15,8 +19,8 @@ chunk_clusters/cluster_meta. Не трогает основные таблицы
 from __future__ import annotations
 
 import argparse
-import json
 import sys
+import time
 from pathlib import Path
 
 
@@ -24,75 +28,34 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parent.parent
 
 
-def _load_embeddings_from_archive(limit: int | None) -> dict[str, list[float]]:
-    """Читает embedding'и chunks из vec_chunks (если доступно).
+def _load_embedding_matrix(limit: int | None):
+    """(chunk_ids, float32 матрица) из vec_chunks; ([], None) если векторов нет.
 
     Реальная схема (sqlite-vec virtual table):
         CREATE VIRTUAL TABLE vec_chunks USING vec0(vector float[N] ...);
     → доступны только `rowid` (= chunks.id) и `vector` (BLOB float32-LE).
-    Стабильный текстовый chunk_id живёт в таблице `chunks` (INTEGER id alias rowid),
-    поэтому JOIN: `vec_chunks v JOIN chunks c ON c.id = v.rowid`.
-
-    Без sqlite-vec extension вернём {} — в этом случае рекластер не сработает,
-    но скрипт корректно отрапортует и выйдет. open_archive() уже грузит расширение
-    (session 32 fix, commit 4d03018).
+    Стабильный текстовый chunk_id живёт в таблице `chunks`, поэтому JOIN
+    (см. `load_embedding_matrix`). open_archive() уже грузит sqlite-vec
+    extension (session 32 fix, commit 4d03018).
     """
     from src.core.memory_archive import open_archive
+    from src.core.memory_topic_clusters import load_embedding_matrix
 
     conn = open_archive()
     try:
-        cur = conn.cursor()
+        cur = conn.execute("SELECT name FROM sqlite_master WHERE name='vec_chunks';")
+        if cur.fetchone() is None:
+            print("vec_chunks table missing — нет embedding'ов для кластеризации", file=sys.stderr)
+            return [], None
         try:
-            cur.execute("SELECT name FROM sqlite_master WHERE name='vec_chunks';")
-            if cur.fetchone() is None:
-                print(
-                    "vec_chunks table missing — нет embedding'ов для кластеризации", file=sys.stderr
-                )
-                return {}
-            # JOIN с chunks: rowid (vec) ↔ id (chunks) → stable chunk_id (TEXT).
-            # vec0 возвращает vector как float32-LE bytes; декодим в _decode_embedding_blob.
-            sql = "SELECT c.chunk_id, v.vector FROM vec_chunks v JOIN chunks c ON c.id = v.rowid"
-            if limit:
-                sql += f" LIMIT {int(limit)}"
-            rows = cur.execute(sql).fetchall()
+            return load_embedding_matrix(conn, limit=limit)
         except Exception as exc:  # noqa: BLE001
             print(f"vec_chunks read failed: {exc}", file=sys.stderr)
-            return {}
-
-        result: dict[str, list[float]] = {}
-        for chunk_id, blob in rows:
-            vec = _decode_embedding_blob(blob)
-            if vec is not None:
-                result[str(chunk_id)] = vec
-        return result
+            return [], None
     finally:
         conn.close()
 
 
-def _decode_embedding_blob(blob) -> list[float] | None:
-    """Пытается декодировать blob в list[float]. Поддерживает sqlite-vec float32-LE."""
-    if blob is None:
-        return None
-    if isinstance(blob, str):
-        try:
-            data = json.loads(blob)
-            return [float(x) for x in data] if isinstance(data, list) else None
-        except (json.JSONDecodeError, ValueError):
-            return None
-    if isinstance(blob, (bytes, memoryview)):
-        import struct
-
-        raw = bytes(blob)
-        if len(raw) % 4 != 0:
-            return None
-        n = len(raw) // 4
-        try:
-            return list(struct.unpack(f"<{n}f", raw))
-        except struct.error:
-            return None
-    return None
-
-
 def main(argv: list[str] | None = None) -> int:
     sys.path.insert(0, str(_project_root()))
 
@@ -104,33 +67,47 @@ def main(argv: list[str] | None = None) -> int:
         "--model-name", default=None, help="имя embedding-модели (для cluster_meta)"
     )
     parser.add_argument("--dry-run", action="store_true", help="не писать в БД, только статистика")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="приписать новые chunks к текущим центроидам (recluster только при дрейфе)",
+    )
     args = parser.parse_args(argv)
 
+    from src.core.memory_topic_clusters import (
+        TopicClusterIndex,
+        _kmeans_cosine_np,
+        _normalize_rows,
+    )
+
+    index = TopicClusterIndex()
+    if args.incremental and not args.dry_run and not index.needs_recluster():
+        assigned = index.assign_unclustered_from_archive(limit=args.limit)
+        print(f"Incremental: assigned {assigned} new chunks to existing centroids.")
+        return 0
+
     print(f"Reading embeddings from archive.db (limit={args.limit})…")
-    embeddings = _load_embeddings_from_archive(args.limit)
-    if not embeddings:
+    started = time.monotonic()
+    chunk_ids, matrix = _load_embedding_matrix(args.limit)
+    if not chunk_ids:
         print("Эмбеддингов не найдено — пропускаю.", file=sys.stderr)
         return 1
-    print(f"Loaded {len(embeddings)} embeddings.")
-
-    from src.core.memory_topic_clusters import TopicClusterIndex, _kmeans_cosine, _l2_normalize
+    print(f"Loaded {len(chunk_ids)}×{matrix.shape[1]} in {time.monotonic() - started:.2f}s.")
 
     if args.dry_run:
-        chunk_ids = list(embeddings.keys())
-        normalized = [_l2_normalize(embeddings[cid]) for cid in chunk_ids]
-        assignments, _centroids = _kmeans_cosine(
-            normalized, num_clusters=args.num_clusters, seed=args.seed
+        labels, _centroids = _kmeans_cosine_np(
+            _normalize_rows(matrix), args.num_clusters, seed=args.seed
         )
         sizes: dict[int, int] = {}
-        for cluster in assignments:
+        for cluster in labels.tolist():
             sizes[int(cluster)] = sizes.get(int(cluster), 0) + 1
-        print(f"[dry-run] clusters={len(sizes)} chunks={len(assignments)}")
+        print(f"[dry-run] clusters={len(sizes)} chunks={len(labels)}")
         print(f"[dry-run] sizes={dict(sorted(sizes.items()))}")
         return 0
 
-    index = TopicClusterIndex()
-    stats = index.recluster(
-        embeddings,
+    stats = index.recluster_matrix(
+        chunk_ids,
+        matrix,
         num_clusters=args.num_clusters,
         model_name=args.model_name,
         seed=args.seed,
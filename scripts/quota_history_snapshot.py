@@ -9,23 +9,20 @@ import urllib.error
 import urllib.request
 from pathlib import Path
 
+# Добавляем корень проекта в sys.path
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+
+from src.core.event_log import get_event_log  # noqa: E402
+
 # Файл JSONL с историей снимков квот
 LOG = Path.home() / ".openclaw/krab_runtime_state/quota_history.jsonl"
 
 # URL owner-panel endpoint (без probe — быстрый ответ)
 _URL = "http://127.0.0.1:8080/api/quota?probe=false"
 
-# Максимальный размер лога до ротации (10 МБ)
-_MAX_BYTES = 10 * 1024 * 1024
-
-
-def _rotate_if_needed(log: Path) -> None:
-    """Простая ротация: если файл >10 МБ — обрезаем старые строки, оставляем последние 5000."""
-    if not log.exists() or log.stat().st_size < _MAX_BYTES:
-        return
-    lines = log.read_text().splitlines()
-    keep = lines[-5000:]
-    log.write_text("\n".join(keep) + "\n")
+# Ротация сегментами по 1 МБ, суммарно не больше 10 МБ (старые сегменты удаляются)
+_LOG_OPTIONS = {"segment_max_bytes": 1024 * 1024, "max_total_bytes": 10 * 1024 * 1024}
 
 
 def main() -> int:
@@ -41,12 +38,7 @@ def main() -> int:
 
     snapshot = {"ts": time.time(), **data}
 
-    LOG.parent.mkdir(parents=True, exist_ok=True)
-    _rotate_if_needed(LOG)
-
-    with LOG.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
-
+    get_event_log(LOG, **_LOG_OPTIONS).append(snapshot)
     return 0
 
 
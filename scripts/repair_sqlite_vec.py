@@ -13,7 +13,8 @@
 Скрипт:
   1. Делает backup archive.db → archive.db.pre-repair-YYYYMMDD_HHMMSS
   2. Пересобирает messages_fts через FTS5 rebuild
-  3. DROP + CREATE vec_chunks, заново кодирует все chunks
+  3. DROP + CREATE vec_chunks, заново кодирует все chunks; per-chat партиции
+     и квантизованная копия (vec_chunks_q) пересобираются из нового vec_chunks
   4. Идемпотентен (можно повторить без двойного backup'а если backup свежий)
 
 Usage:
@@ -171,17 +172,27 @@ def repair_vec(conn: sqlite3.Connection, batch_size: int = 512) -> None:
     DROP + CREATE vec_chunks, затем re-encode всех chunks.
 
     Использует ту же логику что encode_memory_phase2.py --force.
+    vec_chunks_q и ключ ``quantization`` сбрасываются до re-encode (retriever
+    сразу уходит на float32) и квантизуются заново из нового vec_chunks.
     """
     from src.core.memory_embedder import (
         DEFAULT_DIM,
+        backfill_chat_partitions,
+        backfill_quantized_vectors,
         create_vec_table,
+        drop_quantized_vectors,
+        reset_chat_partitions,
         serialize_f32,
+        stored_quantization,
     )
     from src.core.memory_embeddings import get_embedding_model
 
+    quant_mode = stored_quantization(conn)
     print("  [VEC] DROP + CREATE vec_chunks...")
+    drop_quantized_vectors(conn)
     conn.execute("DROP TABLE IF EXISTS vec_chunks")
     conn.commit()
+    reset_chat_partitions(conn)
     create_vec_table(conn, dim=DEFAULT_DIM)
     print("  [VEC] таблица пересоздана")
 
@@ -207,6 +218,11 @@ def repair_vec(conn: sqlite3.Connection, batch_size: int = 512) -> None:
 
     total = time.perf_counter() - t0
     print(f"  [VEC] encode завершён: {processed} chunks за {total:.1f}s")
+    copied = backfill_chat_partitions(conn)
+    print(f"  [VEC] per-chat партиции: {copied} векторов")
+    if quant_mode != "none":
+        quantized = backfill_quantized_vectors(conn, quant_mode, dim=DEFAULT_DIM)
+        print(f"  [VEC] vec_chunks_q ({quant_mode}): {quantized} векторов")
 
 
 # ---------------------------------------------------------------------------
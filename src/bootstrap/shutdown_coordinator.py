@@ -311,6 +311,19 @@ def register_default_drains() -> None:
     except Exception as exc:  # noqa: BLE001
         logger.debug("register_default_drains_translation_cache_skip", error=str(exc))
 
+    # Cost analytics: write-behind rollups → sqlite.
+    try:
+        from src.core.cost_analytics import cost_analytics  # type: ignore[import-not-found]
+
+        if hasattr(cost_analytics, "flush"):
+            shutdown_coordinator.register(
+                "cost_analytics",
+                _wrap_maybe_sync(cost_analytics.flush),
+                timeout_sec=3.0,
+            )
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("register_default_drains_cost_analytics_skip", error=str(exc))
+
     # Wave 79: krab ear health probe.
     try:
         from src.core.krab_ear_health_probe import (  # type: ignore[import-not-found]
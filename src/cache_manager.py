@@ -3,7 +3,7 @@
 Кэш с TTL (Фаза 6 — Производительность).
 
 Бэкенд вынесен в методы _backend_* для последующей замены на Redis
-без изменения публичного API (get/set/clear_expired).
+без изменения публичного API (get/set/clear_expired, async aget/aset/adelete).
 
 Почему хранилище в ~/.openclaw/krab_runtime_state/:
 - файлы в корне проекта принадлежат тому пользователю, кто создал репо;
@@ -11,10 +11,17 @@
 - ~/.openclaw/krab_runtime_state/ — user-specific runtime каталог, всегда rw для текущего юзера.
 """
 
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import json
 import sqlite3
+import threading
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from src.core.exceptions import CacheError
 from src.core.logger import get_logger
@@ -54,61 +61,127 @@ def _resolve_cache_path(db_name: str) -> str:
     return str(_CACHE_DIR_FALLBACK / db_name)
 
 
+def _open_wal_connection(db_path: str) -> sqlite3.Connection:
+    """Long-lived autocommit соединение в WAL-режиме (общий профиль для кэшей)."""
+    conn = sqlite3.connect(
+        db_path,
+        check_same_thread=False,
+        isolation_level=None,  # autocommit: без отдельного commit() на write
+        cached_statements=64,
+    )
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA busy_timeout = 5000;")
+    return conn
+
+
 class CacheManager:
     """
     Кэш с TTL. Текущая реализация — SQLite; логика чтения/записи в _backend_*
     для лёгкой замены на Redis.
+
+    Бэкенд держит одно долгоживущее соединение (WAL, synchronous=NORMAL,
+    autocommit) вместо `sqlite3.connect()` на каждую операцию: statement
+    cache sqlite3 переиспользует подготовленные запросы, а доступ из разных
+    потоков сериализуется `_lock`. Просроченные записи удаляются lazy на
+    get() и пачками (`_SWEEP_BATCH`) не чаще раза в `_SWEEP_INTERVAL_SEC`
+    на set().
+
+    Из asyncio-кода используйте `aget`/`aset`/`adelete` — они уходят в
+    выделенный single-thread executor и не блокируют event loop на диске.
     """
 
+    # Период фоновых sweep'ов просроченных записей и размер одной пачки.
+    _SWEEP_INTERVAL_SEC = 300.0
+    _SWEEP_BATCH = 500
+
     def __init__(self, db_name: str = "cache.db"):
         self.db_path = _resolve_cache_path(db_name)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._last_sweep_at = 0.0
         self._init_db()
         self.clear_expired()
 
+    def _connection(self) -> sqlite3.Connection:
+        """Ленивое long-lived соединение. Вызывать под `_lock`."""
+        if self._conn is None:
+            self._conn = _open_wal_connection(self.db_path)
+        return self._conn
+
     def _init_db(self) -> None:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
+            with self._lock:
+                self._connection().execute("""
                     CREATE TABLE IF NOT EXISTS cache (
                         key TEXT PRIMARY KEY,
                         value TEXT,
                         expires_at REAL
                     )
                 """)
-                conn.commit()
         except sqlite3.Error as e:
             logger.error("cache_init_failed", path=self.db_path, error=str(e))
             raise CacheError(f"Cache init failed: {e}", retryable=True) from e
 
+    def close(self) -> None:
+        """Закрывает соединение и executor. Следующая операция откроет заново."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
     # --- Backend abstraction (подмена на Redis позже) ---
 
     def _backend_get(self, key: str) -> Optional[tuple[str, float]]:
         """Возвращает (value, expires_at) или None. Не логирует промахи."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,))
-            row = cursor.fetchone()
-            return (row[0], row[1]) if row else None
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,))
+                .fetchone()
+            )
+        return (row[0], row[1]) if row else None
 
     def _backend_set(self, key: str, value: str, expires_at: float) -> None:
         """Сохраняет запись с временем истечения."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+        with self._lock:
+            self._connection().execute(
                 "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
                 (key, value, expires_at),
             )
-            conn.commit()
 
     def _backend_delete(self, key: str) -> None:
         """Удаляет одну запись."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
-            conn.commit()
+        with self._lock:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
 
     def _backend_clear_expired(self) -> None:
-        """Удаляет все просроченные записи."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
-            conn.commit()
+        """Удаляет все просроченные записи пачками по `_SWEEP_BATCH`."""
+        now = time.time()
+        while True:
+            # Лок берём на одну пачку, чтобы get/set не ждали весь sweep.
+            with self._lock:
+                cur = self._connection().execute(
+                    "DELETE FROM cache WHERE rowid IN "
+                    "(SELECT rowid FROM cache WHERE expires_at < ? LIMIT ?)",
+                    (now, self._SWEEP_BATCH),
+                )
+            if cur.rowcount < self._SWEEP_BATCH:
+                break
+        self._last_sweep_at = time.monotonic()
+
+    def _maybe_sweep(self) -> None:
+        """Периодический sweep просроченных записей (не чаще `_SWEEP_INTERVAL_SEC`)."""
+        if time.monotonic() - self._last_sweep_at < self._SWEEP_INTERVAL_SEC:
+            return
+        self.clear_expired()
 
     # --- Public API ---
 
@@ -139,6 +212,7 @@ class CacheManager:
         except sqlite3.Error as e:
             logger.error("cache_set_error", key=key, error=str(e))
             raise CacheError(f"Cache set failed: {e}", retryable=True) from e
+        self._maybe_sweep()
 
     def clear_expired(self) -> None:
         """Удаляет все просроченные записи. Вызывается при старте и при необходимости."""
@@ -158,23 +232,358 @@ class CacheManager:
     def clear_all(self) -> int:
         """Очищает все записи из кэша. Возвращает количество удалённых записей."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("SELECT COUNT(*) FROM cache")
-                count = cursor.fetchone()[0]
+            with self._lock:
+                conn = self._connection()
+                count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
                 conn.execute("DELETE FROM cache")
-                conn.commit()
             logger.info("cache_cleared_all", count=count, db=self.db_path)
             return count
         except sqlite3.Error as e:
             logger.warning("cache_clear_all_error", error=str(e))
             return 0
 
+    # --- Async facade ---
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        # Один worker = один writer-thread: операции идут в порядке вызова.
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="krab_cache",
+            )
+        return self._executor
+
+    async def _offload(self, fn, *args):  # noqa: ANN001, ANN202
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args))
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async-вариант get(): disk I/O в выделенном executor'е."""
+        return await self._offload(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: int = DEFAULT_TTL_SECONDS) -> None:
+        """Async-вариант set(). CacheError пробрасывается как и в sync-версии."""
+        await self._offload(self.set, key, value, ttl)
+
+    async def adelete(self, key: str) -> None:
+        """Async-вариант delete()."""
+        await self._offload(self.delete, key)
+
 
 # TTL для истории чатов (24 часа) — переживает рестарт бота
 HISTORY_CACHE_TTL = 86400
 
+
+def _message_digest(raw: str) -> bytes:
+    """Отпечаток сериализованного сообщения — им сверяется сохранённое окно."""
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+@dataclass
+class _TrackedHistory:
+    """In-memory зеркало живого окна чата: seq и отпечатки сохранённых сообщений."""
+
+    next_seq: int = 0
+    live: list[tuple[int, bytes]] = field(default_factory=list)
+    system_json: Optional[str] = None
+
+
+class ChatHistoryLog:
+    """
+    Append-only лог истории чатов: одна строка на сообщение + watermark окна.
+
+    Вместо перезаписи всей истории (`json.dumps(self._sessions[chat_id])`)
+    на каждый ход `persist()` дописывает только новые сообщения. Обрезка
+    sliding window (`OpenClawClient._apply_sliding_window`) сдвигает
+    watermark `live_from` и удаляет строки ниже него диапазоном по PK.
+    System prompt (индекс 0) хранится отдельно в `chat_history_head`:
+    его правят in-place (nonce), и в лог он не попадает.
+
+    Новое сообщение определяется по содержимому: лог помнит отпечатки
+    (blake2b от JSON) последнего сохранённого окна, поэтому in-place правка
+    уже сохранённого dict'а тоже замечается. Если живое окно больше не
+    является «хвост старого + новые в конце» (санитизация, компакция,
+    правка в середине), выполняется полная перезапись окна — seq при этом
+    продолжают расти монотонно.
+    """
+
+    _SWEEP_INTERVAL_SEC = 300.0
+
+    def __init__(self, db_name: str = "history_log.db", ttl: int = HISTORY_CACHE_TTL):
+        self.db_path = _resolve_cache_path(db_name)
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tracked: dict[str, _TrackedHistory] = {}
+        self._last_sweep_at = 0.0
+        self._init_db()
+        self.clear_expired()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Ленивое long-lived соединение. Вызывать под `_lock`."""
+        if self._conn is None:
+            self._conn = _open_wal_connection(self.db_path)
+        return self._conn
+
+    def _init_db(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chat_history_log (
+                        chat_id TEXT NOT NULL,
+                        seq INTEGER NOT NULL,
+                        message TEXT NOT NULL,
+                        PRIMARY KEY (chat_id, seq)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chat_history_head (
+                        chat_id TEXT PRIMARY KEY,
+                        live_from INTEGER NOT NULL,
+                        next_seq INTEGER NOT NULL,
+                        system TEXT,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+        except sqlite3.Error as e:
+            logger.error("history_log_init_failed", path=self.db_path, error=str(e))
+            raise CacheError(f"History log init failed: {e}", retryable=True) from e
+
+    def close(self) -> None:
+        """Закрывает соединение; tracking сбрасывается (следующий persist — rewrite)."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+            self._tracked.clear()
+
+    @staticmethod
+    def _split_system(
+        messages: list[dict[str, Any]],
+    ) -> tuple[Optional[dict[str, Any]], list[dict[str, Any]]]:
+        if messages and isinstance(messages[0], dict) and messages[0].get("role") == "system":
+            return messages[0], messages[1:]
+        return None, list(messages)
+
+    @staticmethod
+    def _plan_append(tracked: _TrackedHistory, digests: list[bytes]) -> Optional[int]:
+        """
+        Возвращает число сохранённых старых сообщений, которые остаются
+        префиксом окна (остальное — новые), или None, если окно изменилось
+        не только обрезкой головы и append'ом.
+        """
+        live = [digest for _, digest in tracked.live]
+        if not digests:
+            return 0
+        starts = [idx for idx, digest in enumerate(live) if digest == digests[0]]
+        if not starts:
+            return 0
+        # Одинаковые сообщения дают несколько кандидатов: берём самый длинный
+        # сохранённый хвост, совпадающий с началом окна.
+        for start in starts:
+            kept = len(live) - start
+            if live[start:] == digests[:kept]:
+                return kept
+        return None
+
+    def persist(self, chat_id: str, messages: list[dict[str, Any]]) -> int:
+        """
+        Синхронизирует лог с живым окном `messages`.
+
+        Возвращает число записанных строк сообщений (0 — изменений нет).
+        При ошибке SQLite бросает CacheError, как и `CacheManager.set`.
+        """
+        key = str(chat_id)
+        system, body = self._split_system(messages)
+        system_json = json.dumps(system, ensure_ascii=False) if system is not None else None
+        body_json = [json.dumps(msg, ensure_ascii=False) for msg in body]
+        digests = [_message_digest(raw) for raw in body_json]
+        expires_at = time.time() + self.ttl
+        try:
+            with self._lock:
+                conn = self._connection()
+                tracked = self._tracked.get(key)
+                plan = self._plan_append(tracked, digests) if tracked is not None else None
+                if tracked is None:
+                    row = conn.execute(
+                        "SELECT next_seq FROM chat_history_head WHERE chat_id = ?", (key,)
+                    ).fetchone()
+                    tracked = _TrackedHistory(next_seq=int(row[0]) if row else 0)
+                conn.execute("BEGIN")
+                try:
+                    if plan is None:
+                        # Полная перезапись окна: старые строки уходят целиком.
+                        conn.execute("DELETE FROM chat_history_log WHERE chat_id = ?", (key,))
+                        kept_live: list[tuple[int, bytes]] = []
+                        kept = 0
+                    else:
+                        kept = plan
+                        kept_live = tracked.live[len(tracked.live) - kept :]
+                    live_from = kept_live[0][0] if kept_live else tracked.next_seq
+                    if plan is not None and tracked.live and tracked.live[0][0] < live_from:
+                        conn.execute(
+                            "DELETE FROM chat_history_log WHERE chat_id = ? AND seq < ?",
+                            (key, live_from),
+                        )
+                    new_json = body_json[kept:]
+                    appended = [
+                        (tracked.next_seq + i, digest) for i, digest in enumerate(digests[kept:])
+                    ]
+                    if appended:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO chat_history_log (chat_id, seq, message) "
+                            "VALUES (?, ?, ?)",
+                            [(key, seq, raw) for (seq, _), raw in zip(appended, new_json)],
+                        )
+                    next_seq = tracked.next_seq + len(appended)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO chat_history_head "
+                        "(chat_id, live_from, next_seq, system, expires_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, live_from, next_seq, system_json, expires_at),
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    self._tracked.pop(key, None)
+                    raise
+                self._tracked[key] = _TrackedHistory(
+                    next_seq=next_seq,
+                    live=kept_live + appended,
+                    system_json=system_json,
+                )
+        except sqlite3.Error as e:
+            logger.error("history_log_persist_error", chat_id=key, error=str(e))
+            raise CacheError(f"History log persist failed: {e}", retryable=True) from e
+        logger.debug(
+            "history_log_persisted",
+            chat_id=key,
+            appended=len(appended),
+            rewrite=plan is None,
+            live=len(kept_live) + len(appended),
+        )
+        self._maybe_sweep()
+        return len(appended)
+
+    def load(self, chat_id: str) -> Optional[list[dict[str, Any]]]:
+        """
+        Читает только живое окно (seq >= watermark). None — истории нет или
+        истёк TTL. Отпечатки загруженных строк запоминаются, чтобы следующий
+        persist дописал лишь новые сообщения.
+        """
+        key = str(chat_id)
+        try:
+            with self._lock:
+                conn = self._connection()
+                head = conn.execute(
+                    "SELECT live_from, next_seq, system, expires_at "
+                    "FROM chat_history_head WHERE chat_id = ?",
+                    (key,),
+                ).fetchone()
+                if head is None:
+                    return None
+                live_from, next_seq, system_json, expires_at = head
+                if time.time() >= expires_at:
+                    self._delete_locked(conn, key)
+                    return None
+                rows = conn.execute(
+                    "SELECT seq, message FROM chat_history_log "
+                    "WHERE chat_id = ? AND seq >= ? ORDER BY seq",
+                    (key, live_from),
+                ).fetchall()
+                live = [(int(seq), _message_digest(raw)) for seq, raw in rows]
+                messages: list[dict[str, Any]] = []
+                if system_json is not None:
+                    messages.append(json.loads(system_json))
+                messages.extend(json.loads(raw) for _, raw in rows)
+                self._tracked[key] = _TrackedHistory(
+                    next_seq=int(next_seq), live=live, system_json=system_json
+                )
+                return messages
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("history_log_load_error", chat_id=key, error=str(e))
+            return None
+
+    def has(self, chat_id: str) -> bool:
+        """Есть ли непросроченная история для чата."""
+        try:
+            with self._lock:
+                row = (
+                    self._connection()
+                    .execute(
+                        "SELECT expires_at FROM chat_history_head WHERE chat_id = ?",
+                        (str(chat_id),),
+                    )
+                    .fetchone()
+                )
+        except sqlite3.Error as e:
+            logger.warning("history_log_has_error", chat_id=str(chat_id), error=str(e))
+            return False
+        return bool(row) and time.time() < row[0]
+
+    def _delete_locked(self, conn: sqlite3.Connection, key: str) -> None:
+        conn.execute("DELETE FROM chat_history_log WHERE chat_id = ?", (key,))
+        conn.execute("DELETE FROM chat_history_head WHERE chat_id = ?", (key,))
+        self._tracked.pop(key, None)
+
+    def delete(self, chat_id: str) -> None:
+        """Удаляет историю чата. При ошибке молча логирует."""
+        key = str(chat_id)
+        try:
+            with self._lock:
+                self._delete_locked(self._connection(), key)
+            logger.debug("history_log_delete", chat_id=key)
+        except sqlite3.Error as e:
+            logger.warning("history_log_delete_error", chat_id=key, error=str(e))
+
+    def clear_all(self) -> int:
+        """Очищает историю всех чатов. Возвращает количество удалённых чатов."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                count = conn.execute("SELECT COUNT(*) FROM chat_history_head").fetchone()[0]
+                conn.execute("DELETE FROM chat_history_log")
+                conn.execute("DELETE FROM chat_history_head")
+                self._tracked.clear()
+            logger.info("history_log_cleared_all", count=count, db=self.db_path)
+            return count
+        except sqlite3.Error as e:
+            logger.warning("history_log_clear_all_error", error=str(e))
+            return 0
+
+    def clear_expired(self) -> None:
+        """Удаляет историю чатов с истёкшим TTL."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                expired = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT chat_id FROM chat_history_head WHERE expires_at < ?", (now,)
+                    ).fetchall()
+                ]
+                for key in expired:
+                    self._delete_locked(conn, key)
+        except sqlite3.Error as e:
+            logger.warning("history_log_clear_expired_error", error=str(e))
+        self._last_sweep_at = time.monotonic()
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep_at < self._SWEEP_INTERVAL_SEC:
+            return
+        self.clear_expired()
+
+
 # Singleton для кэша поиска
 search_cache = CacheManager("search_cache.db")
 
-# Singleton для кэша истории диалогов
+# Singleton для кэша истории диалогов (legacy: полный JSON под chat_history:{id}).
+# Читается только для миграции в history_log.
 history_cache = CacheManager("history_cache.db")
+
+# Singleton для append-only лога истории диалогов
+history_log = ChatHistoryLog("history_log.db")
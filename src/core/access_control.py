@@ -18,13 +18,18 @@ access_control.py — общий ACL-слой для owner/full/partial дост
 from __future__ import annotations
 
 import json
+import os
+import threading
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from ..config import config
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 
 class AccessLevel(str, Enum):
     """Поддерживаемые уровни доступа userbot."""
@@ -482,6 +487,157 @@ def _save_acl_file(path: Path, payload: dict[str, Any]) -> None:
     )
 
 
+_ACL_LEVELS: tuple[str, ...] = (
+    AccessLevel.OWNER.value,
+    AccessLevel.FULL.value,
+    AccessLevel.PARTIAL.value,
+)
+
+
+def _acl_file_signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@dataclass(frozen=True)
+class AclSnapshot:
+    """Распарсенный ACL-файл: lookup-множества по уровням + нормализованный state."""
+
+    signature: tuple[int, int, int] | None
+    ids: dict[str, frozenset[str]]
+    usernames: dict[str, frozenset[str]]
+
+    @classmethod
+    def from_payload(cls, payload: object, signature: tuple[int, int, int] | None) -> "AclSnapshot":
+        raw = payload if isinstance(payload, dict) else {}
+        ids: dict[str, frozenset[str]] = {}
+        usernames: dict[str, frozenset[str]] = {}
+        for level in _ACL_LEVELS:
+            level_ids, level_names = _extract_acl_subjects(raw.get(level))
+            ids[level] = frozenset(level_ids)
+            usernames[level] = frozenset(level_names)
+        return cls(signature=signature, ids=ids, usernames=usernames)
+
+    def state(self) -> dict[str, list[str]]:
+        return {level: sorted(self.ids[level] | self.usernames[level]) for level in _ACL_LEVELS}
+
+
+class AclSnapshotCache:
+    """
+    In-process кэш ACL-файлов.
+
+    Без watcher'а снимок валидируется по (inode, mtime_ns, size) — один
+    ``os.stat`` вместо чтения и парсинга JSON. После ``register_periodic``
+    проверку делает фоновый poll, и чтения (per-message ACL-проверки)
+    идут только в память. Записи через ``save_acl_runtime_state`` обновляют
+    снимок сразу (write-through).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[Path, AclSnapshot] = {}
+        self._watching = False
+        self._loads = 0
+
+    def get(self, path: Path) -> AclSnapshot:
+        entry = self._entries.get(path)
+        if entry is not None and self._watching:
+            return entry
+        signature = _acl_file_signature(path)
+        if entry is not None and entry.signature == signature:
+            return entry
+        return self._load(path, signature)
+
+    def _load(self, path: Path, signature: tuple[int, int, int] | None) -> AclSnapshot:
+        payload = _load_acl_file(path) if signature is not None else {}
+        snapshot = AclSnapshot.from_payload(payload, signature)
+        with self._lock:
+            self._entries[path] = snapshot
+            self._loads += 1
+        return snapshot
+
+    def store(self, path: Path, payload: dict[str, Any]) -> AclSnapshot:
+        """Write-through: снимок из только что записанного payload."""
+        snapshot = AclSnapshot.from_payload(payload, _acl_file_signature(path))
+        with self._lock:
+            self._entries[path] = snapshot
+        return snapshot
+
+    def refresh(self) -> int:
+        """Перечитывает изменившиеся на диске файлы; возвращает их число."""
+        changed = 0
+        for path, entry in list(self._entries.items()):
+            signature = _acl_file_signature(path)
+            if signature != entry.signature:
+                self._load(path, signature)
+                changed += 1
+        return changed
+
+    def register_periodic(
+        self, scheduler: "PeriodicScheduler", *, interval_sec: float = 2.0
+    ) -> None:
+        """Poll-watcher job'ой общего periodic_scheduler; чтения перестают stat'ить файл."""
+        scheduler.register("acl_snapshot_refresh", self.refresh, interval_sec, run_in_thread=True)
+        self._watching = True
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def reset(self) -> None:
+        """Сбросить снимки и режим watcher'а (тесты, перезапуск userbot)."""
+        self.invalidate()
+        self._watching = False
+
+    def stats(self) -> dict[str, Any]:
+        return {"files": len(self._entries), "loads": self._loads, "watching": self._watching}
+
+
+acl_snapshot_cache = AclSnapshotCache()
+
+
+@dataclass(frozen=True)
+class _EnvSubjects:
+    """Субъекты из config (OWNER_USER_IDS / FULL_ACCESS_USERS / PARTIAL_ACCESS_USERS)."""
+
+    ids: dict[str, frozenset[str]]
+    usernames: dict[str, frozenset[str]]
+    owner_username: str
+
+
+_env_subjects_cache: dict[tuple[Any, ...], _EnvSubjects] = {}
+
+
+def _config_env_subjects() -> _EnvSubjects:
+    """Возвращает env-субъекты; парсинг кэшируется по текущим значениям config."""
+    raw_owner = tuple(str(item) for item in list(getattr(config, "OWNER_USER_IDS", [])))
+    raw_full = tuple(str(item) for item in list(getattr(config, "FULL_ACCESS_USERS", [])))
+    raw_partial = tuple(str(item) for item in list(getattr(config, "PARTIAL_ACCESS_USERS", [])))
+    owner_username = normalize_subject(getattr(config, "OWNER_USERNAME", ""))
+    key = (raw_owner, raw_full, raw_partial, owner_username)
+    cached = _env_subjects_cache.get(key)
+    if cached is not None:
+        return cached
+    ids: dict[str, frozenset[str]] = {}
+    usernames: dict[str, frozenset[str]] = {}
+    for level, raw in zip(_ACL_LEVELS, (raw_owner, raw_full, raw_partial)):
+        level_ids, level_names = _split_subjects(list(raw))
+        ids[level] = frozenset(level_ids)
+        usernames[level] = frozenset(level_names)
+    if len(_env_subjects_cache) > 32:
+        _env_subjects_cache.clear()
+    cached = _env_subjects_cache[key] = _EnvSubjects(
+        ids=ids, usernames=usernames, owner_username=owner_username
+    )
+    return cached
+
+
 def _runtime_acl_path(path: Path | None = None) -> Path:
     """Возвращает канонический путь runtime ACL-файла."""
     if isinstance(path, Path):
@@ -501,13 +657,7 @@ def load_acl_runtime_state(path: Path | None = None) -> dict[str, list[str]]:
     - `full`: список subjects из файла;
     - `partial`: список subjects из файла.
     """
-    acl_path = _runtime_acl_path(path)
-    raw_payload = _load_acl_file(acl_path)
-    state: dict[str, list[str]] = {}
-    for level in (AccessLevel.OWNER.value, AccessLevel.FULL.value, AccessLevel.PARTIAL.value):
-        ids, usernames = _extract_acl_subjects(raw_payload.get(level))
-        state[level] = sorted(ids | usernames)
-    return state
+    return acl_snapshot_cache.get(_runtime_acl_path(path)).state()
 
 
 def get_effective_owner_subjects(path: Path | None = None) -> list[str]:
@@ -567,6 +717,7 @@ def save_acl_runtime_state(state: dict[str, list[str]], path: Path | None = None
         )
         payload[level] = normalized
     _save_acl_file(acl_path, payload)
+    acl_snapshot_cache.store(acl_path, payload)
     return acl_path
 
 
@@ -619,8 +770,8 @@ def is_owner_user_id(user_id: int | str, *, path: Path | None = None) -> bool:
     Unified owner-check: env var ИЛИ ACL-файл (приоритет ACL).
 
     Приоритет: ACL-файл (owner секция) → env OWNER_USER_IDS → False.
-    Результат НЕ кэшируется на уровне процесса — ACL-файл может измениться
-    через !acl и нужно всегда читать актуальную версию.
+    ACL читается из `acl_snapshot_cache`: изменения через !acl видны сразу
+    (write-through), ручные правки файла — по mtime/inode.
     """
     if not user_id:
         return False
@@ -629,15 +780,12 @@ def is_owner_user_id(user_id: int | str, *, path: Path | None = None) -> bool:
         return False
 
     # Проверяем ACL-файл (приоритетный источник истины)
-    acl_path = _runtime_acl_path(path)
-    acl_payload = _load_acl_file(acl_path)
-    acl_owner_ids, _ = _extract_acl_subjects(acl_payload.get("owner"))
-    if user_id_str in acl_owner_ids:
+    snapshot = acl_snapshot_cache.get(_runtime_acl_path(path))
+    if user_id_str in snapshot.ids[AccessLevel.OWNER.value]:
         return True
 
     # Проверяем env var OWNER_USER_IDS
-    env_ids, _ = _split_subjects(list(getattr(config, "OWNER_USER_IDS", [])))
-    return user_id_str in env_ids
+    return user_id_str in _config_env_subjects().ids[AccessLevel.OWNER.value]
 
 
 def resolve_access_profile(
@@ -661,23 +809,19 @@ def resolve_access_profile(
     acl_path = Path(
         getattr(config, "USERBOT_ACL_FILE", Path.home() / ".openclaw" / "krab_userbot_acl.json")
     )
-    acl_payload = _load_acl_file(acl_path)
-
-    owner_file_ids, owner_file_names = _extract_acl_subjects(acl_payload.get("owner"))
-    full_file_ids, full_file_names = _extract_acl_subjects(acl_payload.get("full"))
-    partial_file_ids, partial_file_names = _extract_acl_subjects(acl_payload.get("partial"))
-
-    owner_env_ids, owner_env_names = _split_subjects(list(getattr(config, "OWNER_USER_IDS", [])))
-    full_env_ids, full_env_names = _split_subjects(list(getattr(config, "FULL_ACCESS_USERS", [])))
-    partial_env_ids, partial_env_names = _split_subjects(
-        list(getattr(config, "PARTIAL_ACCESS_USERS", []))
-    )
-    owner_username = normalize_subject(getattr(config, "OWNER_USERNAME", ""))
-
-    def _matches(ids: set[str], usernames: set[str]) -> str:
-        if normalized_user_id and normalized_user_id in ids:
+    snapshot = acl_snapshot_cache.get(acl_path)
+    env = _config_env_subjects()
+    owner_username = env.owner_username
+
+    def _matches(level: str) -> str:
+        if normalized_user_id and (
+            normalized_user_id in env.ids[level] or normalized_user_id in snapshot.ids[level]
+        ):
             return normalized_user_id
-        if normalized_username and normalized_username in usernames:
+        if normalized_username and (
+            normalized_username in env.usernames[level]
+            or normalized_username in snapshot.usernames[level]
+        ):
             return normalized_username
         return ""
 
@@ -686,7 +830,7 @@ def resolve_access_profile(
             level=AccessLevel.OWNER, source="self", matched_subject=normalized_user_id
         )
 
-    owner_match = _matches(owner_env_ids | owner_file_ids, owner_env_names | owner_file_names)
+    owner_match = _matches(AccessLevel.OWNER.value)
     if owner_match:
         return AccessProfile(
             level=AccessLevel.OWNER, source="owner_acl", matched_subject=owner_match
@@ -699,13 +843,11 @@ def resolve_access_profile(
             matched_subject=normalized_username,
         )
 
-    full_match = _matches(full_env_ids | full_file_ids, full_env_names | full_file_names)
+    full_match = _matches(AccessLevel.FULL.value)
     if full_match:
         return AccessProfile(level=AccessLevel.FULL, source="full_acl", matched_subject=full_match)
 
-    partial_match = _matches(
-        partial_env_ids | partial_file_ids, partial_env_names | partial_file_names
-    )
+    partial_match = _matches(AccessLevel.PARTIAL.value)
     if partial_match:
         return AccessProfile(
             level=AccessLevel.PARTIAL, source="partial_acl", matched_subject=partial_match
@@ -3,28 +3,58 @@
 Cost Analytics — подсчёт токенов, Cost Engine, бюджет и отчёты по использованию моделей (Фаза 4.1, Шаг 4).
 
 Вынесено из зоны model_manager для единого места аналитики затрат.
+
+Хранение:
+- агрегаты ведутся инкрементально: per-(час, модель, канал) rollup-бакеты,
+  помесячные итоги и сессионные счётчики обновляются за O(1) на вызов,
+  поэтому ``check_budget_ok`` / ``get_monthly_cost_usd`` не сканируют историю;
+- ``_calls`` — ограниченное окно сырых записей (retention + maxlen) для
+  команд/дайджестов, которым нужны отдельные вызовы;
+- после ``configure_default_path()`` rollup'ы и сырые записи пишутся в SQLite
+  write-behind (``flush()`` из periodic_scheduler и shutdown drain), старые
+  сырые записи компактируются. Вызовы, учтённые до подключения хранилища,
+  пишутся первым flush'ем. При старте из часовых rollup'ов восстанавливаются
+  месячные итоги и разбивки по моделям/каналам, т.е. бюджет и отчёты
+  переживают рестарт.
 """
 
 from __future__ import annotations
 
 import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
 
 import structlog
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 logger = structlog.get_logger(__name__)
 
 # Лимит бюджета в USD в месяц (0 = не проверять)
 COST_MONTHLY_BUDGET_USD_ENV = "COST_MONTHLY_BUDGET_USD"
+# Сколько дней хранить сырые записи вызовов (память + SQLite); rollup'ы — бессрочно
+COST_RAW_RETENTION_DAYS_ENV = "COST_RAW_RETENTION_DAYS"
+# Верхняя граница числа сырых записей в памяти
+COST_RAW_MAX_RECORDS_ENV = "COST_RAW_MAX_RECORDS"
 
 # Цены за 1M токенов (input, output) в USD — по умолчанию для облачных моделей
 # Локальные модели (local, mlx, gguf) считаем как 0
 DEFAULT_PRICE_PER_1M_INPUT_USD = 0.075
 DEFAULT_PRICE_PER_1M_OUTPUT_USD = 0.30
 
+DEFAULT_RAW_RETENTION_DAYS = 35.0
+DEFAULT_RAW_MAX_RECORDS = 50_000
+# Размер rollup-бакета
+BUCKET_SEC = 3600
+# Как часто (не чаще) чистить устаревшие сырые записи / бакеты
+_COMPACT_INTERVAL_SEC = 3600.0
+
 
 @dataclass
 class CallRecord:
@@ -42,6 +72,51 @@ class CallRecord:
     context_tokens: int = 0  # длина контекста (session history) при запросе
 
 
+@dataclass
+class CostBucket:
+    """Аддитивный агрегат вызовов (rollup-бакет, месяц, модель, сессия)."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    tool_calls: int = 0
+    fallbacks: int = 0
+    context_tokens: int = 0
+
+    def add_record(self, r: CallRecord) -> None:
+        self.calls += 1
+        self.input_tokens += r.input_tokens
+        self.output_tokens += r.output_tokens
+        self.cost_usd += r.cost_usd
+        self.tool_calls += r.tool_calls_count
+        self.fallbacks += 1 if r.is_fallback else 0
+        self.context_tokens += r.context_tokens
+
+    def merge(self, other: "CostBucket") -> None:
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cost_usd += other.cost_usd
+        self.tool_calls += other.tool_calls
+        self.fallbacks += other.fallbacks
+        self.context_tokens += other.context_tokens
+
+
+# (hour_start_ts, model_id, channel)
+BucketKey = tuple[int, str, str]
+
+_BUCKET_COLUMNS = (
+    "calls",
+    "input_tokens",
+    "output_tokens",
+    "cost_usd",
+    "tool_calls",
+    "fallbacks",
+    "context_tokens",
+)
+
+
 def _is_local_model(model_id: str) -> bool:
     """Локальные модели не тарифицируем."""
     if not model_id:
@@ -59,6 +134,24 @@ def _cost_usd(model_id: str, input_tokens: int, output_tokens: int) -> float:
     return round(inp + out, 6)
 
 
+def _hour_start(ts: float) -> int:
+    return int(ts // BUCKET_SEC) * BUCKET_SEC
+
+
+def _month_key(ts: float) -> tuple[int, int]:
+    """(год, месяц) по локальному времени — как прежний фильтр по date.today()."""
+    lt = time.localtime(ts)
+    return lt.tm_year, lt.tm_mon
+
+
+def _env_positive_float(name: str, default: float) -> float:
+    try:
+        value = float(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
 class CostAnalytics:
     """
     Движок учёта токенов, стоимости и лимитов (Budget).
@@ -70,13 +163,44 @@ class CostAnalytics:
         monthly_budget_usd: Optional[float] = None,
         price_per_1m_input_usd: float = DEFAULT_PRICE_PER_1M_INPUT_USD,
         price_per_1m_output_usd: float = DEFAULT_PRICE_PER_1M_OUTPUT_USD,
+        *,
+        storage_path: Optional[Path] = None,
+        raw_retention_days: Optional[float] = None,
+        max_raw_records: Optional[int] = None,
     ):
+        self._lock = threading.RLock()
         # Текущие итоги по токенам (совместимо с get_usage_stats)
         self._input_tokens: int = 0
         self._output_tokens: int = 0
         self._total_tokens: int = 0
-        # История вызовов для отчётов и прогноза
-        self._calls: list[CallRecord] = []
+        # Окно последних сырых вызовов (команды !costs, дайджесты)
+        if max_raw_records is None:
+            max_raw_records = int(
+                _env_positive_float(COST_RAW_MAX_RECORDS_ENV, DEFAULT_RAW_MAX_RECORDS)
+            )
+        self._calls: deque[CallRecord] = deque(maxlen=max(1, int(max_raw_records)))
+        if raw_retention_days is None:
+            raw_retention_days = _env_positive_float(
+                COST_RAW_RETENTION_DAYS_ENV, DEFAULT_RAW_RETENTION_DAYS
+            )
+        self._raw_retention_sec: float = max(1.0, float(raw_retention_days)) * 86400.0
+        # Инкрементальные агрегаты
+        self._buckets: dict[BucketKey, CostBucket] = {}
+        self._monthly: dict[tuple[int, int], CostBucket] = {}
+        self._session = CostBucket()
+        # Разбивки отчёта: сессия + восстановленные rollup'ы хранилища
+        self._by_model: dict[str, CostBucket] = {}
+        self._by_channel: dict[str, int] = defaultdict(int)
+        self._last_compact_ts: float = time.time()
+        # Write-behind очередь в SQLite
+        self._storage_path: Optional[Path] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._pending_calls: list[CallRecord] = []
+        self._dirty: dict[BucketKey, CostBucket] = {}
+        self._last_db_compact_ts: float = 0.0
+        # Rollup'ы хранилища вливаются в память один раз за жизнь объекта
+        self._restored: bool = False
         # Бюджет: None = не ограничен, иначе лимит в USD на месяц
         if monthly_budget_usd is None:
             try:
@@ -87,6 +211,10 @@ class CostAnalytics:
         self._monthly_budget_usd: float = max(0.0, monthly_budget_usd)
         self._price_in = price_per_1m_input_usd
         self._price_out = price_per_1m_output_usd
+        if storage_path is not None:
+            self.configure_default_path(storage_path)
+
+    # ---- Recording --------------------------------------------------------
 
     def record_usage(
         self,
@@ -107,11 +235,8 @@ class CostAnalytics:
         inp = int(usage.get("prompt_tokens") or usage.get("input_tokens", 0))
         out = int(usage.get("completion_tokens") or usage.get("output_tokens", 0))
         total = int(usage.get("total_tokens", 0)) or (inp + out)
-        self._input_tokens += inp
-        self._output_tokens += out
-        self._total_tokens += total
         cost = _cost_usd(model_id, inp, out)
-        self._calls.append(
+        self._ingest(
             CallRecord(
                 model_id=model_id,
                 input_tokens=inp,
@@ -121,7 +246,8 @@ class CostAnalytics:
                 channel=channel,
                 is_fallback=is_fallback,
                 context_tokens=context_tokens,
-            )
+            ),
+            total_tokens=total,
         )
         if cost > 0:
             logger.debug(
@@ -132,6 +258,69 @@ class CostAnalytics:
                 cost_usd=cost,
             )
 
+    def record_call(self, record: CallRecord) -> None:
+        """Учитывает готовую запись (импорт/бэкфилл, тесты) с её timestamp."""
+        self._ingest(record, total_tokens=record.input_tokens + record.output_tokens)
+
+    def _ingest(self, r: CallRecord, *, total_tokens: int) -> None:
+        key: BucketKey = (_hour_start(r.timestamp), r.model_id, r.channel)
+        with self._lock:
+            self._input_tokens += r.input_tokens
+            self._output_tokens += r.output_tokens
+            self._total_tokens += total_tokens
+            self._session.add_record(r)
+            model_agg = self._by_model.get(r.model_id)
+            if model_agg is None:
+                model_agg = self._by_model[r.model_id] = CostBucket()
+            model_agg.add_record(r)
+            if r.channel:
+                self._by_channel[r.channel] += 1
+            self._apply_to_rollups(key, r)
+            self._calls.append(r)
+            # Очередь ведётся и без хранилища: configure_default_path() допишет
+            # вызовы, учтённые до него.
+            self._pending_calls.append(r)
+            dirty = self._dirty.get(key)
+            if dirty is None:
+                dirty = self._dirty[key] = CostBucket()
+            dirty.add_record(r)
+            now = time.time()
+            if now - self._last_compact_ts >= _COMPACT_INTERVAL_SEC:
+                self._compact_memory(now)
+
+    def _apply_to_rollups(self, key: BucketKey, r: CallRecord) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = CostBucket()
+        bucket.add_record(r)
+        month = _month_key(r.timestamp)
+        month_agg = self._monthly.get(month)
+        if month_agg is None:
+            month_agg = self._monthly[month] = CostBucket()
+        month_agg.add_record(r)
+
+    def _compact_memory(self, now: float) -> None:
+        """Выкидывает из памяти сырые записи и бакеты старше retention."""
+        cutoff = now - self._raw_retention_sec
+        calls = self._calls
+        if any(r.timestamp < cutoff for r in calls):
+            kept = [r for r in calls if r.timestamp >= cutoff]
+            calls.clear()
+            calls.extend(kept)
+        stale = [k for k in self._buckets if k[0] + BUCKET_SEC <= cutoff]
+        for k in stale:
+            del self._buckets[k]
+        if self._storage_path is None:
+            # Хранилище не подключено: очередь write-behind держим в тех же
+            # границах, что и окно сырых записей.
+            pending = [r for r in self._pending_calls if r.timestamp >= cutoff]
+            self._pending_calls = pending[-(calls.maxlen or len(pending)) :]
+            for k in [k for k in self._dirty if k[0] + BUCKET_SEC <= cutoff]:
+                del self._dirty[k]
+        self._last_compact_ts = now
+
+    # ---- Queries ----------------------------------------------------------
+
     def get_usage_stats(self) -> dict[str, int]:
         """Статистика токенов в формате, совместимом с openclaw_client.get_usage_stats()."""
         return {
@@ -142,17 +331,25 @@ class CostAnalytics:
 
     def get_cost_so_far_usd(self) -> float:
         """Суммарная стоимость за текущую сессию (все зафиксированные вызовы)."""
-        return sum(r.cost_usd for r in self._calls)
+        return self._session.cost_usd
+
+    def _current_month(self) -> CostBucket:
+        return self._monthly.get(_month_key(time.time())) or CostBucket()
 
     def get_monthly_cost_usd(self) -> float:
-        """Стоимость за текущий месяц (по timestamp записей)."""
-        # Упрощённо: считаем текущий месяц по локальному времени через 30 дней
-        import datetime
+        """Стоимость за текущий месяц (по timestamp записей, включая восстановленные)."""
+        return self._current_month().cost_usd
 
-        today = datetime.date.today()
-        month_start = today.replace(day=1)
-        month_start_ts = time.mktime(month_start.timetuple())
-        return sum(r.cost_usd for r in self._calls if r.timestamp >= month_start_ts)
+    def cost_usd_since(self, since_ts: float) -> float:
+        """
+        Стоимость с ``since_ts`` по часовым rollup-бакетам (в пределах retention).
+
+        Точность — до часа: бакет, в который попадает ``since_ts``, учитывается
+        целиком. Для границ суток/недель по UTC результат точный.
+        """
+        start = _hour_start(since_ts)
+        with self._lock:
+            return sum(b.cost_usd for k, b in self._buckets.items() if k[0] >= start)
 
     def get_monthly_budget_usd(self) -> float:
         """Лимит бюджета в USD в месяц (0 = не задан)."""
@@ -175,22 +372,17 @@ class CostAnalytics:
         Прогноз числа вызовов в конце месяца по текущему темпу.
         Возвращает None если данных недостаточно (нет вызовов или нет дней в месяце).
         """
-        if not self._calls:
+        n_calls = self._current_month().calls
+        if not self._session.calls and not n_calls:
             return None
         import datetime
 
-        today = datetime.date.today()
-        day_of_month = today.day
+        day_of_month = datetime.date.today().day
         if day_of_month <= 0:
             return None
-        # Вызовов за текущий месяц
-        month_start = today.replace(day=1)
-        month_start_ts = time.mktime(month_start.timetuple())
-        calls_this_month = [r for r in self._calls if r.timestamp >= month_start_ts]
-        n_calls = len(calls_this_month)
         # Линейная экстраполяция на конец месяца
         days_in_month = 30  # упрощение
-        return (n_calls / day_of_month) * days_in_month if day_of_month else None
+        return (n_calls / day_of_month) * days_in_month
 
     def build_usage_report(self) -> str:
         """Текстовый отчёт по использованию моделей и затратам."""
@@ -207,42 +399,40 @@ class CostAnalytics:
         forecast = self.monthly_calls_forecast()
         if forecast is not None:
             lines.append(f"- Прогноз вызовов в конце месяца: ~{int(forecast)}")
-        by_model = defaultdict(lambda: {"tokens_in": 0, "tokens_out": 0, "cost": 0.0, "calls": 0})
-        for r in self._calls:
-            by_model[r.model_id]["tokens_in"] += r.input_tokens
-            by_model[r.model_id]["tokens_out"] += r.output_tokens
-            by_model[r.model_id]["cost"] += r.cost_usd
-            by_model[r.model_id]["calls"] += 1
+        with self._lock:
+            by_model = list(self._by_model.items())
         if by_model:
             lines.append("**По моделям:**")
-            for mid, data in sorted(by_model.items(), key=lambda x: -x[1]["cost"]):
+            for mid, data in sorted(by_model, key=lambda x: -x[1].cost_usd):
                 lines.append(
-                    f"- {mid}: {data['calls']} вызовов, "
-                    f"${data['cost']:.4f}, "
-                    f"токены in/out {data['tokens_in']}/{data['tokens_out']}"
+                    f"- {mid}: {data.calls} вызовов, "
+                    f"${data.cost_usd:.4f}, "
+                    f"токены in/out {data.input_tokens}/{data.output_tokens}"
                 )
         return "\n".join(lines)
 
     def build_usage_report_dict(self) -> dict[str, Any]:
-        """Отчёт в виде словаря для API/JSON. Включает FinOps-метрики."""
-        by_model = defaultdict(
-            lambda: {"input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "calls": 0}
-        )
-        by_channel: dict[str, int] = defaultdict(int)
-        total_tool_calls = 0
-        total_fallbacks = 0
-        total_context_tokens = 0
-        for r in self._calls:
-            by_model[r.model_id]["input_tokens"] += r.input_tokens
-            by_model[r.model_id]["output_tokens"] += r.output_tokens
-            by_model[r.model_id]["cost_usd"] += r.cost_usd
-            by_model[r.model_id]["calls"] += 1
-            total_tool_calls += r.tool_calls_count
-            if r.channel:
-                by_channel[r.channel] += 1
-            if r.is_fallback:
-                total_fallbacks += 1
-            total_context_tokens += r.context_tokens
+        """Отчёт в виде словаря для API/JSON. Включает FinOps-метрики.
+
+        ``by_model`` / ``by_channel`` — за всю историю хранилища (восстановленные
+        rollup'ы + текущая сессия); ``total_*`` — только текущая сессия.
+        """
+        with self._lock:
+            by_model = {
+                mid: {
+                    "input_tokens": b.input_tokens,
+                    "output_tokens": b.output_tokens,
+                    "cost_usd": b.cost_usd,
+                    "calls": b.calls,
+                }
+                for mid, b in self._by_model.items()
+            }
+            by_channel = dict(self._by_channel)
+            session = self._session
+            total_tool_calls = session.tool_calls
+            total_fallbacks = session.fallbacks
+            total_context_tokens = session.context_tokens
+            total_calls = session.calls
         return {
             "input_tokens": self._input_tokens,
             "output_tokens": self._output_tokens,
@@ -255,17 +445,267 @@ class CostAnalytics:
             "remaining_budget_usd": self.get_remaining_budget_usd(),
             "budget_ok": self.check_budget_ok(),
             "monthly_calls_forecast": self.monthly_calls_forecast(),
-            "by_model": dict(by_model),
+            "by_model": by_model,
             # FinOps расширение
             "total_tool_calls": total_tool_calls,
             "total_fallbacks": total_fallbacks,
             "total_context_tokens": total_context_tokens,
-            "avg_context_tokens": round(total_context_tokens / len(self._calls))
-            if self._calls
-            else 0,
-            "by_channel": dict(by_channel),
+            "avg_context_tokens": round(total_context_tokens / total_calls) if total_calls else 0,
+            "by_channel": by_channel,
         }
 
+    # ---- Persistence ------------------------------------------------------
+
+    def configure_default_path(self, storage_path: Path) -> None:
+        """
+        Подключает SQLite-хранилище и восстанавливает из него rollup'ы.
+
+        Идемпотентно для того же пути. Rollup'ы вливаются в память только при
+        первом подключении: повторный вызов (другой путь, reopen после
+        ``close()``) лишь переключает запись, иначе итоги задвоились бы.
+        Вызовы, учтённые до подключения, сразу пишутся flush'ем.
+        Ошибки sqlite → warning, учёт продолжается только в памяти.
+        """
+        storage_path = Path(storage_path)
+        with self._db_lock:
+            if self._storage_path == storage_path and self._conn is not None:
+                return
+            self._close_conn()
+            try:
+                storage_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(
+                    str(storage_path), timeout=5.0, check_same_thread=False, isolation_level=None
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._create_schema(conn)
+            except (sqlite3.Error, OSError) as exc:
+                logger.warning(
+                    "cost_analytics_db_open_failed",
+                    path=str(storage_path),
+                    error=str(exc),
+                    error_type=type(exc).__name__,
+                )
+                return
+            self._conn = conn
+            self._storage_path = storage_path
+            if self._restored:
+                restored = {"rollups": 0, "calls": 0}
+            else:
+                restored = self._restore(conn)
+                self._restored = True
+        logger.info("cost_analytics_store_ready", path=str(storage_path), **restored)
+        if self._pending_calls or self._dirty:
+            self.flush()
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cost_rollup_hourly (
+                hour_ts INTEGER NOT NULL,
+                model_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                tool_calls INTEGER NOT NULL DEFAULT 0,
+                fallbacks INTEGER NOT NULL DEFAULT 0,
+                context_tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (hour_ts, model_id, channel)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cost_calls (
+                ts REAL NOT NULL,
+                model_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                tool_calls_count INTEGER NOT NULL,
+                is_fallback INTEGER NOT NULL,
+                context_tokens INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_calls_ts ON cost_calls(ts)")
+
+    def _restore(self, conn: sqlite3.Connection) -> dict[str, int]:
+        """Загружает rollup'ы (месячные итоги + бакеты в retention) и хвост сырых записей."""
+        now = time.time()
+        cutoff = now - self._raw_retention_sec
+        try:
+            rollups = conn.execute(
+                "SELECT hour_ts, model_id, channel, " + ", ".join(_BUCKET_COLUMNS) + " "
+                "FROM cost_rollup_hourly"
+            ).fetchall()
+            raw_rows = conn.execute(
+                "SELECT ts, model_id, channel, input_tokens, output_tokens, cost_usd, "
+                "tool_calls_count, is_fallback, context_tokens FROM cost_calls "
+                "WHERE ts >= ? ORDER BY ts DESC LIMIT ?",
+                (cutoff, self._calls.maxlen),
+            ).fetchall()
+        except sqlite3.Error as exc:
+            logger.warning(
+                "cost_analytics_restore_failed", error=str(exc), error_type=type(exc).__name__
+            )
+            return {"rollups": 0, "calls": 0}
+        with self._lock:
+            for hour_ts, model_id, channel, *values in rollups:
+                stored = CostBucket(*values)
+                month_agg = self._monthly.get(_month_key(hour_ts))
+                if month_agg is None:
+                    month_agg = self._monthly[_month_key(hour_ts)] = CostBucket()
+                month_agg.merge(stored)
+                model_agg = self._by_model.get(model_id)
+                if model_agg is None:
+                    model_agg = self._by_model[model_id] = CostBucket()
+                model_agg.merge(stored)
+                if channel:
+                    self._by_channel[channel] += stored.calls
+                if hour_ts + BUCKET_SEC > cutoff:
+                    key: BucketKey = (int(hour_ts), model_id, channel)
+                    bucket = self._buckets.get(key)
+                    if bucket is None:
+                        bucket = self._buckets[key] = CostBucket()
+                    bucket.merge(stored)
+            restored = [
+                CallRecord(
+                    model_id=row[1],
+                    input_tokens=row[3],
+                    output_tokens=row[4],
+                    cost_usd=row[5],
+                    timestamp=row[0],
+                    tool_calls_count=row[6],
+                    channel=row[2],
+                    is_fallback=bool(row[7]),
+                    context_tokens=row[8],
+                )
+                for row in reversed(raw_rows)
+            ]
+            # Восстановленные записи старше вызовов текущего процесса.
+            session_calls = list(self._calls)
+            self._calls.clear()
+            self._calls.extend(restored)
+            self._calls.extend(session_calls)
+        return {"rollups": len(rollups), "calls": len(restored)}
+
+    def flush(self) -> int:
+        """
+        Пишет накопленные вызовы и дельты rollup'ов одной транзакцией.
+
+        Раз в час заодно удаляет сырые записи старше retention.
+        Возвращает число записанных вызовов (0 без хранилища).
+        """
+        with self._db_lock:
+            conn = self._conn
+            if conn is None:
+                return 0
+            with self._lock:
+                calls, self._pending_calls = self._pending_calls, []
+                dirty, self._dirty = self._dirty, {}
+            now = time.time()
+            compact = now - self._last_db_compact_ts >= _COMPACT_INTERVAL_SEC
+            if not calls and not dirty and not compact:
+                return 0
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO cost_calls (ts, model_id, channel, input_tokens, "
+                    "output_tokens, cost_usd, tool_calls_count, is_fallback, context_tokens) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r.timestamp,
+                            r.model_id,
+                            r.channel,
+                            r.input_tokens,
+                            r.output_tokens,
+                            r.cost_usd,
+                            r.tool_calls_count,
+                            int(r.is_fallback),
+                            r.context_tokens,
+                        )
+                        for r in calls
+                    ],
+                )
+                conn.executemany(
+                    "INSERT INTO cost_rollup_hourly (hour_ts, model_id, channel, "
+                    + ", ".join(_BUCKET_COLUMNS)
+                    + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(hour_ts, model_id, channel) DO UPDATE SET "
+                    + ", ".join(f"{c} = {c} + excluded.{c}" for c in _BUCKET_COLUMNS),
+                    [
+                        (
+                            hour_ts,
+                            model_id,
+                            channel,
+                            b.calls,
+                            b.input_tokens,
+                            b.output_tokens,
+                            b.cost_usd,
+                            b.tool_calls,
+                            b.fallbacks,
+                            b.context_tokens,
+                        )
+                        for (hour_ts, model_id, channel), b in dirty.items()
+                    ],
+                )
+                if compact:
+                    conn.execute(
+                        "DELETE FROM cost_calls WHERE ts < ?", (now - self._raw_retention_sec,)
+                    )
+                conn.execute("COMMIT")
+            except sqlite3.Error as exc:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                # Вернуть в очередь — допишем следующим flush.
+                with self._lock:
+                    self._pending_calls[:0] = calls
+                    for key, b in dirty.items():
+                        pending = self._dirty.get(key)
+                        if pending is None:
+                            self._dirty[key] = b
+                        else:
+                            pending.merge(b)
+                logger.warning(
+                    "cost_analytics_flush_failed", error=str(exc), error_type=type(exc).__name__
+                )
+                return 0
+            if compact:
+                self._last_db_compact_ts = now
+            return len(calls)
+
+    def register_periodic(self, scheduler: "PeriodicScheduler", *, interval_sec: int = 30) -> None:
+        """flush() job'ой общего periodic_scheduler (sqlite-запись в thread)."""
+        scheduler.register(
+            "cost_analytics_flush",
+            self.flush,
+            max(1, int(interval_sec)),
+            run_in_thread=True,
+        )
+
+    def close(self) -> None:
+        """Финальный flush и закрытие соединения."""
+        self.flush()
+        with self._db_lock:
+            self._close_conn()
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+        self._conn = None
+        self._storage_path = None
+
 
 # Синглтон для использования из model_manager и других модулей
 cost_analytics = CostAnalytics()
@@ -20,12 +20,15 @@ import datetime as _dt
 import os
 import time
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
 
 import structlog
 
 from .metrics.cost_budget import update_cost_budget_gauges
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 logger = structlog.get_logger(__name__)
 
 # Дефолтные курсы и бюджеты ---------------------------------------------------
@@ -162,6 +165,19 @@ class CostBudgetMonitor:
             return []
 
     def _sum_usd_since(self, since_ts: float) -> float:
+        if self._calls_provider is None:
+            # Без подменённого провайдера — часовые rollup'ы cost_analytics
+            # (границы суток/недель UTC совпадают с границами бакетов).
+            try:
+                from .cost_analytics import cost_analytics as _ca  # noqa: PLC0415
+
+                return float(_ca.cost_usd_since(since_ts))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "cost_budget_rollup_fetch_failed",
+                    error=str(exc),
+                    error_type=type(exc).__name__,
+                )
         total = 0.0
         for r in self._get_calls():
             ts = getattr(r, "timestamp", None)
@@ -323,6 +339,21 @@ class CostBudgetMonitor:
                 return
             await asyncio.sleep(max(1, int(interval_sec)))
 
+    def register_periodic(
+        self,
+        scheduler: "PeriodicScheduler",
+        *,
+        notifier: Optional[OwnerNotifier] = None,
+        interval_sec: int = 300,
+    ) -> None:
+        """tick() job'ой общего periodic_scheduler вместо run_loop."""
+        scheduler.register(
+            "cost_budget_monitor",
+            lambda: self.tick(notifier=notifier),
+            max(1, int(interval_sec)),
+            initial_delay_sec=0,
+        )
+
     # Test helper: сбросить запомненные статусы
     def reset_status_memory(self) -> None:
         self._last_daily_status = "ok"
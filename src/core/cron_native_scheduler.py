@@ -1,26 +1,35 @@
 """Native Python cron scheduler — asyncio-задача для выполнения cron_native_store jobs.
 
-Запускается из userbot_bridge.start() и периодически (каждые 30с) опрашивает
-cron_native_store, запуская просроченные jobs через AI pipeline.
+Запускается из userbot_bridge.start() и запускает наступившие cron_native_store
+jobs через AI pipeline. Due-индекс — min-heap ``(due_ts, job_id)``: тик спит
+ровно до ближайшего due (в runtime — adaptive job ``cron_native_scheduler``
+общего periodic_scheduler) и будится раньше, когда store меняется.
 """
 
 from __future__ import annotations
 
 import asyncio
+import heapq
 import time
 import traceback
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Awaitable, Callable
 
 from . import cron_native_store
 from .logger import get_logger
 
 if TYPE_CHECKING:
-    pass
+    from .periodic_scheduler import PeriodicScheduler
 
 logger = get_logger(__name__)
 
-# Интервал опроса (секунды)
+# Запасной интервал тика (если _tick упал и не вернул задержку)
 _POLL_INTERVAL = 30
+# Максимальный сон без изменений — страховка для ручной правки файла jobs
+_MAX_IDLE_SEC = 300.0
+# Cooldown между fire одного job (защита от двойного срабатывания)
+_FIRE_COOLDOWN_SEC = 50.0
+_JOB_NAME = "cron_native_scheduler"
 
 
 class CronNativeScheduler:
@@ -28,9 +37,17 @@ class CronNativeScheduler:
 
     def __init__(self) -> None:
         self._task: asyncio.Task | None = None
+        self._scheduler: "PeriodicScheduler | None" = None
         self._sender: Callable[[str, str], Awaitable[None]] | None = None
         # Словарь job_id → timestamp последнего запуска (защита от двойного срабатывания)
         self._last_fired: dict[str, float] = {}
+        # Due-индекс: heap (due_ts, job_id) + актуальные dict'ы jobs по id
+        self._heap: list[tuple[float, str]] = []
+        self._jobs: dict[str, dict] = {}
+        self._dirty = True
+        self._signature: tuple[int, int] | None = None
+        self._loop_ref: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
 
     def bind_sender(self, sender: Callable[[str, str], Awaitable[None]]) -> None:
         """Привязывает callback для отправки промпта в AI pipeline.
@@ -39,76 +56,165 @@ class CronNativeScheduler:
         """
         self._sender = sender
 
-    def start(self) -> None:
-        """Запускает фоновую asyncio-задачу."""
-        if self._task and not self._task.done():
+    def start(self, scheduler: "PeriodicScheduler | None" = None) -> None:
+        """Запускает тик: adaptive job'ой ``scheduler`` или собственной asyncio-задачей."""
+        if self.is_running:
             return
-        self._task = asyncio.ensure_future(self._loop())
-        logger.info("cron_native_scheduler_started", poll_interval=_POLL_INTERVAL)
+        self._loop_ref = asyncio.get_running_loop()
+        self._dirty = True
+        cron_native_store.add_change_listener(self._on_store_changed)
+        if scheduler is not None:
+            self._scheduler = scheduler
+            scheduler.register(
+                _JOB_NAME,
+                self._tick,
+                _POLL_INTERVAL,
+                initial_delay_sec=0,
+                slack_sec=0,
+                skip_if_running=False,
+                adaptive=True,
+            )
+        else:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._loop())
+        logger.info("cron_native_scheduler_started", max_idle_sec=_MAX_IDLE_SEC)
 
     def stop(self) -> None:
-        """Останавливает фоновую задачу."""
+        """Останавливает фоновую задачу / снимает job с планировщика."""
+        cron_native_store.remove_change_listener(self._on_store_changed)
+        if self._scheduler is not None:
+            self._scheduler.unregister(_JOB_NAME)
+            self._scheduler = None
+            logger.info("cron_native_scheduler_stopped")
         if self._task and not self._task.done():
             self._task.cancel()
             logger.info("cron_native_scheduler_stopped")
         self._task = None
+        self._wakeup = None
+        self._loop_ref = None
 
     @property
     def is_running(self) -> bool:
+        if self._scheduler is not None and self._scheduler.is_registered(_JOB_NAME):
+            return True
         return bool(self._task and not self._task.done())
 
+    def next_fire_at(self) -> float | None:
+        """Ближайший due_ts из индекса (None — индекс пуст)."""
+        return self._heap[0][0] if self._heap else None
+
+    # ─── Wakeup ─────────────────────────────────────────────────────────────
+
+    def _on_store_changed(self) -> None:
+        """Listener cron_native_store: индекс устарел → разбудить тик сейчас."""
+        self._dirty = True
+        loop = self._loop_ref
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake()
+        else:
+            # Изменение пришло из другого потока (web handler в to_thread).
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.trigger(_JOB_NAME)
+        elif self._wakeup is not None:
+            self._wakeup.set()
+
     async def _loop(self) -> None:
-        """Основной цикл опроса."""
+        """Standalone-цикл: тик → сон до ближайшего due (или до wakeup)."""
         while True:
             try:
-                await self._tick()
+                delay = await self._tick()
             except asyncio.CancelledError:
                 raise
             except Exception as exc:  # noqa: BLE001
+                delay = float(_POLL_INTERVAL)
                 logger.error(
                     "cron_native_scheduler_tick_error",
                     error=str(exc),
                     error_type=type(exc).__name__,
                     traceback=traceback.format_exc(),
                 )
-            await asyncio.sleep(_POLL_INTERVAL)
-
-    async def _tick(self) -> None:
-        """Один цикл: проверяет jobs и запускает просроченные.
-
-        Семантика **look-ahead** (by-design, formalized Wave 14-G session-33):
-        triggers fire когда due_ts попадает в окно ``now + _POLL_INTERVAL``
-        (т.е. до 30 секунд раньше wall-clock due-time).
-
-        Почему look-ahead, а не strict ``due_ts <= now``:
-
-        1. ``cron_native_store.next_due()`` всегда округляет вверх к следующей
-           минуте (base ``+60s`` от now). При ``poll_interval=30s`` strict-режим
-           **никогда** не сработал бы — это привело к 5-дневному silent-регрессу
-           (commit 9e67c72 → восстановлено в c510347).
-        2. Krab cron используется для дайджестов/уведомлений/cleanup-задач, где
-           ±30s неточность wall-clock допустима (Weekly Digest at Sun 09:00 →
-           early at Sun 08:59:30 не критично).
-        3. Look-ahead устойчивее к poll-skip из-за рестарта (нет miss-tick).
-        4. Cooldown ``(now - last) > 50s`` защищает от двойного fire.
+            assert self._wakeup is not None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # ─── Due-индекс ─────────────────────────────────────────────────────────
+
+    def _refresh_index(self) -> None:
+        """Пересобирает heap, если store изменился (listener или mtime/size файла).
+
+        Для job'ов с неизменным cron_spec сохраняется уже посчитанный due_ts —
+        пересборка не теряет fire, наступивший между изменением и тиком, и не
+        пересчитывает next_due у всех jobs.
         """
-        now = time.time()
-        jobs = cron_native_store.list_jobs()
-        for job in jobs:
+        signature = cron_native_store.storage_signature()
+        if not self._dirty and signature == self._signature:
+            return
+        self._dirty = False
+        self._signature = signature
+        known = {
+            job_id: (due_ts, str(self._jobs[job_id].get("cron_spec") or ""))
+            for due_ts, job_id in self._heap
+            if job_id in self._jobs
+        }
+        jobs: dict[str, dict] = {}
+        heap: list[tuple[float, str]] = []
+        for job in cron_native_store.list_jobs():
             if not job.get("enabled"):
                 continue
             job_id = str(job.get("id") or "")
-            due_ts = cron_native_store.next_due(job)
+            prev = known.get(job_id)
+            if prev is not None and prev[1] == str(job.get("cron_spec") or ""):
+                due_ts: float | None = prev[0]
+            else:
+                due_ts = cron_native_store.next_due(job)
             if due_ts is None:
                 continue
-            # Trigger когда due_ts попадает в look-ahead окно (now + POLL_INTERVAL).
-            # next_due() всегда возвращает будущее время (+1min base), поэтому
-            # нельзя проверять `due_ts <= now` — оно никогда не будет true.
-            # Cooldown >50s защищает от двойного срабатывания.
+            jobs[job_id] = job
+            heap.append((due_ts, job_id))
+        heapq.heapify(heap)
+        self._jobs = jobs
+        self._heap = heap
+
+    async def _tick(self) -> float:
+        """Один проход: запускает наступившие jobs, возвращает секунды до ближайшего.
+
+        Fire строго по ``due_ts <= now``. Прежний poll раз в 30с с look-ahead
+        окном ``now + 30s`` (fire до 30с раньше wall-clock) больше не нужен:
+        планировщик спит ровно до головы heap. ``next_due`` считается один раз
+        после каждого fire — от ``max(due_ts, now)``, так что пропущенные за
+        время сна хоста срабатывания схлопываются в одно.
+        Cooldown ``_FIRE_COOLDOWN_SEC`` защищает от двойного fire.
+        """
+        self._refresh_index()
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            due_ts, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
             last = self._last_fired.get(job_id, 0.0)
-            if due_ts <= now + _POLL_INTERVAL and (now - last) > 50:
+            if due_ts - last > _FIRE_COOLDOWN_SEC:
                 self._last_fired[job_id] = due_ts
                 asyncio.ensure_future(self._run_job(job))
+            base = datetime.fromtimestamp(max(due_ts, now), tz=timezone.utc)
+            next_ts = cron_native_store.next_due(job, now=base)
+            if next_ts is not None and next_ts > due_ts:
+                heapq.heappush(self._heap, (next_ts, job_id))
+        if not self._heap:
+            return _MAX_IDLE_SEC
+        return min(_MAX_IDLE_SEC, max(0.0, self._heap[0][0] - time.time()))
 
     async def _run_job(self, job: dict) -> None:
         """Выполняет один job: вызывает sender с промптом."""
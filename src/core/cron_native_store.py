@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import json
 import uuid
+from collections.abc import Callable
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
@@ -19,6 +20,8 @@ logger = get_logger(__name__)
 # Путь к файлу хранения (переопределяется через configure_default_path)
 _DEFAULT_PATH = Path.home() / ".openclaw" / "krab_runtime_state" / "cron_native_jobs.json"
 _storage_path: Path = _DEFAULT_PATH
+# Подписчики на изменение jobs (scheduler будит свой due-индекс раньше срока)
+_change_listeners: list[Callable[[], None]] = []
 
 
 def configure_default_path(path: Path) -> None:
@@ -51,6 +54,40 @@ def _save(jobs: list[dict]) -> None:
     _storage_path.parent.mkdir(parents=True, exist_ok=True)
     payload: dict[str, Any] = {"version": 1, "jobs": jobs}
     _storage_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    _notify_changed()
+
+
+def add_change_listener(callback: Callable[[], None]) -> None:
+    """Подписка на любое изменение jobs (add/remove/toggle/mark_run)."""
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
+
+
+def remove_change_listener(callback: Callable[[], None]) -> None:
+    """Снимает подписку (no-op если не подписан)."""
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+
+def _notify_changed() -> None:
+    for callback in list(_change_listeners):
+        try:
+            callback()
+        except Exception as exc:  # noqa: BLE001 — listener не должен ломать запись
+            logger.warning(
+                "cron_native_store_listener_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
+
+def storage_signature() -> tuple[int, int] | None:
+    """(mtime_ns, size) файла jobs — дешёвая проверка ручной правки на диске."""
+    try:
+        st = _storage_path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 
 def list_jobs() -> list[dict]:
@@ -16,11 +16,14 @@ import asyncio
 import os
 import shutil
 from dataclasses import dataclass
-from typing import Callable, Iterable
+from typing import TYPE_CHECKING, Callable, Iterable
 
 from .logger import get_logger
 from .metrics.disk_space import record_disk_usage
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 logger = get_logger(__name__)
 
 
@@ -128,6 +131,24 @@ def _resolve_interval(default: int = DEFAULT_INTERVAL_SEC) -> int:
     return value if value > 0 else default
 
 
+def register_disk_space_monitor(
+    scheduler: "PeriodicScheduler",
+    paths: Iterable[str] | None = None,
+    *,
+    interval_sec: int | None = None,
+) -> None:
+    """Snapshot mount points job'ой общего periodic_scheduler (первый — сразу)."""
+    interval = interval_sec if interval_sec is not None else _resolve_interval()
+    targets = tuple(paths) if paths is not None else DEFAULT_PATHS
+    scheduler.register(
+        "disk_space_monitor",
+        lambda: collect_snapshots(targets),
+        interval,
+        initial_delay_sec=0,
+    )
+    logger.info("disk_space_monitor_scheduled", interval_sec=interval, mounts=list(targets))
+
+
 async def disk_space_monitor_loop(
     paths: Iterable[str] | None = None,
     *,
@@ -0,0 +1,624 @@
+# -*- coding: utf-8 -*-
+"""
+Сегментированный append-only лог событий для runtime JSONL-файлов.
+
+Зачем существует:
+
+Телеметрия Краба (``route_switches.jsonl``, ``bypass_perf.jsonl``,
+``runs_history.jsonl``, ``catchup_history.jsonl``, ``routing_decisions.jsonl``,
+``quota_history.jsonl``...) писалась ad-hoc: часть writer'ов на каждый append
+перечитывала и переписывала файл целиком (FIFO trim), а reader'ы парсили весь
+файл на каждый запрос даже ради окна в один час.
+
+Раскладка на диске (на примере ``bypass_perf.jsonl``):
+
+- ``bypass_perf.jsonl`` — активный сегмент (путь не меняется, внешние
+  tail/grep и снапшоты продолжают работать);
+- ``bypass_perf.000001.jsonl`` ... — закрытые сегменты, seq растёт;
+- ``bypass_perf.index.json`` — sidecar-индекс закрытых сегментов: число
+  записей, размер, min/max ts и разреженный индекс блоков
+  ``[byte_offset, max_ts]`` (один блок на ``index_every`` записей).
+
+### Возможности
+- ``append(record)`` — O(1): одна строка в активный сегмент (``ab``);
+  при превышении ``segment_max_bytes`` / ``segment_max_records`` сегмент
+  закрывается переименованием, индекс пишется один раз.
+- ``iter_since(ts)`` — хронологический обход окна: сегменты и блоки, чей
+  max_ts < ts, пропускаются без чтения и парсинга.
+- ``iter_reverse()`` / ``tail(n)`` — обход с конца блоками по 64KB.
+- ``snapshot_since(ts)`` / ``read_after(cursor)`` — инкрементальное чтение
+  для in-memory агрегатов: только записи, дописанные после курсора.
+- Retention: ``max_segments``, ``max_total_bytes``, ``max_age_sec`` —
+  удаляются только закрытые сегменты, целиком.
+
+Ts записи берётся из поля ``ts_field``: unix-секунды или ISO-8601 строка.
+Записи без валидного ts никогда не отсекаются фильтром окна.
+
+Логи одного пути разделяют instance через ``get_event_log(path, ...)``.
+Запись потокобезопасна внутри процесса; между процессами полагаемся на
+атомарность O_APPEND для коротких строк.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_INDEX_EVERY = 64
+_REVERSE_CHUNK = 64 * 1024
+_INF = math.inf
+
+
+def coerce_ts(value: Any) -> float | None:
+    """unix-секунды / числовая строка / ISO-8601 → float; иначе None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def _parse_line(raw: bytes) -> dict[str, Any] | None:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+@dataclass
+class SegmentMeta:
+    """Метаданные сегмента: счётчики, диапазон ts и блоки ``[offset, max_ts]``."""
+
+    records: int = 0
+    size: int = 0
+    min_ts: float = _INF
+    max_ts: float = -_INF
+    blocks: list[list[float]] = field(default_factory=list)
+    # inode/mtime — только для активного сегмента (детект внешней перезаписи)
+    inode: int = 0
+    mtime_ns: int = 0
+
+    def add(self, offset: int, length: int, ts: float | None, index_every: int) -> None:
+        # Запись без ts не должна отсекаться окном → +inf в max блока.
+        block_ts = _INF if ts is None else ts
+        if self.records % index_every == 0:
+            self.blocks.append([float(offset), block_ts])
+        elif block_ts > self.blocks[-1][1]:
+            self.blocks[-1][1] = block_ts
+        if ts is not None:
+            self.min_ts = min(self.min_ts, ts)
+        self.max_ts = max(self.max_ts, block_ts)
+        self.records += 1
+        self.size = offset + length
+
+    def to_json(self) -> dict[str, Any]:
+        def _enc(v: float) -> float | None:
+            return v if math.isfinite(v) else None
+
+        return {
+            "records": self.records,
+            "size": self.size,
+            "min_ts": _enc(self.min_ts),
+            "max_ts": _enc(self.max_ts) if self.max_ts != _INF else "inf",
+            "blocks": [[int(off), _enc(ts) if ts != _INF else "inf"] for off, ts in self.blocks],
+        }
+
+    @classmethod
+    def from_json(cls, raw: dict[str, Any]) -> "SegmentMeta":
+        def _dec(v: Any, empty: float) -> float:
+            if v == "inf":
+                return _INF
+            return float(v) if isinstance(v, (int, float)) else empty
+
+        return cls(
+            records=int(raw.get("records", 0)),
+            size=int(raw.get("size", 0)),
+            min_ts=_dec(raw.get("min_ts"), _INF),
+            max_ts=_dec(raw.get("max_ts"), -_INF),
+            blocks=[[float(off), _dec(ts, -_INF)] for off, ts in raw.get("blocks", [])],
+        )
+
+
+class EventLog:
+    """Append-only JSONL-лог с ротацией сегментов, индексом по ts и retention."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ts_field: str = "ts",
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+        segment_max_records: int | None = None,
+        max_segments: int | None = None,
+        max_total_bytes: int | None = None,
+        max_age_sec: float | None = None,
+        index_every: int = DEFAULT_INDEX_EVERY,
+    ) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._active: SegmentMeta | None = None
+        self._sealed_meta: dict[str, SegmentMeta] | None = None
+        self.configure(
+            ts_field=ts_field,
+            segment_max_bytes=segment_max_bytes,
+            segment_max_records=segment_max_records,
+            max_segments=max_segments,
+            max_total_bytes=max_total_bytes,
+            max_age_sec=max_age_sec,
+            index_every=index_every,
+        )
+
+    def configure(
+        self,
+        *,
+        ts_field: str = "ts",
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+        segment_max_records: int | None = None,
+        max_segments: int | None = None,
+        max_total_bytes: int | None = None,
+        max_age_sec: float | None = None,
+        index_every: int = DEFAULT_INDEX_EVERY,
+    ) -> None:
+        """Обновляет пороги ротации/retention (применяются со следующего append)."""
+        self.ts_field = ts_field
+        self.segment_max_bytes = max(1, int(segment_max_bytes))
+        self.segment_max_records = max(1, int(segment_max_records)) if segment_max_records else None
+        self.max_segments = max(0, int(max_segments)) if max_segments is not None else None
+        self.max_total_bytes = int(max_total_bytes) if max_total_bytes else None
+        self.max_age_sec = float(max_age_sec) if max_age_sec else None
+        if self._active is not None and index_every != getattr(self, "index_every", index_every):
+            self._active = None  # блоки активного сегмента пересчитаются
+        self.index_every = max(1, int(index_every))
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(f"{self.path.stem}.index.json")
+
+    def _sealed_path(self, seq: int) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{seq:06d}{self.path.suffix}")
+
+    def _sealed_segments(self) -> list[tuple[int, Path]]:
+        pattern = re.compile(
+            rf"^{re.escape(self.path.stem)}\.(\d{{6,}}){re.escape(self.path.suffix)}$"
+        )
+        try:
+            names = os.listdir(self.path.parent)
+        except OSError:
+            return []
+        found = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), self.path.with_name(name)))
+        found.sort()
+        return found
+
+    def segments(self) -> list[Path]:
+        """Пути сегментов от старого к новому (активный — последний)."""
+        paths = [p for _, p in self._sealed_segments()]
+        if self.path.exists():
+            paths.append(self.path)
+        return paths
+
+    def _ts_of(self, record: dict[str, Any]) -> float | None:
+        return coerce_ts(record.get(self.ts_field))
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def _scan(self, path: Path, meta: SegmentMeta | None = None) -> SegmentMeta:
+        """Строит (или дописывает с ``meta.size``) метаданные сегмента чтением файла."""
+        meta = meta or SegmentMeta()
+        try:
+            with path.open("rb") as fh:
+                fh.seek(meta.size)
+                offset = meta.size
+                for raw in fh:
+                    if not raw.endswith(b"\n"):
+                        break  # недописанный хвост — подхватим позже
+                    parsed = _parse_line(raw)
+                    ts = self._ts_of(parsed) if parsed is not None else None
+                    if parsed is None:
+                        # Битая строка: учитываем байты, но не запись.
+                        meta.size = offset + len(raw)
+                    else:
+                        meta.add(offset, len(raw), ts, self.index_every)
+                    offset += len(raw)
+        except OSError:
+            pass
+        return meta
+
+    def _sync_active(self) -> SegmentMeta:
+        """Метаданные активного сегмента; пересчитываются, если файл менялся извне."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._active = SegmentMeta()
+            return self._active
+        meta = self._active
+        if meta is None or meta.inode != st.st_ino or st.st_size < meta.size:
+            meta = self._scan(self.path)
+        elif st.st_size > meta.size:
+            # Дописан — сканируем только хвост; если на границе не перевод
+            # строки, файл переписан целиком (write_text и т.п.).
+            meta = self._scan(self.path, meta if _ends_line_at(self.path, meta.size) else None)
+        elif st.st_mtime_ns != meta.mtime_ns:
+            meta = self._scan(self.path)  # переписан с тем же размером
+        meta.inode = st.st_ino
+        meta.mtime_ns = st.st_mtime_ns
+        self._active = meta
+        return meta
+
+    def _load_sealed_meta(self) -> dict[str, SegmentMeta]:
+        if self._sealed_meta is None:
+            loaded: dict[str, SegmentMeta] = {}
+            try:
+                raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+                for name, item in (raw.get("segments") or {}).items():
+                    loaded[name] = SegmentMeta.from_json(item)
+            except (OSError, ValueError, TypeError, AttributeError):
+                loaded = {}
+            self._sealed_meta = loaded
+        return self._sealed_meta
+
+    def _meta_for_sealed(self, path: Path) -> SegmentMeta:
+        metas = self._load_sealed_meta()
+        meta = metas.get(path.name)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = -1
+        if meta is None or meta.size != size:
+            meta = self._scan(path)
+            metas[path.name] = meta
+            self._save_index()
+        return meta
+
+    def _save_index(self) -> None:
+        metas = self._load_sealed_meta()
+        live = {p.name for _, p in self._sealed_segments()}
+        payload = {
+            "segments": {name: m.to_json() for name, m in sorted(metas.items()) if name in live}
+        }
+        try:
+            fd, tmp = tempfile.mkstemp(
+                prefix=f".{self.path.stem}.index.", suffix=".tmp", dir=str(self.path.parent)
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh)
+            os.replace(tmp, self.index_path)
+        except OSError as exc:
+            logger.debug("event_log_index_save_failed", path=str(self.path), error=str(exc))
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def append(self, record: dict[str, Any]) -> bool:
+        """Дописывает запись. Никогда не raise: False при ошибке IO."""
+        try:
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        except (TypeError, ValueError) as exc:
+            logger.debug("event_log_encode_failed", path=str(self.path), error=str(exc))
+            return False
+        ts = self._ts_of(record)
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("ab") as fh:
+                    st = os.fstat(fh.fileno())
+                    meta = self._active
+                    if (
+                        meta is None
+                        or meta.inode != st.st_ino
+                        or meta.size != st.st_size
+                        or meta.mtime_ns != st.st_mtime_ns
+                    ):
+                        meta = self._sync_active()
+                    offset = st.st_size
+                    if offset != meta.size:
+                        # Чужой недописанный хвост: закрываем строку, чтобы
+                        # наша запись не склеилась с ним.
+                        fh.write(b"\n")
+                        offset += 1
+                    fh.write(line)
+                    fh.flush()
+                    meta.add(offset, len(line), ts, self.index_every)
+                    meta.mtime_ns = os.fstat(fh.fileno()).st_mtime_ns
+            except OSError as exc:
+                logger.debug("event_log_append_failed", path=str(self.path), error=str(exc))
+                return False
+            if meta.size >= self.segment_max_bytes or (
+                self.segment_max_records is not None and meta.records >= self.segment_max_records
+            ):
+                self._rotate()
+        return True
+
+    def _rotate(self) -> int:
+        """Закрывает активный сегмент и применяет retention; → число удалённых."""
+        meta = self._sync_active()
+        if meta.records == 0:
+            return 0
+        sealed = self._sealed_segments()
+        seq = sealed[-1][0] + 1 if sealed else 1
+        target = self._sealed_path(seq)
+        try:
+            os.replace(self.path, target)
+        except OSError as exc:
+            logger.debug("event_log_rotate_failed", path=str(self.path), error=str(exc))
+            return 0
+        meta.inode = 0
+        self._load_sealed_meta()[target.name] = meta
+        self._active = SegmentMeta()
+        removed = self._apply_retention()
+        self._save_index()
+        return removed
+
+    def _apply_retention(self) -> int:
+        sealed = self._sealed_segments()
+        metas = self._load_sealed_meta()
+        doomed: list[Path] = []
+        if self.max_segments is not None and len(sealed) > self.max_segments:
+            cut = len(sealed) - self.max_segments
+            doomed.extend(p for _, p in sealed[:cut])
+            sealed = sealed[cut:]
+        if self.max_age_sec is not None:
+            cutoff = time.time() - self.max_age_sec
+            while sealed and self._meta_for_sealed(sealed[0][1]).max_ts < cutoff:
+                doomed.append(sealed.pop(0)[1])
+        if self.max_total_bytes is not None:
+            active_size = self._active.size if self._active is not None else 0
+            total = active_size + sum(self._meta_for_sealed(p).size for _, p in sealed)
+            while sealed and total > self.max_total_bytes:
+                _, path = sealed.pop(0)
+                total -= self._meta_for_sealed(path).size
+                doomed.append(path)
+        for path in doomed:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            metas.pop(path.name, None)
+        return len(doomed)
+
+    def enforce_retention(self) -> int:
+        """Применяет retention вне ротации (например, по возрасту); → число удалённых.
+
+        При ``max_age_sec`` активный сегмент со старейшей записью старше порога
+        закрывается: на редком логе он иначе копил бы записи без срока.
+        """
+        with self._lock:
+            removed = 0
+            if self.max_age_sec is not None:
+                active = self._sync_active()
+                if active.records and active.min_ts < time.time() - self.max_age_sec:
+                    removed += self._rotate()
+            removed += self._apply_retention()
+            if removed:
+                self._save_index()
+            return removed
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def _metas(self) -> list[tuple[Path, SegmentMeta]]:
+        with self._lock:
+            out = [(p, self._meta_for_sealed(p)) for _, p in self._sealed_segments()]
+            if self.path.exists():
+                out.append((self.path, self._sync_active()))
+            return out
+
+    def iter_since(self, since_ts: float | None = None) -> Iterator[dict[str, Any]]:
+        """Записи от старых к новым; блоки с max_ts < since_ts не читаются.
+
+        Фильтр грубый (по блокам): вызывающий по-прежнему сверяет ts записи.
+        """
+        for path, meta in self._metas():
+            if since_ts is not None and meta.max_ts < since_ts:
+                continue
+            blocks = meta.blocks
+            try:
+                with path.open("rb") as fh:
+                    for i, (offset, block_ts) in enumerate(blocks):
+                        if since_ts is not None and block_ts < since_ts:
+                            continue
+                        end = blocks[i + 1][0] if i + 1 < len(blocks) else meta.size
+                        fh.seek(int(offset))
+                        chunk = fh.read(int(end - offset))
+                        for raw in chunk.splitlines():
+                            parsed = _parse_line(raw)
+                            if parsed is not None:
+                                yield parsed
+            except OSError:
+                continue
+
+    def iter_reverse(self) -> Iterator[dict[str, Any]]:
+        """Записи от новых к старым (чтение файлов с конца блоками)."""
+        for path in reversed(self.segments()):
+            try:
+                with path.open("rb") as fh:
+                    for raw in _reverse_lines(fh):
+                        parsed = _parse_line(raw)
+                        if parsed is not None:
+                            yield parsed
+            except OSError:
+                continue
+
+    def tail(self, limit: int) -> list[dict[str, Any]]:
+        """Последние ``limit`` записей в хронологическом порядке."""
+        if limit <= 0:
+            return []
+        out: list[dict[str, Any]] = []
+        for record in self.iter_reverse():
+            out.append(record)
+            if len(out) >= limit:
+                break
+        out.reverse()
+        return out
+
+    # ------------------------------------------------------------------
+    # Инкрементальные потребители: cursor = (inode сегмента, offset)
+    # ------------------------------------------------------------------
+
+    def snapshot_since(
+        self, since_ts: float | None = None
+    ) -> tuple[list[dict[str, Any]], tuple[int, int]]:
+        """Записи окна (как ``iter_since``) + курсор конца лога, атомарно с append."""
+        with self._lock:
+            records = list(self.iter_since(since_ts))
+            return records, self._end_cursor(self._metas())
+
+    def read_after(
+        self, cursor: tuple[int, int]
+    ) -> tuple[list[dict[str, Any]], tuple[int, int]] | None:
+        """Записи, дописанные после ``cursor``, и новый курсор.
+
+        None — курсор невалиден (сегмент удалён retention'ом или файл
+        переписан извне): потребитель должен перечитать окно заново.
+        """
+        inode, offset = cursor
+        with self._lock:
+            metas = self._metas()
+            if not metas:
+                return ([], cursor) if inode == 0 else None
+            start = None
+            for i, (path, _) in enumerate(metas):
+                try:
+                    if os.stat(path).st_ino == inode:
+                        start = i
+                        break
+                except OSError:
+                    continue
+            if start is None:
+                return None
+            path, meta = metas[start]
+            if meta.size < offset or not _ends_line_at(path, offset):
+                return None
+            records: list[dict[str, Any]] = []
+            for i in range(start, len(metas)):
+                path, meta = metas[i]
+                begin = offset if i == start else 0
+                try:
+                    with path.open("rb") as fh:
+                        fh.seek(begin)
+                        chunk = fh.read(max(0, meta.size - begin))
+                except OSError:
+                    return None
+                for raw in chunk.splitlines():
+                    parsed = _parse_line(raw)
+                    if parsed is not None:
+                        records.append(parsed)
+            return records, self._end_cursor(metas)
+
+    @staticmethod
+    def _end_cursor(metas: list[tuple[Path, SegmentMeta]]) -> tuple[int, int]:
+        if not metas:
+            return (0, 0)
+        path, meta = metas[-1]
+        try:
+            return (os.stat(path).st_ino, meta.size)
+        except OSError:
+            return (0, 0)
+
+    def stats(self) -> dict[str, Any]:
+        metas = self._metas()
+        return {
+            "path": str(self.path),
+            "segments": len(metas),
+            "records": sum(m.records for _, m in metas),
+            "bytes": sum(m.size for _, m in metas),
+        }
+
+
+def _ends_line_at(path: Path, offset: int) -> bool:
+    """True, если байт перед ``offset`` — перевод строки (граница записи)."""
+    if offset <= 0:
+        return True
+    try:
+        with path.open("rb") as fh:
+            fh.seek(offset - 1)
+            return fh.read(1) == b"\n"
+    except OSError:
+        return False
+
+
+def _reverse_lines(fh: Any) -> Iterator[bytes]:
+    """Строки бинарного файла с конца (без завершающих переводов строк)."""
+    fh.seek(0, os.SEEK_END)
+    pos = fh.tell()
+    remainder = b""
+    while pos > 0:
+        step = min(_REVERSE_CHUNK, pos)
+        pos -= step
+        fh.seek(pos)
+        chunk = fh.read(step) + remainder
+        lines = chunk.split(b"\n")
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            if line:
+                yield line
+    if remainder:
+        yield remainder
+
+
+_registry: dict[Path, EventLog] = {}
+_registry_lock = threading.Lock()
+
+
+def get_event_log(path: Path, **options: Any) -> EventLog:
+    """Общий EventLog для пути; ``options`` (пороги) обновляются при каждом вызове."""
+    key = Path(path)
+    with _registry_lock:
+        log = _registry.get(key)
+        if log is None:
+            log = _registry[key] = EventLog(key, **options)
+            return log
+    if options:
+        log.configure(**options)
+    return log
+
+
+__all__ = [
+    "DEFAULT_SEGMENT_MAX_BYTES",
+    "EventLog",
+    "SegmentMeta",
+    "coerce_ts",
+    "get_event_log",
+]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+src/core/gateway_scheduler.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Priority-aware планировщик слотов OpenClaw gateway.
+
+Раньше `_GatewaySlot` в `openclaw_client` был FIFO `asyncio.Semaphore`:
+owner DM, swarm-раунды, cron-дайджесты и catchup replay стояли в одной
+очереди, и пачка фоновой работы держала owner-запрос до 30s.
+
+Правила выдачи слота (при каждом освобождении):
+  1. P0 (DM / mention / reply / команда) всегда первым в очереди — P0
+     «вытесняет» ожидающих (уже выполняющиеся запросы не прерываются).
+  2. Per-class cap: P2 (фон) по умолчанию занимает не больше capacity-1
+     слотов, так что P0/P1 не ждут, пока фон освободит всё.
+  3. Aging: P2, ждущий дольше `aging_sec`, поднимается до уровня P1 и
+     внутри уровня обслуживается FIFO — фон не голодает под потоком P1.
+
+Приоритет текущего запроса передаётся через ContextVar (`gateway_priority`),
+как `_swarm_team_ctx` в swarm_tool_allowlist: message handler выставляет
+результат `classify_priority`, catchup/cron — P2. Вложенная привязка может
+только понизить приоритет (catchup replay owner DM остаётся P2).
+Без привязки — P1 (прежнее поведение для неразмеченных вызовов).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from .message_priority_dispatcher import Priority
+
+DEFAULT_AGING_SEC = 5.0
+
+_gateway_priority_ctx: contextvars.ContextVar[Priority | None] = contextvars.ContextVar(
+    "gateway_priority",
+    default=None,
+)
+
+
+def current_gateway_priority() -> Priority:
+    """Приоритет текущего контекста (P1, если не выставлен)."""
+    value = _gateway_priority_ctx.get()
+    return Priority.P1_NORMAL if value is None else value
+
+
+@contextmanager
+def gateway_priority(priority: Priority) -> Iterator[Priority]:
+    """Привязать приоритет gateway-запросов к текущему контексту.
+
+    Внешняя привязка ограничивает сверху: внутри P2 нельзя поднять до P0.
+    """
+    outer = _gateway_priority_ctx.get()
+    effective = Priority(priority) if outer is None else max(outer, Priority(priority))
+    token = _gateway_priority_ctx.set(effective)
+    try:
+        yield effective
+    finally:
+        _gateway_priority_ctx.reset(token)
+
+
+def priority_label(priority: Priority) -> str:
+    """Короткий label для логов/метрик: "p0" / "p1" / "p2"."""
+    return f"p{int(priority)}"
+
+
+def _resolve_aging_sec(default: float = DEFAULT_AGING_SEC) -> float:
+    """Env ``KRAB_GATEWAY_AGING_SEC`` (range 0.5-60, default 5.0)."""
+    raw = os.getenv("KRAB_GATEWAY_AGING_SEC", "").strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(0.5, min(value, 60.0))
+
+
+def _resolve_background_cap(capacity: int) -> int:
+    """Env ``KRAB_GATEWAY_P2_MAX_CONCURRENT`` (default capacity-1, min 1)."""
+    default = max(1, capacity - 1)
+    raw = os.getenv("KRAB_GATEWAY_P2_MAX_CONCURRENT", "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, capacity))
+
+
+@dataclass(slots=True)
+class _Waiter:
+    priority: Priority
+    enqueued_at: float
+    seq: int
+    future: asyncio.Future = field(repr=False)
+
+
+class GatewayScheduler:
+    """Взвешенный priority-планировщик ограниченного числа слотов."""
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        class_caps: dict[Priority, int] | None = None,
+        aging_sec: float | None = None,
+    ) -> None:
+        self.capacity = max(1, int(capacity))
+        caps = {
+            Priority.P0_INSTANT: self.capacity,
+            Priority.P1_NORMAL: self.capacity,
+            Priority.P2_LOW: _resolve_background_cap(self.capacity),
+        }
+        for prio, cap in (class_caps or {}).items():
+            caps[Priority(prio)] = max(1, min(int(cap), self.capacity))
+        self._caps = caps
+        self.aging_sec = _resolve_aging_sec() if aging_sec is None else max(0.0, aging_sec)
+        self._in_use = 0
+        self._active: dict[Priority, int] = {p: 0 for p in Priority}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> int:
+        # P0 не стареет и не догоняется: aging поднимает максимум до P1.
+        if waiter.priority == Priority.P0_INSTANT:
+            return 0
+        if self.aging_sec <= 0:
+            return int(Priority.P1_NORMAL)
+        steps = int((now - waiter.enqueued_at) / self.aging_sec)
+        return max(int(Priority.P1_NORMAL), int(waiter.priority) - steps)
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._in_use < self.capacity and self._waiters:
+            best: _Waiter | None = None
+            best_key: tuple[int, int] | None = None
+            for waiter in self._waiters:
+                if waiter.future.done():
+                    continue
+                if self._active[waiter.priority] >= self._caps[waiter.priority]:
+                    continue
+                key = (self._effective_priority(waiter, now), waiter.seq)
+                if best_key is None or key < best_key:
+                    best, best_key = waiter, key
+            if best is None:
+                return
+            self._waiters.remove(best)
+            self._in_use += 1
+            self._active[best.priority] += 1
+            best.future.set_result(None)
+
+    async def acquire(self, priority: Priority, *, timeout: float | None = None) -> None:
+        """Дождаться слота. asyncio.TimeoutError — если не дождались за timeout."""
+        priority = Priority(priority)
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority=priority,
+            enqueued_at=time.monotonic(),
+            seq=next(self._seq),
+            future=loop.create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+        if waiter.future.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот выдан одновременно с timeout/cancel — возвращаем его.
+                self.release(priority)
+            else:
+                waiter.future.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, priority: Priority) -> None:
+        priority = Priority(priority)
+        if self._active[priority] > 0:
+            self._active[priority] -= 1
+        if self._in_use > 0:
+            self._in_use -= 1
+        self._dispatch()
+
+    def snapshot(self) -> dict[str, object]:
+        """Состояние для /metrics и диагностики."""
+        waiting = {priority_label(p): 0 for p in Priority}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                waiting[priority_label(waiter.priority)] += 1
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "active": {priority_label(p): n for p, n in self._active.items()},
+            "waiting": waiting,
+            "caps": {priority_label(p): n for p, n in self._caps.items()},
+        }
+
+
+__all__ = [
+    "GatewayScheduler",
+    "current_gateway_priority",
+    "gateway_priority",
+    "priority_label",
+]
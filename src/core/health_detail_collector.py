@@ -28,6 +28,8 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
+from .event_log import coerce_ts, get_event_log
+
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
 
@@ -184,24 +186,16 @@ def _collect_health_catchup() -> dict[str, Any]:
     history_path = _runtime_state_dir() / "catchup_history.jsonl"
     if history_path.exists():
         try:
-            lines = history_path.read_text(encoding="utf-8").splitlines()
+            tail = get_event_log(history_path).tail(1)
         except OSError as exc:
             return {"error": f"read fail: {exc!s}"[:120]}
-        for line in reversed(lines):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                if isinstance(entry, dict):
-                    return {
-                        "ts": entry.get("ts") or entry.get("timestamp"),
-                        "target_count": entry.get("target_count"),
-                        "total_caught_up": entry.get("total_caught_up"),
-                        "total_skipped_self": entry.get("total_skipped_self"),
-                    }
-            except (ValueError, TypeError):
-                continue
+        for entry in tail:
+            return {
+                "ts": entry.get("ts") or entry.get("timestamp"),
+                "target_count": entry.get("target_count"),
+                "total_caught_up": entry.get("total_caught_up"),
+                "total_skipped_self": entry.get("total_skipped_self"),
+            }
         return {"error": "no valid entries"}
     # Fallback: ничего не нашли
     return {"error": "no catchup_history.jsonl"}
@@ -248,39 +242,25 @@ def _collect_health_routes_24h() -> dict[str, Any]:
     log_path = _runtime_state_dir() / "route_switches.jsonl"
     if not log_path.exists():
         return {"count_24h": 0, "top_reason": None}
-    try:
-        lines = log_path.read_text(encoding="utf-8").splitlines()
-    except OSError as exc:
-        return {"count_24h": 0, "error": str(exc)[:120]}
 
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).timestamp()
     reasons: Counter[str] = Counter()
     count = 0
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            entry = json.loads(line)
-        except (ValueError, TypeError):
-            continue
-        if not isinstance(entry, dict):
-            continue
-        ts_raw = entry.get("ts")
-        if not isinstance(ts_raw, str):
-            continue
-        try:
-            ts = datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-        except (ValueError, TypeError):
-            continue
-        if ts < cutoff:
-            continue
-        count += 1
-        reason = entry.get("reason")
-        if isinstance(reason, str) and reason:
-            reasons[reason] += 1
+    try:
+        # Индекс блоков пропускает записи старше окна без парсинга.
+        for entry in get_event_log(log_path).iter_since(cutoff):
+            ts_raw = entry.get("ts")
+            if not isinstance(ts_raw, str):
+                continue
+            ts = coerce_ts(ts_raw)
+            if ts is None or ts < cutoff:
+                continue
+            count += 1
+            reason = entry.get("reason")
+            if isinstance(reason, str) and reason:
+                reasons[reason] += 1
+    except OSError as exc:
+        return {"count_24h": 0, "error": str(exc)[:120]}
 
     top_reason = reasons.most_common(1)[0][0] if reasons else None
     return {"count_24h": count, "top_reason": top_reason}
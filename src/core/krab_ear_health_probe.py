@@ -37,11 +37,14 @@ import os
 import time
 import traceback
 from pathlib import Path
-from typing import Any, Callable
+from typing import TYPE_CHECKING, Any, Callable
 
 import httpx
 import structlog
 
+if TYPE_CHECKING:
+    from src.core.periodic_scheduler import PeriodicScheduler
+
 logger = structlog.get_logger(__name__)
 
 # Дефолтный backend URL — синхронизирован с ecosystem_health.py.
@@ -302,6 +305,16 @@ class KrabEarHealthProbe:
         scaled = self._interval * (1 << k)
         return min(_BACKOFF_MAX_SEC, max(self._interval, int(scaled)))
 
+    @staticmethod
+    def _enabled_via_env() -> bool:
+        flag = (
+            os.getenv("KRAB_EAR_HEALTH_PROBE_ENABLED") or os.getenv("KRAB_EAR_PROBE_ENABLED") or "1"
+        )
+        if flag.strip().lower() not in ("1", "true", "yes"):
+            logger.info("krab_ear_health_probe_disabled_via_env")
+            return False
+        return True
+
     def start(self) -> None:
         """Запускает background loop (идемпотентен).
 
@@ -310,11 +323,7 @@ class KrabEarHealthProbe:
         Если probe self-disabled (KE не установлен) — start всё равно отрабатывает,
         но loop сразу выходит из probe_once → no-op.
         """
-        flag = (
-            os.getenv("KRAB_EAR_HEALTH_PROBE_ENABLED") or os.getenv("KRAB_EAR_PROBE_ENABLED") or "1"
-        )
-        if flag.strip().lower() not in ("1", "true", "yes"):
-            logger.info("krab_ear_health_probe_disabled_via_env")
+        if not self._enabled_via_env():
             return
         if self._task is not None and not self._task.done():
             return
@@ -330,6 +339,32 @@ class KrabEarHealthProbe:
         if self._task and not self._task.done():
             self._task.cancel()
 
+    def register_periodic(self, scheduler: "PeriodicScheduler") -> None:
+        """Probe job'ой общего periodic_scheduler; backoff — через adaptive-задержку."""
+        if not self._enabled_via_env():
+            return
+        scheduler.register(
+            "krab_ear_health_probe",
+            self._tick,
+            self._interval,
+            initial_delay_sec=0,
+            adaptive=True,
+        )
+        logger.info("krab_ear_health_probe_scheduled", interval_sec=self._interval)
+
+    async def _tick(self) -> float:
+        """Один probe; возвращает задержку до следующего (с учётом backoff)."""
+        try:
+            await self.probe_once()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "krab_ear_health_probe_loop_error",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+            return float(self._interval)
+        return float(self._backoff_interval())
+
     async def _loop(self) -> None:
         while True:
             try:
@@ -4,10 +4,27 @@ language_detect.py — определение языка текста и рез
 
 Используется в Translator MVP для определения языка транскрипта
 и выбора направления перевода на основе profile.language_pair.
+
+detect_language — трёхступенчатый:
+  1. Гистограмма Unicode-скриптов по первым ``_SCRIPT_SAMPLE_CHARS``
+     символам: однозначный скрипт (хангыль → ko, кана → ja,
+     греческий/иврит/тайский) решается без langdetect. Кириллица → ru
+     только при чисто русском алфавите и русском маркере (ы/э/ё): без них
+     текст может быть болгарским, сербским, казахским и т.п.
+  2. Bounded LRU по blake2b-хэшу текста — повторы (эхо, пересланные
+     сообщения, повторные /api/translator) не гоняют n-gram модель.
+  3. ``langdetect.detect`` — только для латиницы, смешанных текстов и
+     скриптов, общих для нескольких языков (хань, арабский, деванагари).
+
+Seed langdetect зафиксирован, поэтому кэш не меняет результат.
 """
 
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections import OrderedDict
+
 from langdetect import DetectorFactory, detect
 
 # Фиксируем seed для детерминизма
@@ -16,6 +33,93 @@ DetectorFactory.seed = 0
 # Минимальная длина текста для надёжной детекции
 _MIN_TEXT_LEN = 5
 
+# Гистограмма строится по префиксу — для длинных транскриптов этого достаточно.
+_SCRIPT_SAMPLE_CHARS = 512
+# Доля букв доминирующего скрипта, начиная с которой текст считается однозначным.
+_SCRIPT_DOMINANCE = 0.8
+_CACHE_MAX_SIZE = 4096
+
+# Русский алфавит: А–я (U+0410–U+044F) и Ё/ё. Любая другая кириллица
+# (uk/be/sr/mk, а также U+0490–U+052F: қ ң ә ө ү ұ һ ...) → langdetect.
+_RUSSIAN_CYRILLIC = frozenset(chr(cp) for cp in range(0x410, 0x450)) | frozenset("Ёё")
+# Буквы, которых нет в bg/uk/sr/mk: без них кириллица неоднозначна.
+_RUSSIAN_MARKERS = frozenset("ыэёЫЭЁ")
+
+# Скрипт → язык, если скрипт однозначно задаёт язык среди профилей langdetect.
+_SCRIPT_LANG = {
+    "cyrillic": "ru",
+    "hangul": "ko",
+    "kana": "ja",
+    "greek": "el",
+    "hebrew": "he",
+    "thai": "th",
+}
+
+_cache: OrderedDict[bytes, str] = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
+
+
+def _script_of(cp: int) -> str:
+    if cp < 0x250:
+        return "latin"
+    if 0x400 <= cp <= 0x52F:
+        return "cyrillic"
+    if 0x370 <= cp <= 0x3FF:
+        return "greek"
+    if 0x590 <= cp <= 0x5FF:
+        return "hebrew"
+    if 0x3040 <= cp <= 0x30FF:
+        return "kana"
+    if 0xAC00 <= cp <= 0xD7AF or 0x1100 <= cp <= 0x11FF:
+        return "hangul"
+    if 0x0E00 <= cp <= 0x0E7F:
+        return "thai"
+    if 0x1E00 <= cp <= 0x1EFF:
+        return "latin"
+    return "other"
+
+
+def _is_russian(text: str) -> bool:
+    has_marker = False
+    for ch in text:
+        if 0x400 <= ord(ch) <= 0x52F and ch.isalpha():
+            if ch not in _RUSSIAN_CYRILLIC:
+                return False
+            has_marker = has_marker or ch in _RUSSIAN_MARKERS
+    return has_marker
+
+
+def _detect_by_script(text: str) -> str | None:
+    """Язык по гистограмме скриптов или None, если нужен langdetect."""
+    counts: dict[str, int] = {}
+    total = 0
+    for ch in text[:_SCRIPT_SAMPLE_CHARS]:
+        if not ch.isalpha():
+            continue
+        script = _script_of(ord(ch))
+        counts[script] = counts.get(script, 0) + 1
+        total += 1
+    if not total:
+        return None
+    # Японский пишется смесью каны и кандзи: любая кана при отсутствии
+    # хангыля/кириллицы/латиницы в большинстве — японский.
+    if counts.get("kana", 0) and counts.get("kana", 0) + counts.get("other", 0) >= (
+        _SCRIPT_DOMINANCE * total
+    ):
+        return "ja"
+    script, count = max(counts.items(), key=lambda item: item[1])
+    if count < _SCRIPT_DOMINANCE * total:
+        return None
+    if script == "cyrillic" and not _is_russian(text):
+        return None
+    return _SCRIPT_LANG.get(script)
+
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
 
 def detect_language(text: str) -> str:
     """
@@ -23,12 +127,45 @@ def detect_language(text: str) -> str:
 
     Возвращает пустую строку если текст слишком короткий или детекция не удалась.
     """
+    global _cache_hits, _cache_misses
     if not text or len(text.strip()) < _MIN_TEXT_LEN:
         return ""
+    text = text.strip()
+    by_script = _detect_by_script(text)
+    if by_script is not None:
+        return by_script
+
+    key = _cache_key(text)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _cache_hits += 1
+            return cached
+        _cache_misses += 1
     try:
-        return detect(text.strip())
+        lang = detect(text)
     except Exception:
-        return ""
+        lang = ""
+    with _cache_lock:
+        _cache[key] = lang
+        while len(_cache) > _CACHE_MAX_SIZE:
+            _cache.popitem(last=False)
+    return lang
+
+
+def language_cache_stats() -> dict[str, int]:
+    """Счётчики LRU (только тексты, дошедшие до langdetect)."""
+    with _cache_lock:
+        return {"size": len(_cache), "hits": _cache_hits, "misses": _cache_misses}
+
+
+def clear_language_cache() -> None:
+    """For tests."""
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        _cache.clear()
+        _cache_hits = _cache_misses = 0
 
 
 def auto_detect_direction(detected_lang: str) -> tuple[str, str]:
@@ -22,12 +22,15 @@ import asyncio
 import subprocess
 import time
 import traceback
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
 
 import structlog
 
 from src.core.subprocess_env import clean_subprocess_env
 
+if TYPE_CHECKING:
+    from src.core.periodic_scheduler import PeriodicScheduler
+
 logger = structlog.get_logger(__name__)
 
 # Префикс для фильтрации launchctl list. ai.openclaw.gateway и com.krab.mcp-*
@@ -199,6 +202,17 @@ class LaunchdHealthMonitor:
         if self._task and not self._task.done():
             self._task.cancel()
 
+    def register_periodic(self, scheduler: "PeriodicScheduler") -> None:
+        """Snapshot job'ой общего periodic_scheduler (первый — сразу, в thread)."""
+        scheduler.register(
+            "launchd_health_monitor",
+            lambda: refresh_snapshot_sync(runner=self._runner, now_fn=self._now_fn),
+            self._interval,
+            initial_delay_sec=0,
+            run_in_thread=True,
+        )
+        logger.info("launchd_health_monitor_scheduled", interval_sec=self._interval)
+
     async def _loop(self) -> None:
         while True:
             try:
@@ -8,6 +8,10 @@ llm_latency_tracker — накопитель LLM latency для Prometheus histo
 
 prometheus_metrics.collect_metrics() читает текущий snapshot и выдаёт
 Prometheus histogram (bucket/sum/count) без сторонних библиотек.
+
+Параллельно каждая series ведёт mergeable quantile sketch
+(``src.core.quantile_sketch``): фиксированные бакеты не дают истинных
+p50/p95/p99, sketch даёт их с относительной ошибкой ≤1%.
 """
 
 from __future__ import annotations
@@ -16,9 +20,14 @@ import threading
 from collections import defaultdict
 from dataclasses import dataclass, field
 
+from .quantile_sketch import QuantileSketch
+
 # Стандартные bucket-границы (секунды), совместимые с Prometheus defaults
 _DEFAULT_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
 
+# Квантили, отдаваемые в snapshot (и в Prometheus gauge)
+QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
 
 @dataclass
 class _SeriesData:
@@ -27,6 +36,7 @@ class _SeriesData:
     buckets: dict[float, int] = field(default_factory=dict)
     total_sum: float = 0.0
     count: int = 0
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
 
     def __post_init__(self) -> None:
         for b in _DEFAULT_BUCKETS:
@@ -57,6 +67,7 @@ class LLMLatencyTracker:
                     s.buckets[b] += 1
             s.total_sum += duration_s
             s.count += 1
+            s.sketch.add(duration_s)
 
     def snapshot(self) -> list[dict]:
         """Вернуть снимок всех series.
@@ -66,6 +77,7 @@ class LLMLatencyTracker:
             - provider, model
             - buckets: {le_str: count}  (le="0.1", …, le="+Inf")
             - sum, count
+            - quantiles: {"0.5": sec, "0.95": sec, "0.99": sec}
         """
         result = []
         with self._lock:
@@ -81,10 +93,20 @@ class LLMLatencyTracker:
                         "buckets": buckets_out,
                         "sum": s.total_sum,
                         "count": s.count,
+                        "quantiles": {str(q): s.sketch.quantile(q) for q in QUANTILES},
                     }
                 )
         return result
 
+    def quantile(self, q: float, provider: str | None = None, model: str | None = None) -> float:
+        """Квантиль latency по series, отфильтрованным provider/model (None = все)."""
+        merged = QuantileSketch()
+        with self._lock:
+            for (p, m), s in self._series.items():
+                if (provider is None or p == provider) and (model is None or m == model):
+                    merged.merge(s.sketch)
+        return merged.quantile(q)
+
     def reset(self) -> None:
         """Сброс всех накопленных данных (тесты / maintenance)."""
         with self._lock:
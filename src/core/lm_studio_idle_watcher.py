@@ -28,6 +28,7 @@ from typing import TYPE_CHECKING, Callable
 import structlog
 
 if TYPE_CHECKING:
+    from src.core.periodic_scheduler import PeriodicScheduler
     from src.model_manager import ModelManager
 
 logger = structlog.get_logger(__name__)
@@ -89,6 +90,13 @@ class LmStudioIdleWatcher:
         # Инъекция часов для тестов; по умолчанию time.time()
         self._now: Callable[[], float] = now_fn or time.time
         self._task: asyncio.Task | None = None
+        self._scheduler: "PeriodicScheduler | None" = None
+
+    def register_periodic(self, scheduler: "PeriodicScheduler") -> None:
+        """Гонять `_check_once` job'ой общего periodic_scheduler вместо своего loop."""
+        self._scheduler = scheduler
+        scheduler.register("lm_studio_idle_watcher", self._check_once, _CHECK_INTERVAL_SEC)
+        logger.info("lm_studio_idle_watcher_scheduled", interval_sec=_CHECK_INTERVAL_SEC)
 
     def start(self) -> None:
         """Запускает background task (идемпотентен — повторный вызов ignored)."""
@@ -97,9 +105,12 @@ class LmStudioIdleWatcher:
         self._task = asyncio.create_task(self._loop(), name="lm_studio_idle_watcher")
 
     def stop(self) -> None:
-        """Останавливает background task."""
+        """Останавливает background task / снимает job с periodic_scheduler."""
         if self._task and not self._task.done():
             self._task.cancel()
+        if self._scheduler is not None:
+            self._scheduler.unregister("lm_studio_idle_watcher")
+            self._scheduler = None
 
     async def _loop(self) -> None:
         logger.info("lm_studio_idle_watcher_started", interval_sec=_CHECK_INTERVAL_SEC)
@@ -180,16 +191,24 @@ class LmStudioIdleWatcher:
 _watcher: LmStudioIdleWatcher | None = None
 
 
-def configure(model_manager: "ModelManager") -> LmStudioIdleWatcher:
+def configure(
+    model_manager: "ModelManager",
+    *,
+    scheduler: "PeriodicScheduler | None" = None,
+) -> LmStudioIdleWatcher:
     """
     Инициализирует и запускает singleton watcher.
-    Вызывается из KraabUserbot.start() после инициализации model_manager.
+    Вызывается из KraabUserbot.start() после инициализации model_manager;
+    со `scheduler` — тик регистрируется в нём вместо собственного task.
     """
     global _watcher
     if _watcher is not None:
         _watcher.stop()
     _watcher = LmStudioIdleWatcher(model_manager)
-    _watcher.start()
+    if scheduler is not None:
+        _watcher.register_periodic(scheduler)
+    else:
+        _watcher.start()
     return _watcher
 
 
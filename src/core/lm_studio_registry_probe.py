@@ -28,12 +28,15 @@ import asyncio
 import os
 import re
 import traceback
-from typing import Any, Callable, Iterable
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 
 import structlog
 
 from src.core.metrics.lm_registry import set_lm_registry_state
 
+if TYPE_CHECKING:
+    from src.core.periodic_scheduler import PeriodicScheduler
+
 logger = structlog.get_logger(__name__)
 
 _DEFAULT_INTERVAL_SEC = 60
@@ -171,6 +174,7 @@ class LmStudioRegistryProbe:
         self._interval_fn = interval_fn or _get_interval_sec
         self._url_fn = url_fn or _get_base_url
         self._task: asyncio.Task | None = None
+        self._scheduler: "PeriodicScheduler | None" = None
 
     def start(self) -> None:
         if self._task is not None and not self._task.done():
@@ -180,6 +184,33 @@ class LmStudioRegistryProbe:
     def stop(self) -> None:
         if self._task and not self._task.done():
             self._task.cancel()
+        if self._scheduler is not None:
+            self._scheduler.unregister("lm_studio_registry_probe")
+            self._scheduler = None
+
+    def register_periodic(self, scheduler: "PeriodicScheduler") -> None:
+        """Гонять `_tick` job'ой общего periodic_scheduler вместо своего loop."""
+        self._scheduler = scheduler
+        interval = self._interval_fn()
+        scheduler.register(
+            "lm_studio_registry_probe",
+            self._tick,
+            interval,
+            initial_delay_sec=0,
+            adaptive=True,
+        )
+        logger.info("lm_studio_registry_probe_scheduled", interval_sec=interval)
+
+    async def _tick(self) -> float:
+        """Один probe (если включён); возвращает задержку до следующего."""
+        if _is_enabled():
+            count, total_gb = await self.probe_once()
+            logger.debug(
+                "lm_studio_registry_probe_tick",
+                loaded_count=count,
+                estimated_ram_gb=total_gb,
+            )
+        return float(self._interval_fn())
 
     async def probe_once(self) -> tuple[int, float]:
         """Одна итерация probe — вынесена для тестируемости."""
@@ -220,13 +251,16 @@ class LmStudioRegistryProbe:
 _probe: LmStudioRegistryProbe | None = None
 
 
-def configure() -> LmStudioRegistryProbe:
-    """Инициализирует и запускает singleton probe."""
+def configure(*, scheduler: "PeriodicScheduler | None" = None) -> LmStudioRegistryProbe:
+    """Инициализирует и запускает singleton probe (со `scheduler` — как его job)."""
     global _probe
     if _probe is not None:
         _probe.stop()
     _probe = LmStudioRegistryProbe()
-    _probe.start()
+    if scheduler is not None:
+        _probe.register_periodic(scheduler)
+    else:
+        _probe.start()
     return _probe
 
 
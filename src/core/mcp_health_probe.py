@@ -39,11 +39,14 @@ import os
 import threading
 import time
 from collections.abc import Awaitable, Callable
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .logger import get_logger
 from .metrics.mcp_health import record_probe_result
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 logger = get_logger(__name__)
 
 
@@ -261,6 +264,14 @@ class MCPHealthProbe:
             self._task.cancel()
         self._task = None
 
+    def register_periodic(
+        self, scheduler: "PeriodicScheduler", interval_seconds: float | None = None
+    ) -> None:
+        """Гонять `probe_once` job'ой общего periodic_scheduler вместо своего loop."""
+        interval = float(interval_seconds) if interval_seconds is not None else _env_interval()
+        scheduler.register("mcp_health_probe", self.probe_once, interval, initial_delay_sec=0)
+        logger.info("mcp_health_probe_scheduled", interval_sec=interval)
+
 
 # Module-level singleton — pattern совпадает с chat_ban_cache, silence_manager,
 # inbox_service. Bootstrap вызывает `mcp_health_probe.start_background()` из
@@ -0,0 +1,212 @@
+"""
+Activity rollup Memory Layer: число сообщений по (chat_id, часовой bucket).
+
+Heatmap (`/api/memory/heatmap`) и stats (`collect_memory_stats`) раньше делали
+``GROUP BY`` + ``strftime('%s', timestamp)`` по каждой строке `messages` —
+на многомиллионном archive.db это секунды. Теперь они читают компактную
+таблицу `message_activity_hourly` (DDL — в `memory_archive`):
+
+  * инкрементально — `MemoryIndexerWorker._sync_flush_to_db` копит приросты
+    по реально вставленным сообщениям и пишет их через `record_activity()`
+    в той же транзакции;
+  * полный пересчёт — `backfill_activity_rollup()` (bootstrap, скрипт
+    `scripts/memory_activity_rollup_backfill.py`).
+
+Читатели используют rollup только если `meta.activity_rollup_ready = 1`
+(выставляется backfill'ом): до первого backfill'а инкременты неполные, и
+callsite'ы падают обратно на прямые запросы к `messages`. Удаления, которые
+нельзя точно отразить в rollup'е, сбрасывают флаг (`invalidate_activity_rollup`).
+"""
+
+from __future__ import annotations
+
+import calendar
+import sqlite3
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any
+
+from .memory_archive import ensure_activity_rollup_table
+
+#: Ширина bucket'а rollup'а (секунды).
+ACTIVITY_BUCKET_SEC = 3600
+
+#: Ключ в `meta`: rollup полностью посчитан и поддерживается инкрементально.
+ROLLUP_READY_META_KEY = "activity_rollup_ready"
+
+_UPSERT_SQL = (
+    "INSERT INTO message_activity_hourly (chat_id, bucket, msg_count) VALUES (?, ?, ?) "
+    "ON CONFLICT(chat_id, bucket) DO UPDATE SET msg_count = msg_count + excluded.msg_count;"
+)
+
+
+def hour_bucket(timestamp: str) -> int | None:
+    """ISO-8601 timestamp из `messages` → unix-эпоха начала часа (UTC).
+
+    Совпадает с ``strftime('%s', timestamp)`` SQLite: 'Z'/offset учитываются,
+    naive-строка считается UTC. None — если строку не удалось разобрать.
+    """
+    raw = (timestamp or "").strip()
+    if not raw:
+        return None
+    if raw.endswith(("Z", "z")):
+        raw = raw[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        epoch = int(parsed.timestamp())
+    else:
+        epoch = calendar.timegm(parsed.timetuple())
+    return epoch - epoch % ACTIVITY_BUCKET_SEC
+
+
+def record_activity(conn: sqlite3.Connection, increments: Mapping[tuple[str, int], int]) -> None:
+    """Прибавляет приросты ``{(chat_id, bucket): n}`` (без commit — в транзакции caller'а)."""
+    rows = [(chat_id, bucket, n) for (chat_id, bucket), n in increments.items() if n > 0]
+    if rows:
+        conn.executemany(_UPSERT_SQL, rows)
+
+
+def is_rollup_ready(conn: sqlite3.Connection) -> bool:
+    """True, если rollup посчитан backfill'ом и ему можно доверять."""
+    try:
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = ?;", (ROLLUP_READY_META_KEY,)
+        ).fetchone()
+        if not row or str(row[0]) != "1":
+            return False
+        conn.execute("SELECT 1 FROM message_activity_hourly LIMIT 1;")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def backfill_activity_rollup(conn: sqlite3.Connection) -> int:
+    """Полный пересчёт rollup'а из `messages` (один проход) + флаг ready.
+
+    Идемпотентно: таблица очищается и заполняется в одной транзакции.
+    Возвращает число строк rollup'а.
+    """
+    if not ensure_activity_rollup_table(conn):
+        raise sqlite3.OperationalError("message_activity_hourly: create failed")
+    conn.commit()
+    try:
+        conn.execute("BEGIN;")
+        conn.execute("DELETE FROM message_activity_hourly;")
+        conn.execute(
+            f"""
+            INSERT INTO message_activity_hourly (chat_id, bucket, msg_count)
+            SELECT chat_id, bucket, COUNT(*)
+            FROM (
+                SELECT chat_id,
+                       (CAST(strftime('%s', timestamp) AS INTEGER) / {ACTIVITY_BUCKET_SEC})
+                           * {ACTIVITY_BUCKET_SEC} AS bucket
+                FROM messages
+                WHERE strftime('%s', timestamp) IS NOT NULL
+            )
+            GROUP BY chat_id, bucket;
+            """
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1');",
+            (ROLLUP_READY_META_KEY,),
+        )
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    row = conn.execute("SELECT COUNT(*) FROM message_activity_hourly;").fetchone()
+    return int(row[0]) if row else 0
+
+
+def invalidate_activity_rollup(conn: sqlite3.Connection) -> None:
+    """Сбрасывает флаг ready (без commit): читатели вернутся к `messages` до backfill'а."""
+    try:
+        conn.execute("DELETE FROM meta WHERE key = ?;", (ROLLUP_READY_META_KEY,))
+    except sqlite3.Error:
+        pass
+
+
+def drop_chat_activity(conn: sqlite3.Connection, chat_id: str) -> None:
+    """Удаляет rollup чата (без commit) — при полном удалении его сообщений."""
+    try:
+        conn.execute("DELETE FROM message_activity_hourly WHERE chat_id = ?;", (str(chat_id),))
+    except sqlite3.OperationalError:
+        # Таблицы нет (старая БД без rollup'а) — нечего чистить.
+        pass
+
+
+def top_chats(conn: sqlite3.Connection, limit: int) -> list[tuple[str, int]]:
+    """Топ чатов по числу сообщений из rollup'а."""
+    rows = conn.execute(
+        """
+        SELECT chat_id, SUM(msg_count) AS cnt
+        FROM message_activity_hourly
+        GROUP BY chat_id
+        ORDER BY cnt DESC
+        LIMIT ?;
+        """,
+        (max(1, int(limit)),),
+    ).fetchall()
+    return [(r[0], int(r[1])) for r in rows]
+
+
+def chat_density(
+    conn: sqlite3.Connection, chat_ids: Iterable[str], bucket_hours: int
+) -> list[tuple[str, int, int]]:
+    """(chat_id, bucket_start_epoch, count) для ``bucket_hours``-часовых bucket'ов.
+
+    Bucket'ы выровнены по unix-эпохе (как в прежнем SQL heatmap'а);
+    порядок — chat_id, bucket.
+    """
+    ids = list(chat_ids)
+    if not ids:
+        return []
+    seconds = max(1, int(bucket_hours)) * 3600
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(
+        f"""
+        SELECT chat_id, (bucket / {seconds}) * {seconds} AS b, SUM(msg_count)
+        FROM message_activity_hourly
+        WHERE chat_id IN ({placeholders})
+        GROUP BY chat_id, b
+        ORDER BY chat_id, b;
+        """,
+        ids,
+    ).fetchall()
+    return [(r[0], int(r[1]), int(r[2])) for r in rows]
+
+
+def activity_totals(conn: sqlite3.Connection) -> dict[str, Any]:
+    """total_messages + точные oldest/newest timestamp'ы через rollup.
+
+    oldest/newest: rollup даёт крайние часы, а точное значение берётся
+    MIN/MAX по индексу ``(chat_id, timestamp)`` только для чатов этого часа.
+    """
+    row = conn.execute(
+        "SELECT COALESCE(SUM(msg_count), 0), MIN(bucket), MAX(bucket) FROM message_activity_hourly;"
+    ).fetchone()
+    total, first_bucket, last_bucket = (int(row[0]), row[1], row[2]) if row else (0, None, None)
+    oldest = newest = None
+    if first_bucket is not None:
+        oldest = conn.execute(
+            """
+            SELECT MIN(ts) FROM (
+                SELECT (SELECT MIN(timestamp) FROM messages m WHERE m.chat_id = r.chat_id) AS ts
+                FROM message_activity_hourly r WHERE r.bucket = ?
+            );
+            """,
+            (first_bucket,),
+        ).fetchone()[0]
+        newest = conn.execute(
+            """
+            SELECT MAX(ts) FROM (
+                SELECT (SELECT MAX(timestamp) FROM messages m WHERE m.chat_id = r.chat_id) AS ts
+                FROM message_activity_hourly r WHERE r.bucket = ?
+            );
+            """,
+            (last_bucket,),
+        ).fetchone()[0]
+    return {"total_messages": total, "oldest_message_ts": oldest, "newest_message_ts": newest}
@@ -17,6 +17,7 @@ SQLite-схема для Memory Layer (Track E), DDL-only слой.
   - `chunks`          — группированные разговорные нити
   - `chunk_messages`  — many-to-many между chunks и messages (для будущего)
   - `indexer_state`   — watermark инкрементальной индексации (last processed msg)
+  - `message_activity_hourly` — rollup (chat_id, час) → число сообщений
 
 FTS5:
   - `messages_fts`    — FTS5 content-less table, индексирует `chunks.text`
@@ -233,6 +234,24 @@ _DDL_MESSAGE_MEDIA_SUMMARIES_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_media_summaries_type ON message_media_summaries(media_type);",
 ]
 
+# Activity rollup: число сообщений по (chat_id, часовой bucket). Heatmap и
+# stats читают его вместо GROUP BY + strftime по всем строкам `messages`.
+# bucket — unix-эпоха начала часа (UTC). Поддерживается инкрементально
+# indexer'ом; полный пересчёт — memory_activity_rollup.backfill_activity_rollup.
+_DDL_MESSAGE_ACTIVITY_HOURLY = """
+CREATE TABLE IF NOT EXISTS message_activity_hourly (
+    chat_id    TEXT NOT NULL,
+    bucket     INTEGER NOT NULL,
+    msg_count  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, bucket)
+) WITHOUT ROWID;
+"""
+
+_DDL_MESSAGE_ACTIVITY_HOURLY_INDEXES = [
+    # Глобальные MIN/MAX bucket (oldest/newest для stats) без полного скана.
+    "CREATE INDEX IF NOT EXISTS idx_activity_hourly_bucket ON message_activity_hourly(bucket);",
+]
+
 
 # ---------------------------------------------------------------------------
 # Публичный API.
@@ -290,6 +309,8 @@ def create_schema(conn: sqlite3.Connection) -> None:
             _DDL_CHUNK_CLUSTERS,
             *_DDL_CHUNK_CLUSTERS_INDEXES,
             _DDL_CLUSTER_META,
+            _DDL_MESSAGE_ACTIVITY_HOURLY,
+            *_DDL_MESSAGE_ACTIVITY_HOURLY_INDEXES,
         ):
             cur.execute(stmt)
 
@@ -515,6 +536,21 @@ def ensure_chunk_clusters_tables(conn: sqlite3.Connection) -> bool:
         return False
 
 
+def ensure_activity_rollup_table(conn: sqlite3.Connection) -> bool:
+    """Lazy CREATE для `message_activity_hourly` (БД, созданные до rollup'а).
+
+    Идемпотентна; не коммитит — вызывается и внутри транзакции flush'а.
+    Возвращает False при sqlite-ошибке.
+    """
+    try:
+        conn.execute(_DDL_MESSAGE_ACTIVITY_HOURLY)
+        for stmt in _DDL_MESSAGE_ACTIVITY_HOURLY_INDEXES:
+            conn.execute(stmt)
+        return True
+    except sqlite3.Error:
+        return False
+
+
 # ---------------------------------------------------------------------------
 # Feature E: Multi-Modal Memory — helper API.
 # ---------------------------------------------------------------------------
@@ -22,6 +22,18 @@ Model2Vec StaticModel, и пишет полученные 256-мерные ве
   в unit-тестах — чтобы не тянуть настоящий Model2Vec на каждый прогон.
 * **rowid alignment**: ``vec_chunks.rowid == chunks.id`` (id — alias для rowid
   в INTEGER PRIMARY KEY). Это позволяет JOIN'ить две таблицы без посредников.
+* **Per-chat партиции**: каждый вектор дублируется в ``vec_chunks_chat`` —
+  vec0-таблицу с ``chat_id text partition key``. Chat-scoped KNN идёт по
+  одной партиции (точный top-k за O(размер чата)), глобальный — по
+  ``vec_chunks``. Для архивов, проиндексированных до партиций, есть
+  ``backfill_chat_partitions()`` (копирует уже готовые векторы, без re-encode);
+  готовность фиксируется ключом ``chat_partition_ready`` в ``vec_chunks_meta``.
+* **Квантизация (опционально)**: ``KRAB_VEC_QUANTIZATION=int8|binary`` —
+  каждый вектор дополнительно пишется в ``vec_chunks_q`` (int8 — 4× меньше,
+  binary — 32× меньше float32). Первая стадия KNN в ``HybridRetriever``
+  сканирует её, top-кандидаты пересчитываются точным float32 из
+  ``vec_chunks``. Режим фиксируется ключом ``quantization`` в
+  ``vec_chunks_meta`` только после полного backfill'а.
 
 Этот модуль — вторая половина Phase 2 (первая половина — skeleton в
 ``memory_retrieval.py``).
@@ -29,6 +41,7 @@ Model2Vec StaticModel, и пишет полученные 256-мерные ве
 
 from __future__ import annotations
 
+import os
 import sqlite3
 import struct
 import threading
@@ -57,6 +70,29 @@ DEFAULT_MODEL_NAME = "minishlab/M2V_multilingual_output"
 #: Размер batch'а для encode + INSERT. 512 — компромисс между памятью и IO.
 DEFAULT_BATCH_SIZE = 512
 
+#: vec0-таблица с partition key по chat_id (зеркало vec_chunks).
+CHAT_VEC_TABLE = "vec_chunks_chat"
+
+#: Ключ vec_chunks_meta: "1" — партиции покрывают все векторы vec_chunks.
+CHAT_PARTITION_READY_KEY = "chat_partition_ready"
+
+#: vec0-таблица квантизованных векторов для первой стадии KNN.
+QUANT_VEC_TABLE = "vec_chunks_q"
+
+#: Ключ vec_chunks_meta: режим квантизации, которым покрыт весь vec_chunks.
+QUANTIZATION_META_KEY = "quantization"
+
+#: mode → (тип колонки vec0, SQL-выражение квантизации float32-BLOB'а).
+#: int8 'unit' ждёт компоненты в [-1, 1] — поэтому vec_normalize до квантизации
+#: (cosine от нормы не зависит).
+_QUANT_SPECS: dict[str, tuple[str, str]] = {
+    "int8": (
+        "int8[{dim}] distance_metric=cosine",
+        "vec_quantize_int8(vec_normalize({arg}), 'unit')",
+    ),
+    "binary": ("bit[{dim}]", "vec_quantize_binary({arg})"),
+}
+
 
 # ---------------------------------------------------------------------------
 # DDL helper.
@@ -115,6 +151,290 @@ def create_vec_table(conn: sqlite3.Connection, dim: int = DEFAULT_DIM) -> None:
         f"USING vec0(vector float[{dim}] distance_metric=cosine);"
     )
     conn.commit()
+    create_chat_vec_table(conn, dim=dim)
+
+
+def create_chat_vec_table(conn: sqlite3.Connection, dim: int = DEFAULT_DIM) -> bool:
+    """
+    Создать ``vec_chunks_chat`` (vec0 с ``chat_id`` partition key), если её нет.
+
+    Extension уже должен быть загружен (вызывается из ``create_vec_table``).
+    Возвращает False, если сборка sqlite-vec не умеет partition key
+    (< 0.1.6) — тогда chat-scoped поиск остаётся на legacy-пути.
+    """
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {CHAT_VEC_TABLE} "
+            f"USING vec0(chat_id text partition key, "
+            f"vector float[{dim}] distance_metric=cosine);"
+        )
+        conn.commit()
+    except sqlite3.OperationalError as exc:
+        logger.warning("embedder_chat_vec_table_unavailable", error=str(exc))
+        return False
+    return True
+
+
+def resolve_quantization_mode(raw: str | None = None) -> str:
+    """Env ``KRAB_VEC_QUANTIZATION``: ``none`` (default) / ``int8`` / ``binary``."""
+    value = (os.getenv("KRAB_VEC_QUANTIZATION", "none") if raw is None else raw).strip().lower()
+    if value in ("", "0", "off", "none", "float32"):
+        return "none"
+    if value not in _QUANT_SPECS:
+        logger.warning("embedder_quantization_unknown", value=value, fallback="none")
+        return "none"
+    return value
+
+
+def quantize_sql(mode: str, arg: str = "?") -> str:
+    """SQL-выражение, превращающее float32-BLOB ``arg`` в вектор режима ``mode``."""
+    return _QUANT_SPECS[mode][1].format(arg=arg)
+
+
+def create_quantized_vec_table(conn: sqlite3.Connection, mode: str, dim: int = DEFAULT_DIM) -> bool:
+    """CREATE ``vec_chunks_q`` под ``mode`` (extension уже загружен). False — не умеет."""
+    column = _QUANT_SPECS[mode][0].format(dim=dim)
+    try:
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {QUANT_VEC_TABLE} USING vec0(vector {column});"
+        )
+        conn.commit()
+    except sqlite3.OperationalError as exc:
+        logger.warning("embedder_quant_vec_table_unavailable", mode=mode, error=str(exc))
+        return False
+    return True
+
+
+def stored_quantization(conn: sqlite3.Connection) -> str:
+    """Режим, которым ``vec_chunks_q`` полностью покрывает vec_chunks (иначе ``none``)."""
+    try:
+        row = conn.execute(
+            "SELECT value FROM vec_chunks_meta WHERE key = ?;", (QUANTIZATION_META_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return "none"
+    return str(row[0]) if row is not None else "none"
+
+
+def _set_stored_quantization(conn: sqlite3.Connection, mode: str) -> None:
+    try:
+        if mode == "none":
+            conn.execute("DELETE FROM vec_chunks_meta WHERE key = ?;", (QUANTIZATION_META_KEY,))
+        else:
+            conn.execute(
+                "INSERT OR REPLACE INTO vec_chunks_meta(key, value) VALUES (?, ?);",
+                (QUANTIZATION_META_KEY, mode),
+            )
+        conn.commit()
+    except sqlite3.OperationalError as exc:
+        logger.warning("embedder_quantization_flag_failed", error=str(exc))
+
+
+def _quant_table_mode(conn: sqlite3.Connection) -> str | None:
+    """Режим существующей ``vec_chunks_q`` по её DDL (None — таблицы нет)."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?;", (QUANT_VEC_TABLE,)
+    ).fetchone()
+    if row is None:
+        return None
+    ddl = str(row[0] or "").lower()
+    return "binary" if " bit[" in ddl else "int8" if " int8[" in ddl else "unknown"
+
+
+def drop_quantized_vectors(conn: sqlite3.Connection) -> None:
+    """DROP ``vec_chunks_q`` и снять ключ ``quantization`` (retriever → float32 KNN)."""
+    _set_stored_quantization(conn, "none")
+    conn.execute(f"DROP TABLE IF EXISTS {QUANT_VEC_TABLE};")
+    conn.commit()
+
+
+def backfill_quantized_vectors(
+    conn: sqlite3.Connection,
+    mode: str,
+    dim: int = DEFAULT_DIM,
+    batch_size: int = 5000,
+) -> int:
+    """
+    Привести ``vec_chunks_q`` к режиму ``mode``: квантизовать уже посчитанные
+    float32-векторы из ``vec_chunks`` (без re-encode), резюмируемо batch'ами.
+
+    При смене режима таблица пересоздаётся. Ключ ``quantization`` выставляется
+    только после полного покрытия — до этого retriever остаётся на float32.
+    Возвращает число квантизованных векторов.
+    """
+    if mode == "none":
+        drop_quantized_vectors(conn)
+        return 0
+    if _quant_table_mode(conn) not in (None, mode):
+        drop_quantized_vectors(conn)
+    if not create_quantized_vec_table(conn, mode, dim=dim):
+        return 0
+    copied = 0
+    # INSERT ... SELECT в vec0 теряет subtype (int8/bit) у результата
+    # vec_quantize_* — поэтому читаем batch и вставляем через VALUES.
+    insert_sql = f"INSERT INTO {QUANT_VEC_TABLE}(rowid, vector) VALUES (?, {quantize_sql(mode)});"
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT v.rowid, v.vector
+            FROM vec_chunks AS v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {QUANT_VEC_TABLE} AS q WHERE q.rowid = v.rowid
+            )
+            LIMIT ?;
+            """,
+            (int(batch_size),),
+        ).fetchall()
+        if rows:
+            conn.executemany(insert_sql, rows)
+            conn.commit()
+        copied += len(rows)
+        if len(rows) < batch_size:
+            break
+    _set_stored_quantization(conn, mode)
+    logger.info("embedder_quantized_vectors_backfilled", mode=mode, copied=copied)
+    return copied
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def chat_partition_ready(conn: sqlite3.Connection) -> bool:
+    """True если ``vec_chunks_chat`` полностью покрывает ``vec_chunks``."""
+    try:
+        row = conn.execute(
+            "SELECT value FROM vec_chunks_meta WHERE key = ?;",
+            (CHAT_PARTITION_READY_KEY,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return False
+    return row is not None and str(row[0]) == "1"
+
+
+def _set_chat_partition_ready(conn: sqlite3.Connection, ready: bool) -> None:
+    try:
+        if ready:
+            conn.execute(
+                "INSERT OR REPLACE INTO vec_chunks_meta(key, value) VALUES (?, '1');",
+                (CHAT_PARTITION_READY_KEY,),
+            )
+        else:
+            conn.execute("DELETE FROM vec_chunks_meta WHERE key = ?;", (CHAT_PARTITION_READY_KEY,))
+        conn.commit()
+    except sqlite3.OperationalError as exc:
+        logger.warning("embedder_chat_partition_flag_failed", error=str(exc))
+
+
+def delete_chunk_vectors(conn: sqlite3.Connection, row_ids: list[int]) -> None:
+    """
+    Удалить векторы chunks из ``vec_chunks``, ``vec_chunks_chat`` и ``vec_chunks_q``.
+
+    Не коммитит — caller управляет транзакцией. Отсутствие
+    ``vec_chunks_chat`` (sqlite-vec без partition key) / ``vec_chunks_q``
+    (квантизация выключена) не ошибка.
+    """
+    if not row_ids:
+        return
+    placeholders = ",".join("?" * len(row_ids))
+    conn.execute(f"DELETE FROM vec_chunks WHERE rowid IN ({placeholders});", row_ids)
+    for table in (CHAT_VEC_TABLE, QUANT_VEC_TABLE):
+        if _table_exists(conn, table):
+            conn.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders});", row_ids)
+
+
+def insert_chunk_vectors(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    vecs: Any,
+    *,
+    chat_partition: bool = True,
+    quant_mode: str = "none",
+) -> None:
+    """
+    Вставить векторы chunks в ``vec_chunks``, ``vec_chunks_chat`` и ``vec_chunks_q``.
+
+    rows = [(id, chunk_id, text_redacted[, chat_id]), ...] — chat_id без
+    4-го элемента дочитывается из chunks. ``chat_partition=False`` /
+    ``quant_mode="none"`` — соответствующей таблицы нет. Не коммитит.
+    """
+    # numpy-массив индексируется vecs[i]; list-of-list — тоже.
+    payload = [(row[0], serialize_f32(vecs[i])) for i, row in enumerate(rows)]
+
+    chat_payload: list[tuple[int, str, bytes]] = []
+    if chat_partition:
+        chat_by_id = {r[0]: r[3] for r in rows if len(r) > 3}
+        missing = [r[0] for r in rows if r[0] not in chat_by_id]
+        if missing:
+            placeholders = ",".join("?" * len(missing))
+            chat_by_id.update(
+                conn.execute(
+                    f"SELECT id, chat_id FROM chunks WHERE id IN ({placeholders});",
+                    missing,
+                ).fetchall()
+            )
+        chat_payload = [
+            (rid, str(chat_by_id[rid]), blob) for rid, blob in payload if rid in chat_by_id
+        ]
+
+    conn.executemany("INSERT INTO vec_chunks(rowid, vector) VALUES (?, ?);", payload)
+    if chat_payload:
+        conn.executemany(
+            f"INSERT INTO {CHAT_VEC_TABLE}(rowid, chat_id, vector) VALUES (?, ?, ?);",
+            chat_payload,
+        )
+    if quant_mode != "none":
+        conn.executemany(
+            f"INSERT INTO {QUANT_VEC_TABLE}(rowid, vector) VALUES (?, {quantize_sql(quant_mode)});",
+            payload,
+        )
+
+
+def reset_chat_partitions(conn: sqlite3.Connection) -> None:
+    """DROP ``vec_chunks_chat`` и снять флаг готовности (перед пересозданием vec_chunks)."""
+    conn.execute(f"DROP TABLE IF EXISTS {CHAT_VEC_TABLE};")
+    conn.commit()
+    _set_chat_partition_ready(conn, False)
+
+
+def backfill_chat_partitions(conn: sqlite3.Connection, batch_size: int = 5000) -> int:
+    """
+    Миграция: скопировать уже посчитанные векторы из ``vec_chunks`` в партиции.
+
+    Идемпотентно и резюмируемо: копируются только rowid, которых ещё нет в
+    ``vec_chunks_chat``; commit после каждого batch'а. Векторы без живого
+    chunk'а (orphans) пропускаются. По завершении выставляет
+    ``chat_partition_ready=1``. Возвращает число скопированных векторов.
+    """
+    if not _table_exists(conn, CHAT_VEC_TABLE):
+        return 0
+    copied = 0
+    while True:
+        cur = conn.execute(
+            f"""
+            INSERT INTO {CHAT_VEC_TABLE}(rowid, chat_id, vector)
+            SELECT v.rowid, c.chat_id, v.vector
+            FROM vec_chunks AS v
+            JOIN chunks AS c ON c.id = v.rowid
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {CHAT_VEC_TABLE} AS p WHERE p.rowid = v.rowid
+            )
+            ORDER BY v.rowid
+            LIMIT ?;
+            """,
+            (int(batch_size),),
+        )
+        conn.commit()
+        n = cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else 0
+        copied += n
+        if n < batch_size:
+            break
+    _set_chat_partition_ready(conn, True)
+    logger.info("embedder_chat_partitions_backfilled", copied=copied)
+    return copied
 
 
 # ---------------------------------------------------------------------------
@@ -182,6 +502,8 @@ class MemoryEmbedder:
             (256 для M2V_multilingual_output).
         _model: опциональная инъекция модели (для тестов). Если передана —
             загрузка по ``model_name`` пропускается.
+        quantization: ``none`` / ``int8`` / ``binary``; None → env
+            ``KRAB_VEC_QUANTIZATION``.
     """
 
     def __init__(
@@ -191,8 +513,10 @@ class MemoryEmbedder:
         batch_size: int = DEFAULT_BATCH_SIZE,
         dim: int = DEFAULT_DIM,
         _model: Any | None = None,
+        quantization: str | None = None,
     ) -> None:
         self._paths = archive_paths or ArchivePaths.default()
+        self._quant_mode = resolve_quantization_mode(quantization)
         self._model_name = model_name
         self._batch_size = max(1, int(batch_size))
         self._dim = int(dim)
@@ -219,6 +543,10 @@ class MemoryEmbedder:
         # при первом dlopen-failure — embedder переходит в no-op режим.
         # True = по умолчанию (будет проверено при первом _ensure_connection).
         self._vec_available: bool = True
+        # vec_chunks_chat создан (sqlite-vec поддерживает partition key).
+        self._chat_vec_available: bool = False
+        # vec_chunks_q создан под self._quant_mode — _embed_batch пишет и туда.
+        self._quant_vec_available: bool = False
 
     # ------------------------------------------------------------------
     # Публичный API.
@@ -237,7 +565,7 @@ class MemoryEmbedder:
 
         rows = conn.execute(
             """
-            SELECT c.id, c.chunk_id, c.text_redacted
+            SELECT c.id, c.chunk_id, c.text_redacted, c.chat_id
             FROM chunks AS c
             LEFT JOIN vec_chunks AS v ON v.rowid = c.id
             WHERE v.rowid IS NULL
@@ -254,6 +582,15 @@ class MemoryEmbedder:
         # Идемпотентный no-op не перезаписывает indexed_at timestamp.
         if stats.chunks_processed > 0:
             self._write_vec_meta(conn)
+        # Архив, проиндексированный до партиций: одноразово копируем готовые
+        # векторы в vec_chunks_chat (дальше _embed_batch пишет в обе таблицы).
+        if self._chat_vec_available and not chat_partition_ready(conn):
+            with self._write_lock:
+                backfill_chat_partitions(conn)
+        # То же для квантизованной таблицы: включили режим на готовом архиве.
+        if self._quant_vec_available and stored_quantization(conn) != self._quant_mode:
+            with self._write_lock:
+                backfill_quantized_vectors(conn, self._quant_mode, dim=self._dim)
         return EmbedStats(
             chunks_processed=stats.chunks_processed,
             chunks_skipped=chunks_skipped,
@@ -286,7 +623,7 @@ class MemoryEmbedder:
         placeholders = ",".join("?" * len(ids))
         rows = conn.execute(
             f"""
-            SELECT id, chunk_id, text_redacted
+            SELECT id, chunk_id, text_redacted, chat_id
             FROM chunks
             WHERE chunk_id IN ({placeholders})
             ORDER BY id;
@@ -297,12 +634,8 @@ class MemoryEmbedder:
         # Удаляем старые векторы для этих rowid'ов (если были).
         row_ids = [r[0] for r in rows]
         if row_ids:
-            del_placeholders = ",".join("?" * len(row_ids))
             with self._write_lock:
-                conn.execute(
-                    f"DELETE FROM vec_chunks WHERE rowid IN ({del_placeholders});",
-                    row_ids,
-                )
+                delete_chunk_vectors(conn, row_ids)
                 conn.commit()
 
         chunks_skipped = len(ids) - len(rows)
@@ -327,10 +660,16 @@ class MemoryEmbedder:
         """
         conn = self._ensure_connection()
 
-        # DROP и CREATE виртуальной таблицы.
+        # DROP и CREATE виртуальных таблиц (vec_chunks + партиции).
         conn.execute("DROP TABLE IF EXISTS vec_chunks;")
         conn.commit()
+        reset_chat_partitions(conn)
+        drop_quantized_vectors(conn)
         create_vec_table(conn, dim=self._dim)
+        if self._quant_mode != "none":
+            self._quant_vec_available = create_quantized_vec_table(
+                conn, self._quant_mode, dim=self._dim
+            )
 
         return self.embed_all_unindexed()
 
@@ -397,6 +736,15 @@ class MemoryEmbedder:
             self._vec_available = False
             conn.close()
             raise
+        self._chat_vec_available = _table_exists(conn, CHAT_VEC_TABLE)
+        # Квантизацию выключили или сменили режим — убираем старую таблицу,
+        # иначе retriever искал бы по индексу без новых векторов.
+        if _quant_table_mode(conn) not in (None, self._quant_mode):
+            drop_quantized_vectors(conn)
+        if self._quant_mode != "none":
+            self._quant_vec_available = create_quantized_vec_table(
+                conn, self._quant_mode, dim=self._dim
+            )
         self._tls.conn = conn
         with self._conns_lock:
             self._all_conns.append(conn)
@@ -481,10 +829,10 @@ class MemoryEmbedder:
 
     def _process_rows(
         self,
-        rows: list[tuple[int, str, str]],
+        rows: list[tuple],
         model_load_sec: float,
     ) -> EmbedStats:
-        """Прогнать список (id, chunk_id, text) через модель и вставить."""
+        """Прогнать список (id, chunk_id, text[, chat_id]) через модель и вставить."""
         if not rows:
             return EmbedStats(
                 chunks_processed=0,
@@ -530,13 +878,14 @@ class MemoryEmbedder:
             model_load_sec=model_load_sec,
         )
 
-    def _embed_batch(self, rows: list[tuple[int, str, str]]) -> None:
+    def _embed_batch(self, rows: list[tuple]) -> None:
         """
-        Проэмбеддить один batch и вставить векторы в vec_chunks.
+        Проэмбеддить один batch и вставить векторы в vec_chunks и vec_chunks_chat.
 
-        rows = [(id, chunk_id, text_redacted), ...]. Model2Vec возвращает
-        numpy-массив shape (N, dim). Для cosine distance vec0 сам нормализует,
-        так что можно передавать не-нормализованные векторы.
+        rows = [(id, chunk_id, text_redacted, chat_id), ...]; chat_id
+        опционален (legacy 3-tuple) — тогда он дочитывается из chunks.
+        Model2Vec возвращает numpy-массив shape (N, dim). Для cosine distance
+        vec0 сам нормализует, так что можно передавать не-нормализованные векторы.
         """
         conn = getattr(self._tls, "conn", None)
         assert conn is not None
@@ -545,17 +894,15 @@ class MemoryEmbedder:
         texts = [r[2] for r in rows]
         vecs = self._model.encode(texts)
 
-        payload = []
-        # numpy-массив индексируется vecs[i]; list-of-list — тоже.
-        for i, row in enumerate(rows):
-            payload.append((row[0], serialize_f32(vecs[i])))
-
         # Сериализуем write в vec_chunks между потоками — SQLite-уровень
         # single-writer, избегаем "database is locked" при конкурентных
         # embed'ах из разных asyncio.to_thread воркеров.
         with self._write_lock:
-            conn.executemany(
-                "INSERT INTO vec_chunks(rowid, vector) VALUES (?, ?);",
-                payload,
+            insert_chunk_vectors(
+                conn,
+                rows,
+                vecs,
+                chat_partition=self._chat_vec_available,
+                quant_mode=self._quant_mode if self._quant_vec_available else "none",
             )
             conn.commit()
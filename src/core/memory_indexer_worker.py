@@ -14,13 +14,15 @@ import asyncio
 import concurrent.futures
 import hashlib
 import sqlite3
+from collections import Counter
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import structlog
 
-from src.core.memory_archive import ArchivePaths, open_archive
+from src.core.memory_activity_rollup import hour_bucket, record_activity
+from src.core.memory_archive import ArchivePaths, ensure_activity_rollup_table, open_archive
 from src.core.memory_chunking import Chunk, ChunkBuilder, Message
 from src.core.memory_pii_redactor import PIIRedactor
 from src.core.memory_whitelist import MemoryWhitelist
@@ -132,6 +134,8 @@ class MemoryIndexerWorker:
         self._builders: dict[str, ChunkBuilder] = {}
         # Watermark cache: chat_id → last indexed message_id (для idempotency).
         self._watermark_cache: dict[str, str] = {}
+        # message_activity_hourly проверен/создан в этом archive.db (один раз).
+        self._activity_table_ready = False
         # C5: dedicated single-thread executor для embedder — гарантирует,
         # что все вызовы embed_specific идут в ОДИН и тот же OS thread →
         # threading.local SQLite connection + sqlite-vec загружаются один раз.
@@ -545,11 +549,13 @@ class MemoryIndexerWorker:
                     (chat_id, title, chat_type),
                 )
 
-            # Insert сообщений (с PII-redacted текстом)
+            # Insert сообщений (с PII-redacted текстом); activity rollup
+            # прирастает только по реально вставленным строкам.
+            activity: Counter[tuple[str, int]] = Counter()
             for qmsg in batch:
                 redacted = self._redactor.redact(qmsg.text).text
                 ts_str = qmsg.timestamp.replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
-                conn.execute(
+                cur = conn.execute(
                     "INSERT OR IGNORE INTO messages "
                     "(message_id, chat_id, sender_id, timestamp, text_redacted, reply_to_id) "
                     "VALUES (?, ?, ?, ?, ?, ?);",
@@ -562,6 +568,14 @@ class MemoryIndexerWorker:
                         qmsg.reply_to_message_id,
                     ),
                 )
+                if cur.rowcount > 0:
+                    bucket = hour_bucket(ts_str)
+                    if bucket is not None:
+                        activity[(qmsg.chat_id, bucket)] += 1
+            if activity:
+                if not self._activity_table_ready:
+                    self._activity_table_ready = ensure_activity_rollup_table(conn)
+                record_activity(conn, activity)
 
             # Insert chunks + chunk_messages + FTS
             for chunk, chunk_id, chat_id in new_chunks:
@@ -45,10 +45,13 @@ import time
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .logger import get_logger
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 logger = get_logger(__name__)
 
 # Defaults — overridable через ENV.
@@ -503,6 +506,34 @@ def run_once(runtime_state_dir: Path | None = None) -> dict[str, Any]:
     }
 
 
+def register_periodic(
+    scheduler: "PeriodicScheduler", runtime_state_dir: Path | None = None
+) -> bool:
+    """
+    Регистрирует run_once job'ой общего periodic_scheduler (вместо background_loop).
+
+    Возвращает False, если детектор выключен env'ом.
+    """
+    if not _is_enabled():
+        logger.info("memory_leak_detector_disabled")
+        return False
+    interval = _check_interval_sec()
+    scheduler.register(
+        "memory_leak_detector",
+        lambda: run_once(runtime_state_dir),
+        interval,
+        initial_delay_sec=0,
+    )
+    logger.info(
+        "memory_leak_detector_started",
+        interval_sec=interval,
+        threshold_mb_per_hour=_threshold_mb_per_hour(),
+        window_hours=_window_hours(),
+        tracemalloc=_tracemalloc_enabled(),
+    )
+    return True
+
+
 async def background_loop(runtime_state_dir: Path | None = None) -> None:
     """
     Background-задача для запуска из userbot_bridge bootstrap.
@@ -17,21 +17,35 @@ MMR (Maximal Marginal Relevance) diversity re-ranking для hybrid retrieval.
 Config:
     KRAB_RAG_MMR_ENABLED=1         — включено по умолчанию.
     KRAB_RAG_MMR_LAMBDA=0.7        — relevance weight (1.0 = только relevance).
+    KRAB_RAG_MMR_NUMPY=1           — NumPy-ядро (если numpy установлен).
+
+NumPy-ядро: матрица кандидатов нормализуется один раз, а max-similarity к
+выбранным хранится вектором и обновляется одним mat-vec на каждый pick —
+O(n·d) на шаг вместо O(n·|S|·d) Python-циклов. Pure-Python путь остаётся
+fallback'ом (нет numpy / векторы разной длины) и эталоном для parity-теста.
 
 Public API:
     mmr_rerank(query_vec, doc_vecs, doc_ids, rrf_scores, top_k, lambda_) -> list[str]
+    decode_f32_blob(blob) -> np.ndarray | list[float]
     mmr_is_enabled() -> bool
     mmr_lambda() -> float
+    mmr_numpy_enabled() -> bool
 """
 
 from __future__ import annotations
 
 import math
 import os
-from typing import Sequence
+import struct
+from typing import Any, Sequence
 
 from structlog import get_logger
 
+try:  # numpy опционален: без него работает pure-Python путь.
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
 logger = get_logger(__name__)
 
 
@@ -61,6 +75,13 @@ def mmr_lambda(default: float = 0.7) -> float:
     return val
 
 
+def mmr_numpy_enabled() -> bool:
+    """NumPy-ядро доступно и не выключено через KRAB_RAG_MMR_NUMPY=0."""
+    if np is None:
+        return False
+    return os.getenv("KRAB_RAG_MMR_NUMPY", "1").strip().lower() in ("1", "true", "yes", "on")
+
+
 # ---------------------------------------------------------------------------
 # Векторная математика.
 # ---------------------------------------------------------------------------
@@ -84,8 +105,12 @@ def _jaccard(a: str, b: str) -> float:
 
 
 def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
-    """Cosine similarity двух векторов. При нулевой норме → 0.0."""
-    if not a or not b or len(a) != len(b):
+    """Cosine similarity двух векторов. При нулевой норме → 0.0.
+
+    Пустота — через ``len``: ``decode_f32_blob`` отдаёт np.ndarray, у которого
+    truth value неоднозначен.
+    """
+    if len(a) == 0 or len(b) == 0 or len(a) != len(b):
         return 0.0
     dot = 0.0
     na = 0.0
@@ -99,6 +124,18 @@ def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
     return dot / (math.sqrt(na) * math.sqrt(nb))
 
 
+def decode_f32_blob(blob: bytes) -> Any:
+    """
+    Декодирует float32 little-endian blob из vec_chunks (обратное serialize_f32).
+
+    С numpy — zero-copy `np.frombuffer` (read-only view), без — list[float]
+    через struct.unpack.
+    """
+    if mmr_numpy_enabled():
+        return np.frombuffer(blob, dtype="<f4")
+    return list(struct.unpack(f"<{len(blob) // 4}f", blob))
+
+
 # ---------------------------------------------------------------------------
 # MMR алгоритм.
 # ---------------------------------------------------------------------------
@@ -138,6 +175,22 @@ def mmr_rerank(
 
     lam = mmr_lambda() if lambda_ is None else max(0.0, min(1.0, lambda_))
 
+    if mmr_numpy_enabled():
+        ordered = _mmr_rerank_numpy(query_vec, doc_vecs, n, rrf_scores, top_k, lam)
+        if ordered is not None:
+            return [doc_ids[i] for i in ordered]
+    return [doc_ids[i] for i in _mmr_rerank_py(query_vec, doc_vecs, n, rrf_scores, top_k, lam)]
+
+
+def _mmr_rerank_py(
+    query_vec: Sequence[float] | None,
+    doc_vecs: Sequence[Sequence[float] | None],
+    n: int,
+    rrf_scores: Sequence[float] | None,
+    top_k: int,
+    lam: float,
+) -> list[int]:
+    """Pure-Python MMR: возвращает индексы выбранных документов."""
     # Предвычисляем relevance для каждого документа.
     # Приоритет: cosine(q, d) → rrf_scores → 0.0.
     rel: list[float] = []
@@ -180,7 +233,82 @@ def mmr_rerank(
         selected.append(best_idx)
         remaining.remove(best_idx)
 
-    return [doc_ids[i] for i in selected]
+    return selected
+
+
+def _mmr_rerank_numpy(
+    query_vec: Sequence[float] | None,
+    doc_vecs: Sequence[Sequence[float] | None],
+    n: int,
+    rrf_scores: Sequence[float] | None,
+    top_k: int,
+    lam: float,
+) -> list[int] | None:
+    """
+    NumPy MMR с той же семантикой, что `_mmr_rerank_py` (включая tie-break
+    по меньшему индексу и clamp max_sim снизу нулём).
+
+    Возвращает None если векторы нельзя собрать в одну матрицу (разная
+    размерность / пустые векторы) — caller уходит в pure-Python путь.
+    """
+    dim = 0
+    for v in doc_vecs[:n]:
+        if v is None:
+            continue
+        if len(v) == 0 or (dim and len(v) != dim):
+            return None
+        dim = len(v)
+
+    # Матрица строится один раз; None → нулевая строка (sim=0 ко всем).
+    valid = np.fromiter((v is not None for v in doc_vecs[:n]), dtype=bool, count=n)
+    mat = np.zeros((n, max(dim, 1)), dtype=np.float64)
+    if dim:
+        mat[valid] = np.array([v for v in doc_vecs[:n] if v is not None], dtype=np.float64)
+    norms = np.linalg.norm(mat, axis=1)
+    nonzero = norms > 0.0
+    unit = np.zeros_like(mat)
+    unit[nonzero] = mat[nonzero] / norms[nonzero, None]
+
+    # Relevance: cosine(q, d) → rrf_scores → 0.0 (как в pure-Python пути).
+    fallback = np.zeros(n, dtype=np.float64)
+    if rrf_scores is not None:
+        m = min(n, len(rrf_scores))
+        fallback[:m] = np.asarray(rrf_scores[:m], dtype=np.float64)
+    have_query = query_vec is not None and len(query_vec) > 0
+    if have_query:
+        q = np.asarray(query_vec, dtype=np.float64)
+        if dim and q.shape[0] != dim:
+            # Pure-путь даёт cosine=0.0 при несовпадении длины.
+            q_sim = np.zeros(n, dtype=np.float64)
+        else:
+            q_norm = float(np.linalg.norm(q))
+            q_sim = unit @ (q / q_norm) if q_norm > 0.0 and dim else np.zeros(n)
+        rel = np.where(valid, q_sim, fallback)
+    else:
+        rel = fallback
+
+    selected: list[int] = []
+    available = np.ones(n, dtype=bool)
+    max_sim = np.zeros(n, dtype=np.float64)
+    limit = min(top_k, n)
+
+    first = int(np.argmax(rel))
+    selected.append(first)
+    available[first] = False
+
+    while len(selected) < limit:
+        last = selected[-1]
+        if valid[last]:
+            # Инкрементальный апдейт: max_sim = max(max_sim, sim(·, last)).
+            # Нулевые строки (None-векторы) остаются с max_sim=0.
+            np.maximum(max_sim, unit @ unit[last], out=max_sim)
+        scores = lam * rel - (1.0 - lam) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+
+    return selected
 
 
 def mmr_rerank_texts(
@@ -73,7 +73,12 @@ from structlog import get_logger
 
 from src.core.memory_adaptive_rerank import rerank_adaptive
 from src.core.memory_archive import ArchivePaths, open_archive
-from src.core.memory_mmr import mmr_is_enabled, mmr_rerank, mmr_rerank_texts
+from src.core.memory_mmr import (
+    decode_f32_blob,
+    mmr_is_enabled,
+    mmr_rerank,
+    mmr_rerank_texts,
+)
 from src.core.memory_retrieval_scores import record_scores
 from src.core.sentry_perf import set_tag as _sentry_tag
 from src.core.sentry_perf import start_span as _sentry_span
@@ -275,6 +280,20 @@ def _rrf_vector_weight() -> float:
     return max(0.0, min(5.0, w))
 
 
+def _quantized_search_enabled() -> bool:
+    """Env: KRAB_VEC_QUANTIZED_SEARCH (default "1") — kill-switch квантизованной стадии KNN."""
+    return os.getenv("KRAB_VEC_QUANTIZED_SEARCH", "1") == "1"
+
+
+def _rescore_factor() -> int:
+    """Env: KRAB_VEC_RESCORE_FACTOR (default 8, clamp 1..50) — кандидатов на один результат."""
+    try:
+        value = int(os.getenv("KRAB_VEC_RESCORE_FACTOR", "8"))
+    except (TypeError, ValueError):
+        return 8
+    return max(1, min(value, 50))
+
+
 def normalize_scores_0_1(scores: dict[str, float]) -> dict[str, float]:
     """Min-max нормализация до диапазона [0, 1] для UI и logging."""
     if not scores:
@@ -322,6 +341,12 @@ class HybridRetriever:
         self._conn: sqlite3.Connection | None = None
         self._model: object | None = None  # Model2Vec.StaticModel, late import
         self._vec_available: bool = False
+        # vec_chunks_chat backfill завершён — chat-scoped KNN по партиции.
+        # Кешируем только True: до миграции проверяем meta на каждом вызове.
+        self._chat_vec_ready: bool = False
+        # Режим vec_chunks_q ("int8" / "binary") для первой стадии KNN;
+        # "none" — обычный float32 KNN. Выставляется в _check_vec_meta_compat.
+        self._vec_quantization: str = "none"
         # Последний query — нужен для cosine MMR в _materialize_results().
         self._last_query: str = ""
         # LRU-кеш для embed query: same query → same vector без повторного encode.
@@ -855,7 +880,8 @@ class HybridRetriever:
         """
         try:
             meta_rows = conn.execute(
-                "SELECT key, value FROM vec_chunks_meta WHERE key IN ('model_name','model_dim');"
+                "SELECT key, value FROM vec_chunks_meta "
+                "WHERE key IN ('model_name','model_dim','quantization');"
             ).fetchall()
         except sqlite3.OperationalError:
             # Таблицы ещё нет (legacy-БД: open_archive() не вызывает
@@ -891,6 +917,7 @@ class HybridRetriever:
             return True
 
         meta = {str(k): str(v) for k, v in meta_rows}
+        self._vec_quantization = self._resolve_vec_quantization(conn, meta.get("quantization"))
         stored_name = meta.get("model_name")
         stored_dim_raw = meta.get("model_dim")
         try:
@@ -916,6 +943,43 @@ class HybridRetriever:
             return False
         return True
 
+    def _resolve_vec_quantization(self, conn: sqlite3.Connection, stored: str | None) -> str:
+        """
+        Режим первой стадии KNN из vec_chunks_meta.quantization.
+
+        Ключ пишет embedder только после полного backfill'а ``vec_chunks_q``.
+        Неизвестный режим или отсутствующая таблица — не повод уходить в
+        FTS-only: float32 ``vec_chunks`` валиден, ищем по нему.
+        """
+        if not stored or stored == "none":
+            return "none"
+        try:
+            from src.core.memory_embedder import QUANT_VEC_TABLE, _quant_table_mode
+        except Exception:  # noqa: BLE001
+            return "none"
+        try:
+            table_mode = _quant_table_mode(conn)
+        except sqlite3.Error:
+            table_mode = None
+        if table_mode != stored:
+            logger.warning(
+                "memory_vec_quantization_mismatch",
+                stored=stored,
+                table=QUANT_VEC_TABLE,
+                table_mode=table_mode,
+                action="fallback_to_float32_knn",
+            )
+            return "none"
+        return stored
+
+    def _reload_vec_quantization(self, conn: sqlite3.Connection) -> str:
+        """Перечитать vec_chunks_meta.quantization (после ошибки по vec_chunks_q)."""
+        try:
+            from src.core.memory_embedder import stored_quantization
+        except Exception:  # noqa: BLE001
+            return "none"
+        return self._resolve_vec_quantization(conn, stored_quantization(conn))
+
     def _encode_query_cached(self, model: object, query: str) -> list[float]:
         """
         Encode query через Model2Vec с LRU-кешем.
@@ -1036,10 +1100,16 @@ class HybridRetriever:
             `!= "1"` возвращает []. Проверка per-call — toggle без restart'а.
           * Lazy-load Model2Vec через `_ensure_model()`. Если модель
             недоступна — []
-          * Per-chat фильтр реализован через subquery: KNN MATCH не
-            поддерживает дополнительный WHERE напрямую, поэтому берём
-            `limit * 3` соседей по вектору и фильтруем по `chat_id`
-            во внешнем SELECT.
+          * Per-chat: если `vec_chunks_chat` (partition key chat_id) готов —
+            точный KNN внутри партиции чата, O(размер чата). Иначе (архив
+            ещё не мигрирован, `KRAB_RAG_CHAT_PARTITION_ENABLED=0`) — legacy:
+            `limit * 3` глобальных соседей с фильтром по `chat_id`, который
+            в большом архиве часто возвращает 0 hits.
+          * Глобальный KNN при `vec_chunks_meta.quantization` = int8/binary —
+            первая стадия по `vec_chunks_q`, затем float32 rescoring
+            (`_quantized_vector_search`). Если `vec_chunks_q` сменилась после
+            connect (OperationalError) — режим перечитывается из meta, запрос
+            повторяется по float32 `vec_chunks`.
           * Любой `sqlite3.OperationalError` → warning + []. Retriever
             продолжает работу в FTS-only режиме.
           * C7 guard: `self._vec_available` выставляется в `_ensure_connection()`
@@ -1069,8 +1139,18 @@ class HybridRetriever:
             return []
 
         try:
+            if chat_id is not None and self._chat_partition_usable(conn):
+                sql = """
+                    SELECT c.chunk_id, v.distance
+                    FROM vec_chunks_chat AS v
+                    JOIN chunks AS c ON c.id = v.rowid
+                    WHERE v.vector MATCH ? AND k = ? AND v.chat_id = ?
+                    ORDER BY v.distance;
+                """
+                rows = conn.execute(sql, (q_blob, limit, str(chat_id))).fetchall()
+                return [r[0] for r in rows]
             if chat_id is not None:
-                # KNN-поиск по вектору с запасом, затем фильтр по chat_id.
+                # Legacy: KNN-поиск по вектору с запасом, затем фильтр по chat_id.
                 # `limit * 3` — типичный recall-boost для per-chat режима.
                 sql = """
                     SELECT c.chunk_id
@@ -1084,6 +1164,22 @@ class HybridRetriever:
                 """
                 rows = conn.execute(sql, (q_blob, limit * 3, chat_id)).fetchall()
                 return [r[0] for r in rows][:limit]
+            if self._vec_quantization != "none" and _quantized_search_enabled():
+                try:
+                    return self._quantized_vector_search(conn, q_blob, limit)
+                except sqlite3.OperationalError as exc:
+                    # Режим читается при connect; embedder мог с тех пор
+                    # пересоздать/удалить vec_chunks_q — перечитываем meta и
+                    # этот запрос добираем по float32 vec_chunks.
+                    stale = self._vec_quantization
+                    self._vec_quantization = self._reload_vec_quantization(conn)
+                    logger.warning(
+                        "memory_vec_quantized_search_failed",
+                        error=str(exc),
+                        stale=stale,
+                        quantization=self._vec_quantization,
+                        action="retry_float32_knn",
+                    )
             sql = """
                 SELECT c.chunk_id, v.distance
                 FROM vec_chunks AS v
@@ -1097,6 +1193,59 @@ class HybridRetriever:
             logger.warning("memory_vec_search_failed", error=str(exc))
             return []
 
+    def _quantized_vector_search(
+        self,
+        conn: sqlite3.Connection,
+        q_blob: bytes,
+        limit: int,
+    ) -> list[str]:
+        """
+        Двухстадийный KNN: `limit × rescore_factor` кандидатов по квантизованной
+        `vec_chunks_q` (int8 / bit — в 4× / 32× меньше байт на скан), затем
+        точный cosine по float32 из `vec_chunks` только для кандидатов.
+        """
+        from src.core.memory_embedder import QUANT_VEC_TABLE, quantize_sql
+
+        candidates = conn.execute(
+            f"""
+            SELECT rowid FROM {QUANT_VEC_TABLE}
+            WHERE vector MATCH {quantize_sql(self._vec_quantization)} AND k = ?;
+            """,
+            (q_blob, limit * _rescore_factor()),
+        ).fetchall()
+        if not candidates:
+            return []
+        row_ids = [r[0] for r in candidates]
+        # `rowid IN (...)` vec0 исполняет полным сканом; JOIN от CTE даёт
+        # point lookup по rowid на каждого кандидата.
+        values = ",".join(["(?)"] * len(row_ids))
+        rows = conn.execute(
+            f"""
+            WITH cand(id) AS (VALUES {values})
+            SELECT c.chunk_id, vec_distance_cosine(v.vector, ?) AS distance
+            FROM cand
+            JOIN vec_chunks AS v ON v.rowid = cand.id
+            JOIN chunks AS c ON c.id = cand.id
+            ORDER BY distance
+            LIMIT ?;
+            """,
+            (*row_ids, q_blob, limit),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _chat_partition_usable(self, conn: sqlite3.Connection) -> bool:
+        """Можно ли делать chat-scoped KNN по `vec_chunks_chat`."""
+        if os.getenv("KRAB_RAG_CHAT_PARTITION_ENABLED", "1") != "1":
+            return False
+        if self._chat_vec_ready:
+            return True
+        try:
+            from src.core.memory_embedder import chat_partition_ready
+        except Exception:  # noqa: BLE001
+            return False
+        self._chat_vec_ready = chat_partition_ready(conn)
+        return self._chat_vec_ready
+
     # ------------------------------------------------------------------
     # Сборка результатов.
     # ------------------------------------------------------------------
@@ -1187,7 +1336,7 @@ class HybridRetriever:
                 # Ожидаемое ускорение MMR 50-100ms → 5-10ms (10× speedup).
                 ordered_ids: list[str] = []
                 model = self._ensure_model()
-                d_vecs: list[list[float] | None] = [None] * len(doc_ids)
+                d_vecs: list = [None] * len(doc_ids)
                 if (
                     model is not None
                     and self._last_query
@@ -1195,12 +1344,6 @@ class HybridRetriever:
                     and any(c is not None for c in chunk_ids_for_mmr)
                 ):
                     try:
-                        # struct-unpack — обратная операция к serialize_f32.
-                        import struct as _struct
-
-                        def _deser(blob: bytes) -> list[float]:
-                            return list(_struct.unpack(f"<{len(blob) // 4}f", blob))
-
                         valid_ids = [c for c in chunk_ids_for_mmr if c is not None]
                         if valid_ids:
                             placeholders = ",".join("?" * len(valid_ids))
@@ -1210,10 +1353,12 @@ class HybridRetriever:
                                 f"WHERE c.chunk_id IN ({placeholders});",
                                 valid_ids,
                             ).fetchall()
-                            vec_by_chunk: dict[str, list[float]] = {}
+                            # decode_f32_blob: np.frombuffer (zero-copy) при
+                            # наличии numpy, иначе struct.unpack → list[float].
+                            vec_by_chunk: dict[str, object] = {}
                             for cid, vec_blob in rows:
                                 if vec_blob:
-                                    vec_by_chunk[cid] = _deser(bytes(vec_blob))
+                                    vec_by_chunk[cid] = decode_f32_blob(bytes(vec_blob))
                             for i, cid in enumerate(chunk_ids_for_mmr):
                                 if cid is not None and cid in vec_by_chunk:
                                     d_vecs[i] = vec_by_chunk[cid]
@@ -6,6 +6,8 @@ import sqlite3
 from pathlib import Path
 from typing import Any
 
+from .memory_activity_rollup import activity_totals, is_rollup_ready, top_chats
+
 
 def default_archive_db_path() -> Path:
     """Возвращает канонический путь до archive.db Memory Layer."""
@@ -23,6 +25,10 @@ def collect_memory_stats(db_path: Path | None = None) -> dict[str, Any]:
       - db_size_bytes / db_size_mb
       - oldest_message_ts / newest_message_ts
       - top_chats — топ-10 по количеству сообщений
+      - activity_source — "rollup" (message_activity_hourly) или "messages"
+
+    total_messages / oldest / newest / top_chats берутся из activity rollup'а,
+    если он готов; иначе — прямыми запросами к `messages` (полный скан).
     """
 
     path = db_path if db_path is not None else default_archive_db_path()
@@ -34,7 +40,18 @@ def collect_memory_stats(db_path: Path | None = None) -> dict[str, Any]:
     try:
         stats: dict[str, Any] = {"exists": True, "path": str(path)}
 
-        stats["total_messages"] = _count(conn, "messages")
+        use_rollup = is_rollup_ready(conn)
+        stats["activity_source"] = "rollup" if use_rollup else "messages"
+        totals: dict[str, Any] | None = None
+        if use_rollup:
+            try:
+                totals = activity_totals(conn)
+            except sqlite3.Error:
+                totals = None
+                stats["activity_source"] = "messages"
+        stats["total_messages"] = (
+            totals["total_messages"] if totals is not None else _count(conn, "messages")
+        )
         # В реальной схеме таблица называется `chunks`, но поддерживаем и legacy `memory_chunks`.
         total_chunks = _count(conn, "chunks")
         if total_chunks == 0:
@@ -51,22 +68,31 @@ def collect_memory_stats(db_path: Path | None = None) -> dict[str, Any]:
         stats["db_size_bytes"] = size
         stats["db_size_mb"] = round(size / 1024 / 1024, 2)
 
-        try:
-            row = conn.execute(
-                "SELECT MIN(timestamp) AS oldest, MAX(timestamp) AS newest FROM messages"
-            ).fetchone()
-            stats["oldest_message_ts"] = row["oldest"] if row else None
-            stats["newest_message_ts"] = row["newest"] if row else None
-        except sqlite3.OperationalError:
-            stats["oldest_message_ts"] = None
-            stats["newest_message_ts"] = None
+        if totals is not None:
+            stats["oldest_message_ts"] = totals["oldest_message_ts"]
+            stats["newest_message_ts"] = totals["newest_message_ts"]
+        else:
+            try:
+                row = conn.execute(
+                    "SELECT MIN(timestamp) AS oldest, MAX(timestamp) AS newest FROM messages"
+                ).fetchone()
+                stats["oldest_message_ts"] = row["oldest"] if row else None
+                stats["newest_message_ts"] = row["newest"] if row else None
+            except sqlite3.OperationalError:
+                stats["oldest_message_ts"] = None
+                stats["newest_message_ts"] = None
 
         try:
-            rows = conn.execute(
-                "SELECT chat_id, COUNT(*) AS cnt FROM messages "
-                "GROUP BY chat_id ORDER BY cnt DESC LIMIT 10"
-            ).fetchall()
-            stats["top_chats"] = [{"chat_id": r["chat_id"], "count": r["cnt"]} for r in rows]
+            if totals is not None:
+                stats["top_chats"] = [
+                    {"chat_id": chat_id, "count": cnt} for chat_id, cnt in top_chats(conn, 10)
+                ]
+            else:
+                rows = conn.execute(
+                    "SELECT chat_id, COUNT(*) AS cnt FROM messages "
+                    "GROUP BY chat_id ORDER BY cnt DESC LIMIT 10"
+                ).fetchall()
+                stats["top_chats"] = [{"chat_id": r["chat_id"], "count": r["cnt"]} for r in rows]
         except sqlite3.OperationalError:
             stats["top_chats"] = []
 
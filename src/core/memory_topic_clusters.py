@@ -15,8 +15,17 @@ chunks из тех же кластеров → broader context.
   - `cluster_stats()` — для диагностики и CLI.
 
 K-means реализован вручную через cosine-distance, без sklearn — чтобы
-не тащить лишнюю зависимость в hot-path. Sklearn опционально подхватываем
-для batch reclustering, если он установлен (быстрее и стабильнее).
+не тащить лишнюю зависимость в hot-path. Основной путь — векторизованный
+NumPy (`_kmeans_cosine_np`) по contiguous float32 матрице, которую
+`load_embedding_matrix` собирает прямо из BLOB'ов `vec_chunks`: Lloyd
+блочными матричными умножениями, k-means++ seeding (D²-sampling), а для
+больших архивов (≥ `_KMEANS_MINIBATCH_MIN_N`) — mini-batch k-means.
+Pure-Python `_kmeans_cosine` остаётся fallback'ом без numpy.
+
+Incremental mode: центроиды последнего recluster'а лежат в cluster_meta
+(`centroids_b64`), `assign_incremental` / `assign_unclustered_from_archive`
+приписывают свежие chunks к ближайшему центроиду. Полный recluster нужен,
+когда доля таких chunks превысила порог (`needs_recluster`).
 
 Persistence: всё лежит в archive.db (sidecar tables); sidecar-режим
 позволяет жить с любой версией основной схемы.
@@ -24,6 +33,7 @@ Persistence: всё лежит в archive.db (sidecar tables); sidecar-режи
 
 from __future__ import annotations
 
+import base64
 import json
 import logging
 import math
@@ -32,6 +42,12 @@ import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
+
+try:  # numpy опционален: без него работает pure-Python путь.
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
 
 from src.core.memory_archive import (
     ArchivePaths,
@@ -45,6 +61,15 @@ logger = logging.getLogger(__name__)
 _KMEANS_MAX_ITER = 50
 # Порог сходимости (доля смены центров): меньше → стабильнее, дольше итерируем.
 _KMEANS_TOL = 1e-4
+# С какого размера архива recluster переключается на mini-batch k-means.
+_KMEANS_MINIBATCH_MIN_N = 50_000
+_KMEANS_MINIBATCH_SIZE = 4096
+_KMEANS_MINIBATCH_ITER = 100
+# Строк на один блок матричного умножения (ограничивает пиковую память
+# матрицы сходства: 65536 × k × 4 байта).
+_ASSIGN_BLOCK_ROWS = 65536
+# Доля incremental-приписанных chunks, после которой нужен полный recluster.
+_INCREMENTAL_RECLUSTER_RATIO = 0.25
 
 
 # ---------------------------------------------------------------------------
@@ -112,22 +137,33 @@ def _kmeans_cosine(
     """Простой k-means с cosine distance. Возвращает (assignments, centroids).
 
     Все векторы должны быть L2-нормализованы заранее (вызывается из
-    `recluster`, где это уже сделано).
+    `recluster`, где это уже сделано). При наличии numpy делегирует в
+    `_kmeans_cosine_np`; ниже — pure-Python fallback.
     """
     n = len(embeddings)
     if n == 0:
         return [], []
     k = max(1, min(num_clusters, n))
+    if np is not None and len({len(v) for v in embeddings}) == 1:
+        labels, centers = _kmeans_cosine_np(
+            np.asarray(embeddings, dtype=np.float32),
+            k,
+            max_iter=max_iter,
+            tol=tol,
+            seed=seed,
+        )
+        return labels.tolist(), centers.tolist()
 
     rng = random.Random(seed)
     # k-means++ упрощённый: первый центр случайный, дальше — самый дальний
     # от уже выбранных.
     indices = [rng.randrange(n)]
+    chosen = set(indices)
     while len(indices) < k:
         best_idx = -1
         best_dist = -1.0
         for i in range(n):
-            if i in indices:
+            if i in chosen:
                 continue
             min_d = min(_cosine_distance(embeddings[i], embeddings[j]) for j in indices)
             if min_d > best_dist:
@@ -136,6 +172,7 @@ def _kmeans_cosine(
         if best_idx < 0:
             break
         indices.append(best_idx)
+        chosen.add(best_idx)
 
     centroids = [list(embeddings[i]) for i in indices]
     assignments = [0] * n
@@ -176,6 +213,195 @@ def _kmeans_cosine(
     return assignments, centroids
 
 
+# ---------------------------------------------------------------------------
+# K-means (cosine), NumPy.
+# ---------------------------------------------------------------------------
+
+
+def _normalize_rows(matrix: Any) -> Any:
+    """float32 копия с L2-нормализованными строками (нулевые строки — нули)."""
+    out = np.array(matrix, dtype=np.float32, order="C", copy=True)
+    if out.ndim != 2:
+        out = out.reshape(len(out), -1)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    out /= norms
+    return out
+
+
+def _assign_np(matrix: Any, centroids: Any) -> tuple[Any, Any]:
+    """Ближайший центроид для каждой строки → (labels int32, similarity float32).
+
+    Считает блоками по `_ASSIGN_BLOCK_ROWS`, чтобы матрица сходства n×k не
+    занимала лишнюю память на 500k chunks.
+    """
+    n = matrix.shape[0]
+    labels = np.empty(n, dtype=np.int32)
+    sims = np.empty(n, dtype=np.float32)
+    centers_t = np.ascontiguousarray(centroids.T)
+    for start in range(0, n, _ASSIGN_BLOCK_ROWS):
+        block = matrix[start : start + _ASSIGN_BLOCK_ROWS] @ centers_t
+        best = block.argmax(axis=1)
+        labels[start : start + len(best)] = best
+        sims[start : start + len(best)] = block[np.arange(len(best)), best]
+    return labels, sims
+
+
+def _cluster_sums_np(matrix: Any, labels: Any, k: int) -> tuple[Any, Any]:
+    """Сумма векторов и размер каждого кластера (one-hot matmul блоками)."""
+    sums = np.zeros((k, matrix.shape[1]), dtype=np.float32)
+    cluster_ids = np.arange(k, dtype=labels.dtype)
+    for start in range(0, matrix.shape[0], _ASSIGN_BLOCK_ROWS):
+        block_labels = labels[start : start + _ASSIGN_BLOCK_ROWS]
+        onehot = (block_labels[None, :] == cluster_ids[:, None]).astype(np.float32)
+        sums += onehot @ matrix[start : start + _ASSIGN_BLOCK_ROWS]
+    counts = np.bincount(labels, minlength=k)
+    return sums, counts
+
+
+def _kmeans_pp_init_np(matrix: Any, k: int, rng: Any) -> Any:
+    """k-means++ seeding (D²-sampling) по cosine distance, O(n·k·dim) в BLAS."""
+    n = matrix.shape[0]
+    centers = np.empty((k, matrix.shape[1]), dtype=np.float32)
+    centers[0] = matrix[rng.integers(n)]
+    min_dist = np.maximum(1.0 - matrix @ centers[0], 0.0)
+    for c in range(1, k):
+        total = float(min_dist.sum())
+        if total <= 0.0:
+            # Все точки совпали с центрами — добираем случайными.
+            idx = int(rng.integers(n))
+        else:
+            idx = int(np.searchsorted(np.cumsum(min_dist), rng.random() * total))
+            idx = min(idx, n - 1)
+        centers[c] = matrix[idx]
+        np.minimum(min_dist, np.maximum(1.0 - matrix @ centers[c], 0.0), out=min_dist)
+    return centers
+
+
+def _kmeans_cosine_np(
+    matrix: Any,
+    num_clusters: int,
+    *,
+    max_iter: int = _KMEANS_MAX_ITER,
+    tol: float = _KMEANS_TOL,
+    seed: int = 42,
+    batch_size: int | None = None,
+) -> tuple[Any, Any]:
+    """Векторизованный k-means по L2-нормализованной float32 матрице (n × dim).
+
+    Returns:
+        (labels int32[n], centroids float32[k, dim]) — центроиды нормализованы.
+    `batch_size` — mini-batch k-means (Sculley 2010): центры обновляются по
+    случайным батчам, затем одно полное присваивание.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.int32), np.empty((0, matrix.shape[1]), dtype=np.float32)
+    k = max(1, min(num_clusters, n))
+    rng = np.random.default_rng(seed)
+    centroids = _kmeans_pp_init_np(matrix, k, rng)
+
+    if batch_size and n > batch_size:
+        seen = np.zeros(k, dtype=np.float64)
+        for _iteration in range(max(max_iter, _KMEANS_MINIBATCH_ITER)):
+            batch = matrix[rng.integers(0, n, size=batch_size)]
+            batch_labels, _sims = _assign_np(batch, centroids)
+            sums, counts = _cluster_sums_np(batch, batch_labels, k)
+            hit = counts > 0
+            # Per-center learning rate 1/v: взвешенное среднее старого центра
+            # и суммы новых точек батча.
+            updated = centroids.copy()
+            updated[hit] = (centroids[hit] * seen[hit, None] + sums[hit]) / (
+                seen[hit] + counts[hit]
+            )[:, None]
+            seen += counts
+            updated = _normalize_rows(updated)
+            shift = float(np.max(1.0 - np.einsum("ij,ij->i", updated, centroids)))
+            centroids = updated
+            if shift < tol:
+                break
+        labels, _sims = _assign_np(matrix, centroids)
+        return labels, centroids
+
+    prev_labels = None
+    labels = np.zeros(n, dtype=np.int32)
+    for _iteration in range(max_iter):
+        labels, _sims = _assign_np(matrix, centroids)
+        sums, counts = _cluster_sums_np(matrix, labels, k)
+        empty = counts == 0
+        if empty.any():
+            # Пустой кластер — пере-инициализируем случайной точкой.
+            sums[empty] = matrix[rng.integers(0, n, size=int(empty.sum()))]
+        new_centroids = _normalize_rows(sums)
+        if prev_labels is not None:
+            changed = int(np.count_nonzero(prev_labels != labels))
+            if changed / n < tol:
+                centroids = new_centroids
+                break
+        prev_labels = labels
+        centroids = new_centroids
+    return labels, centroids
+
+
+def _encode_centroids(centroids: Any) -> str:
+    return base64.b64encode(np.ascontiguousarray(centroids, dtype="<f4").tobytes()).decode("ascii")
+
+
+def _decode_centroids(raw: str, dim: int) -> Any | None:
+    try:
+        data = np.frombuffer(base64.b64decode(raw), dtype="<f4")
+    except (ValueError, TypeError):
+        return None
+    if dim <= 0 or data.size == 0 or data.size % dim:
+        return None
+    return data.reshape(-1, dim).astype(np.float32)
+
+
+def load_embedding_matrix(
+    conn: sqlite3.Connection,
+    *,
+    limit: int | None = None,
+    only_unclustered: bool = False,
+) -> tuple[list[str], Any]:
+    """chunk_ids + contiguous float32 матрица (n × dim) из `vec_chunks`.
+
+    BLOB'ы sqlite-vec (float32-LE) склеиваются в один буфер и оборачиваются
+    `np.frombuffer` без поэлементного декодирования. Векторы чужой
+    размерности (смена модели посреди архива) пропускаются.
+    `only_unclustered` — только chunks без строки в chunk_clusters
+    (для incremental mode).
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for load_embedding_matrix")
+    sql = "SELECT c.chunk_id, v.vector FROM vec_chunks v JOIN chunks c ON c.id = v.rowid"
+    if only_unclustered:
+        sql += " LEFT JOIN chunk_clusters cc ON cc.chunk_id = c.chunk_id WHERE cc.chunk_id IS NULL"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    chunk_ids: list[str] = []
+    blobs: list[bytes] = []
+    row_bytes = 0
+    cur = conn.execute(sql)
+    while True:
+        rows = cur.fetchmany(8192)
+        if not rows:
+            break
+        for chunk_id, blob in rows:
+            if not isinstance(blob, (bytes, memoryview)):
+                continue
+            raw = bytes(blob)
+            if not row_bytes:
+                row_bytes = len(raw)
+            if len(raw) != row_bytes or row_bytes % 4:
+                continue
+            chunk_ids.append(str(chunk_id))
+            blobs.append(raw)
+    if not blobs:
+        return [], np.empty((0, 0), dtype=np.float32)
+    matrix = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(len(blobs), row_bytes // 4)
+    return chunk_ids, matrix
+
+
 # ---------------------------------------------------------------------------
 # Публичный API.
 # ---------------------------------------------------------------------------
@@ -242,20 +468,95 @@ class TopicClusterIndex:
             )
 
         chunk_ids = list(embeddings.keys())
-        normalized = [_l2_normalize(embeddings[cid]) for cid in chunk_ids]
+        if np is not None and len({len(v) for v in embeddings.values()}) == 1:
+            matrix = np.asarray([embeddings[cid] for cid in chunk_ids], dtype=np.float32)
+            return self.recluster_matrix(
+                chunk_ids,
+                matrix,
+                num_clusters=num_clusters,
+                model_name=model_name,
+                seed=seed,
+            )
 
+        normalized = [_l2_normalize(embeddings[cid]) for cid in chunk_ids]
         assignments, centroids = _kmeans_cosine(
             normalized,
             num_clusters=num_clusters,
             seed=seed,
         )
+        distances = [
+            _cosine_distance(vec, centroids[cluster])
+            for vec, cluster in zip(normalized, assignments)
+        ]
+        return self._write_full(chunk_ids, assignments, distances, len(centroids), None, model_name)
+
+    def recluster_matrix(
+        self,
+        chunk_ids: list[str],
+        matrix: Any,
+        *,
+        num_clusters: int = 30,
+        model_name: str | None = None,
+        seed: int = 42,
+        batch_size: int | None = None,
+    ) -> ClusterStats:
+        """Полная переиндексация по float32 матрице (n × dim), см. `load_embedding_matrix`.
+
+        `batch_size=None` → mini-batch включается автоматически для архивов
+        от `_KMEANS_MINIBATCH_MIN_N` chunks; 0 — всегда полный Lloyd.
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for recluster_matrix")
+        if not chunk_ids:
+            return ClusterStats(0, 0, None, None, {})
+        normalized = _normalize_rows(matrix)
+        if batch_size is None:
+            batch_size = _KMEANS_MINIBATCH_SIZE if len(chunk_ids) >= _KMEANS_MINIBATCH_MIN_N else 0
+        labels, centroids = _kmeans_cosine_np(
+            normalized,
+            num_clusters,
+            seed=seed,
+            batch_size=batch_size or None,
+        )
+        # distance до своего центра — для дебага и сортировки в expand.
+        own_sim = np.einsum("ij,ij->i", normalized, centroids[labels])
+        distances = np.clip(1.0 - own_sim, 0.0, 2.0)
+        return self._write_full(
+            chunk_ids, labels.tolist(), distances.tolist(), len(centroids), centroids, model_name
+        )
 
-        # Считаем distance до своего центра — пригодится для дебага и сортировки.
-        rows: list[tuple[str, int, float, str]] = []
+    def recluster_from_archive(
+        self,
+        *,
+        num_clusters: int = 30,
+        model_name: str | None = None,
+        seed: int = 42,
+        limit: int | None = None,
+    ) -> ClusterStats:
+        """Полный recluster по всем векторам `vec_chunks` этого archive.db."""
+        conn = self._open()
+        try:
+            chunk_ids, matrix = load_embedding_matrix(conn, limit=limit)
+        finally:
+            conn.close()
+        return self.recluster_matrix(
+            chunk_ids, matrix, num_clusters=num_clusters, model_name=model_name, seed=seed
+        )
+
+    def _write_full(
+        self,
+        chunk_ids: list[str],
+        assignments: list[int],
+        distances: list[float],
+        num_centroids: int,
+        centroids: Any | None,
+        model_name: str | None,
+    ) -> ClusterStats:
         now_iso = self._now_iso()
-        for cid, vec, cluster in zip(chunk_ids, normalized, assignments):
-            d = _cosine_distance(vec, centroids[cluster])
-            rows.append((cid, int(cluster), float(d), now_iso))
+        rows: list[tuple[str, int, float, str]] = [
+            (cid, int(cluster), float(d), now_iso)
+            for cid, cluster, d in zip(chunk_ids, assignments, distances)
+        ]
 
         cluster_sizes: dict[int, int] = {}
         for _, cluster, _d, _ts in rows:
@@ -276,12 +577,20 @@ class TopicClusterIndex:
             )
             # cluster_meta UPSERT (несколько ключей).
             meta_pairs = [
-                ("num_clusters", str(len(centroids))),
+                ("num_clusters", str(num_centroids)),
                 ("indexed_chunks", str(len(rows))),
                 ("indexed_at", now_iso),
                 ("model_name", model_name or ""),
                 ("cluster_sizes_json", json.dumps(cluster_sizes, sort_keys=True)),
+                ("incremental_assigned", "0"),
             ]
+            if centroids is not None:
+                meta_pairs.append(("centroid_dim", str(int(centroids.shape[1]))))
+                meta_pairs.append(("centroids_b64", _encode_centroids(centroids)))
+            else:
+                cur.execute(
+                    "DELETE FROM cluster_meta WHERE key IN ('centroid_dim', 'centroids_b64');"
+                )
             cur.executemany(
                 """
                 INSERT INTO cluster_meta(key, value) VALUES (?, ?)
@@ -293,7 +602,7 @@ class TopicClusterIndex:
             logger.info(
                 "topic_clusters_reclustered chunks=%d clusters=%d",
                 len(rows),
-                len(centroids),
+                num_centroids,
             )
         except sqlite3.Error:
             conn.rollback()
@@ -303,13 +612,116 @@ class TopicClusterIndex:
             conn.close()
 
         return ClusterStats(
-            num_clusters=len(centroids),
+            num_clusters=num_centroids,
             indexed_chunks=len(rows),
             indexed_at=now_iso,
             model_name=model_name,
             cluster_sizes=cluster_sizes,
         )
 
+    def assign_incremental(self, chunk_ids: list[str], matrix: Any) -> int:
+        """Приписывает новые chunks к ближайшим центроидам последнего recluster'а.
+
+        Центроиды не сдвигаются — дрейф копится в `incremental_assigned`,
+        см. `needs_recluster`. Returns: число приписанных chunks (0, если
+        центроидов нет или размерность не совпала).
+        """
+        if np is None or not chunk_ids:
+            return 0
+        conn = self._open()
+        try:
+            return self._assign_incremental_locked(conn, chunk_ids, matrix)
+        finally:
+            conn.close()
+
+    def assign_unclustered_from_archive(self, *, limit: int | None = None) -> int:
+        """Incremental mode по архиву: все векторы `vec_chunks` без кластера."""
+        if np is None:
+            return 0
+        conn = self._open()
+        try:
+            chunk_ids, matrix = load_embedding_matrix(conn, limit=limit, only_unclustered=True)
+            if not chunk_ids:
+                return 0
+            return self._assign_incremental_locked(conn, chunk_ids, matrix)
+        finally:
+            conn.close()
+
+    def _assign_incremental_locked(
+        self, conn: sqlite3.Connection, chunk_ids: list[str], matrix: Any
+    ) -> int:
+        meta = dict(conn.execute("SELECT key, value FROM cluster_meta;").fetchall())
+        dim = int(meta.get("centroid_dim", "0") or 0)
+        centroids = _decode_centroids(meta.get("centroids_b64", ""), dim)
+        if centroids is None or matrix.shape[1] != dim:
+            logger.info("topic_clusters_incremental_skipped reason=no_centroids")
+            return 0
+        normalized = _normalize_rows(matrix)
+        labels, sims = _assign_np(normalized, centroids)
+        distances = np.clip(1.0 - sims, 0.0, 2.0)
+        now_iso = self._now_iso()
+        rows = [
+            (cid, int(c), float(d), now_iso)
+            for cid, c, d in zip(chunk_ids, labels.tolist(), distances.tolist())
+        ]
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN;")
+            cur.executemany(
+                """
+                INSERT OR REPLACE INTO chunk_clusters
+                    (chunk_id, cluster_id, distance, assigned_at)
+                VALUES (?, ?, ?, ?);
+                """,
+                rows,
+            )
+            # Размеры пересчитываем по индексу cluster_id — дёшево и не
+            # расходится с таблицей при повторном assign того же chunk'а.
+            sizes = {
+                int(cluster): int(cnt)
+                for cluster, cnt in cur.execute(
+                    "SELECT cluster_id, COUNT(*) FROM chunk_clusters GROUP BY cluster_id;"
+                ).fetchall()
+            }
+            cur.executemany(
+                """
+                INSERT INTO cluster_meta(key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value;
+                """,
+                [
+                    ("indexed_chunks", str(sum(sizes.values()))),
+                    (
+                        "incremental_assigned",
+                        str(int(meta.get("incremental_assigned", "0") or 0) + len(rows)),
+                    ),
+                    ("cluster_sizes_json", json.dumps(sizes, sort_keys=True)),
+                ],
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            logger.exception("topic_clusters_incremental_failed")
+            raise
+        logger.info("topic_clusters_incremental_assigned chunks=%d", len(rows))
+        return len(rows)
+
+    def needs_recluster(
+        self, *, max_incremental_ratio: float = _INCREMENTAL_RECLUSTER_RATIO
+    ) -> bool:
+        """True, если центроидов нет или incremental-хвост стал слишком большим."""
+        conn = self._open()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM cluster_meta;").fetchall())
+        except sqlite3.OperationalError:
+            return True
+        finally:
+            conn.close()
+        if not meta.get("centroids_b64"):
+            return True
+        indexed = int(meta.get("indexed_chunks", "0") or 0)
+        incremental = int(meta.get("incremental_assigned", "0") or 0)
+        return indexed <= 0 or incremental / indexed > max_incremental_ratio
+
     # ---------- read paths ----------------------------------------------
 
     def get_cluster_id(self, chunk_id: str) -> int | None:
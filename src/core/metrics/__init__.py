@@ -28,6 +28,13 @@ from .dispatcher_barrier import (
     inc_dispatcher_barrier,
 )
 
+# === gateway_queue (priority gateway scheduler) ===
+from .gateway_queue import (
+    _GATEWAY_QUEUE_WAIT,
+    krab_gateway_queue_wait_seconds,
+    observe_gateway_queue_wait,
+)
+
 # === google_bypass (Wave 20-B) ===
 from .google_bypass import (
     krab_google_direct_bypass_latency_seconds,
@@ -179,6 +186,13 @@ from .swarm_artifacts import (
     set_swarm_artifacts_metrics,
 )
 
+# === telegram_lanes (priority lanes Telegram rate limiter) ===
+from .telegram_lanes import (
+    _TELEGRAM_LANE_WAIT,
+    krab_telegram_lane_wait_seconds,
+    observe_telegram_lane_wait,
+)
+
 # === telegram_rate (Wave 121) ===
 from .telegram_rate import (
     _RATE_LIMIT_DEADLINES as _TELEGRAM_RATE_LIMIT_DEADLINES,  # test alias
@@ -339,6 +353,10 @@ __all__ = [
     "_DISPATCHER_BARRIER_COUNTER",
     "_dispatcher_groups_barrier_total",
     "inc_dispatcher_barrier",
+    # gateway_queue (priority gateway scheduler)
+    "_GATEWAY_QUEUE_WAIT",
+    "krab_gateway_queue_wait_seconds",
+    "observe_gateway_queue_wait",
     # idle_skip (S62 W6 + S63 W1 codex)
     "_BYPASS_IDLE_SKIP_COUNTER",
     "_CODEX_IDLE_SKIP_COUNTER",
@@ -376,6 +394,10 @@ __all__ = [
     "_CAPABILITY_CACHE_MISMATCH_COUNTER",
     "_capability_cache_mismatch_total",
     "inc_capability_cache_mismatch",
+    # telegram_lanes (priority lanes Telegram rate limiter)
+    "_TELEGRAM_LANE_WAIT",
+    "krab_telegram_lane_wait_seconds",
+    "observe_telegram_lane_wait",
     # telegram_rate (Wave 121)
     "_TELEGRAM_RATE_LIMIT_DEADLINES",
     "_telegram_flood_wait_duration_seconds",
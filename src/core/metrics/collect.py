@@ -221,6 +221,22 @@ def collect_metrics() -> str:
             )
             lines.append(f"{metric_name}_sum{{{label_str_base}}} {series['sum']:.6f}")
             lines.append(f"{metric_name}_count{{{label_str_base}}} {series['count']}")
+        # Истинные перцентили из quantile sketch (histogram-бакеты их не дают)
+        quantile_name = "krab_llm_route_latency_quantile_seconds"
+        quantile_lines: list[str] = []
+        for series in llm_latency_tracker.snapshot():
+            label_str_base = (
+                f'provider="{_sanitize_label(series["provider"])}",'
+                f'model="{_sanitize_label(series["model"])}"'
+            )
+            for q_str, value in (series.get("quantiles") or {}).items():
+                quantile_lines.append(
+                    f'{quantile_name}{{{label_str_base},quantile="{q_str}"}} {value:.6f}'
+                )
+        if quantile_lines:
+            lines.append(f"# HELP {quantile_name} LLM route latency quantiles (sketch, seconds)")
+            lines.append(f"# TYPE {quantile_name} gauge")
+            lines.extend(quantile_lines)
     except Exception:
         pass
 
@@ -624,6 +640,109 @@ def collect_metrics() -> str:
     except Exception:  # noqa: BLE001
         pass
 
+    # === Gateway slot scheduler: queue wait per priority + live occupancy ===
+    try:
+        from .gateway_queue import render_gateway_queue_wait
+
+        lines.extend(render_gateway_queue_wait())
+        from src.openclaw_client import _gateway_scheduler
+
+        snap = _gateway_scheduler.snapshot()
+        lines.append("# HELP krab_gateway_slots_active Busy OpenClaw gateway slots by priority")
+        lines.append("# TYPE krab_gateway_slots_active gauge")
+        for prio, cnt in snap["active"].items():
+            lines.append(f'krab_gateway_slots_active{{priority="{prio}"}} {cnt}')
+        lines.append("# HELP krab_gateway_queue_depth Waiting gateway requests by priority")
+        lines.append("# TYPE krab_gateway_queue_depth gauge")
+        for prio, cnt in snap["waiting"].items():
+            lines.append(f'krab_gateway_queue_depth{{priority="{prio}"}} {cnt}')
+    except Exception:  # noqa: BLE001
+        pass
+
+    # === Telegram rate limiter: token wait per lane + live queue depth ===
+    try:
+        from .telegram_lanes import render_telegram_lane_wait
+
+        lines.extend(render_telegram_lane_wait())
+        from src.core.telegram_rate_limiter import telegram_rate_limiter
+
+        lanes = telegram_rate_limiter.lane_stats()
+        lines.append("# HELP krab_telegram_lane_waiting Telegram calls waiting for a token by lane")
+        lines.append("# TYPE krab_telegram_lane_waiting gauge")
+        for lane, entry in lanes.items():
+            lines.append(f'krab_telegram_lane_waiting{{lane="{lane}"}} {entry["waiting"]}')
+    except Exception:  # noqa: BLE001
+        pass
+
+    # === Tool result cache: hit / miss / single-flight coalesce ===
+    try:
+        from src.core.tool_result_cache import tool_result_cache
+
+        tc_stats = tool_result_cache.stats()
+        for key, help_text in (
+            ("hits", "Tool calls served from ToolResultCache"),
+            ("misses", "Tool calls not found in ToolResultCache"),
+            ("coalesced", "Concurrent identical tool calls joined to an in-flight call"),
+            ("evictions", "ToolResultCache LRU evictions"),
+        ):
+            name = f"krab_tool_result_cache_{key}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {tc_stats[key]}")
+        lines.append("# HELP krab_tool_result_cache_size Entries in ToolResultCache")
+        lines.append("# TYPE krab_tool_result_cache_size gauge")
+        lines.append(f"krab_tool_result_cache_size {tc_stats['size']}")
+    except Exception:  # noqa: BLE001
+        pass
+
+    # === Periodic scheduler: стоимость фоновых jobs ===
+    try:
+        from src.core.periodic_scheduler import periodic_scheduler
+
+        ps_stats = periodic_scheduler.stats()
+        lines.append(
+            "# HELP krab_periodic_scheduler_wakeups_total Periodic scheduler driver wakeups"
+        )
+        lines.append("# TYPE krab_periodic_scheduler_wakeups_total counter")
+        lines.append(f"krab_periodic_scheduler_wakeups_total {ps_stats['wakeups']}")
+        jobs = ps_stats["jobs"]
+        for key, name, mtype, help_text in (
+            ("runs", "krab_periodic_job_runs_total", "counter", "Periodic job runs"),
+            ("failures", "krab_periodic_job_failures_total", "counter", "Periodic job failures"),
+            (
+                "skipped",
+                "krab_periodic_job_skipped_total",
+                "counter",
+                "Ticks skipped because previous run was still active",
+            ),
+            (
+                "coalesced",
+                "krab_periodic_job_coalesced_total",
+                "counter",
+                "Missed ticks collapsed into one run after idle/sleep",
+            ),
+            (
+                "total_duration_sec",
+                "krab_periodic_job_duration_seconds_total",
+                "counter",
+                "Cumulative periodic job run time",
+            ),
+            (
+                "last_duration_sec",
+                "krab_periodic_job_last_duration_seconds",
+                "gauge",
+                "Duration of the last periodic job run",
+            ),
+        ):
+            if not jobs:
+                break
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {mtype}")
+            for job_name, snap in jobs.items():
+                lines.append(f'{name}{{job="{_sanitize_label(job_name)}"}} {snap[key]}')
+    except Exception:  # noqa: BLE001
+        pass
+
     # === Wave 223: long-context routing decisions (MLX local) ===
     try:
         from .long_context_routing import _MLX_LOCAL_ROUTING_COUNTER
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Queue-wait histogram для слотов OpenClaw gateway (per priority).
+
+Метрика:
+    krab_gateway_queue_wait_seconds{priority}  — p0 / p1 / p2
+    buckets: 0.005, 0.05, 0.25, 1, 2, 5, 10, 30
+
+Наблюдается в `_GatewaySlot` при выдаче слота `GatewayScheduler`'ом.
+Pattern: ``dispatcher_barrier.py`` — prometheus_client optional, in-memory
+копия для text render в ``collect.py``. Helper никогда не бросает.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+QUEUE_WAIT_BUCKETS: tuple[float, ...] = (0.005, 0.05, 0.25, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+try:
+    from prometheus_client import Histogram as _Histogram  # type: ignore[import-not-found]
+
+    krab_gateway_queue_wait_seconds: Any = _Histogram(
+        "krab_gateway_queue_wait_seconds",
+        "OpenClaw gateway slot queue wait by priority",
+        ["priority"],
+        buckets=QUEUE_WAIT_BUCKETS,
+    )
+except Exception:  # noqa: BLE001 — prometheus_client optional
+    krab_gateway_queue_wait_seconds = None
+
+
+# priority → {"buckets": [cumulative counts...], "sum": float, "count": int}
+_GATEWAY_QUEUE_WAIT: dict[str, dict[str, Any]] = {}
+
+
+def observe_gateway_queue_wait(priority: str, seconds: float) -> None:
+    """Фиксирует ожидание слота. Best-effort."""
+    try:
+        value = max(0.0, float(seconds))
+        key = str(priority) if priority else "unknown"
+        entry = _GATEWAY_QUEUE_WAIT.get(key)
+        if entry is None:
+            entry = {"buckets": [0] * len(QUEUE_WAIT_BUCKETS), "sum": 0.0, "count": 0}
+            _GATEWAY_QUEUE_WAIT[key] = entry
+        for i, bound in enumerate(QUEUE_WAIT_BUCKETS):
+            if value <= bound:
+                entry["buckets"][i] += 1
+        entry["sum"] += value
+        entry["count"] += 1
+        if krab_gateway_queue_wait_seconds is not None:
+            krab_gateway_queue_wait_seconds.labels(priority=key).observe(value)
+    except Exception:  # noqa: BLE001 — инструментация best-effort
+        pass
+
+
+def render_gateway_queue_wait() -> list[str]:
+    """Prometheus text lines из in-memory копии (пусто, если наблюдений нет)."""
+    if not _GATEWAY_QUEUE_WAIT:
+        return []
+    name = "krab_gateway_queue_wait_seconds"
+    lines = [
+        f"# HELP {name} OpenClaw gateway slot queue wait by priority",
+        f"# TYPE {name} histogram",
+    ]
+    for priority, entry in sorted(_GATEWAY_QUEUE_WAIT.items()):
+        for bound, cnt in zip(QUEUE_WAIT_BUCKETS, entry["buckets"]):
+            lines.append(f'{name}_bucket{{priority="{priority}",le="{bound}"}} {cnt}')
+        lines.append(f'{name}_bucket{{priority="{priority}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'{name}_sum{{priority="{priority}"}} {round(entry["sum"], 6)}')
+        lines.append(f'{name}_count{{priority="{priority}"}} {entry["count"]}')
+    return lines
+
+
+__all__ = [
+    "QUEUE_WAIT_BUCKETS",
+    "_GATEWAY_QUEUE_WAIT",
+    "krab_gateway_queue_wait_seconds",
+    "observe_gateway_queue_wait",
+    "render_gateway_queue_wait",
+]
@@ -24,7 +24,7 @@ except Exception:  # noqa: BLE001
 
 
 _SMART_ROUTING_STAGES: frozenset[str] = frozenset(
-    {"hard_gate", "chat_policy", "regex", "llm_classifier", "feedback"}
+    {"hard_gate", "chat_policy", "regex", "embed_classifier", "llm_classifier", "feedback"}
 )
 _SMART_ROUTING_OUTCOMES: frozenset[str] = frozenset({"allow", "deny"})
 
@@ -35,6 +35,8 @@ _DECISION_PATH_TO_STAGE: dict[str, str] = {
     "regex_low": "regex",
     "media_present": "regex",
     "regex_threshold_fallback": "regex",
+    "embed_yes": "embed_classifier",
+    "embed_no": "embed_classifier",
     "llm_yes": "llm_classifier",
     "llm_no": "llm_classifier",
     "llm_error_fallback": "feedback",
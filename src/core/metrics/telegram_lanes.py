@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Wait histogram токенов Telegram rate limiter'а (per lane).
+
+Метрика:
+    krab_telegram_lane_wait_seconds{lane}  — owner / interactive / background / bulk
+    buckets: 0.001, 0.01, 0.05, 0.25, 1, 2, 5, 15
+
+Наблюдается в `GlobalTelegramRateLimiter.acquire` (мгновенная выдача — 0).
+Pattern: ``gateway_queue.py`` — prometheus_client optional, in-memory
+копия для text render в ``collect.py``. Helper никогда не бросает.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+LANE_WAIT_BUCKETS: tuple[float, ...] = (0.001, 0.01, 0.05, 0.25, 1.0, 2.0, 5.0, 15.0)
+
+try:
+    from prometheus_client import Histogram as _Histogram  # type: ignore[import-not-found]
+
+    krab_telegram_lane_wait_seconds: Any = _Histogram(
+        "krab_telegram_lane_wait_seconds",
+        "Telegram rate limiter token wait by lane",
+        ["lane"],
+        buckets=LANE_WAIT_BUCKETS,
+    )
+except Exception:  # noqa: BLE001 — prometheus_client optional
+    krab_telegram_lane_wait_seconds = None
+
+
+# lane → {"buckets": [cumulative counts...], "sum": float, "count": int}
+_TELEGRAM_LANE_WAIT: dict[str, dict[str, Any]] = {}
+
+
+def observe_telegram_lane_wait(lane: str, seconds: float) -> None:
+    """Фиксирует ожидание токена lane. Best-effort."""
+    try:
+        value = max(0.0, float(seconds))
+        key = str(lane) if lane else "unknown"
+        entry = _TELEGRAM_LANE_WAIT.get(key)
+        if entry is None:
+            entry = {"buckets": [0] * len(LANE_WAIT_BUCKETS), "sum": 0.0, "count": 0}
+            _TELEGRAM_LANE_WAIT[key] = entry
+        for i, bound in enumerate(LANE_WAIT_BUCKETS):
+            if value <= bound:
+                entry["buckets"][i] += 1
+        entry["sum"] += value
+        entry["count"] += 1
+        if krab_telegram_lane_wait_seconds is not None:
+            krab_telegram_lane_wait_seconds.labels(lane=key).observe(value)
+    except Exception:  # noqa: BLE001 — инструментация best-effort
+        pass
+
+
+def render_telegram_lane_wait() -> list[str]:
+    """Prometheus text lines из in-memory копии (пусто, если наблюдений нет)."""
+    if not _TELEGRAM_LANE_WAIT:
+        return []
+    name = "krab_telegram_lane_wait_seconds"
+    lines = [
+        f"# HELP {name} Telegram rate limiter token wait by lane",
+        f"# TYPE {name} histogram",
+    ]
+    for lane, entry in sorted(_TELEGRAM_LANE_WAIT.items()):
+        for bound, cnt in zip(LANE_WAIT_BUCKETS, entry["buckets"]):
+            lines.append(f'{name}_bucket{{lane="{lane}",le="{bound}"}} {cnt}')
+        lines.append(f'{name}_bucket{{lane="{lane}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'{name}_sum{{lane="{lane}"}} {round(entry["sum"], 6)}')
+        lines.append(f'{name}_count{{lane="{lane}"}} {entry["count"]}')
+    return lines
+
+
+__all__ = [
+    "LANE_WAIT_BUCKETS",
+    "_TELEGRAM_LANE_WAIT",
+    "krab_telegram_lane_wait_seconds",
+    "observe_telegram_lane_wait",
+    "render_telegram_lane_wait",
+]
@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""
+Единый планировщик периодических фоновых задач runtime.
+
+Зачем существует:
+
+До него каждый фоновый сервис поднимал свой ``while True: ...; await
+asyncio.sleep(N)`` (reaper, idea-features tick, disk/MCP/launchd/Krab Ear
+probes, memory leak detector, cost budget, LM Studio watchers, weekly digest,
+native cron...). Два десятка независимых таймеров будят event loop вразнобой
+даже когда делать нечего, а стоимость фоновой работы нигде не видна.
+
+``PeriodicScheduler`` держит все jobs в одной heap по due-time и будит loop
+ровно тогда, когда что-то пора запускать.
+
+### Возможности
+- ``register(name, func, interval_sec, ...)`` — job = sync/async callable без
+  аргументов; sync-функции можно увести в thread (``run_in_thread=True``).
+- ``jitter_sec`` — случайная добавка к каждому due, чтобы jobs с одинаковым
+  периодом не стреляли синхронно.
+- ``slack_sec`` — на сколько раньше job разрешено запустить «попутно», если
+  loop уже проснулся ради другой job (default 10% периода, ≤30s): меньше
+  пробуждений ценой небольшого сдвига фазы.
+- ``max_concurrency`` + ``skip_if_running`` — если прошлый запуск ещё идёт:
+  пропустить тик (счётчик ``skipped``) или отложить один повтор до окончания.
+- Coalescing после простоя: если loop долго не просыпался (сон хоста,
+  блокировка event loop), просроченная job запускается один раз, без догона
+  всех пропущенных тиков (счётчик ``coalesced``). Сон хоста детектируется по
+  расхождению wall-clock и monotonic (monotonic на macOS/Linux во сне стоит).
+- ``adaptive=True`` — числовой результат job трактуется как задержка до
+  следующего запуска (backoff, «следующее событие через N секунд»).
+  Без флага результат игнорируется (многие тики возвращают счётчики).
+- ``stats()`` — runs / failures / skipped / coalesced / длительности по
+  каждой job → /metrics (``krab_periodic_job_*``).
+
+Legacy ``*_loop()`` / ``start()`` сервисов оставлены для standalone-запуска и
+тестов; userbot bootstrap регистрирует их одиночные тики здесь.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# Максимальный сон driver'а: ограничивает задержку детекта сна хоста.
+_DEFAULT_MAX_IDLE_SEC = 60.0
+# Расхождение wall vs monotonic, начиная с которого считаем, что хост спал.
+_SLEEP_GAP_THRESHOLD_SEC = 5.0
+# Верхняя граница default slack (попутного раннего запуска).
+_DEFAULT_SLACK_CAP_SEC = 30.0
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+@dataclass
+class PeriodicJob:
+    """Зарегистрированная периодическая job + её runtime-счётчики."""
+
+    name: str
+    func: Callable[[], Any]
+    interval_sec: float
+    jitter_sec: float = 0.0
+    slack_sec: float = 0.0
+    max_concurrency: int = 1
+    skip_if_running: bool = True
+    run_in_thread: bool = False
+    adaptive: bool = False
+    next_due: float = 0.0
+    generation: int = 0
+    running: int = 0
+    pending: bool = False
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    coalesced: int = 0
+    total_duration_sec: float = 0.0
+    last_duration_sec: float = 0.0
+    max_duration_sec: float = 0.0
+    last_run_ts: float = 0.0
+    last_error: str = ""
+    tasks: set[asyncio.Task] = field(default_factory=set, repr=False)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "interval_sec": self.interval_sec,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "total_duration_sec": round(self.total_duration_sec, 6),
+            "last_duration_sec": round(self.last_duration_sec, 6),
+            "max_duration_sec": round(self.max_duration_sec, 6),
+            "last_run_ts": self.last_run_ts,
+            "last_error": self.last_error,
+        }
+
+
+class PeriodicScheduler:
+    """Heap-планировщик периодических jobs поверх одного asyncio-driver'а."""
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        max_idle_sec: float | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._max_idle_sec = (
+            max_idle_sec
+            if max_idle_sec is not None
+            else _env_float("KRAB_PERIODIC_MAX_IDLE_SEC", _DEFAULT_MAX_IDLE_SEC)
+        )
+        self._rng = rng or random.Random()
+        self._jobs: dict[str, PeriodicJob] = {}
+        # (due, seq, name, generation) — устаревшие записи отсеиваются по generation.
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._driver: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        # Время сна хоста, добавленное к monotonic (виртуальные часы).
+        self._offset = 0.0
+        self._last_mono = clock()
+        self._last_wall = wall_clock()
+        self._wakeups = 0
+        self._sleep_gaps = 0
+        # True, пока driver сам перепланирует jobs — будить его не нужно.
+        self._firing = False
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_sec: float,
+        *,
+        initial_delay_sec: float | None = None,
+        jitter_sec: float = 0.0,
+        slack_sec: float | None = None,
+        max_concurrency: int = 1,
+        skip_if_running: bool = True,
+        run_in_thread: bool = False,
+        adaptive: bool = False,
+    ) -> PeriodicJob:
+        """
+        Зарегистрировать (или заменить) job ``name``.
+
+        Первый запуск — через ``initial_delay_sec`` (default — через один
+        ``interval_sec``). Если есть running loop, driver стартует сам.
+        """
+        interval = max(0.001, float(interval_sec))
+        previous = self._jobs.pop(name, None)
+        job = PeriodicJob(
+            name=name,
+            func=func,
+            interval_sec=interval,
+            jitter_sec=max(0.0, float(jitter_sec)),
+            slack_sec=(
+                max(0.0, float(slack_sec))
+                if slack_sec is not None
+                else min(_DEFAULT_SLACK_CAP_SEC, 0.1 * interval)
+            ),
+            max_concurrency=max(1, int(max_concurrency)),
+            skip_if_running=skip_if_running,
+            run_in_thread=run_in_thread,
+            adaptive=adaptive,
+        )
+        if previous is not None:
+            # Счётчики переживают re-register (restart userbot); in-flight запуск
+            # старой версии доживает сам и в новую job не засчитывается.
+            job.generation = previous.generation + 1
+            job.tasks = previous.tasks
+            for key in ("runs", "failures", "skipped", "coalesced", "total_duration_sec"):
+                setattr(job, key, getattr(previous, key))
+            job.max_duration_sec = previous.max_duration_sec
+        delay = interval if initial_delay_sec is None else max(0.0, float(initial_delay_sec))
+        self._jobs[name] = job
+        self._schedule(job, self._now() + delay + self._jitter(job))
+        self._ensure_driver()
+        logger.debug("periodic_job_registered", job=name, interval_sec=interval, first_in_sec=delay)
+        return job
+
+    def unregister(self, name: str) -> bool:
+        """Убрать job (in-flight запуск доживает). True — job была."""
+        job = self._jobs.pop(name, None)
+        if job is None:
+            return False
+        job.generation += 1
+        return True
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._jobs
+
+    def trigger(self, name: str) -> bool:
+        """Запустить job вне расписания (с учётом concurrency). False — нет такой."""
+        job = self._jobs.get(name)
+        if job is None:
+            return False
+        self._dispatch(job)
+        return True
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def is_running(self) -> bool:
+        return self._driver is not None and not self._driver.done()
+
+    def start(self) -> None:
+        """Поднять driver в текущем event loop (идемпотентно)."""
+        if self.is_running:
+            return
+        self._wakeup = asyncio.Event()
+        self._last_mono = self._clock()
+        self._last_wall = self._wall_clock()
+        self._driver = asyncio.create_task(self._run(), name="krab_periodic_scheduler")
+        logger.info("periodic_scheduler_started", jobs=len(self._jobs))
+
+    async def stop(self) -> None:
+        """Остановить driver и in-flight запуски. Регистрации сохраняются."""
+        tasks = [t for job in self._jobs.values() for t in job.tasks if not t.done()]
+        if self._driver is not None and not self._driver.done():
+            tasks.append(self._driver)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001
+                pass
+        self._driver = None
+        logger.info("periodic_scheduler_stopped", jobs=len(self._jobs))
+
+    def reset(self) -> None:
+        """Снести все jobs и driver без ожидания (тесты)."""
+        for job in self._jobs.values():
+            for task in job.tasks:
+                task.cancel()
+        if self._driver is not None and not self._driver.done():
+            self._driver.cancel()
+        self._driver = None
+        self._wakeup = None
+        self._jobs.clear()
+        self._heap.clear()
+        self._offset = 0.0
+        self._wakeups = 0
+        self._sleep_gaps = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "wakeups": self._wakeups,
+            "sleep_gaps": self._sleep_gaps,
+            "jobs": {name: job.snapshot() for name, job in sorted(self._jobs.items())},
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _now(self) -> float:
+        return self._clock() + self._offset
+
+    def _jitter(self, job: PeriodicJob) -> float:
+        return self._rng.uniform(0.0, job.jitter_sec) if job.jitter_sec > 0 else 0.0
+
+    def _schedule(self, job: PeriodicJob, due: float) -> None:
+        job.next_due = due
+        heapq.heappush(self._heap, (due, next(self._seq), job.name, job.generation))
+        if self._wakeup is not None and not self._firing:
+            self._wakeup.set()
+
+    def _ensure_driver(self) -> None:
+        if self.is_running:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+
+    def _detect_sleep(self) -> None:
+        mono, wall = self._clock(), self._wall_clock()
+        gap = (wall - self._last_wall) - (mono - self._last_mono)
+        self._last_mono, self._last_wall = mono, wall
+        if gap > _SLEEP_GAP_THRESHOLD_SEC:
+            self._offset += gap
+            self._sleep_gaps += 1
+            logger.info("periodic_scheduler_host_sleep_detected", slept_sec=round(gap, 1))
+
+    def _live(self, entry: tuple[float, int, str, int]) -> PeriodicJob | None:
+        job = self._jobs.get(entry[2])
+        if job is None or job.generation != entry[3] or job.next_due != entry[0]:
+            return None
+        return job
+
+    def _fire_due(self, now: float) -> None:
+        while self._heap and self._live(self._heap[0]) is None:
+            heapq.heappop(self._heap)
+        if not self._heap or self._heap[0][0] > now:
+            return
+        # Раз уж проснулись — забираем и jobs, которым можно стартовать попутно.
+        fire: list[PeriodicJob] = []
+        keep: list[tuple[float, int, str, int]] = []
+        for entry in self._heap:
+            job = self._live(entry)
+            if job is None:
+                continue
+            if entry[0] - job.slack_sec <= now:
+                fire.append(job)
+            else:
+                keep.append(entry)
+        heapq.heapify(keep)
+        self._heap = keep
+        for job in fire:
+            due = job.next_due
+            missed = int((now - due) // job.interval_sec) if now - due >= job.interval_sec else 0
+            if missed:
+                job.coalesced += missed
+                next_due = now + job.interval_sec
+            else:
+                next_due = due + job.interval_sec
+            self._schedule(job, next_due + self._jitter(job))
+            self._dispatch(job)
+
+    def _next_wait(self, now: float) -> float:
+        while self._heap and self._live(self._heap[0]) is None:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return self._max_idle_sec
+        return min(self._max_idle_sec, max(0.0, self._heap[0][0] - now))
+
+    def _dispatch(self, job: PeriodicJob) -> None:
+        if job.running >= job.max_concurrency:
+            if job.skip_if_running:
+                job.skipped += 1
+                logger.debug("periodic_job_skipped_running", job=job.name)
+            else:
+                job.pending = True
+            return
+        job.running += 1
+        task = asyncio.create_task(self._execute(job), name=f"periodic:{job.name}")
+        job.tasks.add(task)
+        task.add_done_callback(job.tasks.discard)
+
+    async def _execute(self, job: PeriodicJob) -> None:
+        started = time.perf_counter()
+        hint: Any = None
+        try:
+            if job.run_in_thread:
+                hint = await asyncio.to_thread(job.func)
+            else:
+                hint = job.func()
+                if asyncio.iscoroutine(hint) or isinstance(hint, asyncio.Future):
+                    hint = await hint
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 — job не должна валить driver
+            job.failures += 1
+            job.last_error = f"{type(exc).__name__}: {exc}"[:300]
+            hint = None
+            logger.warning(
+                "periodic_job_failed",
+                job=job.name,
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+        finally:
+            elapsed = time.perf_counter() - started
+            job.running -= 1
+            job.runs += 1
+            job.last_run_ts = time.time()
+            job.last_duration_sec = elapsed
+            job.total_duration_sec += elapsed
+            job.max_duration_sec = max(job.max_duration_sec, elapsed)
+        current = self._jobs.get(job.name)
+        if current is not job:
+            return
+        if (
+            job.adaptive
+            and isinstance(hint, (int, float))
+            and not isinstance(hint, bool)
+            and math.isfinite(hint)
+        ):
+            job.generation += 1
+            self._schedule(job, self._now() + max(0.0, float(hint)))
+        if job.pending and job.running < job.max_concurrency:
+            job.pending = False
+            self._dispatch(job)
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            self._wakeup.clear()
+            self._detect_sleep()
+            now = self._now()
+            self._firing = True
+            try:
+                self._fire_due(now)
+            finally:
+                self._firing = False
+            timeout = self._next_wait(now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeups += 1
+
+
+# Module-level singleton — userbot bootstrap регистрирует jobs сюда.
+periodic_scheduler = PeriodicScheduler()
+
+__all__ = ["PeriodicJob", "PeriodicScheduler", "periodic_scheduler"]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Mergeable streaming quantile sketch (DDSketch-подобный) для latency-метрик.
+
+Зачем существует:
+
+Panel-эндпоинты latency (``/api/bypass/perf``) и ``LLMLatencyTracker`` либо
+сортировали все записи окна на каждый запрос, либо держали только
+фиксированные Prometheus-бакеты, из которых истинный p95/p99 не восстановить.
+
+Sketch хранит логарифмические бины: значение ``x > 0`` попадает в бин
+``ceil(log_gamma(x))``, ``gamma = (1 + a) / (1 - a)``. Любой квантиль
+восстанавливается с относительной ошибкой ≤ ``a`` (по умолчанию 1%), число
+бинов ~ ``log_gamma(max / min)`` (≈700 на диапазон 1ms..1000s). Два sketch'а
+сливаются сложением счётчиков бинов — поэтому окно = merge sketch'ей бакетов.
+
+Пока значений ≤ ``exact_limit``, sketch хранит их как есть и отдаёт точные
+перцентили (тем же правилом ранга ``min(int(n*q), n-1)``, что и старый
+sort-based расчёт) — маленькие окна не теряют точности вовсе.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_EXACT_LIMIT = 128
+# Значения ниже — в «нулевой» бин (duration 0 / отрицательные артефакты).
+_MIN_POSITIVE = 1e-9
+
+
+class QuantileSketch:
+    """Sketch квантилей с относительной точностью ``relative_accuracy``."""
+
+    __slots__ = (
+        "relative_accuracy",
+        "exact_limit",
+        "_gamma_ln",
+        "_exact",
+        "_bins",
+        "_zero",
+        "count",
+        "total",
+        "min",
+        "max",
+    )
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        exact_limit: int = DEFAULT_EXACT_LIMIT,
+    ) -> None:
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.exact_limit = max(0, int(exact_limit))
+        self._gamma_ln = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._exact: list[float] | None = []
+        self._bins: dict[int, int] = {}
+        self._zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self._exact is not None:
+            self._exact.append(value)
+            if len(self._exact) > self.exact_limit:
+                self._compact()
+            return
+        self._add_binned(value, 1)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._gamma_ln)
+
+    def _add_binned(self, value: float, weight: int) -> None:
+        if value < _MIN_POSITIVE:
+            self._zero += weight
+            return
+        key = self._key(value)
+        self._bins[key] = self._bins.get(key, 0) + weight
+
+    def _compact(self) -> None:
+        """Переводит точный буфер в бины (необратимо)."""
+        exact, self._exact = self._exact, None
+        for value in exact or ():
+            self._add_binned(value, 1)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Вливает ``other`` в себя. Точности sketch'ей должны совпадать."""
+        if other.count == 0:
+            return
+        if not math.isclose(self._gamma_ln, other._gamma_ln):
+            raise ValueError("cannot merge sketches with different relative_accuracy")
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self._exact is not None and other._exact is not None:
+            self._exact.extend(other._exact)
+            if len(self._exact) > self.exact_limit:
+                self._compact()
+            return
+        if self._exact is not None:
+            self._compact()
+        if other._exact is not None:
+            for value in other._exact:
+                self._add_binned(value, 1)
+            return
+        self._zero += other._zero
+        for key, weight in other._bins.items():
+            self._bins[key] = self._bins.get(key, 0) + weight
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    @property
+    def is_exact(self) -> bool:
+        return self._exact is not None
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Значение ранга ``min(int(count * q), count - 1)``; 0.0 для пустого."""
+        if self.count == 0:
+            return 0.0
+        q = min(max(float(q), 0.0), 1.0)
+        # +1e-9: 20 * 0.95 в float даёт 18.999…, а sort-based расчёт брал 19.
+        rank = min(int(self.count * q + 1e-9), self.count - 1)
+        if self._exact is not None:
+            return sorted(self._exact)[rank]
+        if rank < self._zero:
+            return min(max(0.0, self.min), self.max)
+        seen = self._zero
+        gamma = math.exp(self._gamma_ln)
+        for key in sorted(self._bins):
+            seen += self._bins[key]
+            if seen > rank:
+                # Середина бина (gamma^(k-1), gamma^k] с относительной ошибкой ≤ a.
+                estimate = 2.0 * math.exp(key * self._gamma_ln) / (gamma + 1.0)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def __repr__(self) -> str:
+        mode = "exact" if self._exact is not None else f"bins={len(self._bins)}"
+        return f"QuantileSketch(count={self.count}, {mode})"
+
+
+__all__ = [
+    "DEFAULT_EXACT_LIMIT",
+    "DEFAULT_RELATIVE_ACCURACY",
+    "QuantileSketch",
+]
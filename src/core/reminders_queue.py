@@ -4,9 +4,13 @@ Reminders Queue — proactivity level 2.
 
 Time-based: "через 2 часа проверь X" → запускает action в delta_time.
 Event-based: "когда в чате N появится тема Y сделай Z" → trigger on match.
+Pending event reminders индексируются по chat_id с предкомпилированными
+pattern'ами: check_event_match стоит O(reminders этого чата) без re.compile.
 
 Persistence: JSON-файл в ~/.openclaw/krab_runtime_state/reminders_queue.json
-Trigger: background asyncio task, проверяет каждые 30 сек.
+Trigger: background asyncio task; time-based reminders лежат в min-heap
+``(fire_at, id)`` — loop спит ровно до ближайшего fire_at и будится раньше
+при add/cancel.
 
 TODO Session 11.1: wire reminders_queue into userbot_bridge._process_message
 (check_event_match call after message receipt) + start_loop in startup.
@@ -15,6 +19,7 @@ TODO Session 11.1: wire reminders_queue into userbot_bridge._process_message
 from __future__ import annotations
 
 import asyncio
+import heapq
 import json
 import re
 import time
@@ -31,6 +36,9 @@ logger = get_logger(__name__)
 # Путь к файлу состояния (переопределяется в тестах)
 STATE_PATH = Path("~/.openclaw/krab_runtime_state/reminders_queue.json").expanduser()
 CHECK_INTERVAL_SEC = 30
+# Максимальный сон loop'а без изменений: wall-clock может прыгнуть (сон хоста),
+# а asyncio-таймеры идут по monotonic.
+MAX_IDLE_SEC = 300
 
 
 class ReminderTrigger(str, Enum):
@@ -87,6 +95,51 @@ class Reminder:
 FireCallback = Callable[[Reminder], Awaitable[None]]
 
 
+class _ChatEventMatcher:
+    """Скомпилированные pattern'ы pending event reminders одного чата.
+
+    Pattern'ы без групп дополнительно слиты в одну альтернацию-префильтр:
+    большинство сообщений ни с чем не совпадает и отсекается одним
+    ``search``. Pattern'ы с группами (возможны backreference'ы, которые в
+    общей альтернации поменяли бы нумерацию) проверяются всегда поштучно.
+    """
+
+    __slots__ = ("entries", "prefilter", "unmerged")
+
+    def __init__(self, reminders: list[Reminder]) -> None:
+        self.entries: list[tuple[Reminder, re.Pattern[str]]] = []
+        for r in reminders:
+            try:
+                compiled = re.compile(r.match_pattern or "", re.IGNORECASE)
+            except re.error:
+                # Битый regex — молча пропускаем (как и раньше)
+                continue
+            self.entries.append((r, compiled))
+        mergeable = [pat.pattern for _, pat in self.entries if pat.groups == 0]
+        self.prefilter: Optional[re.Pattern[str]] = None
+        if len(mergeable) > 1:
+            try:
+                self.prefilter = re.compile("|".join(f"(?:{p})" for p in mergeable), re.IGNORECASE)
+            except re.error:
+                # Например, inline-флаги не в начале — без префильтра.
+                self.prefilter = None
+        self.unmerged = (
+            [(r, pat) for r, pat in self.entries if pat.groups > 0]
+            if self.prefilter is not None
+            else self.entries
+        )
+
+    def match(self, text: str) -> list[Reminder]:
+        candidates = self.entries
+        if self.prefilter is not None and self.prefilter.search(text) is None:
+            candidates = self.unmerged
+        return [
+            r
+            for r, pat in candidates
+            if r.status == ReminderStatus.PENDING and pat.search(text) is not None
+        ]
+
+
 class RemindersQueue:
     """Очередь напоминаний (time-based + event-based)."""
 
@@ -95,6 +148,16 @@ class RemindersQueue:
         self._reminders: dict[str, Reminder] = {}
         self._callback: Optional[FireCallback] = None
         self._task: Optional[asyncio.Task] = None
+        # Due-индекс time-based reminders: (fire_at, id). Удаление ленивое —
+        # запись с устаревшим fire_at/статусом отбрасывается при pop.
+        self._due_heap: list[tuple[int, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # Event-индекс: chat_id → id pending event reminders (в порядке добавления)
+        # и лениво собираемые matcher'ы; чат в _stale_event_chats пересобирается
+        # при следующем check_event_match.
+        self._event_ids_by_chat: dict[str, list[str]] = {}
+        self._event_matchers: dict[str, _ChatEventMatcher] = {}
+        self._stale_event_chats: set[str] = set()
         self._load()
 
     # ─── Persistence ──────────────────────────────────────────────────────
@@ -110,6 +173,13 @@ class RemindersQueue:
                 self._reminders[r.id] = r
         except Exception as e:  # noqa: BLE001 — хотим проглотить ЛЮБУЮ ошибку загрузки
             logger.warning("reminders_load_failed", error=str(e))
+        self._due_heap = [
+            (r.fire_at, r.id) for r in self._reminders.values() if self._is_due_candidate(r)
+        ]
+        heapq.heapify(self._due_heap)
+        for r in self._reminders.values():
+            if r.trigger_type == ReminderTrigger.EVENT and r.status == ReminderStatus.PENDING:
+                self._index_event(r)
 
     def _save(self) -> None:
         """Сохраняет текущее состояние на диск."""
@@ -141,6 +211,7 @@ class RemindersQueue:
         )
         self._reminders[r.id] = r
         self._save()
+        self._index_due(r)
         return r.id
 
     def add_event_reminder(
@@ -163,6 +234,7 @@ class RemindersQueue:
         )
         self._reminders[r.id] = r
         self._save()
+        self._index_event(r)
         return r.id
 
     def cancel(self, reminder_id: str) -> bool:
@@ -172,6 +244,22 @@ class RemindersQueue:
             return False
         r.status = ReminderStatus.CANCELLED
         self._save()
+        self._invalidate_event(r)
+        self._notify_changed()
+        return True
+
+    def reschedule(self, reminder_id: str, fire_at: int) -> bool:
+        """Перенести pending time-reminder на новый fire_at. True если перенесли."""
+        r = self._reminders.get(reminder_id)
+        if (
+            r is None
+            or r.status != ReminderStatus.PENDING
+            or r.trigger_type != ReminderTrigger.TIME
+        ):
+            return False
+        r.fire_at = int(fire_at)
+        self._save()
+        self._index_due(r)
         return True
 
     def list_pending(self, owner_id: Optional[str] = None) -> list[Reminder]:
@@ -192,18 +280,77 @@ class RemindersQueue:
         """
         self._callback = cb
 
+    # ─── Due-индекс ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _is_due_candidate(r: Reminder) -> bool:
+        return (
+            r.status == ReminderStatus.PENDING
+            and r.trigger_type == ReminderTrigger.TIME
+            and r.fire_at is not None
+        )
+
+    def _index_due(self, r: Reminder) -> None:
+        """Кладёт (fire_at, id) в heap и будит loop (старая запись станет stale)."""
+        if self._is_due_candidate(r):
+            heapq.heappush(self._due_heap, (int(r.fire_at), r.id))  # type: ignore[arg-type]
+        self._notify_changed()
+
+    def _is_live_entry(self, entry: tuple[int, str]) -> bool:
+        r = self._reminders.get(entry[1])
+        return r is not None and self._is_due_candidate(r) and r.fire_at == entry[0]
+
+    def _notify_changed(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def next_fire_at(self) -> Optional[int]:
+        """fire_at ближайшего pending time-reminder (None — таких нет)."""
+        while self._due_heap and not self._is_live_entry(self._due_heap[0]):
+            heapq.heappop(self._due_heap)
+        return self._due_heap[0][0] if self._due_heap else None
+
+    # ─── Event-индекс ─────────────────────────────────────────────────────
+
+    def _index_event(self, r: Reminder) -> None:
+        chat = str(r.watch_chat_id)
+        self._event_ids_by_chat.setdefault(chat, []).append(r.id)
+        self._stale_event_chats.add(chat)
+
+    def _invalidate_event(self, r: Reminder) -> None:
+        if r.trigger_type == ReminderTrigger.EVENT:
+            self._stale_event_chats.add(str(r.watch_chat_id))
+
+    def _rebuild_event_matcher(self, chat: str) -> None:
+        self._stale_event_chats.discard(chat)
+        pending: list[Reminder] = []
+        for rid in self._event_ids_by_chat.get(chat, ()):
+            r = self._reminders.get(rid)
+            if r is not None and r.status == ReminderStatus.PENDING and r.match_pattern:
+                pending.append(r)
+        if not pending:
+            self._event_ids_by_chat.pop(chat, None)
+            self._event_matchers.pop(chat, None)
+            return
+        self._event_ids_by_chat[chat] = [r.id for r in pending]
+        self._event_matchers[chat] = _ChatEventMatcher(pending)
+
     # ─── Triggering ───────────────────────────────────────────────────────
 
     async def check_time_reminders(self) -> list[str]:
-        """Проверка time-based напоминаний. Возвращает id-шники сработавших."""
+        """Проверка time-based напоминаний. Возвращает id-шники сработавших.
+
+        Снимает с головы heap только наступившие записи — O(k log n) на k
+        сработавших вместо полного прохода по всем reminders.
+        """
         now = int(time.time())
         fired: list[str] = []
         changed = False
-        for r in list(self._reminders.values()):
-            if r.status != ReminderStatus.PENDING or r.trigger_type != ReminderTrigger.TIME:
-                continue
-            if r.fire_at is None or now < r.fire_at:
+        while self._due_heap and self._due_heap[0][0] <= now:
+            entry = heapq.heappop(self._due_heap)
+            if not self._is_live_entry(entry):
                 continue
+            r = self._reminders[entry[1]]
             try:
                 if self._callback is not None:
                     await self._callback(r)
@@ -222,21 +369,13 @@ class RemindersQueue:
 
     def check_event_match(self, chat_id: str, message_text: str) -> list[Reminder]:
         """Вернуть pending event-reminders, которые матчатся на сообщение."""
-        matched: list[Reminder] = []
-        for r in self._reminders.values():
-            if r.status != ReminderStatus.PENDING or r.trigger_type != ReminderTrigger.EVENT:
-                continue
-            if str(r.watch_chat_id) != str(chat_id):
-                continue
-            if not r.match_pattern:
-                continue
-            try:
-                if re.search(r.match_pattern, message_text, re.IGNORECASE):
-                    matched.append(r)
-            except re.error:
-                # Битый regex — молча пропускаем
-                continue
-        return matched
+        chat = str(chat_id)
+        if chat in self._stale_event_chats:
+            self._rebuild_event_matcher(chat)
+        matcher = self._event_matchers.get(chat)
+        if matcher is None:
+            return []
+        return matcher.match(message_text)
 
     async def fire_event_reminder(self, reminder: Reminder) -> None:
         """Запустить event-reminder (вызывается после check_event_match)."""
@@ -251,15 +390,39 @@ class RemindersQueue:
             logger.error("event_reminder_fire_failed", id=reminder.id, error=str(e))
         finally:
             self._save()
+            self._invalidate_event(reminder)
+
+    def seconds_until_next_due(self, now: Optional[float] = None) -> float:
+        """Сколько спать loop'у: до ближайшего fire_at, но не дольше MAX_IDLE_SEC."""
+        nxt = self.next_fire_at()
+        if nxt is None:
+            return float(MAX_IDLE_SEC)
+        current = time.time() if now is None else now
+        return min(float(MAX_IDLE_SEC), max(0.0, nxt - current))
 
     async def start_loop(self) -> None:
-        """Фоновый loop для time-based reminders (проверка каждые CHECK_INTERVAL_SEC)."""
-        while True:
-            try:
-                await self.check_time_reminders()
-            except Exception as e:  # noqa: BLE001
-                logger.error("reminders_loop_error", error=str(e))
-            await asyncio.sleep(CHECK_INTERVAL_SEC)
+        """Фоновый loop для time-based reminders: спит до ближайшего fire_at.
+
+        add/cancel/reschedule будят loop раньше. При ошибке проверки —
+        повтор через CHECK_INTERVAL_SEC.
+        """
+        self._wakeup = wakeup = asyncio.Event()
+        try:
+            while True:
+                wakeup.clear()
+                try:
+                    await self.check_time_reminders()
+                    delay = self.seconds_until_next_due()
+                except Exception as e:  # noqa: BLE001
+                    logger.error("reminders_loop_error", error=str(e))
+                    delay = float(CHECK_INTERVAL_SEC)
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._wakeup is wakeup:
+                self._wakeup = None
 
 
 # Singleton для использования по всему runtime
@@ -15,6 +15,7 @@ import sqlite3
 from pathlib import Path
 
 from .logger import get_logger
+from .memory_activity_rollup import drop_chat_activity, invalidate_activity_rollup
 
 logger = get_logger(__name__)
 
@@ -47,6 +48,8 @@ def clear_archive_db_for_chat(chat_id: str, db_path: Path | None = None) -> int:
         conn.execute("DELETE FROM chunk_messages WHERE chat_id = ?", (str(chat_id),))
         conn.execute("DELETE FROM chunks WHERE chat_id = ?", (str(chat_id),))
         conn.execute("DELETE FROM messages WHERE chat_id = ?", (str(chat_id),))
+        # Activity rollup чата уходит вместе с его сообщениями.
+        drop_chat_activity(conn, str(chat_id))
         # indexer_state: сбрасываем прогресс индексатора для чата,
         # чтобы на следующем запуске начал с чистой доски.
         conn.execute("DELETE FROM indexer_state WHERE chat_id = ?", (str(chat_id),))
@@ -161,6 +164,9 @@ def delete_archive_messages_before(
         )
         # Удаляем сами messages.
         conn.execute("DELETE FROM messages WHERE date < ?", (cutoff_ts,))
+        # Частичные часы не вычесть из rollup'а точно — до backfill'а читатели
+        # вернутся к прямым запросам.
+        invalidate_activity_rollup(conn)
         conn.commit()
         logger.info("archive_db_deleted_before_date", cutoff_ts=cutoff_ts, deleted=count)
         return count
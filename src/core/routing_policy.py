@@ -14,7 +14,6 @@ backend назначения под свой use-case (см. TODO-USER метк
 
 from __future__ import annotations
 
-import json
 import os
 import re
 import threading
@@ -24,6 +23,8 @@ from typing import NamedTuple, Optional
 
 import structlog
 
+from .event_log import EventLog, get_event_log
+
 logger = structlog.get_logger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -97,45 +98,23 @@ _SENSITIVE_PATTERNS = re.compile(
 
 _DECISIONS_LOG = Path.home() / ".openclaw" / "krab_runtime_state" / "routing_decisions.jsonl"
 _DECISIONS_MAX = 200
-_log_lock = threading.Lock()
+
+
+def _decisions_log() -> EventLog:
+    """EventLog решений: FIFO через ротацию сегмента по _DECISIONS_MAX записей."""
+    return get_event_log(_DECISIONS_LOG, segment_max_records=_DECISIONS_MAX, max_segments=1)
 
 
 def _append_decision(decision_entry: dict) -> None:
-    """Дозаписывает запись в JSONL-лог, обрезая до последних _DECISIONS_MAX."""
-    try:
-        _DECISIONS_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with _log_lock:
-            lines: list[str] = []
-            if _DECISIONS_LOG.exists():
-                with _DECISIONS_LOG.open("r", encoding="utf-8") as f:
-                    lines = f.readlines()
-            lines.append(json.dumps(decision_entry, ensure_ascii=False) + "\n")
-            # Обрезаем до последних N
-            if len(lines) > _DECISIONS_MAX:
-                lines = lines[-_DECISIONS_MAX:]
-            with _DECISIONS_LOG.open("w", encoding="utf-8") as f:
-                f.writelines(lines)
-    except Exception as exc:  # noqa: BLE001
-        logger.debug("routing_decision_log_failed", error=str(exc))
+    """Дозаписывает запись в JSONL-лог (O(1), без перезаписи файла)."""
+    if not _decisions_log().append(decision_entry):
+        logger.debug("routing_decision_log_failed", path=str(_DECISIONS_LOG))
 
 
 def read_recent_decisions(n: int = 20) -> list[dict]:
-    """Читает последние n записей из лога решений."""
+    """Читает последние n (≤ _DECISIONS_MAX) записей из лога решений."""
     try:
-        if not _DECISIONS_LOG.exists():
-            return []
-        with _log_lock:
-            with _DECISIONS_LOG.open("r", encoding="utf-8") as f:
-                lines = f.readlines()
-        out = []
-        for line in reversed(lines[-n:]):
-            line = line.strip()
-            if line:
-                try:
-                    out.append(json.loads(line))
-                except json.JSONDecodeError:
-                    pass
-        return list(reversed(out))
+        return _decisions_log().tail(min(n, _DECISIONS_MAX))
     except Exception as exc:  # noqa: BLE001
         logger.debug("routing_decisions_read_failed", error=str(exc))
         return []
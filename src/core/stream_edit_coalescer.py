@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Общий coalescer промежуточных edit'ов streaming-ответов в Telegram.
+
+### Зачем
+
+`_run_llm_request_flow` редактировал placeholder каждые
+``TELEGRAM_STREAM_UPDATE_INTERVAL_SEC`` независимо от того, сколько чатов
+стримят одновременно. Все edit'ы идут через `_telegram_send_queue` →
+`telegram_rate_limiter` и конкурируют с обычными send'ами: 20 параллельных
+стримов по одному edit'у раз в 0.75с — это ~27 вызовов/с, больше всего
+глобального cap'а, и отправка настоящих ответов начинает ждать.
+
+### Семантика
+
+Coalescer ничего не отправляет сам — он отвечает на вопрос «edit'ить
+сейчас или пропустить» (`offer`), caller делает edit и подтверждает
+(`mark_edited`). Промежуточный текст не теряется: следующий разрешённый
+edit покажет накопленный текст целиком, а финальный ответ доставляется
+caller'ом сразу, мимо coalescer'а (`close_stream` только снимает stream).
+
+Интервал одного стрима — общий бюджет edit'ов, поделённый между активными
+стримами:
+
+    edit_rate = capacity_per_sec * budget_share * headroom
+    interval  = clamp(active_streams / edit_rate, min_interval, max_interval)
+
+где ``headroom`` — доля свободных слотов в окне `telegram_rate_limiter`.
+Когда send'ы выбирают окно, edit'ы разрежаются вплоть до ``max_interval``.
+Поверх интервала — общий sliding-window cap на число edit'ов всех стримов
+в секунду (стримы, стартовавшие одновременно, не бьют залпом).
+
+Edit пропускается и тогда, когда видимый прирост текста меньше
+``min_visible_delta`` символов: перерисовка ради пары символов стоит
+столько же API-бюджета, сколько ради абзаца.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+from .logger import get_logger
+
+if TYPE_CHECKING:
+    from .telegram_rate_limiter import GlobalTelegramRateLimiter
+
+logger = get_logger(__name__)
+
+# Доля глобального Telegram-бюджета, отдаваемая промежуточным edit'ам.
+_DEFAULT_BUDGET_SHARE: float = 0.5
+_DEFAULT_MIN_INTERVAL_SEC: float = 0.75
+_DEFAULT_MAX_INTERVAL_SEC: float = 6.0
+# Минимальный видимый прирост текста (символов) для промежуточного edit'а.
+_DEFAULT_MIN_VISIBLE_DELTA: int = 16
+
+
+@dataclass
+class StreamEditStats:
+    """Счётчики одного стрима."""
+
+    stream_id: str
+    min_interval_sec: float
+    opened_at: float
+    last_edit_at: float = 0.0
+    last_text: str = ""
+    offered: int = 0
+    edits: int = 0
+    dropped_interval: int = 0
+    dropped_small_diff: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_interval + self.dropped_small_diff
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stream_id": self.stream_id,
+            "offered": self.offered,
+            "edits": self.edits,
+            "dropped": self.dropped,
+            "dropped_interval": self.dropped_interval,
+            "dropped_small_diff": self.dropped_small_diff,
+        }
+
+
+def visible_delta(previous: str, current: str) -> int:
+    """Оценка видимого изменения текста между двумя edit'ами.
+
+    Дописывание в конец (обычный стрим) — длина хвоста без пробелов по краям;
+    любая правка уже показанной части — считается крупной (``len(current)``).
+    """
+    if current.startswith(previous):
+        return len(current[len(previous) :].strip())
+    return max(len(current), 1)
+
+
+class StreamEditCoalescer:
+    """
+    Планировщик промежуточных edit'ов по всем активным стримам.
+
+    Thread-model: только asyncio loop (sync-методы без await, lock не нужен).
+    Тесты создают свой instance с fake ``rate_limiter`` и ``clock``.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_limiter: "GlobalTelegramRateLimiter | None" = None,
+        budget_share: float = _DEFAULT_BUDGET_SHARE,
+        max_interval_sec: float = _DEFAULT_MAX_INTERVAL_SEC,
+        min_visible_delta: int = _DEFAULT_MIN_VISIBLE_DELTA,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate_limiter = rate_limiter
+        self._budget_share = float(budget_share)
+        self._max_interval_sec = float(max_interval_sec)
+        self._min_visible_delta = int(min_visible_delta)
+        self._clock = clock
+        self._streams: dict[str, StreamEditStats] = {}
+        # monotonic timestamps edit'ов всех стримов за последнюю секунду
+        self._recent_edits: deque[float] = deque()
+        self._total_streams = 0
+        self._total_edits = 0
+        self._total_dropped_interval = 0
+        self._total_dropped_small_diff = 0
+
+    def _limiter(self) -> "GlobalTelegramRateLimiter":
+        if self._rate_limiter is None:
+            from .telegram_rate_limiter import telegram_rate_limiter
+
+            self._rate_limiter = telegram_rate_limiter
+        return self._rate_limiter
+
+    # ─── Lifecycle стрима ───────────────────────────────────────────────────
+
+    def open_stream(
+        self, stream_id: str, *, min_interval_sec: float = _DEFAULT_MIN_INTERVAL_SEC
+    ) -> None:
+        """Регистрирует стрим; ``min_interval_sec`` — нижняя граница его интервала."""
+        self._streams[stream_id] = StreamEditStats(
+            stream_id=stream_id,
+            min_interval_sec=max(0.0, float(min_interval_sec)),
+            opened_at=self._clock(),
+        )
+        self._total_streams += 1
+
+    def close_stream(self, stream_id: str) -> dict[str, Any] | None:
+        """Снимает стрим (перед финальной доставкой) и возвращает его счётчики."""
+        state = self._streams.pop(stream_id, None)
+        if state is None:
+            return None
+        result = state.as_dict()
+        if state.offered:
+            logger.debug("stream_edit_coalescer_stream_closed", **result)
+        return result
+
+    # ─── Решение ────────────────────────────────────────────────────────────
+
+    def edit_rate_per_sec(self) -> float:
+        """Сколько промежуточных edit'ов в секунду сейчас допустимо на все стримы."""
+        limiter = self._limiter()
+        return limiter.capacity_per_sec() * self._budget_share * limiter.headroom()
+
+    def interval_for(self, stream_id: str) -> float:
+        """Текущий интервал между edit'ами стрима с учётом бюджета и числа стримов."""
+        state = self._streams.get(stream_id)
+        floor = state.min_interval_sec if state is not None else _DEFAULT_MIN_INTERVAL_SEC
+        rate = self.edit_rate_per_sec()
+        if rate <= 0:
+            return max(floor, self._max_interval_sec)
+        fair = max(1, len(self._streams)) / rate
+        return max(floor, min(self._max_interval_sec, fair))
+
+    def offer(self, stream_id: str, text: str) -> bool:
+        """True — caller должен отредактировать сообщение текстом ``text`` сейчас.
+
+        False — edit пропущен (интервал/бюджет или крошечный diff); текст
+        не теряется, его покажет следующий разрешённый edit или финал.
+        Незарегистрированный стрим открывается с интервалом по умолчанию.
+        """
+        state = self._streams.get(stream_id)
+        if state is None:
+            self.open_stream(stream_id)
+            state = self._streams[stream_id]
+        state.offered += 1
+        now = self._clock()
+
+        if visible_delta(state.last_text, text) < self._min_visible_delta:
+            state.dropped_small_diff += 1
+            self._total_dropped_small_diff += 1
+            return False
+
+        # Первый edit стрима — сразу (пользователь видит, что ответ пошёл).
+        if state.edits and now - state.last_edit_at < self.interval_for(stream_id):
+            state.dropped_interval += 1
+            self._total_dropped_interval += 1
+            return False
+
+        # Общий cap edit'ов в секунду: стримы, стартовавшие разом, не бьют залпом.
+        while self._recent_edits and self._recent_edits[0] <= now - 1.0:
+            self._recent_edits.popleft()
+        if len(self._recent_edits) >= max(1.0, self.edit_rate_per_sec()):
+            state.dropped_interval += 1
+            self._total_dropped_interval += 1
+            return False
+        return True
+
+    def mark_edited(self, stream_id: str, text: str) -> None:
+        """Подтверждение выполненного edit'а (вызывать после ``offer() -> True``)."""
+        state = self._streams.get(stream_id)
+        if state is None:
+            return
+        now = self._clock()
+        state.last_edit_at = now
+        state.last_text = text
+        state.edits += 1
+        self._recent_edits.append(now)
+        self._total_edits += 1
+
+    # ─── Observability ──────────────────────────────────────────────────────
+
+    def stream_stats(self, stream_id: str) -> dict[str, Any] | None:
+        state = self._streams.get(stream_id)
+        return state.as_dict() if state is not None else None
+
+    def stats(self) -> dict[str, Any]:
+        """Снимок метрик для /api/health/lite и regression тестов."""
+        return {
+            "active_streams": len(self._streams),
+            "edit_rate_per_sec": round(self.edit_rate_per_sec(), 2),
+            "total_streams": self._total_streams,
+            "total_edits": self._total_edits,
+            "total_dropped": self._total_dropped_interval + self._total_dropped_small_diff,
+            "total_dropped_interval": self._total_dropped_interval,
+            "total_dropped_small_diff": self._total_dropped_small_diff,
+            "streams": [s.as_dict() for s in self._streams.values()],
+        }
+
+    def reset_counters(self) -> None:
+        """Сбрасывает агрегированные счётчики (тесты / `!stats reset`)."""
+        self._total_streams = len(self._streams)
+        self._total_edits = 0
+        self._total_dropped_interval = 0
+        self._total_dropped_small_diff = 0
+
+
+# Module-level singleton, pattern совпадает с telegram_rate_limiter.
+stream_edit_coalescer = StreamEditCoalescer()
@@ -19,7 +19,9 @@ import re
 import time
 from typing import Any, Callable
 
+from .gateway_scheduler import gateway_priority
 from .logger import get_logger
+from .message_priority_dispatcher import Priority
 from .swarm_channels import swarm_channels
 from .swarm_memory import swarm_memory
 from .swarm_pending_state import make_round_id, swarm_pending_store
@@ -439,12 +441,15 @@ class AgentRoom:
 
                 try:
                     # Wave 38-B: route через engine dispatcher (при dispatch OFF — прямой router.route_query)
-                    response = await _dispatch_route_query(
-                        prompt,
-                        router,
-                        team_name=_team_name,
-                        chat_id=None,  # swarm не знает chat_id — передаём None (resolver использует room)
-                    )
+                    # Роли раунда — не выше P1 для gateway-слотов: пачка ролей
+                    # не должна вытеснять P0 owner-запросы (GatewayScheduler).
+                    with gateway_priority(Priority.P1_NORMAL):
+                        response = await _dispatch_route_query(
+                            prompt,
+                            router,
+                            team_name=_team_name,
+                            chat_id=None,  # swarm не знает chat_id — передаём None (resolver использует room)
+                        )
                 except Exception as exc:  # noqa: BLE001
                     response = f"[Ошибка роли {name}: {exc}]"
                     logger.warning("agent_room_role_failed", role=name, error=str(exc))
@@ -55,6 +55,7 @@ from pathlib import Path
 from typing import Any
 
 from .logger import get_logger
+from .telegram_rate_limiter import TelegramLane, telegram_rate_limiter
 
 logger = get_logger(__name__)
 
@@ -465,6 +466,9 @@ class SwarmChannels:
         if len(text) > 4000:
             text = text[:3950] + "\n\n[...обрезано]"
 
+        # Посты swarm-каналов — bulk lane: не отнимают токены у ответов людям.
+        await telegram_rate_limiter.acquire(purpose="swarm_channel", lane=TelegramLane.BULK)
+
         if topic_id:
             try:
                 await _cl.send_message(
@@ -42,6 +42,7 @@ from collections import defaultdict, deque
 
 from .logger import get_logger
 from .metrics import telegram_throttle as _metrics
+from .telegram_rate_limiter import TelegramLane
 
 logger = get_logger(__name__)
 
@@ -144,10 +145,12 @@ class TelegramOutgoingThrottle:
             return 0.0
         return len(dq) / self._window_sec
 
-    async def acquire(self, caller: str = "unknown") -> bool:
+    async def acquire(self, caller: str = "unknown", *, lane: TelegramLane | None = None) -> bool:
         """Регистрирует outgoing call, throttle'ит если rate > max_rps.
 
         Возвращает True если был применён pre-emptive delay, иначе False.
+        ``lane=TelegramLane.OWNER`` — вызов учитывается в rate, но не
+        притормаживается: ответ owner'у не ждёт эвристику фонового трафика.
         Best-effort: при любой ошибке логирует и пропускает (не блокирует
         отправку).
         """
@@ -163,7 +166,7 @@ class TelegramOutgoingThrottle:
                 rate = len(dq) / self._window_sec if self._window_sec > 0 else 0.0
                 max_rps = self._resolve_max_rps()
                 throttled = False
-                if rate > max_rps:
+                if rate > max_rps and lane != TelegramLane.OWNER:
                     throttled = True
                     self._total_throttled += 1
                     _metrics.inc_throttle_applied(clean_caller)
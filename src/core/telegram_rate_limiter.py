@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 """
-Global sliding-window rate limiter для исходящих Telegram API вызовов.
+Global token-bucket rate limiter с priority lanes для исходящих Telegram API вызовов.
 
 ### Зачем это нужно
 
@@ -22,22 +22,36 @@ Telegram SpamBot смотрит не только на количество от
 
 ### Семантика
 
-Sliding window: в любой момент за последние `window_sec` секунд может
-быть сделано не больше `max_per_sec * window_sec` API вызовов. Если
-очередной `acquire()` превысил порог, корутина `await asyncio.sleep`
-до момента, когда самый старый слот в окне освободится.
+Token bucket: ёмкость ``burst`` (по умолчанию ``max_per_sec``), пополнение
+``max_per_sec / window_sec`` токенов в секунду. ``acquire()`` забирает
+токен сразу, если он есть и никто не ждёт; иначе встаёт в очередь своей
+lane и получает токен по мере пополнения.
+
+Поверх bucket'а держится прежний sliding window: за любые ``window_sec``
+выдаётся не больше ``max(max_per_sec, burst)`` токенов. Без него полный
+bucket плюс пополнение за то же окно пропускали бы ~2× лимита.
 
 **Soft cap, не hard**: мы не отказываем в вызове, мы **замедляем**.
 Это принципиально — отмена вызова означала бы потерю сообщения,
 а нам нужно доставить, просто с небольшой задержкой.
 
+### Priority lanes
+
+Прежний sliding window был FIFO: catchup replay, typing actions и посты
+swarm-каналов задерживали ответы owner'у. Теперь ожидающие разложены по
+lanes (`TelegramLane`): owner → interactive → background → bulk, и токены
+делятся weighted fair queuing'ом (веса `LANE_WEIGHTS`, 8:4:2:1). Под
+нагрузкой owner получает 8/15 пропускной способности, но bulk не голодает.
+
+Lane текущего вызова — явный ``lane=`` или ContextVar (`telegram_lane`),
+как `gateway_priority` в gateway_scheduler; без привязки lane выводится из
+gateway priority (P2 → background, иначе interactive).
+
 ### Что НЕ делает
 
 - Не per-chat throttling — для этого есть `_TelegramSendQueue`.
-- Не приоритизирует вызовы (owner > background). Можно добавить позже.
-- Не персистит state через рестарты — sliding window начинается заново
-  после рестарта (это ok: Telegram SpamBot смотрит rolling среднее,
-  не абсолютное значение).
+- Не персистит state через рестарты — bucket начинается полным
+  (это ok: Telegram SpamBot смотрит rolling среднее, не абсолютное значение).
 
 ### Default: 20 req/s
 
@@ -50,10 +64,18 @@ updates, (2) occasional bursts, (3) MCP сервера которые тоже 
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import time
 from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Iterator
 
+from .gateway_scheduler import current_gateway_priority
 from .logger import get_logger
+from .message_priority_dispatcher import Priority
+from .metrics.telegram_lanes import observe_telegram_lane_wait
 
 logger = get_logger(__name__)
 
@@ -65,13 +87,81 @@ _DEFAULT_MAX_PER_SEC: int = 20
 _DEFAULT_WINDOW_SEC: float = 1.0
 
 
+class TelegramLane(IntEnum):
+    """Lane исходящего Telegram вызова (меньше — важнее)."""
+
+    OWNER = 0  # ответы owner'у
+    INTERACTIVE = 1  # ответы в DM / mention / reply, обычный message flow
+    BACKGROUND = 2  # catchup replay, cron, typing actions
+    BULK = 3  # swarm-каналы, рассылки
+
+
+# Веса weighted fair queuing: доля токенов lane под нагрузкой.
+LANE_WEIGHTS: dict[TelegramLane, float] = {
+    TelegramLane.OWNER: 8.0,
+    TelegramLane.INTERACTIVE: 4.0,
+    TelegramLane.BACKGROUND: 2.0,
+    TelegramLane.BULK: 1.0,
+}
+
+_telegram_lane_ctx: contextvars.ContextVar[TelegramLane | None] = contextvars.ContextVar(
+    "telegram_lane",
+    default=None,
+)
+
+
+def lane_label(lane: TelegramLane) -> str:
+    """Label для логов/метрик: "owner" / "interactive" / "background" / "bulk"."""
+    return TelegramLane(lane).name.lower()
+
+
+def current_telegram_lane() -> TelegramLane:
+    """Lane текущего контекста: ContextVar, иначе по gateway priority."""
+    value = _telegram_lane_ctx.get()
+    if value is not None:
+        return value
+    if current_gateway_priority() == Priority.P2_LOW:
+        return TelegramLane.BACKGROUND
+    return TelegramLane.INTERACTIVE
+
+
+@contextmanager
+def telegram_lane(lane: TelegramLane) -> Iterator[TelegramLane]:
+    """Привязать lane Telegram-вызовов к текущему контексту.
+
+    Внешняя привязка ограничивает сверху: внутри background нельзя поднять до owner.
+    """
+    outer = _telegram_lane_ctx.get()
+    effective = TelegramLane(lane) if outer is None else max(outer, TelegramLane(lane))
+    token = _telegram_lane_ctx.set(effective)
+    try:
+        yield effective
+    finally:
+        _telegram_lane_ctx.reset(token)
+
+
+@dataclass(slots=True)
+class _Waiter:
+    lane: TelegramLane
+    purpose: str
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+@dataclass(slots=True)
+class _LaneCounters:
+    acquired: int = 0
+    waited: int = 0
+    wait_sec: float = 0.0
+
+
 class GlobalTelegramRateLimiter:
     """
-    Sliding-window rate limiter для исходящих Telegram API вызовов.
+    Token-bucket rate limiter для исходящих Telegram API вызовов с priority lanes.
 
-    Thread-model: используется в asyncio context, защищён asyncio.Lock.
-    Одновременно несколько await acquire() → serialized через lock,
-    но inside lock работа быстрая (deque ops + optional sleep).
+    Thread-model: только asyncio loop. Lock не нужен: выдача токенов — sync
+    `_dispatch()` (по acquire и по таймеру пополнения), ожидающие спят на
+    своих futures.
 
     Тесты: инжектируются через `storage=None` (state только in-memory),
     так что тест может создать свой instance без загрязнения singleton.
@@ -82,75 +172,200 @@ class GlobalTelegramRateLimiter:
         *,
         max_per_sec: int = _DEFAULT_MAX_PER_SEC,
         window_sec: float = _DEFAULT_WINDOW_SEC,
+        burst: int | None = None,
     ) -> None:
         self._max_per_sec = int(max_per_sec)
         self._window_sec = float(window_sec)
-        # deque of monotonic timestamps of recent acquires
+        self._burst = float(burst if burst is not None else self._max_per_sec)
+        self._tokens = self._burst
+        self._refilled_at = time.monotonic()
+        self._waiters: dict[TelegramLane, deque[_Waiter]] = {lane: deque() for lane in TelegramLane}
+        # WFQ: virtual finish time каждой lane + текущее virtual time.
+        self._lane_vtime: dict[TelegramLane, float] = {lane: 0.0 for lane in TelegramLane}
+        self._vtime = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # deque of monotonic timestamps выданных токенов (sliding-window cap + stats)
         self._recent: deque[float] = deque()
-        self._lock: asyncio.Lock | None = None
+        self._lanes: dict[TelegramLane, _LaneCounters] = {
+            lane: _LaneCounters() for lane in TelegramLane
+        }
         self._total_acquired: int = 0
         self._total_waited: int = 0
         self._total_wait_sec: float = 0.0
 
-    def configure(self, *, max_per_sec: int, window_sec: float = 1.0) -> None:
+    @property
+    def _rate(self) -> float:
+        return self._max_per_sec / max(self._window_sec, 1e-9)
+
+    def configure(
+        self, *, max_per_sec: int, window_sec: float = 1.0, burst: int | None = None
+    ) -> None:
         """Runtime-reconfigure лимита. Вызывается из bootstrap по config."""
+        self._refill(time.monotonic())
+        old_burst = self._burst
         self._max_per_sec = max(1, int(max_per_sec))
         self._window_sec = max(0.1, float(window_sec))
+        self._burst = float(max(1, int(burst)) if burst is not None else self._max_per_sec)
+        # Поднятый лимит доступен сразу, а не после пополнения.
+        self._tokens = min(self._burst, self._tokens + max(0.0, self._burst - old_burst))
+        self._reschedule()
         logger.info(
             "telegram_rate_limiter_configured",
             max_per_sec=self._max_per_sec,
             window_sec=self._window_sec,
+            burst=int(self._burst),
         )
 
-    def _get_lock(self) -> asyncio.Lock:
-        """Lazy-create lock — нельзя создавать в __init__ до running loop'а."""
-        if self._lock is None:
-            self._lock = asyncio.Lock()
-        return self._lock
-
-    async def acquire(self, purpose: str = "unknown") -> None:
+    # ─── Bucket ─────────────────────────────────────────────────────────────
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._refilled_at
+        if elapsed > 0:
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+            self._refilled_at = now
+
+    def _prune_window(self, now: float) -> None:
+        window_start = now - self._window_sec
+        while self._recent and self._recent[0] < window_start:
+            self._recent.popleft()
+
+    @property
+    def _window_cap(self) -> int:
+        return max(self._max_per_sec, int(self._burst))
+
+    def _can_grant(self, now: float) -> bool:
+        """Есть токен в bucket'е и место в sliding window."""
+        self._refill(now)
+        self._prune_window(now)
+        return self._tokens >= 1.0 and len(self._recent) < self._window_cap
+
+    def _has_waiters(self) -> bool:
+        return any(self._waiters.values())
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Ожидающие из прошлого (мёртвого) loop'а отбрасываются при рестарте."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            for queue in self._waiters.values():
+                queue.clear()
+            self._timer = None
+            self._loop = loop
+        return loop
+
+    def _pick_lane(self) -> TelegramLane | None:
+        best: TelegramLane | None = None
+        for lane, queue in self._waiters.items():
+            while queue and queue[0].future.done():
+                queue.popleft()  # cancelled waiter
+            if not queue:
+                continue
+            if best is None or self._lane_vtime[lane] < self._lane_vtime[best]:
+                best = lane
+        return best
+
+    def _grant(self, lane: TelegramLane, now: float) -> None:
+        self._tokens -= 1.0
+        self._recent.append(now)
+        self._total_acquired += 1
+        self._lanes[lane].acquired += 1
+
+    def _dispatch(self) -> None:
+        """Раздаёт накопленные токены ожидающим (WFQ между lanes, FIFO внутри)."""
+        self._timer = None
+        now = time.monotonic()
+        while self._can_grant(now):
+            lane = self._pick_lane()
+            if lane is None:
+                break
+            waiter = self._waiters[lane].popleft()
+            self._grant(lane, now)
+            self._vtime = self._lane_vtime[lane]
+            self._lane_vtime[lane] += 1.0 / LANE_WEIGHTS[lane]
+            waiter.future.set_result(None)
+        self._reschedule()
+
+    def _reschedule(self) -> None:
+        """Таймер на момент появления следующего токена (если есть ожидающие)."""
+        if self._timer is not None or self._loop is None or not self._has_waiters():
+            return
+        delay = max(0.0, (1.0 - self._tokens) / self._rate)
+        if len(self._recent) >= self._window_cap:
+            # Окно заполнено — ждём, пока из него выпадет старейший вызов.
+            delay = max(delay, self._recent[0] + self._window_sec - time.monotonic())
+        self._timer = self._loop.call_later(delay, self._dispatch)
+
+    # ─── Public API ─────────────────────────────────────────────────────────
+
+    async def acquire(self, purpose: str = "unknown", *, lane: TelegramLane | None = None) -> None:
         """
-        Блокирует корутину пока не появится слот в окне.
+        Блокирует корутину пока lane не получит токен.
 
         `purpose` — free-form string для логов (send_message, get_chat,
         get_chat_history, send_reaction, ...). Не влияет на логику, но
         помогает при диагностике «что жрёт rate budget».
+        `lane` — None → `current_telegram_lane()`.
         """
-        lock = self._get_lock()
-        async with lock:
-            now = time.monotonic()
-            # Evict старые timestamps из окна.
-            window_start = now - self._window_sec
-            while self._recent and self._recent[0] < window_start:
-                self._recent.popleft()
-
-            if len(self._recent) >= self._max_per_sec:
-                # Окно полно — нужно подождать пока освободится самый старый слот.
-                oldest = self._recent[0]
-                wait_sec = self._window_sec - (now - oldest) + 0.001
-                if wait_sec > 0:
-                    self._total_waited += 1
-                    self._total_wait_sec += wait_sec
-                    logger.info(
-                        "telegram_rate_limiter_wait",
-                        purpose=purpose,
-                        wait_sec=round(wait_sec, 3),
-                        current_in_window=len(self._recent),
-                        max_per_sec=self._max_per_sec,
-                    )
-                    await asyncio.sleep(wait_sec)
-                    now = time.monotonic()
-                    # Re-evict после sleep — часть старых timestamps должна была
-                    # выйти из окна.
-                    window_start = now - self._window_sec
-                    while self._recent and self._recent[0] < window_start:
-                        self._recent.popleft()
-
-            self._recent.append(now)
-            self._total_acquired += 1
+        lane = current_telegram_lane() if lane is None else TelegramLane(lane)
+        loop = self._bind_loop()
+        now = time.monotonic()
+
+        if self._can_grant(now) and not self._has_waiters():
+            self._grant(lane, now)
+            observe_telegram_lane_wait(lane_label(lane), 0.0)
+            return
+
+        queue = self._waiters[lane]
+        if not queue:
+            # Lane была idle — не копит «кредит» за время простоя.
+            self._lane_vtime[lane] = max(self._lane_vtime[lane], self._vtime)
+        waiter = _Waiter(lane=lane, purpose=purpose, enqueued_at=now, future=loop.create_future())
+        queue.append(waiter)
+        self._reschedule()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            raise
+
+        wait_sec = time.monotonic() - waiter.enqueued_at
+        counters = self._lanes[lane]
+        counters.waited += 1
+        counters.wait_sec += wait_sec
+        self._total_waited += 1
+        self._total_wait_sec += wait_sec
+        observe_telegram_lane_wait(lane_label(lane), wait_sec)
+        logger.info(
+            "telegram_rate_limiter_wait",
+            purpose=purpose,
+            lane=lane_label(lane),
+            wait_sec=round(wait_sec, 3),
+            current_in_window=len(self._recent),
+            max_per_sec=self._max_per_sec,
+        )
+
+    def headroom(self) -> float:
+        """Заполненность bucket'а (0.0 — токенов нет, 1.0 — полный).
+
+        Sync и без ожидания, для планировщиков вроде stream_edit_coalescer,
+        которые решают «слать ли необязательный вызов». Пока есть
+        ожидающие, headroom — 0.
+        """
+        if self._has_waiters():
+            return 0.0
+        now = time.monotonic()
+        if not self._can_grant(now):
+            return 0.0
+        return max(0.0, min(1.0, self._tokens / max(self._burst, 1.0)))
+
+    def capacity_per_sec(self) -> float:
+        """Пропускная способность лимитера в вызовах/сек."""
+        return self._rate
 
     def stats(self) -> dict[str, float | int]:
         """Снимок метрик для `!stats` / owner UI / regression тестов."""
+        self._prune_window(time.monotonic())
         return {
             "max_per_sec": self._max_per_sec,
             "window_sec": self._window_sec,
@@ -160,11 +375,26 @@ class GlobalTelegramRateLimiter:
             "total_wait_sec": round(self._total_wait_sec, 3),
         }
 
+    def lane_stats(self) -> dict[str, dict[str, float | int]]:
+        """Per-lane счётчики и текущая глубина очереди (для /metrics и /api/health/lite)."""
+        result: dict[str, dict[str, float | int]] = {}
+        for lane in TelegramLane:
+            counters = self._lanes[lane]
+            result[lane_label(lane)] = {
+                "weight": LANE_WEIGHTS[lane],
+                "waiting": sum(1 for w in self._waiters[lane] if not w.future.done()),
+                "acquired": counters.acquired,
+                "waited": counters.waited,
+                "wait_sec": round(counters.wait_sec, 3),
+            }
+        return result
+
     def reset_counters(self) -> None:
         """Сбрасывает счётчики (owner-command `!stats reset` или в тестах)."""
         self._total_acquired = 0
         self._total_waited = 0
         self._total_wait_sec = 0.0
+        self._lanes = {lane: _LaneCounters() for lane in TelegramLane}
 
 
 # Module-level singleton, pattern совпадает с silence_manager / chat_ban_cache /
@@ -28,19 +28,28 @@ short-lived data, после рестарта Краба кеш пустой и
 - Tools с временем в результате (clock, uptime)
 - Tools завязанные на чат (recall_memory, history)
 
-Ответственность за «кэшировать или нет» — на caller'е (через `cached_tool_call`).
+Allowlist идемпотентных tools — `is_cacheable_tool()` (`_CACHEABLE_TOOLS` +
+env ``KRAB_TOOL_CACHE_EXTRA_TOOLS``, CSV). Выключатель —
+``KRAB_TOOL_RESULT_CACHE_ENABLED=0``.
 
 ### Wire-up
-Чисто модуль. Подключение к openclaw_client / mcp_client — в backlog: точка
-интеграции — место где tool_call формируется и исполняется. Здесь только
-data-структура + helpers, чтобы тесты были изолированы и refactoring openclaw
-не блокировал landing этой идеи.
+`MCPClientManager._call_tool_unified_impl` после swarm allowlist guard
+пропускает allowlisted tools через `acached_tool_call`. Результаты с
+префиксом «❌» (ошибки) не кэшируются.
+
+### Single-flight
+Параллельные идентичные вызовы (swarm-роли / несколько iterations tool loop
+ищут одно и то же) делят один in-flight future: исполняется только первый,
+остальные ждут его результат (счётчик `coalesced`). Если leader отменён —
+follower исполняет вызов сам.
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
+import os
 import threading
 import time
 from collections import OrderedDict
@@ -60,6 +69,16 @@ _TOOL_TTL_OVERRIDES: dict[str, float] = {
     "urban": 86400.0,
 }
 
+# Allowlist идемпотентных tools для wire-up в tool loop: native + read-only
+# поисковые MCP tools. State-изменяющие tools сюда не попадают никогда.
+_CACHEABLE_TOOLS: frozenset[str] = frozenset(
+    {
+        *_TOOL_TTL_OVERRIDES,
+        "brave-search__brave_web_search",
+        "firecrawl__firecrawl_search",
+    }
+)
+
 # Дефолтные TTL и емкость. 500 записей × ~2KB payload ≈ 1MB cap — приемлемо
 # для долгоживущего процесса.
 _DEFAULT_TTL_SEC: float = 300.0
@@ -81,6 +100,20 @@ def _stable_args_hash(args: Any) -> str:
     return digest[:32]
 
 
+def is_tool_cache_enabled() -> bool:
+    """Env ``KRAB_TOOL_RESULT_CACHE_ENABLED`` (default on)."""
+    raw = os.getenv("KRAB_TOOL_RESULT_CACHE_ENABLED", "1").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def is_cacheable_tool(tool_name: str) -> bool:
+    """True если tool в allowlist идемпотентных (+ ``KRAB_TOOL_CACHE_EXTRA_TOOLS``)."""
+    if tool_name in _CACHEABLE_TOOLS:
+        return True
+    extra = os.getenv("KRAB_TOOL_CACHE_EXTRA_TOOLS", "")
+    return bool(extra) and tool_name in {t.strip() for t in extra.split(",") if t.strip()}
+
+
 class ToolResultCache:
     """LRU кэш результатов tool calls с per-tool TTL.
 
@@ -107,6 +140,9 @@ class ToolResultCache:
         self._hits = 0
         self._misses = 0
         self._evictions = 0
+        self._coalesced = 0
+        # Single-flight: key → future исполняющегося вызова (только event loop).
+        self._inflight: dict[str, asyncio.Future] = {}
 
     # ---- Core API -------------------------------------------------------
 
@@ -179,6 +215,13 @@ class ToolResultCache:
         with self._lock:
             self._entries.clear()
 
+    def reset(self) -> None:
+        """Очистка записей, in-flight и счётчиков (для тестов)."""
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+            self._hits = self._misses = self._evictions = self._coalesced = 0
+
     def stats(self) -> dict[str, Any]:
         """Снимок счётчиков для observability."""
         with self._lock:
@@ -190,6 +233,8 @@ class ToolResultCache:
                 "hits": self._hits,
                 "misses": self._misses,
                 "evictions": self._evictions,
+                "coalesced": self._coalesced,
+                "inflight": len(self._inflight),
                 "hit_rate": round(hit_rate, 4),
             }
 
@@ -254,8 +299,9 @@ async def acached_tool_call(
     *,
     cache: ToolResultCache | None = None,
     ttl_sec: float | None = None,
+    should_cache: Callable[[Any], bool] | None = None,
 ) -> Any:
-    """Async-вариант cached_tool_call.
+    """Async-вариант cached_tool_call с single-flight.
 
     Пример::
 
@@ -264,6 +310,10 @@ async def acached_tool_call(
             {"city": "Madrid"},
             lambda: weather_provider.fetch("Madrid"),
         )
+
+    Пока идёт вызов с тем же (tool, args), повторные caller'ы не исполняют
+    fn(), а ждут результат первого (включая исключение). `should_cache`
+    решает, писать ли результат в кэш (например, не кэшировать ошибки).
     """
     target_cache = cache or tool_result_cache
     args_hash = _stable_args_hash(args)
@@ -272,7 +322,38 @@ async def acached_tool_call(
     cached = target_cache.get(tool_name, args_hash)
     if cached is not None:
         return cached
-    result = await fn()
-    if result is not None:
+
+    key = target_cache._make_key(tool_name, args_hash)
+    inflight = target_cache._inflight.get(key)
+    if inflight is not None and not inflight.done():
+        with target_cache._lock:
+            target_cache._coalesced += 1
+        try:
+            # shield: отмена follower'а не должна отменять вызов leader'а.
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if not inflight.cancelled() or (task is not None and task.cancelling()):
+                raise
+            # Leader отменён — исполняем сами (без повторной регистрации).
+            return await fn()
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    # Исключение без follower'ов не должно логироваться как "never retrieved".
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    target_cache._inflight[key] = future
+    try:
+        result = await fn()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        if target_cache._inflight.get(key) is future:
+            del target_cache._inflight[key]
+    if result is not None and (should_cache is None or should_cache(result)):
         target_cache.set(tool_name, args_hash, result, ttl_sec=ttl_sec)
+    future.set_result(result)
     return result
@@ -13,9 +13,18 @@ Wave 95: content-hash cache для translator_engine.translate_text.
 - Value: ``{translation, ts, hit_count}``.
 - LRU + TTL: max 5000 entries, TTL 7 дней (default, конфигурируется через
   конструктор для тестов).
-- Persist: atomic write в ``~/.openclaw/krab_runtime_state/translation_cache.json``
-  через tempfile + ``os.replace``. Write batched: на каждый store(), но не
-  на lookup() (hot path).
+- Persist (write-behind, log-structured):
+  * snapshot ``~/.openclaw/krab_runtime_state/translation_cache.json`` —
+    ``{version, entries}``, atomic write через tempfile + ``os.replace``;
+  * journal ``translation_cache.json.journal`` — JSONL put/del события.
+  store() только добавляет строку в in-memory буфер (O(1)); запись на диск
+  делает single-thread executor пачками. Каждые ``compact_every`` событий
+  в буфер ставится snapshot текущего состояния — writer пишет его и
+  обнуляет journal. Startup: snapshot + replay journal (битая хвостовая
+  строка после crash пропускается). lookup() на диск не пишет (hot path).
+- Crash semantics: теряются только события, не дошедшие до writer'а
+  (обычно последние миллисекунды); ``persist()`` — синхронный compaction
+  для shutdown_coordinator.
 - Thread-safe: `threading.RLock` — translator вызывается из event-loop, но
   background sweep / metrics scrape могут читать параллельно.
 
@@ -25,6 +34,7 @@ lookup всегда возвращает None, store no-op.
 
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import json
 import os
@@ -49,6 +59,8 @@ logger = get_logger(__name__)
 # Дефолты — продовые значения. Тесты могут переопределять через конструктор.
 _DEFAULT_MAX_ENTRIES: int = 5000
 _DEFAULT_TTL_SECONDS: float = 7 * 24 * 3600.0  # 7 дней
+_JOURNAL_SUFFIX = ".journal"
+_FLUSH_TIMEOUT_SEC = 5.0
 
 
 def _env_enabled() -> bool:
@@ -79,6 +91,7 @@ class TranslationCache:
         max_entries: int = _DEFAULT_MAX_ENTRIES,
         ttl_seconds: float = _DEFAULT_TTL_SECONDS,
         now_fn: Callable[[], float] | None = None,
+        compact_every: int | None = None,
     ) -> None:
         self._lock = threading.RLock()
         self._storage_path: Path | None = storage_path
@@ -87,6 +100,12 @@ class TranslationCache:
         self._now_fn: Callable[[], float] = now_fn or time.time
         # OrderedDict даёт O(1) LRU: move_to_end на hit, popitem(last=False) на eviction.
         self._entries: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        # Write-behind: строки journal (str) и snapshot'ы (dict) в порядке событий.
+        self._pending_writes: list[str | dict[str, Any]] = []
+        self._drain_scheduled = False
+        self._journal_records = 0
+        self._compact_every: int = max(1, int(compact_every or max(1000, self._max_entries)))
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
         if storage_path is not None:
             self._load_from_disk()
             self._update_size_gauge()
@@ -140,16 +159,17 @@ class TranslationCache:
                 "hit_count": 0,
             }
             self._entries.move_to_end(key)
+            self._journal_locked({"op": "put", "k": key, "v": translation, "ts": now})
             # LRU eviction если переполнили.
             while len(self._entries) > self._max_entries:
                 evicted_key, _evicted_val = self._entries.popitem(last=False)
+                self._journal_locked({"op": "del", "k": evicted_key})
                 logger.info(
                     "translation_cache_evicted",
                     key=evicted_key,
                     cache_size=len(self._entries),
                 )
             self._update_size_gauge_locked()
-            self._persist_to_disk()
 
     def stats(self) -> dict[str, Any]:
         """Снимок состояния для /api/translation/cache/stats."""
@@ -171,10 +191,35 @@ class TranslationCache:
             n = len(self._entries)
             self._entries.clear()
             self._update_size_gauge_locked()
-            self._persist_to_disk()
+            self._schedule_compaction_locked()
         logger.info("translation_cache_cleared", removed=n)
         return n
 
+    def flush(self, timeout: float = _FLUSH_TIMEOUT_SEC) -> bool:
+        """Дождаться записи всех pending событий на диск. False — timeout/ошибка."""
+        with self._lock:
+            path = self._storage_path
+            if path is None:
+                return True
+            future = self._submit(self._drain_pending_writes, path)
+        try:
+            future.result(timeout=timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("translation_cache_flush_failed", error=str(exc))
+            return False
+        return True
+
+    def persist(self) -> bool:
+        """Синхронный compaction: snapshot текущего state + пустой journal.
+
+        Используется shutdown_coordinator'ом (Wave 101 default drains).
+        """
+        with self._lock:
+            if self._storage_path is None:
+                return True
+            self._schedule_compaction_locked()
+        return self.flush()
+
     # ---- Bootstrap configuration ---------------------------------------
 
     def configure_default_path(self, storage_path: Path) -> None:
@@ -183,9 +228,13 @@ class TranslationCache:
         Идемпотентно — повторный вызов перечитывает state. Используется
         в bootstrap (userbot_bridge.start) и в тестах для re-init.
         """
+        # Дописываем события старого пути до переключения.
+        self.flush()
         with self._lock:
             self._storage_path = storage_path
             self._entries = OrderedDict()
+            self._pending_writes = []
+            self._journal_records = 0
             self._load_from_disk()
             self._update_size_gauge_locked()
 
@@ -203,30 +252,37 @@ class TranslationCache:
 
     def _load_from_disk(self) -> None:
         path = self._storage_path
-        if path is None or not path.exists():
-            return
-        try:
-            raw = json.loads(path.read_text(encoding="utf-8") or "{}")
-        except (json.JSONDecodeError, OSError) as exc:
-            logger.warning(
-                "translation_cache_load_failed",
-                path=str(path),
-                error=str(exc),
-                error_type=type(exc).__name__,
-            )
-            return
-        if not isinstance(raw, dict):
-            logger.warning("translation_cache_load_malformed", path=str(path))
-            return
-        entries_raw = raw.get("entries") if "entries" in raw else raw
-        if not isinstance(entries_raw, dict):
+        if path is None:
             return
+        entries: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8") or "{}")
+            except (json.JSONDecodeError, OSError) as exc:
+                logger.warning(
+                    "translation_cache_load_failed",
+                    path=str(path),
+                    error=str(exc),
+                    error_type=type(exc).__name__,
+                )
+                raw = {}
+            if not isinstance(raw, dict):
+                logger.warning("translation_cache_load_malformed", path=str(path))
+                raw = {}
+            entries_raw = raw.get("entries") if "entries" in raw else raw
+            if isinstance(entries_raw, dict):
+                # Сохраняем порядок из disk (recently used последними).
+                for key, value in entries_raw.items():
+                    if isinstance(value, dict):
+                        entries[str(key)] = value
+        replayed = self._replay_journal(_journal_path(path), entries)
         now = self._now_fn()
         loaded = 0
         skipped = 0
-        # Сохраняем порядок из disk (recently used последними).
-        for key, value in entries_raw.items():
-            if not isinstance(value, dict):
+        # Хвост OrderedDict — самые свежие; при переполнении оставляем их.
+        overflow = max(0, len(entries) - self._max_entries)
+        for index, (key, value) in enumerate(entries.items()):
+            if index < overflow:
                 skipped += 1
                 continue
             ts = value.get("ts")
@@ -240,30 +296,120 @@ class TranslationCache:
             if not isinstance(translation, str):
                 skipped += 1
                 continue
-            self._entries[str(key)] = {
+            self._entries[key] = {
                 "translation": translation,
                 "ts": float(ts),
                 "hit_count": int(value.get("hit_count") or 0),
             }
             loaded += 1
-            if loaded >= self._max_entries:
-                break
-        if loaded or skipped:
+        self._journal_records = replayed
+        if loaded or skipped or replayed:
             logger.info(
                 "translation_cache_loaded",
                 loaded=loaded,
                 skipped=skipped,
+                journal_replayed=replayed,
                 path=str(path),
             )
 
-    def _persist_to_disk(self) -> None:
-        path = self._storage_path
-        if path is None:
+    @staticmethod
+    def _replay_journal(
+        journal: Path,
+        entries: "OrderedDict[str, dict[str, Any]]",
+    ) -> int:
+        """Применяет put/del события journal поверх snapshot. Возвращает число событий."""
+        if not journal.exists():
+            return 0
+        try:
+            lines = journal.read_text(encoding="utf-8").splitlines()
+        except OSError as exc:
+            logger.warning("translation_cache_journal_read_failed", error=str(exc))
+            return 0
+        replayed = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+                op = record["op"]
+                key = str(record["k"])
+            except (ValueError, KeyError, TypeError):
+                # Недописанная строка после crash — пропускаем.
+                continue
+            if op == "put":
+                entries[key] = {"translation": record.get("v"), "ts": record.get("ts")}
+                entries.move_to_end(key)
+            elif op == "del":
+                entries.pop(key, None)
+            else:
+                continue
+            replayed += 1
+        return replayed
+
+    # ---- Write-behind ------------------------------------------------------
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        # Один worker = один writer-thread: события пишутся в порядке store().
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="krab_translation_cache",
+            )
+        return self._executor.submit(fn, *args)
+
+    def _journal_locked(self, record: dict[str, Any]) -> None:
+        if self._storage_path is None:
             return
-        payload = {
-            "version": 1,
-            "entries": dict(self._entries),
-        }
+        self._pending_writes.append(json.dumps(record, ensure_ascii=False))
+        self._journal_records += 1
+        if self._journal_records >= self._compact_every:
+            self._schedule_compaction_locked()
+        else:
+            self._schedule_drain_locked()
+
+    def _schedule_compaction_locked(self) -> None:
+        if self._storage_path is None:
+            return
+        # Snapshot покрывает все события до него — их строки можно не писать.
+        self._pending_writes = [
+            {"version": 1, "entries": {k: dict(v) for k, v in self._entries.items()}}
+        ]
+        self._journal_records = 0
+        self._schedule_drain_locked()
+
+    def _schedule_drain_locked(self) -> None:
+        if self._drain_scheduled:
+            return
+        self._drain_scheduled = True
+        self._submit(self._drain_pending_writes, self._storage_path)
+
+    def _drain_pending_writes(self, path: Path) -> None:
+        """Writer-thread: пишет накопленные события/snapshot'ы по порядку."""
+        with self._lock:
+            items, self._pending_writes = self._pending_writes, []
+            self._drain_scheduled = False
+        lines: list[str] = []
+        for item in items:
+            if isinstance(item, dict):
+                lines.clear()
+                self._write_snapshot(path, item)
+            else:
+                lines.append(item)
+        if lines:
+            self._append_journal(path, lines)
+
+    def _append_journal(self, path: Path, lines: list[str]) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(_journal_path(path), "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError as exc:
+            logger.warning(
+                "translation_cache_journal_write_failed",
+                path=str(path),
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
+    def _write_snapshot(self, path: Path, payload: dict[str, Any]) -> None:
         try:
             path.parent.mkdir(parents=True, exist_ok=True)
             # Atomic write: tempfile в той же директории + os.replace.
@@ -283,6 +429,9 @@ class TranslationCache:
                 except OSError:
                     pass
                 raise
+            # Snapshot на месте — journal до него больше не нужен.
+            with open(_journal_path(path), "w", encoding="utf-8"):
+                pass
         except (OSError, TypeError) as exc:
             logger.warning(
                 "translation_cache_persist_failed",
@@ -290,6 +439,13 @@ class TranslationCache:
                 error=str(exc),
                 error_type=type(exc).__name__,
             )
+            # События до snapshot'а не попали на диск — compaction на следующем store().
+            with self._lock:
+                self._journal_records = self._compact_every
+
+
+def _journal_path(path: Path) -> Path:
+    return path.with_name(path.name + _JOURNAL_SUFFIX)
 
 
 def _safe_metric_inc(counter: Any) -> None:
@@ -25,6 +25,7 @@ import structlog
 if TYPE_CHECKING:
     from .chat_response_policy import ChatResponsePolicyStore
     from .llm_intent_classifier import IntentResult, LLMIntentClassifier
+    from .trigger_embedding_classifier import TriggerEmbeddingClassifier
 
 logger = structlog.get_logger(__name__)
 
@@ -473,6 +474,7 @@ class SmartTriggerResult:
       - "regex_high"         — regex score >=0.6
       - "regex_low"          — regex score <0.2 (drop без LLM)
       - "regex_threshold_fallback" — LLM unavailable, regex против policy threshold
+      - "embed_yes" / "embed_no" — уверенный вердикт embedding-классификатора (без LLM)
       - "llm_yes" / "llm_no" — LLM ответил should_respond=true/false
       - "llm_error_fallback" — LLM error → fallback на regex threshold
       - "media_present"      — фото/видео/video_note/animation/sticker без caption
@@ -520,13 +522,17 @@ async def detect_smart_trigger(
     llm_classifier: "LLMIntentClassifier | None" = None,
     has_media: bool = False,
     user_id: str | int | None = None,
+    embed_classifier: "TriggerEmbeddingClassifier | None" = None,
 ) -> SmartTriggerResult:
     """5-stage smart routing pipeline (Session 26 Smart Routing).
 
     Stage 1: hard gates (always respond) — command/mention/reply-to-me.
     Stage 2: per-chat policy — SILENT → drop.
     Stage 3: regex fast filter — score>=0.6 → respond, score<0.2 → drop.
-    Stage 4: LLM intent classifier для borderline (0.2-0.6).
+    Stage 4: LLM intent classifier для borderline (0.2-0.6); если передан
+        embed_classifier и он уверен — вердикт по Model2Vec-эмбеддингу без LLM
+        (случайная доля уверенных всё равно сверяется с LLM как shadow-сэмпл).
+        Успешные вердикты LLM логируются в embed_classifier как обучающие.
     Stage 5: fallback на regex+threshold при отсутствии/ошибке LLM.
 
     has_media: True если message несёт photo/video/video_note/animation/sticker.
@@ -636,6 +642,38 @@ async def detect_smart_trigger(
             )
         )
 
+    def _embed_verdict(embed_intent: IntentResult) -> SmartTriggerResult:
+        return _emit_smart_routing_metric(
+            SmartTriggerResult(
+                should_respond=(
+                    embed_intent.should_respond and embed_intent.confidence >= threshold
+                ),
+                decision_path=f"embed_{'yes' if embed_intent.should_respond else 'no'}",
+                confidence=embed_intent.confidence,
+                legacy_result=legacy,
+                intent_result=embed_intent,
+            )
+        )
+
+    # Stage 4a: embedding-классификатор — уверенный вердикт без LLM-вызова.
+    shadow_of = None
+    if embed_classifier is not None:
+        try:
+            embed_intent = embed_classifier.classify(text, regex_score=effective_low_score)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("smart_trigger_embed_error", chat_id=chat_id, error=str(exc))
+            embed_intent = None
+        if (
+            embed_intent is not None
+            and llm_classifier is not None
+            and embed_classifier.shadow_sample()
+        ):
+            # Shadow-сэмпл: уверенный вердикт всё равно сверяем с LLM, иначе
+            # в обучающий лог попадали бы только неуверенные сообщения.
+            shadow_of, embed_intent = embed_intent, None
+        if embed_intent is not None:
+            return _embed_verdict(embed_intent)
+
     # Stage 4: LLM intent (borderline 0.2-0.6)
     if llm_classifier is None:
         return _emit_smart_routing_metric(
@@ -656,6 +694,8 @@ async def detect_smart_trigger(
         )
     except Exception as exc:  # noqa: BLE001
         logger.warning("smart_trigger_llm_error", chat_id=chat_id, error=str(exc))
+        if shadow_of is not None:
+            return _embed_verdict(shadow_of)
         return _emit_smart_routing_metric(
             SmartTriggerResult(
                 should_respond=(legacy.score >= threshold),
@@ -666,6 +706,8 @@ async def detect_smart_trigger(
         )
 
     if intent.error:
+        if shadow_of is not None:
+            return _embed_verdict(shadow_of)
         return _emit_smart_routing_metric(
             SmartTriggerResult(
                 should_respond=(legacy.score >= threshold),
@@ -676,6 +718,19 @@ async def detect_smart_trigger(
             )
         )
 
+    if embed_classifier is not None:
+        try:
+            embed_classifier.record_llm_decision(
+                text,
+                chat_id=chat_id,
+                regex_score=effective_low_score,
+                intent=intent,
+                shadow_of=shadow_of,
+                sender_id=user_id,
+            )
+        except Exception as exc:  # noqa: BLE001 — лог обучающих примеров best-effort
+            logger.debug("smart_trigger_embed_record_failed", error=str(exc))
+
     final_decision = intent.should_respond and intent.confidence >= threshold
     return _emit_smart_routing_metric(
         SmartTriggerResult(
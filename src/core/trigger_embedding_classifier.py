@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding-классификатор Stage 4 Smart Routing (альтернатива LLM-вызову).
+
+Зачем существует:
+
+``detect_smart_trigger`` отправлял каждое borderline-сообщение группы
+(regex score 0.2–0.6) в ``LLMIntentClassifier`` — HTTP-вызов LM Studio на
+сотни миллисекунд. Model2Vec (уже загруженный для memory retrieval) кодирует
+короткий текст за десятки микросекунд, а решения LLM по таким сообщениям
+хорошо предсказуемы по смыслу текста.
+
+Как работает:
+
+* каждое успешное (не cached) решение LLM-пути логируется в
+  ``trigger_decisions.jsonl`` (``EventLog``): текст, regex score, вердикт;
+* ``retrain()`` (фоновый periodic job) обучает логистическую регрессию над
+  ``[unit(embedding), regex_score]`` c балансировкой классов, меряет качество
+  на хронологическом holdout'е и активирует модель, только если уверенные
+  вердикты согласны с LLM ≥ ``MIN_AGREEMENT`` и выборка ≥ ``MIN_SAMPLES``;
+* ``classify()`` возвращает ``IntentResult`` лишь при уверенности
+  ``p ≥ confidence`` (или ``p ≤ 1 - confidence``), иначе ``None`` → LLM.
+
+Смещение выборки: пока модель активна, до LLM доходят только неуверенные
+сообщения, и лог перестаёт описывать поток целиком. Поэтому каждая запись
+помечается ``source``: ``inactive`` (модель выключена — LLM видит всё),
+``uncertain`` (модель активна, но не уверена) или ``shadow`` — случайная
+доля ``shadow_rate`` уверенных вердиктов, которая всё равно уходит в LLM
+(с вердиктом эмбеддинга рядом). Обучение и гейт используют только
+``inactive`` + ``shadow``; ``uncertain`` остаётся в логе для анализа.
+
+Приватность лога: текст проходит ``PIIRedactor`` до записи, чаты
+``no_archive`` (``chat_sensitivity``) не логируются вовсе, записи старше
+``DECISIONS_MAX_AGE_SEC`` удаляются retention'ом ``EventLog``, а
+``scripts/forget_me.py`` вычищает записи чата / отправителя.
+
+Hot path не грузит модель и не ходит на диск: encoder по умолчанию берёт
+Model2Vec retriever'а, только если он уже загружен; веса — ~257 float'ов,
+скоринг — pure-Python dot product. NumPy, если установлен, ускоряет
+только обучение; без него работает тот же full-batch GD на списках.
+
+Env:
+    KRAB_TRIGGER_EMBED_ENABLED=1       — использовать классификатор (default 1).
+    KRAB_TRIGGER_EMBED_CONFIDENCE=0.85 — порог уверенности для вердикта без LLM.
+    KRAB_TRIGGER_EMBED_SHADOW_RATE=0.05 — доля уверенных вердиктов, сверяемых с LLM.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from .chat_sensitivity import sensitive_chat_registry
+from .event_log import EventLog, get_event_log
+from .llm_intent_classifier import IntentResult
+from .memory_pii_redactor import PIIRedactor
+
+try:  # numpy опционален: без него обучение идёт pure-Python путём.
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
+logger = structlog.get_logger(__name__)
+
+_STATE_DIR = Path.home() / ".openclaw" / "krab_runtime_state"
+DECISIONS_LOG = _STATE_DIR / "trigger_decisions.jsonl"
+MODEL_PATH = _STATE_DIR / "trigger_embed_classifier.json"
+DECISIONS_MAX_AGE_SEC = 30 * 86400
+DECISIONS_LOG_OPTIONS: dict[str, Any] = {
+    "segment_max_bytes": 4 * 1024 * 1024,
+    "max_total_bytes": 32 * 1024 * 1024,
+    "max_age_sec": DECISIONS_MAX_AGE_SEC,
+}
+
+DEFAULT_CONFIDENCE = 0.85
+DEFAULT_SHADOW_RATE = 0.05
+MIN_SAMPLES = 200
+MIN_AGREEMENT = 0.95
+HOLDOUT_FRACTION = 0.2
+MAX_TRAIN_SAMPLES = 5000
+RETRAIN_INTERVAL_SEC = 6 * 3600
+_TEXT_MAX_CHARS = 500
+
+# Encoder: список текстов → список векторов; None — модель недоступна.
+Encoder = Callable[[Sequence[str]], "Sequence[Sequence[float]] | None"]
+
+
+def is_enabled() -> bool:
+    return os.getenv("KRAB_TRIGGER_EMBED_ENABLED", "1").strip().lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
+def confidence_threshold() -> float:
+    try:
+        value = float(os.getenv("KRAB_TRIGGER_EMBED_CONFIDENCE", DEFAULT_CONFIDENCE))
+    except ValueError:
+        return DEFAULT_CONFIDENCE
+    return min(max(value, 0.5), 1.0)
+
+
+def shadow_rate() -> float:
+    try:
+        value = float(os.getenv("KRAB_TRIGGER_EMBED_SHADOW_RATE", DEFAULT_SHADOW_RATE))
+    except ValueError:
+        return DEFAULT_SHADOW_RATE
+    return min(max(value, 0.0), 1.0)
+
+
+def retriever_encoder(*, load: bool = False) -> Encoder:
+    """Encoder поверх Model2Vec memory retriever'а.
+
+    ``load=False`` (hot path) — только уже загруженная модель, без I/O;
+    ``load=True`` (обучение/оценка) — разрешает lazy-load через ``_ensure_model``.
+    """
+
+    def _encode(texts: Sequence[str]) -> Sequence[Sequence[float]] | None:
+        from .memory_adapter import _get_retriever  # noqa: PLC0415
+
+        retriever = _get_retriever()
+        model = getattr(retriever, "_model", None)
+        if model is None and load and hasattr(retriever, "_ensure_model"):
+            model = retriever._ensure_model()
+        if model is None:
+            return None
+        return model.encode(list(texts))
+
+    return _encode
+
+
+def _features(vector: Sequence[float], regex_score: float) -> list[float]:
+    """``[unit(embedding)..., regex_score]`` — косинусная геометрия + regex-сигнал."""
+    values = [float(v) for v in vector]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    values = [v / norm for v in values]
+    values.append(float(regex_score))
+    return values
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+@dataclass
+class LinearTriggerModel:
+    """Логистическая регрессия над признаками ``_features``."""
+
+    weights: list[float]
+    bias: float
+    trained_at: float = 0.0
+    samples: int = 0
+    holdout_agreement: float = 0.0
+    holdout_coverage: float = 0.0
+    active: bool = False
+
+    def predict_proba(self, features: Sequence[float]) -> float:
+        z = self.bias
+        for w, x in zip(self.weights, features):
+            z += w * x
+        return _sigmoid(z)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LinearTriggerModel":
+        return cls(
+            weights=[float(w) for w in data["weights"]],
+            bias=float(data["bias"]),
+            trained_at=float(data.get("trained_at", 0.0)),
+            samples=int(data.get("samples", 0)),
+            holdout_agreement=float(data.get("holdout_agreement", 0.0)),
+            holdout_coverage=float(data.get("holdout_coverage", 0.0)),
+            active=bool(data.get("active", False)),
+        )
+
+
+def train_logistic(
+    rows: Sequence[Sequence[float]],
+    labels: Sequence[bool],
+    *,
+    epochs: int = 300,
+    learning_rate: float = 1.0,
+    l2: float = 1e-3,
+) -> LinearTriggerModel:
+    """Full-batch GD с L2 и балансировкой классов (LLM в основном говорит NO)."""
+    n = len(rows)
+    if n == 0:
+        raise ValueError("no training rows")
+    positives = sum(1 for y in labels if y)
+    w_pos = n / (2.0 * positives) if positives else 1.0
+    w_neg = n / (2.0 * (n - positives)) if positives < n else 1.0
+    sample_w = [w_pos if y else w_neg for y in labels]
+    targets = [1.0 if y else 0.0 for y in labels]
+    dim = len(rows[0])
+
+    if np is not None:
+        x = np.asarray(rows, dtype=np.float64)
+        t = np.asarray(targets)
+        sw = np.asarray(sample_w)
+        weights = np.zeros(dim)
+        bias = 0.0
+        for _ in range(epochs):
+            z = np.clip(x @ weights + bias, -30.0, 30.0)
+            err = (1.0 / (1.0 + np.exp(-z)) - t) * sw
+            weights -= learning_rate * (x.T @ err / n + l2 * weights)
+            bias -= learning_rate * float(err.mean())
+        return LinearTriggerModel(weights=weights.tolist(), bias=bias)
+
+    weights_py = [0.0] * dim
+    bias_py = 0.0
+    for _ in range(epochs):
+        grad = [0.0] * dim
+        grad_b = 0.0
+        for row, target, weight in zip(rows, targets, sample_w):
+            z = bias_py + sum(w * v for w, v in zip(weights_py, row))
+            err = (_sigmoid(z) - target) * weight
+            grad_b += err
+            for j, v in enumerate(row):
+                grad[j] += err * v
+        weights_py = [w - learning_rate * (g / n + l2 * w) for w, g in zip(weights_py, grad)]
+        bias_py -= learning_rate * grad_b / n
+    return LinearTriggerModel(weights=weights_py, bias=bias_py)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q + 1e-9), len(ordered) - 1)]
+
+
+@dataclass
+class EvalReport:
+    """Качество классификатора на хронологическом holdout'е против LLM-вердиктов."""
+
+    train_samples: int = 0
+    holdout_samples: int = 0
+    agreement_all: float = 0.0  # argmax классификатора vs LLM на всём holdout
+    coverage: float = 0.0  # доля сообщений, решённых без LLM
+    agreement_confident: float = 0.0  # согласие на уверенной части
+    agreement_hybrid: float = 0.0  # уверенные → классификатор, остальные → LLM
+    classifier_p50_ms: float = 0.0
+    classifier_p99_ms: float = 0.0
+    llm_p50_ms: float = 0.0
+    llm_p99_ms: float = 0.0
+    confidence: float = DEFAULT_CONFIDENCE
+    passed: bool = False
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _is_unbiased(rec: dict) -> bool:
+    """Запись без отбора по уверенности модели (записи до ``source`` — inactive)."""
+    return rec.get("source", "inactive") != "uncertain"
+
+
+def _labeled(records: Sequence[dict]) -> list[dict]:
+    out = []
+    for rec in records:
+        text = rec.get("text")
+        if isinstance(text, str) and text.strip() and isinstance(rec.get("should_respond"), bool):
+            out.append(rec)
+    return out
+
+
+def _encode_rows(records: Sequence[dict], encoder: Encoder) -> list[list[float]] | None:
+    vectors = encoder([rec["text"] for rec in records])
+    if vectors is None:
+        return None
+    return [
+        _features(vec, float(rec.get("regex_score") or 0.0)) for vec, rec in zip(vectors, records)
+    ]
+
+
+def evaluate(
+    records: Sequence[dict],
+    encoder: Encoder,
+    *,
+    holdout_fraction: float = HOLDOUT_FRACTION,
+    confidence: float = DEFAULT_CONFIDENCE,
+    min_samples: int = MIN_SAMPLES,
+    min_agreement: float = MIN_AGREEMENT,
+) -> EvalReport:
+    """Обучает на старых записях, проверяет на свежих (хронологический split).
+
+    Latency классификатора меряется per-message (encode + score) — ровно
+    то, что добавится в hot path; latency LLM берётся из залогированных
+    ``latency_ms`` того же holdout'а.
+    """
+    report = EvalReport(confidence=confidence)
+    labeled = _labeled(records)
+    split = int(len(labeled) * (1.0 - holdout_fraction))
+    train, holdout = labeled[:split], labeled[split:]
+    report.train_samples, report.holdout_samples = len(train), len(holdout)
+    if not train or not holdout or len({rec["should_respond"] for rec in train}) < 2:
+        report.extra["reason"] = "not_enough_data"
+        return report
+    rows = _encode_rows(train, encoder)
+    if rows is None:
+        report.extra["reason"] = "encoder_unavailable"
+        return report
+    model = train_logistic(rows, [rec["should_respond"] for rec in train])
+
+    agree_all = covered = agree_covered = 0
+    latencies: list[float] = []
+    for rec in holdout:
+        start = time.perf_counter()
+        vectors = encoder([rec["text"]])
+        if vectors is None:
+            report.extra["reason"] = "encoder_unavailable"
+            return report
+        p = model.predict_proba(_features(vectors[0], float(rec.get("regex_score") or 0.0)))
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        verdict = p >= 0.5
+        correct = verdict == rec["should_respond"]
+        agree_all += correct
+        if p >= confidence or p <= 1.0 - confidence:
+            covered += 1
+            agree_covered += correct
+
+    n = len(holdout)
+    report.agreement_all = agree_all / n
+    report.coverage = covered / n
+    report.agreement_confident = agree_covered / covered if covered else 0.0
+    report.agreement_hybrid = (agree_covered + (n - covered)) / n
+    report.classifier_p50_ms = statistics.median(latencies)
+    report.classifier_p99_ms = _percentile(latencies, 0.99)
+    llm_latencies = [float(rec["latency_ms"]) for rec in holdout if rec.get("latency_ms")]
+    report.llm_p50_ms = _percentile(llm_latencies, 0.5)
+    report.llm_p99_ms = _percentile(llm_latencies, 0.99)
+    report.passed = (
+        len(labeled) >= min_samples and covered > 0 and report.agreement_confident >= min_agreement
+    )
+    return report
+
+
+class TriggerEmbeddingClassifier:
+    """Stage 4: уверенный вердикт по эмбеддингу или ``None`` → LLM."""
+
+    def __init__(
+        self,
+        *,
+        encoder: Encoder | None = None,
+        training_encoder: Encoder | None = None,
+        log_path: Path = DECISIONS_LOG,
+        model_path: Path = MODEL_PATH,
+        confidence: float | None = None,
+        shadow_rate: float | None = None,
+        rng: random.Random | None = None,
+        sensitivity_registry: Any | None = None,
+        redactor: PIIRedactor | None = None,
+    ) -> None:
+        self._encoder = encoder or retriever_encoder(load=False)
+        self._training_encoder = training_encoder or encoder or retriever_encoder(load=True)
+        self._log_path = Path(log_path)
+        self._model_path = Path(model_path)
+        self._confidence = confidence
+        self._shadow_rate = shadow_rate
+        self._rng = rng or random.Random()
+        self._sensitivity = sensitivity_registry or sensitive_chat_registry
+        self._redactor = redactor or PIIRedactor()
+        self._model: LinearTriggerModel | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.last_report: EvalReport | None = None
+
+    # ------------------------------------------------------------------
+    # Лог решений LLM
+    # ------------------------------------------------------------------
+
+    def _log(self) -> EventLog:
+        return get_event_log(self._log_path, **DECISIONS_LOG_OPTIONS)
+
+    def record_llm_decision(
+        self,
+        text: str,
+        *,
+        chat_id: str,
+        regex_score: float,
+        intent: IntentResult,
+        shadow_of: IntentResult | None = None,
+        sender_id: str | int | None = None,
+    ) -> None:
+        """Логирует успешный вердикт LLM как обучающий пример (cached — пропуск).
+
+        ``shadow_of`` — уверенный вердикт модели, отправленный в LLM как shadow-сэмпл.
+        Чаты ``no_archive`` не логируются; текст пишется после PII-redaction.
+        """
+        if intent.error or intent.cached or not text or not text.strip():
+            return
+        try:
+            if self._sensitivity.should_skip_archive(chat_id):
+                return
+        except Exception as exc:  # noqa: BLE001 — лог опционален: fail-closed
+            logger.debug("trigger_embed_sensitivity_check_failed", error=str(exc))
+            return
+        record = {
+            "ts": time.time(),
+            "chat_id": str(chat_id),
+            "sender_id": str(sender_id) if sender_id is not None else None,
+            "text": self._redactor.redact(text).text[:_TEXT_MAX_CHARS],
+            "regex_score": round(float(regex_score), 4),
+            "should_respond": bool(intent.should_respond),
+            "confidence": round(float(intent.confidence), 4),
+            "latency_ms": round(float(intent.latency_ms), 1),
+            "source": "inactive",
+        }
+        if shadow_of is not None:
+            record["source"] = "shadow"
+            record["embed_should_respond"] = bool(shadow_of.should_respond)
+        elif self.is_active:
+            record["source"] = "uncertain"
+        self._log().append(record)
+
+    def read_decisions(
+        self, limit: int = MAX_TRAIN_SAMPLES, *, unbiased_only: bool = False
+    ) -> list[dict]:
+        """Последние ``limit`` записей; ``unbiased_only`` — без ``uncertain``."""
+        records = self._log().iter_since(0.0)
+        if unbiased_only:
+            records = (rec for rec in records if _is_unbiased(rec))
+        return list(deque(records, maxlen=limit))
+
+    def shadow_sample(self) -> bool:
+        """Отправить ли уверенный вердикт в LLM для несмещённой сверки."""
+        rate = self._shadow_rate if self._shadow_rate is not None else shadow_rate()
+        return rate > 0.0 and self._rng.random() < rate
+
+    # ------------------------------------------------------------------
+    # Модель
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> LinearTriggerModel | None:
+        if self._loaded:
+            return self._model
+        with self._lock:
+            if not self._loaded:
+                try:
+                    data = json.loads(self._model_path.read_text(encoding="utf-8"))
+                    self._model = LinearTriggerModel.from_dict(data)
+                except FileNotFoundError:
+                    self._model = None
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("trigger_embed_model_load_failed", error=str(exc))
+                    self._model = None
+                self._loaded = True
+        return self._model
+
+    @property
+    def is_active(self) -> bool:
+        model = self._ensure_loaded()
+        return bool(model and model.active)
+
+    def classify(self, text: str, *, regex_score: float) -> IntentResult | None:
+        """Уверенный вердикт или ``None`` (модель неактивна / encoder не готов / неуверенно)."""
+        model = self._ensure_loaded()
+        if model is None or not model.active or not text or not text.strip():
+            return None
+        start = time.perf_counter()
+        try:
+            vectors = self._encoder([text])
+        except Exception as exc:  # noqa: BLE001 — encoder не должен ронять routing
+            logger.debug("trigger_embed_encode_failed", error=str(exc))
+            return None
+        if vectors is None:
+            return None
+        p = model.predict_proba(_features(vectors[0], regex_score))
+        confidence = self._confidence if self._confidence is not None else confidence_threshold()
+        if 1.0 - confidence < p < confidence:
+            return None
+        should_respond = p >= 0.5
+        return IntentResult(
+            should_respond=should_respond,
+            confidence=p if should_respond else 1.0 - p,
+            reasoning=f"embed p={p:.3f}",
+            latency_ms=(time.perf_counter() - start) * 1000.0,
+        )
+
+    def retrain(self) -> EvalReport:
+        """Переобучает по логу решений; активирует модель только при прохождении гейтов.
+
+        Берутся только несмещённые записи (``inactive`` + ``shadow``): ``uncertain``
+        отобраны самой моделью и завысили бы/исказили оценку на holdout'е.
+        """
+        confidence = self._confidence if self._confidence is not None else confidence_threshold()
+        self._log().enforce_retention()
+        records = self.read_decisions(unbiased_only=True)
+        report = evaluate(records, self._training_encoder, confidence=confidence)
+        self.last_report = report
+        model: LinearTriggerModel | None = None
+        if report.passed:
+            labeled = _labeled(records)
+            rows = _encode_rows(labeled, self._training_encoder)
+            if rows is not None:
+                model = train_logistic(rows, [rec["should_respond"] for rec in labeled])
+                model.samples = len(labeled)
+        if model is None:
+            # Гейт не пройден — модель (включая прежнюю) деактивируется: drift LLM/чатов.
+            current = self._ensure_loaded()
+            if current is not None and current.active:
+                current.active = False
+                self._save(current)
+            logger.info("trigger_embed_retrain_skipped", **report.to_dict())
+            return report
+        model.trained_at = time.time()
+        model.holdout_agreement = report.agreement_confident
+        model.holdout_coverage = report.coverage
+        model.active = True
+        self._save(model)
+        with self._lock:
+            self._model, self._loaded = model, True
+        logger.info("trigger_embed_retrained", **report.to_dict())
+        return report
+
+    def _save(self, model: LinearTriggerModel) -> None:
+        try:
+            self._model_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._model_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(model.to_dict()), encoding="utf-8")
+            tmp.replace(self._model_path)
+        except OSError as exc:
+            logger.warning("trigger_embed_model_save_failed", error=str(exc))
+
+
+_default_classifier: TriggerEmbeddingClassifier | None = None
+
+
+def get_embedding_classifier() -> TriggerEmbeddingClassifier:
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = TriggerEmbeddingClassifier()
+    return _default_classifier
+
+
+def reset_embedding_classifier() -> None:
+    """For tests."""
+    global _default_classifier
+    _default_classifier = None
+
+
+def register_periodic(scheduler: "PeriodicScheduler") -> bool:
+    """Регистрирует переобучение job'ой periodic_scheduler (в thread — GD + encode)."""
+    if not is_enabled():
+        logger.info("trigger_embed_classifier_disabled")
+        return False
+    classifier = get_embedding_classifier()
+    scheduler.register(
+        "trigger_embed_retrain",
+        classifier.retrain,
+        RETRAIN_INTERVAL_SEC,
+        initial_delay_sec=600.0,
+        run_in_thread=True,
+    )
+    logger.info("trigger_embed_retrain_registered", interval_sec=RETRAIN_INTERVAL_SEC)
+    return True
+
+
+__all__ = [
+    "DECISIONS_LOG",
+    "DECISIONS_MAX_AGE_SEC",
+    "DEFAULT_CONFIDENCE",
+    "DEFAULT_SHADOW_RATE",
+    "EvalReport",
+    "LinearTriggerModel",
+    "MODEL_PATH",
+    "TriggerEmbeddingClassifier",
+    "evaluate",
+    "get_embedding_classifier",
+    "is_enabled",
+    "register_periodic",
+    "reset_embedding_classifier",
+    "retriever_encoder",
+    "shadow_rate",
+    "train_logistic",
+]
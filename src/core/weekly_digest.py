@@ -21,13 +21,18 @@ from collections import defaultdict
 from collections.abc import Awaitable, Callable
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from ..core.cost_analytics import cost_analytics
+from ..integrations._bypass_perf import PERF_LOG_OPTIONS
+from .event_log import get_event_log
 from .inbox_service import inbox_service
 from .logger import get_logger
 from .swarm_artifact_store import swarm_artifact_store
 
+if TYPE_CHECKING:
+    from .periodic_scheduler import PeriodicScheduler
+
 # Путь к JSONL-файлу с bypass latency записями
 _BYPASS_PERF_LOG = Path.home() / ".openclaw/krab_runtime_state/bypass_perf.jsonl"
 # Путь к логу мониторинга памяти
@@ -86,7 +91,8 @@ class WeeklyDigestService:
             "top_kinds": [],
             "top_models": [],
         }
-        if not _BYPASS_PERF_LOG.exists():
+        log = get_event_log(_BYPASS_PERF_LOG, **PERF_LOG_OPTIONS)
+        if not log.segments():
             return empty
 
         cutoff = time.time() - window_days * 86400
@@ -100,30 +106,22 @@ class WeeklyDigestService:
         total_failures = 0
 
         try:
-            with _BYPASS_PERF_LOG.open() as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        r = json.loads(line)
-                    except Exception:  # noqa: BLE001
-                        continue
-                    if r.get("ts", 0) < cutoff:
-                        continue
-                    total_calls += 1
-                    kind = str(r.get("kind") or "unknown")
-                    model = str(r.get("model") or "unknown")
-                    dur = r.get("duration_sec", 0.0)
-                    ok = r.get("success", True)
-                    if not ok:
-                        total_failures += 1
-                    by_kind[kind]["count"] += 1
-                    by_kind[kind]["fail"] += 0 if ok else 1
-                    by_kind[kind]["durations"].append(dur)
-                    by_model[model]["count"] += 1
-                    by_model[model]["fail"] += 0 if ok else 1
-                    by_model[model]["durations"].append(dur)
+            for r in log.iter_since(cutoff):
+                if r.get("ts", 0) < cutoff:
+                    continue
+                total_calls += 1
+                kind = str(r.get("kind") or "unknown")
+                model = str(r.get("model") or "unknown")
+                dur = r.get("duration_sec", 0.0)
+                ok = r.get("success", True)
+                if not ok:
+                    total_failures += 1
+                by_kind[kind]["count"] += 1
+                by_kind[kind]["fail"] += 0 if ok else 1
+                by_kind[kind]["durations"].append(dur)
+                by_model[model]["count"] += 1
+                by_model[model]["fail"] += 0 if ok else 1
+                by_model[model]["durations"].append(dur)
         except Exception as exc:  # noqa: BLE001
             logger.warning("weekly_digest_bypass_read_failed", error=str(exc))
             return empty
@@ -595,6 +593,16 @@ class WeeklyDigestService:
                 logger.warning("weekly_digest_loop_error", error=str(exc))
             await asyncio.sleep(self.INTERVAL_SEC)
 
+    def register_periodic(self, scheduler: "PeriodicScheduler") -> None:
+        """generate_digest job'ой общего periodic_scheduler (первый fire — через FIRST_RUN_DELAY_SEC)."""
+        scheduler.register(
+            "weekly_digest",
+            self.generate_digest,
+            self.INTERVAL_SEC,
+            initial_delay_sec=self.FIRST_RUN_DELAY_SEC,
+        )
+        logger.info("weekly_digest_loop_started", interval_sec=self.INTERVAL_SEC)
+
     def start_weekly_digest_loop(self) -> "asyncio.Task[None]":
         """Запускает фоновую задачу Weekly Digest и возвращает Task."""
         loop = asyncio.get_event_loop()
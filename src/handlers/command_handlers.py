@@ -18,6 +18,7 @@ from pyrogram.types import Message
 
 from ..cache_manager import (  # noqa: F401  # patch surface (state_commands)
     history_cache,
+    history_log,
     search_cache,
 )
 from ..config import config  # noqa: F401  # patch surface (info_commands tests)
@@ -22,6 +22,7 @@ import httpx
 from pyrogram.types import Message
 
 from ...cache_manager import history_cache as _history_cache_baseline
+from ...cache_manager import history_log as _history_log_baseline
 from ...cache_manager import search_cache as _search_cache_baseline
 from ...config import config as _config_baseline
 from ...core.access_control import AccessLevel
@@ -387,6 +388,7 @@ async def handle_clear(bot: "KraabUserbot", message: Message) -> None:
     """Очистка контекста / кэшей."""
     openclaw_client = _ch_attr("openclaw_client", _openclaw_client_baseline)
     history_cache = _ch_attr("history_cache", _history_cache_baseline)
+    history_log = _ch_attr("history_log", _history_log_baseline)
     search_cache = _ch_attr("search_cache", _search_cache_baseline)
 
     chat_id = str(message.chat.id)
@@ -402,10 +404,12 @@ async def handle_clear(bot: "KraabUserbot", message: Message) -> None:
         res = f"🧹 **Все сессии очищены** (`{count}` чат(ов)). Краб начинает с чистого листа!"
     elif sub == "cache":
         h_count = history_cache.clear_all()
+        log_count = history_log.clear_all()
         s_count = search_cache.clear_all()
         res = (
             f"🗑️ **Кэши очищены**\n"
             f"• history_cache: `{h_count}` записей\n"
+            f"• history_log: `{log_count}` чат(ов)\n"
             f"• search_cache: `{s_count}` записей"
         )
     else:
@@ -451,6 +455,7 @@ async def handle_reset(bot: "KraabUserbot", message: Message) -> None:
 
     openclaw_client = _ch_attr("openclaw_client", _openclaw_client_baseline)
     history_cache = _ch_attr("history_cache", _history_cache_baseline)
+    history_log = _ch_attr("history_log", _history_log_baseline)
 
     valid_layers = {"krab", "openclaw", "gemini", "archive"}
 
@@ -511,7 +516,7 @@ async def handle_reset(bot: "KraabUserbot", message: Message) -> None:
     if layer in (None, "krab"):
         for cid in target_chat_ids:
             try:
-                if history_cache.get(f"chat_history:{cid}"):
+                if history_cache.get(f"chat_history:{cid}") or history_log.has(cid):
                     impact["krab"] += 1
             except Exception as exc:  # noqa: BLE001
                 logger.warning("reset_krab_probe_failed", chat_id=cid, error=str(exc))
@@ -565,8 +570,13 @@ async def handle_reset(bot: "KraabUserbot", message: Message) -> None:
         if layer in (None, "krab"):
             key = f"chat_history:{cid}"
             try:
-                if history_cache.get(key):
+                had_legacy = bool(history_cache.get(key))
+                had_log = history_log.has(cid)
+                if had_legacy:
                     history_cache.delete(key)
+                if had_log:
+                    history_log.delete(cid)
+                if had_legacy or had_log:
                     stats["krab"] += 1
             except Exception as exc:  # noqa: BLE001
                 logger.warning("reset_krab_failed", chat_id=cid, error=str(exc))
@@ -4,18 +4,38 @@
   {ts, kind, model, duration_sec, success, response_len, error_type}
 
 kind значения: 'cli', 'vertex', 'anthropic-vertex', 'google-direct', 'gemma'
+
+Файл ведётся через общий ``EventLog``: сегменты по 4MB, retention по
+возрасту/объёму. ``aggregate_perf`` держит in-memory rollup quantile
+sketch'ей по (kind, model, бакет) и догоняет лог инкрементально.
 """
 
 from __future__ import annotations
 
-import json
+import threading
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from ..core.event_log import EventLog, get_event_log
+from ..core.quantile_sketch import QuantileSketch
+
 # Путь к JSONL-файлу с записями latency
 PERF_LOG = Path.home() / ".openclaw/krab_runtime_state/bypass_perf.jsonl"
 
+# Пороги сегментации/retention: weekly digest смотрит на 7 дней, держим 30.
+PERF_LOG_OPTIONS: dict[str, Any] = {
+    "segment_max_bytes": 4 * 1024 * 1024,
+    "max_total_bytes": 64 * 1024 * 1024,
+    "max_age_sec": 30 * 86400,
+}
+
+
+def perf_log() -> EventLog:
+    """Общий EventLog для ``PERF_LOG`` (путь читается на вызов — тесты патчат)."""
+    return get_event_log(PERF_LOG, **PERF_LOG_OPTIONS)
+
 
 def record_bypass_call(
     *,
@@ -34,7 +54,6 @@ def record_bypass_call(
     одинаково и невозможно отличить transient (quota/perm) от genuine bug.
     """
     try:
-        PERF_LOG.parent.mkdir(parents=True, exist_ok=True)
         record: dict[str, Any] = {
             "ts": time.time(),
             "kind": kind,
@@ -46,8 +65,7 @@ def record_bypass_call(
             "error_message": (error_message or "")[:300],  # truncate для безопасности
             **(extra or {}),
         }
-        with PERF_LOG.open("a") as f:
-            f.write(json.dumps(record) + "\n")
+        perf_log().append(record)
     except Exception:  # noqa: BLE001
         pass  # никогда не крашим bypass из-за профилировщика
 
@@ -78,11 +96,174 @@ def is_expected_failure(error_message: str | None) -> bool:
     return any(pattern.lower() in msg for pattern in EXPECTED_ERROR_PATTERNS)
 
 
+# Минутные бакеты держим сутки (+час на край окна), часовые — весь retention лога.
+_MINUTE_SEC = 60
+_HOUR_SEC = 3600
+_MINUTE_HORIZON_SEC = 25 * _HOUR_SEC
+
+
+@dataclass
+class _PerfCell:
+    """Агрегат одного бакета: счётчики вызовов/ошибок + sketch длительностей."""
+
+    records: int = 0
+    fails: int = 0
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def merge(self, other: "_PerfCell") -> None:
+        self.records += other.records
+        self.fails += other.fails
+        self.sketch.merge(other.sketch)
+
+    def stats(self) -> dict[str, Any]:
+        sk = self.sketch
+        return {
+            "count": self.records,
+            "fail_rate": round(self.fails / max(self.records, 1), 3),
+            "p50": round(sk.quantile(0.50), 3),
+            "p95": round(sk.quantile(0.95), 3),
+            "p99": round(sk.quantile(0.99), 3),
+            "mean": round(sk.total / max(sk.count, 1), 3),
+        }
+
+
+# Ключ ячейки: (bucket_start, kind, model, expected_failure)
+_CellKey = tuple[int, Any, Any, bool]
+
+
+class _PerfRollup:
+    """Sketch-rollup bypass_perf.jsonl по (бакет, kind, model, expected).
+
+    Догоняет лог по курсору ``EventLog.read_after``: каждый запрос парсит
+    только записи, дописанные с прошлого запроса (в т.ч. другими процессами),
+    после рестарта/ротации-с-удалением окно перечитывается один раз.
+    Окно = merge минутных бакетов на краю + часовых бакетов внутри —
+    O(бакетов), а не O(записей). Край окна выравнивается вниз по минуте.
+    """
+
+    def __init__(self, log: EventLog, horizon_sec: float) -> None:
+        self._log = log
+        self._horizon_sec = horizon_sec
+        self._lock = threading.Lock()
+        self._cursor: tuple[int, int] | None = None
+        self._minutes: dict[_CellKey, _PerfCell] = {}
+        self._hours: dict[_CellKey, _PerfCell] = {}
+
+    def _ingest(self, r: dict[str, Any]) -> None:
+        ts = r.get("ts", 0)
+        if isinstance(ts, bool) or not isinstance(ts, (int, float)):
+            return
+        ok = r.get("success", True)
+        expected = not ok and is_expected_failure(r.get("error_message"))
+        dur = r.get("duration_sec")
+        has_dur = isinstance(dur, (int, float)) and not isinstance(dur, bool)
+        try:
+            for table, size in ((self._minutes, _MINUTE_SEC), (self._hours, _HOUR_SEC)):
+                key = (
+                    int(ts // size) * size,
+                    r.get("kind", "unknown"),
+                    r.get("model", "unknown"),
+                    expected,
+                )
+                cell = table.get(key)
+                if cell is None:
+                    cell = table[key] = _PerfCell()
+                cell.records += 1
+                cell.fails += 0 if ok else 1
+                if has_dur:
+                    cell.sketch.add(dur)
+        except TypeError:
+            return  # unhashable kind/model — как и раньше, запись пропускается
+
+    def _prune(self, now: float) -> None:
+        for table, size, horizon in (
+            (self._minutes, _MINUTE_SEC, _MINUTE_HORIZON_SEC),
+            (self._hours, _HOUR_SEC, self._horizon_sec),
+        ):
+            edge = now - horizon - size
+            for key in [k for k in table if k[0] < edge]:
+                del table[key]
+
+    def _sync(self, now: float) -> None:
+        if self._cursor is not None:
+            delta = self._log.read_after(self._cursor)
+            if delta is not None:
+                records, self._cursor = delta
+                for r in records:
+                    self._ingest(r)
+                self._prune(now)
+                return
+        # Первый запрос или курсор невалиден — перечитываем горизонт целиком.
+        self._minutes.clear()
+        self._hours.clear()
+        records, self._cursor = self._log.snapshot_since(now - self._horizon_sec)
+        for r in records:
+            self._ingest(r)
+        self._prune(now)
+
+    def _window_cells(self, cutoff: float, now: float) -> list[tuple[_CellKey, _PerfCell]]:
+        minute_start = int(cutoff // _MINUTE_SEC) * _MINUTE_SEC
+        if minute_start < now - _MINUTE_HORIZON_SEC:
+            hour_start = int(cutoff // _HOUR_SEC) * _HOUR_SEC
+            return [(k, c) for k, c in self._hours.items() if k[0] >= hour_start]
+        # Край окна до ближайшей границы часа — минутными бакетами, дальше часовыми.
+        boundary = -(-minute_start // _HOUR_SEC) * _HOUR_SEC
+        cells = [(k, c) for k, c in self._minutes.items() if minute_start <= k[0] < boundary]
+        cells.extend((k, c) for k, c in self._hours.items() if k[0] >= boundary)
+        return cells
+
+    def aggregate(self, window_sec: int, exclude_expected: bool) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            self._sync(now)
+            by_kind: dict[Any, _PerfCell] = {}
+            by_model: dict[Any, _PerfCell] = {}
+            total = _PerfCell()
+            for (_, kind, model, expected), cell in self._window_cells(now - window_sec, now):
+                # Session 39: фильтруем expected failures из alert pipeline
+                if exclude_expected and expected:
+                    continue
+                for groups, name in ((by_kind, kind), (by_model, model)):
+                    acc = groups.get(name)
+                    if acc is None:
+                        acc = groups[name] = _PerfCell()
+                    acc.merge(cell)
+                total.records += cell.records
+                total.fails += cell.fails
+        return {
+            "total_calls": total.records,
+            "total_failures": total.fails,
+            "window_sec": window_sec,
+            "by_kind": {k: v.stats() for k, v in by_kind.items()},
+            "by_model": {k: v.stats() for k, v in by_model.items()},
+        }
+
+
+_rollups: dict[Path, _PerfRollup] = {}
+_rollups_lock = threading.Lock()
+
+
+def _perf_rollup() -> _PerfRollup:
+    """Rollup для текущего ``PERF_LOG`` (один на путь — тесты патчат путь)."""
+    log = perf_log()
+    with _rollups_lock:
+        rollup = _rollups.get(log.path)
+        if rollup is None:
+            rollup = _rollups[log.path] = _PerfRollup(
+                log, float(PERF_LOG_OPTIONS.get("max_age_sec") or 30 * 86400)
+            )
+        return rollup
+
+
 def aggregate_perf(
     window_sec: int = 3600,
     exclude_expected: bool = False,
 ) -> dict[str, Any]:
-    """Читает bypass_perf.jsonl, возвращает агрегированную статистику per kind+model.
+    """Возвращает агрегированную статистику bypass_perf.jsonl per kind+model.
+
+    Перцентили считаются merge'ем quantile sketch'ей бакетов окна
+    (``src.core.quantile_sketch``): точные, пока в группе ≤128 значений,
+    дальше — с относительной ошибкой ≤1%.
 
     Args:
         window_sec: окно в секундах (default 3600 = 1h).
@@ -106,37 +287,8 @@ def aggregate_perf(
           }
         }
     """
-    if not PERF_LOG.exists():
-        return {
-            "total_calls": 0,
-            "total_failures": 0,
-            "window_sec": window_sec,
-            "by_kind": {},
-            "by_model": {},
-        }
-
-    cutoff = time.time() - window_sec
-    records: list[dict[str, Any]] = []
     try:
-        with PERF_LOG.open() as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    r = json.loads(line)
-                    if r.get("ts", 0) < cutoff:
-                        continue
-                    # Session 39: фильтруем expected failures из alert pipeline
-                    if (
-                        exclude_expected
-                        and not r.get("success", True)
-                        and is_expected_failure(r.get("error_message"))
-                    ):
-                        continue
-                    records.append(r)
-                except Exception:  # noqa: BLE001
-                    continue
+        return _perf_rollup().aggregate(window_sec, exclude_expected)
     except Exception:  # noqa: BLE001
         return {
             "total_calls": 0,
@@ -146,45 +298,6 @@ def aggregate_perf(
             "by_model": {},
         }
 
-    def _percentile(values: list[float], pct: int) -> float:
-        """Вычисляет перцентиль списка значений."""
-        if not values:
-            return 0.0
-        s = sorted(values)
-        idx = min(int(len(s) * pct / 100), len(s) - 1)
-        return round(s[idx], 3)
-
-    def _stats_for(subset: list[dict[str, Any]]) -> dict[str, Any]:
-        """Агрегирует статистику по подмножеству записей."""
-        durs = [r["duration_sec"] for r in subset if "duration_sec" in r]
-        fails = [r for r in subset if not r.get("success", True)]
-        count = len(subset)
-        return {
-            "count": count,
-            "fail_rate": round(len(fails) / max(count, 1), 3),
-            "p50": _percentile(durs, 50),
-            "p95": _percentile(durs, 95),
-            "p99": _percentile(durs, 99),
-            "mean": round(sum(durs) / max(len(durs), 1), 3),
-        }
-
-    # Группируем по kind и model
-    by_kind: dict[str, list[dict[str, Any]]] = {}
-    by_model: dict[str, list[dict[str, Any]]] = {}
-    for r in records:
-        by_kind.setdefault(r.get("kind", "unknown"), []).append(r)
-        by_model.setdefault(r.get("model", "unknown"), []).append(r)
-
-    total_failures = len([r for r in records if not r.get("success", True)])
-
-    return {
-        "total_calls": len(records),
-        "total_failures": total_failures,
-        "window_sec": window_sec,
-        "by_kind": {k: _stats_for(v) for k, v in by_kind.items()},
-        "by_model": {k: _stats_for(v) for k, v in by_model.items()},
-    }
-
 
 def parse_duration(window: str) -> int:
     """Парсит строку window ('1h', '24h', '5m', '30s', '3600') в секунды.
@@ -8,7 +8,8 @@ Best-effort: запись никогда не должна тормозить и
 Также (best-effort) пытается зарегистрировать run в OpenClaw external
 session register API — чтобы run появился в OpenClaw Sessions dashboard.
 
-Ротация: при достижении 100MB файл переименуется в .1 и начинается новый.
+Ротация: общий ``EventLog`` — сегменты по 16MB, суммарно не больше 200MB
+(старые сегменты удаляются целиком).
 """
 
 from __future__ import annotations
@@ -17,14 +18,21 @@ import json
 import os
 import time
 import uuid
+from collections import deque
 from pathlib import Path
 from typing import Any
 
+from ..core.event_log import EventLog, get_event_log
+
 # Путь к JSONL-файлу с записями agent runs
 RUNS_LOG = Path.home() / ".openclaw/krab_runtime_state/runs_history.jsonl"
 
-# Максимальный размер в байтах перед ротацией (100 MB)
-MAX_LOG_BYTES = 100 * 1024 * 1024
+# Пороги сегментации/retention runs-лога
+RUNS_LOG_OPTIONS: dict[str, Any] = {
+    "ts_field": "ts_started",
+    "segment_max_bytes": 16 * 1024 * 1024,
+    "max_total_bytes": 200 * 1024 * 1024,
+}
 
 # OpenClaw gateway external session register endpoint (best-effort).
 OPENCLAW_SESSIONS_URL = os.environ.get(
@@ -42,19 +50,9 @@ def _truncate(text: str | None, limit: int) -> str:
     return s[:limit] + "…"
 
 
-def _maybe_rotate() -> None:
-    """Ротация файла при превышении MAX_LOG_BYTES."""
-    try:
-        if RUNS_LOG.exists() and RUNS_LOG.stat().st_size >= MAX_LOG_BYTES:
-            backup = RUNS_LOG.with_suffix(RUNS_LOG.suffix + ".1")
-            try:
-                if backup.exists():
-                    backup.unlink()
-            except Exception:  # noqa: BLE001
-                pass
-            RUNS_LOG.rename(backup)
-    except Exception:  # noqa: BLE001
-        pass
+def _runs_log() -> EventLog:
+    """Общий EventLog для ``RUNS_LOG`` (путь читается на вызов — тесты патчат)."""
+    return get_event_log(RUNS_LOG, **RUNS_LOG_OPTIONS)
 
 
 def record_agent_run(
@@ -109,10 +107,7 @@ def record_agent_run(
         record.update(extra)
 
     try:
-        RUNS_LOG.parent.mkdir(parents=True, exist_ok=True)
-        _maybe_rotate()
-        with RUNS_LOG.open("a") as f:
-            f.write(json.dumps(record, default=str) + "\n")
+        _runs_log().append(record)
     except Exception:  # noqa: BLE001
         pass
 
@@ -174,56 +169,50 @@ def read_runs(
         chat_id_filter: только runs с этим chat_id.
         model_filter: подстрока в model.
     """
-    if not RUNS_LOG.exists():
-        return []
-
     cutoff = (time.time() - since_sec) if since_sec else None
-    out: list[dict[str, Any]] = []
-    try:
-        with RUNS_LOG.open() as f:
-            lines = f.readlines()
-    except Exception:  # noqa: BLE001
-        return []
 
-    # newest first
-    for line in reversed(lines):
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            rec = json.loads(line)
-        except Exception:  # noqa: BLE001
-            continue
+    def _matches(rec: dict[str, Any]) -> bool:
         if cutoff is not None and rec.get("ts_started", 0) < cutoff:
-            continue
+            return False
         if status_filter and rec.get("status") != status_filter:
-            continue
+            return False
         if chat_id_filter is not None and str(rec.get("chat_id") or "") != str(chat_id_filter):
-            continue
+            return False
         if model_filter and model_filter not in str(rec.get("model") or ""):
-            continue
-        out.append(rec)
-        if len(out) >= limit:
-            break
-    return out
+            return False
+        return True
+
+    log = _runs_log()
+    try:
+        if cutoff is None:
+            # Без окна — читаем с конца и останавливаемся на limit.
+            out: list[dict[str, Any]] = []
+            for rec in log.iter_reverse():
+                if _matches(rec):
+                    out.append(rec)
+                    if len(out) >= limit:
+                        break
+            return out
+        # С окном — индекс по ts_started пропускает сегменты/блоки старше cutoff.
+        window: deque[dict[str, Any]] = deque(maxlen=max(limit, 0))
+        for rec in log.iter_since(cutoff):
+            if _matches(rec):
+                window.append(rec)
+    except Exception:  # noqa: BLE001
+        return []
+    # newest first
+    return list(reversed(window))
 
 
 def get_run(request_id: str) -> dict[str, Any] | None:
     """Возвращает full record по request_id или None."""
-    if not RUNS_LOG.exists() or not request_id:
+    if not request_id:
         return None
     try:
-        with RUNS_LOG.open() as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                except Exception:  # noqa: BLE001
-                    continue
-                if rec.get("request_id") == request_id:
-                    return rec
+        # Свежие runs запрашивают чаще — ищем с конца.
+        for rec in _runs_log().iter_reverse():
+            if rec.get("request_id") == request_id:
+                return rec
     except Exception:  # noqa: BLE001
         return None
     return None
@@ -4,17 +4,20 @@
 on-demand display в `!routes` Telegram command. Append-only, idempotent,
 graceful degradation если файл повреждён.
 
+Хранение — через общий ``EventLog``: сегмент по ``MAX_ENTRIES`` записей плюс
+один закрытый, так что append — O(1) без перезаписи файла.
+
 Hook: вызывается из `openclaw_client.py` рядом с
 ``logger.warning("model_fallback_engaged", ...)``.
 """
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from ..core.event_log import EventLog, get_event_log
 from ..core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -46,23 +49,8 @@ def append_switch(
     if kind:
         entry["kind"] = kind
 
-    try:
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        # Прочитаем текущий хвост, отрежем по MAX_ENTRIES-1, перепишем atomically
-        existing: list[str] = []
-        if LOG_FILE.exists():
-            try:
-                existing = LOG_FILE.read_text(encoding="utf-8").splitlines()
-            except OSError:
-                existing = []
-        # Сохраняем последние MAX_ENTRIES-1 + добавляем новую
-        keep = existing[-(MAX_ENTRIES - 1) :] if len(existing) >= MAX_ENTRIES else existing
-        keep.append(json.dumps(entry, ensure_ascii=False))
-        tmp = LOG_FILE.with_suffix(".jsonl.tmp")
-        tmp.write_text("\n".join(keep) + "\n", encoding="utf-8")
-        tmp.replace(LOG_FILE)
-    except Exception as exc:  # noqa: BLE001
-        logger.debug("route_switch_log_append_failed", error=str(exc))
+    if not _log().append(entry):
+        logger.debug("route_switch_log_append_failed", path=str(LOG_FILE))
 
 
 def read_recent(limit: int = 5) -> list[dict[str, Any]]:
@@ -71,25 +59,12 @@ def read_recent(limit: int = 5) -> list[dict[str, Any]]:
     Невалидные строки тихо пропускаются. Возвращает пустой список если
     файла нет или он пуст.
     """
-    if not LOG_FILE.exists():
-        return []
-    try:
-        lines = LOG_FILE.read_text(encoding="utf-8").splitlines()
-    except OSError as exc:
-        logger.debug("route_switch_log_read_failed", error=str(exc))
-        return []
-    out: list[dict[str, Any]] = []
-    for line in lines[-limit:]:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            parsed = json.loads(line)
-            if isinstance(parsed, dict):
-                out.append(parsed)
-        except (ValueError, TypeError):
-            continue
-    return out
+    return _log().tail(min(limit, MAX_ENTRIES))
+
+
+def _log() -> EventLog:
+    # LOG_FILE / MAX_ENTRIES читаются на каждый вызов — тесты их патчат.
+    return get_event_log(LOG_FILE, segment_max_records=MAX_ENTRIES, max_segments=1)
 
 
 __all__ = ["LOG_FILE", "MAX_ENTRIES", "append_switch", "read_recent"]
@@ -9,6 +9,7 @@
   `list_directory`), но больше не хардкодит серверы прямо в коде.
 """
 
+import asyncio
 import os
 from contextlib import AsyncExitStack
 from typing import Any, Dict, List, Optional
@@ -31,6 +32,34 @@ class MCPClientManager:
         self.sessions: Dict[str, ClientSession] = {}
         self.exit_stack = AsyncExitStack()
         self.is_running = False
+        # Кэш манифеста: server → (id(session), OpenAI-entries). id сессии
+        # меняется при рестарте сервера — запись автоматически устаревает.
+        self._server_tools_cache: Dict[str, tuple[int, List[Dict[str, Any]]]] = {}
+        # Memoized итоговый манифест: (cache_key, list) — запросы получают
+        # один и тот же объект, пока не изменились сессии / флаги / кэш.
+        self._manifest_memo: Optional[tuple[tuple, List[Dict[str, Any]]]] = None
+        self._manifest_generation = 0
+
+    def invalidate_tool_manifest(self, server_name: Optional[str] = None) -> None:
+        """Сбрасывает кэш tools сервера (или всех) и memoized манифест."""
+        if server_name is None:
+            self._server_tools_cache.clear()
+        else:
+            self._server_tools_cache.pop(server_name, None)
+        self._manifest_generation += 1
+        self._manifest_memo = None
+
+    def _make_message_handler(self, server_name: str):
+        """Обработчик входящих MCP-сообщений: ловим notifications/tools/list_changed."""
+
+        async def _handler(message: Any) -> None:
+            # mcp 1.x заворачивает notification в RootModel (.root).
+            notification = getattr(message, "root", message)
+            if getattr(notification, "method", None) == "notifications/tools/list_changed":
+                logger.info("mcp_tools_list_changed", server=server_name)
+                self.invalidate_tool_manifest(server_name)
+
+        return _handler
 
     async def start_server(
         self, name: str, command: str, args: List[str], env: Optional[Dict[str, str]] = None
@@ -56,10 +85,13 @@ class MCPClientManager:
 
             transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
             read, write = transport
-            session = await self.exit_stack.enter_async_context(ClientSession(read, write))
+            session = await self.exit_stack.enter_async_context(
+                ClientSession(read, write, message_handler=self._make_message_handler(name))
+            )
 
             await session.initialize()
             self.sessions[name] = session
+            self.invalidate_tool_manifest(name)
             logger.info("mcp_server_ready", name=name)
             return True
         except (OSError, ConnectionError, ValueError, KeyError) as e:
@@ -190,30 +222,75 @@ class MCPClientManager:
         except (AttributeError, IndexError, KeyError, TypeError):
             return str(result)
 
+    async def _list_server_tools(
+        self, server_name: str, session: ClientSession
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Tools одного сервера в OpenAI-формате (None — list_tools упал)."""
+        try:
+            tools_result = await session.list_tools()
+        except Exception as e:
+            logger.error("mcp_list_tools_failed", server=server_name, error=str(e))
+            return None
+        # Обычно SDK mcp-python возвращает объект с полем .tools
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": f"{server_name}__{tool.name}",
+                    "description": tool.description,
+                    "parameters": tool.inputSchema,
+                },
+            }
+            for tool in getattr(tools_result, "tools", [])
+        ]
+
     async def get_tool_manifest(self) -> List[Dict[str, Any]]:
         """
         Собирает список всех доступных инструментов от всех активных MCP сессий.
         Форматирует их в OpenAI-совместимый Tool Definition.
+
+        list_tools() опрашивается параллельно и только для серверов без
+        актуального кэша; итоговый список memoized — повторные вызовы
+        возвращают тот же объект (не мутировать!).
         """
+        from . import config as _cfg
+
+        tor_enabled = bool(getattr(_cfg.config, "TOR_ENABLED", False))
+        vpn_enabled = os.environ.get("KRAB_VPN_TOOLS_ENABLED", "1").strip().lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+        sessions = dict(self.sessions)
+        stale = [
+            (name, session)
+            for name, session in sessions.items()
+            if self._server_tools_cache.get(name, (None,))[0] != id(session)
+        ]
+        if stale:
+            fetched = await asyncio.gather(
+                *(self._list_server_tools(name, session) for name, session in stale)
+            )
+            for (name, session), entries in zip(stale, fetched):
+                # Ошибку не кэшируем — следующий запрос повторит list_tools.
+                if entries is not None and self.sessions.get(name) is session:
+                    self._server_tools_cache[name] = (id(session), entries)
+                    self._manifest_generation += 1
+
+        memo_key = (
+            tuple((name, id(session)) for name, session in sessions.items()),
+            self._manifest_generation,
+            tor_enabled,
+            vpn_enabled,
+        )
+        if self._manifest_memo is not None and self._manifest_memo[0] == memo_key:
+            return self._manifest_memo[1]
+
         manifest = []
-        for server_name, session in self.sessions.items():
-            try:
-                tools_result = await session.list_tools()
-                # Обычно SDK mcp-python возвращает объект с полем .tools
-                tools = getattr(tools_result, "tools", [])
-                for tool in tools:
-                    manifest.append(
-                        {
-                            "type": "function",
-                            "function": {
-                                "name": f"{server_name}__{tool.name}",
-                                "description": tool.description,
-                                "parameters": tool.inputSchema,
-                            },
-                        }
-                    )
-            except Exception as e:
-                logger.error("mcp_list_tools_failed", server=server_name, error=str(e))
+        for server_name, session in sessions.items():
+            cached = self._server_tools_cache.get(server_name)
+            if cached is not None and cached[0] == id(session):
+                manifest.extend(cached[1])
 
         # Добавляем нативные инструменты Краба, если они еще не в MCP
         # peekaboo: скриншот через KrabEarAgent
@@ -250,9 +327,7 @@ class MCPClientManager:
             }
         )
         # tor_fetch: анонимный HTTP запрос через Tor (если включён)
-        from . import config as _cfg
-
-        if getattr(_cfg.config, "TOR_ENABLED", False):
+        if tor_enabled:
             manifest.append(
                 {
                     "type": "function",
@@ -307,11 +382,7 @@ class MCPClientManager:
 
         # vpn_tools: read-only VPN x-ui панель (VPN Phase A).
         # Опционально через KRAB_VPN_TOOLS_ENABLED (default включено).
-        if os.environ.get("KRAB_VPN_TOOLS_ENABLED", "1").strip().lower() not in (
-            "0",
-            "false",
-            "no",
-        ):
+        if vpn_enabled:
             try:
                 from .core.vpn_tools import VPN_TOOL_SCHEMAS
 
@@ -329,6 +400,7 @@ class MCPClientManager:
             except ImportError:
                 pass  # graceful: vpn_tools опциональны
 
+        self._manifest_memo = (memo_key, manifest)
         return manifest
 
     async def call_tool_unified(self, full_tool_name: str, arguments: Dict[str, Any]) -> str:
@@ -373,6 +445,39 @@ class MCPClientManager:
         except Exception as _guard_exc:  # noqa: BLE001
             logger.warning("swarm_tool_guard_failed", error=str(_guard_exc))
 
+        # Идемпотентные tools — через ToolResultCache (TTL + single-flight).
+        # Guard выше отрабатывает раньше: заблокированная команда не получит
+        # результат из кэша.
+        from .core.tool_result_cache import (
+            acached_tool_call,
+            is_cacheable_tool,
+            is_tool_cache_enabled,
+        )
+
+        if is_cacheable_tool(full_tool_name) and is_tool_cache_enabled():
+            return await acached_tool_call(
+                full_tool_name,
+                self._tool_cache_args(full_tool_name, arguments),
+                lambda: self._dispatch_tool_call(full_tool_name, arguments),
+                should_cache=self._is_cacheable_result,
+            )
+        return await self._dispatch_tool_call(full_tool_name, arguments)
+
+    @staticmethod
+    def _is_cacheable_result(result: Any) -> bool:
+        """Кэшируем только успешный непустой ответ: None/"" — это сбой вызова."""
+        text = "" if result is None else str(result).strip()
+        return bool(text) and not text.startswith("❌")
+
+    @staticmethod
+    def _tool_cache_args(full_tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Ключ кэша: для web_search значим только нормализованный query."""
+        if full_tool_name == "web_search":
+            return {"query": " ".join(str(arguments.get("query", "")).split()).lower()}
+        return arguments
+
+    async def _dispatch_tool_call(self, full_tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Маршрутизация tool call по имени (native / userbot / vpn / MCP)."""
         if full_tool_name == "peekaboo":
             return await self._peekaboo_impl(arguments)
 
@@ -501,6 +606,7 @@ class MCPClientManager:
         """Остановка всех серверов"""
         await self.exit_stack.aclose()
         self.sessions.clear()
+        self.invalidate_tool_manifest()
         logger.info("mcp_all_stopped")
 
 
@@ -3,10 +3,26 @@
 
 Выделено отдельным модулем чтобы тесты могли вызвать ту же логику
 формирования SQL bucket-выражения, что и боевой endpoint.
+
+``collect_heatmap`` — синхронная часть endpoint'а (вызывается через
+``asyncio.to_thread``): читает activity rollup ``message_activity_hourly``,
+если он готов, иначе — ``GROUP BY`` по ``messages`` (``build_bucket_sql_expr``).
 """
 
 from __future__ import annotations
 
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from src.core.memory_activity_rollup import chat_density, is_rollup_ready, top_chats
+
+
+class HeatmapUnavailableError(Exception):
+    """archive.db отсутствует/не открывается/битая → endpoint отвечает 503."""
+
 
 def build_bucket_sql_expr(bucket_hours: int) -> str:
     """Возвращает SQL-выражение, агрегирующее timestamp в bucket из ``bucket_hours`` часов.
@@ -35,3 +51,102 @@ def build_bucket_sql_expr(bucket_hours: int) -> str:
         f"(CAST(strftime('%s', timestamp) AS INTEGER) / {seconds}) * {seconds}, "
         f"'unixepoch')"
     )
+
+
+def format_bucket_label(bucket_start: int, bucket_hours: int) -> str:
+    """Метка bucket'а из unix-эпохи — та же форма, что даёт ``build_bucket_sql_expr``."""
+    dt = datetime.fromtimestamp(int(bucket_start), tz=timezone.utc)
+    if bucket_hours == 24:
+        return dt.strftime("%Y-%m-%d")
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def collect_heatmap(db_path: Path, bucket_hours: int, top_chats_limit: int) -> dict[str, Any]:
+    """Плотность сообщений top-чатов по bucket'ам (тело ``/api/memory/heatmap``).
+
+    Raises:
+        HeatmapUnavailableError: archive.db нет, не открывается или битая.
+    """
+    if not db_path.exists():
+        raise HeatmapUnavailableError(f"archive.db not found: {db_path}")
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    except sqlite3.OperationalError as exc:
+        raise HeatmapUnavailableError(f"archive.db open failed: {exc}") from exc
+
+    generated_at = datetime.now(timezone.utc).isoformat()
+    try:
+        use_rollup = is_rollup_ready(conn)
+        try:
+            if use_rollup:
+                top_rows = top_chats(conn, top_chats_limit)
+            else:
+                top_rows = conn.execute(
+                    """
+                    SELECT chat_id, COUNT(*) as cnt
+                    FROM messages
+                    GROUP BY chat_id
+                    ORDER BY cnt DESC
+                    LIMIT ?
+                    """,
+                    (max(1, top_chats_limit),),
+                ).fetchall()
+        except sqlite3.DatabaseError as exc:
+            raise HeatmapUnavailableError(f"archive.db malformed: {exc}") from exc
+
+        if not top_rows:
+            return {"bucket_hours": bucket_hours, "chats": [], "generated_at": generated_at}
+
+        top_chat_ids = [r[0] for r in top_rows]
+        placeholders = ",".join("?" * len(top_chat_ids))
+
+        chat_titles: dict[str, str] = {}
+        try:
+            title_rows = conn.execute(
+                f"SELECT chat_id, title FROM chats WHERE chat_id IN ({placeholders})",
+                top_chat_ids,
+            ).fetchall()
+            chat_titles = {r[0]: r[1] for r in title_rows if r[1]}
+        except sqlite3.DatabaseError:
+            pass
+
+        buckets_by_chat: dict[str, list[dict]] = defaultdict(list)
+        try:
+            if use_rollup:
+                for chat_id, bucket_start, cnt in chat_density(conn, top_chat_ids, bucket_hours):
+                    buckets_by_chat[chat_id].append(
+                        {"ts": format_bucket_label(bucket_start, bucket_hours), "count": cnt}
+                    )
+            else:
+                bucket_expr = build_bucket_sql_expr(bucket_hours)
+                density_rows = conn.execute(
+                    f"""
+                    SELECT chat_id,
+                           {bucket_expr} AS bucket_ts,
+                           COUNT(*) AS cnt
+                    FROM messages
+                    WHERE chat_id IN ({placeholders})
+                    GROUP BY chat_id, bucket_ts
+                    ORDER BY chat_id, bucket_ts
+                    """,
+                    top_chat_ids,
+                ).fetchall()
+                for chat_id, bucket_ts, cnt in density_rows:
+                    buckets_by_chat[chat_id].append({"ts": bucket_ts, "count": cnt})
+        except sqlite3.DatabaseError as exc:
+            raise HeatmapUnavailableError(f"archive.db malformed on density query: {exc}") from exc
+
+        return {
+            "bucket_hours": bucket_hours,
+            "chats": [
+                {
+                    "chat_id": chat_id,
+                    "chat_title": chat_titles.get(chat_id, chat_id),
+                    "buckets": buckets_by_chat.get(chat_id, []),
+                }
+                for chat_id in top_chat_ids
+            ],
+            "generated_at": generated_at,
+        }
+    finally:
+        conn.close()
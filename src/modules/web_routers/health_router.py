@@ -338,6 +338,12 @@ def build_health_router(ctx: RouterContext) -> APIRouter:
             _rate_limiter_stats = _trl.stats()
         except Exception:
             _rate_limiter_stats = None
+        try:
+            from ...core.stream_edit_coalescer import stream_edit_coalescer as _sec
+
+            _stream_edit_stats = _sec.stats()
+        except Exception:
+            _stream_edit_stats = None
         result = {
             "ok": True,
             "status": "up",
@@ -362,6 +368,8 @@ def build_health_router(ctx: RouterContext) -> APIRouter:
         }
         if _rate_limiter_stats is not None:
             result["telegram_rate_limiter"] = _rate_limiter_stats
+        if _stream_edit_stats is not None:
+            result["stream_edit_coalescer"] = _stream_edit_stats
         return result
 
     # ── /api/health/deep ────────────────────────────────────────────────────
@@ -182,124 +182,26 @@ def _build_get_endpoints(router: APIRouter) -> None:
 
         Returns:
           { bucket_hours, chats: [{chat_id, chat_title, buckets: [{ts, count}]}], generated_at }
+
+        Читает activity rollup (message_activity_hourly), если он готов.
         """
-        import sqlite3 as _sqlite3
-        from datetime import datetime, timezone
+        import asyncio
         from pathlib import Path
 
-        from src.modules.web_app_heatmap import build_bucket_sql_expr
+        from src.modules.web_app_heatmap import HeatmapUnavailableError, collect_heatmap
 
         # Clamp до разумного диапазона: [1, 8760] часов (год)
         bucket_hours = max(1, min(int(bucket_hours), 8760))
 
         db_path = Path("~/.openclaw/krab_memory/archive.db").expanduser()
 
-        if not db_path.exists():
-            from fastapi.responses import JSONResponse
-
-            return JSONResponse(
-                status_code=503,
-                content={"error": f"archive.db not found: {db_path}"},
-            )
-
+        # SQLite-чтение — в thread pool: на большом archive.db не блокируем loop.
         try:
-            uri = f"file:{db_path}?mode=ro"
-            conn = _sqlite3.connect(uri, uri=True)
-        except _sqlite3.OperationalError as exc:
+            return await asyncio.to_thread(collect_heatmap, db_path, bucket_hours, top_chats)
+        except HeatmapUnavailableError as exc:
             from fastapi.responses import JSONResponse
 
-            return JSONResponse(
-                status_code=503,
-                content={"error": f"archive.db open failed: {exc}"},
-            )
-
-        try:
-            try:
-                top_rows = conn.execute(
-                    """
-                    SELECT chat_id, COUNT(*) as cnt
-                    FROM messages
-                    GROUP BY chat_id
-                    ORDER BY cnt DESC
-                    LIMIT ?
-                    """,
-                    (max(1, top_chats),),
-                ).fetchall()
-            except _sqlite3.DatabaseError as exc:
-                from fastapi.responses import JSONResponse
-
-                return JSONResponse(
-                    status_code=503,
-                    content={"error": f"archive.db malformed: {exc}"},
-                )
-
-            if not top_rows:
-                return {
-                    "bucket_hours": bucket_hours,
-                    "chats": [],
-                    "generated_at": datetime.now(timezone.utc).isoformat(),
-                }
-
-            top_chat_ids = [r[0] for r in top_rows]
-
-            chat_titles: dict[str, str] = {}
-            try:
-                placeholders = ",".join("?" * len(top_chat_ids))
-                title_rows = conn.execute(
-                    f"SELECT chat_id, title FROM chats WHERE chat_id IN ({placeholders})",
-                    top_chat_ids,
-                ).fetchall()
-                chat_titles = {r[0]: r[1] for r in title_rows if r[1]}
-            except _sqlite3.DatabaseError:
-                pass
-
-            bucket_expr = build_bucket_sql_expr(bucket_hours)
-            try:
-                placeholders = ",".join("?" * len(top_chat_ids))
-                density_rows = conn.execute(
-                    f"""
-                    SELECT chat_id,
-                           {bucket_expr} AS bucket_ts,
-                           COUNT(*) AS cnt
-                    FROM messages
-                    WHERE chat_id IN ({placeholders})
-                    GROUP BY chat_id, bucket_ts
-                    ORDER BY chat_id, bucket_ts
-                    """,
-                    top_chat_ids,
-                ).fetchall()
-            except _sqlite3.DatabaseError as exc:
-                from fastapi.responses import JSONResponse
-
-                return JSONResponse(
-                    status_code=503,
-                    content={"error": f"archive.db malformed on density query: {exc}"},
-                )
-
-            from collections import defaultdict
-
-            buckets_by_chat: dict[str, list[dict]] = defaultdict(list)
-            for chat_id, bucket_ts, cnt in density_rows:
-                buckets_by_chat[chat_id].append({"ts": bucket_ts, "count": cnt})
-
-            chats_out = []
-            for chat_id in top_chat_ids:
-                chats_out.append(
-                    {
-                        "chat_id": chat_id,
-                        "chat_title": chat_titles.get(chat_id, chat_id),
-                        "buckets": buckets_by_chat.get(chat_id, []),
-                    }
-                )
-
-            return {
-                "bucket_hours": bucket_hours,
-                "chats": chats_out,
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-        finally:
-            conn.close()
+            return JSONResponse(status_code=503, content={"error": str(exc)})
 
     @router.get("/api/memory/doctor")
     async def memory_doctor() -> dict:
@@ -16,7 +16,6 @@ GET /api/observability/route-switches    (Wave 51-D — surfacing Wave 48-B)
 
 from __future__ import annotations
 
-import json
 from typing import Annotated, Any
 
 from fastapi import APIRouter, HTTPException, Query
@@ -106,28 +105,13 @@ def build_observability_router(ctx: RouterContext) -> APIRouter:  # noqa: ARG001
     ) -> dict:
         """Список последних route-switches (Wave 48-B).
 
-        Tail последние ``limit`` строк JSONL ring-buffer'а, malformed
-        строки тихо пропускаются.
+        Tail последние ``limit`` записей JSONL ring-buffer'а (включая закрытый
+        сегмент EventLog), malformed строки тихо пропускаются.
         """
+        from src.core.event_log import get_event_log
         from src.integrations.route_switch_log import LOG_FILE
 
-        entries: list[dict[str, Any]] = []
-        if LOG_FILE.exists():
-            try:
-                lines = LOG_FILE.read_text(encoding="utf-8").splitlines()
-            except OSError:
-                lines = []
-            # Берём хвост и парсим, malformed пропускаем (graceful).
-            for raw in lines[-limit:]:
-                line = raw.strip()
-                if not line:
-                    continue
-                try:
-                    parsed = json.loads(line)
-                    if isinstance(parsed, dict):
-                        entries.append(parsed)
-                except (ValueError, TypeError):
-                    continue
+        entries: list[dict[str, Any]] = get_event_log(LOG_FILE).tail(limit)
         # Reverse chronological: новые первыми.
         entries.reverse()
         return {"ok": True, "count": len(entries), "switches": entries}
@@ -172,25 +156,9 @@ def build_observability_router(ctx: RouterContext) -> APIRouter:  # noqa: ARG001
         пропускаются. Файл может отсутствовать (до первого catchup) — в этом
         случае возвращается пустой list.
         """
-        from src.userbot.message_catchup import _resolve_history_path
-
-        path = _resolve_history_path()
-        entries: list[dict[str, Any]] = []
-        if path.exists():
-            try:
-                lines = path.read_text(encoding="utf-8").splitlines()
-            except OSError:
-                lines = []
-            for raw in lines[-limit:]:
-                line = raw.strip()
-                if not line:
-                    continue
-                try:
-                    parsed = json.loads(line)
-                    if isinstance(parsed, dict):
-                        entries.append(parsed)
-                except (ValueError, TypeError):
-                    continue
+        from src.userbot.message_catchup import read_catchup_history
+
+        entries: list[dict[str, Any]] = read_catchup_history(limit)
         # Reverse chronological: новые первыми.
         entries.reverse()
         return {"ok": True, "count": len(entries), "history": entries}
@@ -22,13 +22,14 @@ Query params (quota/history):
 from __future__ import annotations
 
 import datetime
-import json
 import pathlib
 import time
 from typing import Annotated
 
 from fastapi import APIRouter, Query
 
+from src.core.event_log import get_event_log
+
 from ._context import RouterContext
 
 # Путь к лог-файлу (тот же что в observability_commands)
@@ -136,18 +137,12 @@ def build_quota_router(ctx: RouterContext) -> APIRouter:  # noqa: ARG001
                 "aggregated": {},
             }
 
-        snapshots: list[dict] = []
-        with _QUOTA_HISTORY_LOG.open(encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    snap = json.loads(line)
-                    if snap.get("ts", 0) >= cutoff:
-                        snapshots.append(snap)
-                except (json.JSONDecodeError, ValueError):
-                    continue  # повреждённые строки пропускаем
+        # Индекс EventLog пропускает сегменты/блоки старше cutoff без парсинга.
+        snapshots: list[dict] = [
+            snap
+            for snap in get_event_log(_QUOTA_HISTORY_LOG).iter_since(cutoff)
+            if snap.get("ts", 0) >= cutoff
+        ]
 
         # Агрегация: max today_calls per (date, provider)
         # Результат: {"2026-05-06": {"gemini-cli": 42, "codex-cli": 7, ...}, ...}
@@ -22,7 +22,7 @@ from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 
-from .cache_manager import HISTORY_CACHE_TTL, history_cache
+from .cache_manager import history_cache, history_log
 from .config import config
 from .core.cloud_key_probe import (
     CloudProbeResult,
@@ -33,9 +33,16 @@ from .core.cloud_key_probe import (
     probe_gemini_key,
 )
 from .core.exceptions import ProviderAuthError, ProviderError
+from .core.gateway_scheduler import (
+    GatewayScheduler,
+    current_gateway_priority,
+    priority_label,
+)
 from .core.lm_studio_auth import build_lm_studio_auth_headers
 from .core.lm_studio_health import is_lm_studio_available
 from .core.logger import get_logger
+from .core.message_priority_dispatcher import Priority
+from .core.metrics.gateway_queue import observe_gateway_queue_wait
 from .core.observability import metrics
 from .core.openclaw_runtime_models import (
     get_runtime_fallback_models,
@@ -71,14 +78,16 @@ def _resolve_max_concurrent_requests() -> int:
 # Module-level concurrency limiter to OpenClaw gateway (Wave 14-B / session-33).
 # Bounds parallel outbound HTTP requests so a burst (e.g. forwarded batch with 5
 # parallel AI calls) cannot overwhelm gateway and trigger health probe failures.
+# Slots are granted by priority (P0 owner/mention/command first, capped P2
+# background, aging) — see src/core/gateway_scheduler.py.
 _OPENCLAW_MAX_CONCURRENT = _resolve_max_concurrent_requests()
-_openclaw_request_semaphore: asyncio.Semaphore = asyncio.Semaphore(_OPENCLAW_MAX_CONCURRENT)
+_gateway_scheduler = GatewayScheduler(_OPENCLAW_MAX_CONCURRENT)
 _OPENCLAW_QUEUE_WARN_SEC = 2.0
 _OPENCLAW_QUEUE_TIMEOUT_SEC = 30.0
 
 
 class OpenClawSemaphoreTimeoutError(ProviderError):
-    """Raised when waiting for the gateway semaphore exceeds OPENCLAW_QUEUE_TIMEOUT_SEC."""
+    """Raised when waiting for a gateway slot exceeds OPENCLAW_QUEUE_TIMEOUT_SEC."""
 
     def __init__(self, waited_sec: float):
         super().__init__(
@@ -90,17 +99,25 @@ class OpenClawSemaphoreTimeoutError(ProviderError):
 
 class _GatewaySlot:
     """
-    Async context manager wrapping the module-level OpenClaw gateway semaphore.
+    Async context manager around the module-level OpenClaw gateway scheduler.
 
+    - Priority defaults to the `gateway_priority` context binding (P1 if unset).
+    - Observes queue wait in `krab_gateway_queue_wait_seconds{priority}`.
     - Logs `openclaw_request_queued` warning if wait > _OPENCLAW_QUEUE_WARN_SEC.
     - Raises `OpenClawSemaphoreTimeoutError` if wait exceeds _OPENCLAW_QUEUE_TIMEOUT_SEC.
     """
 
-    __slots__ = ("_chat_id", "_request_id", "_acquired", "_waited_ms")
+    __slots__ = ("_chat_id", "_request_id", "_priority", "_acquired", "_waited_ms")
 
-    def __init__(self, chat_id: Any = None, request_id: Any = None):
+    def __init__(
+        self,
+        chat_id: Any = None,
+        request_id: Any = None,
+        priority: Priority | None = None,
+    ):
         self._chat_id = chat_id
         self._request_id = request_id
+        self._priority = current_gateway_priority() if priority is None else Priority(priority)
         self._acquired = False
         self._waited_ms: float = 0.0
 
@@ -108,10 +125,7 @@ class _GatewaySlot:
         loop = asyncio.get_running_loop()
         started = loop.time()
         try:
-            await asyncio.wait_for(
-                _openclaw_request_semaphore.acquire(),
-                timeout=_OPENCLAW_QUEUE_TIMEOUT_SEC,
-            )
+            await _gateway_scheduler.acquire(self._priority, timeout=_OPENCLAW_QUEUE_TIMEOUT_SEC)
         except asyncio.TimeoutError as exc:
             waited = loop.time() - started
             logger.error(
@@ -119,30 +133,38 @@ class _GatewaySlot:
                 waited_sec=round(waited, 2),
                 chat_id=self._chat_id,
                 request_id=self._request_id,
+                priority=priority_label(self._priority),
                 max_concurrent=_OPENCLAW_MAX_CONCURRENT,
             )
             raise OpenClawSemaphoreTimeoutError(waited) from exc
         self._acquired = True
-        self._waited_ms = (loop.time() - started) * 1000.0
+        waited_sec = loop.time() - started
+        self._waited_ms = waited_sec * 1000.0
+        observe_gateway_queue_wait(priority_label(self._priority), waited_sec)
         if self._waited_ms >= _OPENCLAW_QUEUE_WARN_SEC * 1000.0:
             logger.warning(
                 "openclaw_request_queued",
                 queue_wait_ms=round(self._waited_ms, 1),
                 chat_id=self._chat_id,
                 request_id=self._request_id,
+                priority=priority_label(self._priority),
                 max_concurrent=_OPENCLAW_MAX_CONCURRENT,
             )
         return self
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
         if self._acquired:
-            _openclaw_request_semaphore.release()
+            _gateway_scheduler.release(self._priority)
             self._acquired = False
 
 
-def _gateway_slot(chat_id: Any = None, request_id: Any = None) -> _GatewaySlot:
-    """Acquire a slot on the OpenClaw gateway concurrency semaphore."""
-    return _GatewaySlot(chat_id=chat_id, request_id=request_id)
+def _gateway_slot(
+    chat_id: Any = None,
+    request_id: Any = None,
+    priority: Priority | None = None,
+) -> _GatewaySlot:
+    """Acquire a slot on the OpenClaw gateway priority scheduler."""
+    return _GatewaySlot(chat_id=chat_id, request_id=request_id, priority=priority)
 
 
 AUTH_UNAUTHORIZED_CODE = "openclaw_auth_unauthorized"
@@ -1210,17 +1232,60 @@ class OpenClawClient:
 
         self._sessions[chat_id] = sanitized_messages
         try:
-            history_cache.set(
-                f"chat_history:{chat_id}",
-                json.dumps(sanitized_messages, ensure_ascii=False),
-                ttl=HISTORY_CACHE_TTL,
-            )
+            history_log.persist(chat_id, sanitized_messages)
             logger.info(
                 "history_cache_sanitized", chat_id=chat_id, messages=len(sanitized_messages)
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning("history_cache_sanitize_set_failed", chat_id=chat_id, error=str(exc))
 
+    def _restore_persisted_history(self, chat_id: str) -> List[Dict[str, Any]]:
+        """
+        Поднимает историю чата после рестарта: только живое окно из `history_log`.
+
+        Если в логе пусто, читается legacy-ключ `chat_history:{chat_id}` из
+        `history_cache` (полный JSON до append-only лога): он санируется,
+        переносится в лог и удаляется.
+        """
+        restored = history_log.load(chat_id)
+        from_legacy = False
+        if restored is None:
+            cached = history_cache.get(f"chat_history:{chat_id}")
+            if not cached:
+                return []
+            try:
+                restored = json.loads(cached)
+            except (json.JSONDecodeError, TypeError):
+                return []
+            if not isinstance(restored, list):
+                return []
+            from_legacy = True
+
+        sanitized_messages, changed = self._sanitize_session_history(restored)
+        logger.info(
+            "history_restored_from_cache",
+            chat_id=chat_id,
+            messages=len(sanitized_messages),
+            legacy=from_legacy,
+        )
+        if changed or from_legacy:
+            try:
+                history_log.persist(chat_id, sanitized_messages)
+                if from_legacy:
+                    history_cache.delete(f"chat_history:{chat_id}")
+                logger.info(
+                    "history_cache_rewritten_after_restore",
+                    chat_id=chat_id,
+                    messages=len(sanitized_messages),
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(
+                    "history_cache_restore_rewrite_failed",
+                    chat_id=chat_id,
+                    error=str(exc),
+                )
+        return sanitized_messages
+
     def _apply_sliding_window(
         self,
         chat_id: str,
@@ -3207,15 +3272,16 @@ class OpenClawClient:
             return None
 
     def _finalize_chat_response(self, chat_id: str, final_response: str) -> None:
-        """Сохраняет ответ ассистента в историю и кэш."""
+        """
+        Сохраняет ответ ассистента в историю и append-only лог.
+
+        `history_log.persist` дописывает только новые сообщения хода и сдвигает
+        watermark вслед за `_apply_sliding_window` — без перезаписи всей истории.
+        """
         self._sessions[chat_id].append({"role": "assistant", "content": final_response})
         self._sessions[chat_id] = self._apply_sliding_window(chat_id, self._sessions[chat_id])
         try:
-            history_cache.set(
-                f"chat_history:{chat_id}",
-                json.dumps(self._sessions[chat_id], ensure_ascii=False),
-                ttl=HISTORY_CACHE_TTL,
-            )
+            history_log.persist(chat_id, self._sessions[chat_id])
         except Exception as exc:  # noqa: BLE001
             logger.warning("history_cache_set_failed", chat_id=chat_id, error=str(exc))
 
@@ -3225,7 +3291,7 @@ class OpenClawClient:
         try:
             # Wave 14-B: health probe also goes through semaphore so that during
             # an overload burst the probe is naturally queued (not racing inflight chats).
-            async with _gateway_slot(chat_id="_health"):
+            async with _gateway_slot(chat_id="_health", priority=Priority.P0_INSTANT):
                 response = await self._http_client.get(f"{self.base_url}/health")
             ok = response.status_code == 200
             return ok
@@ -3443,39 +3509,7 @@ class OpenClawClient:
         self._request_disable_tools = disable_tools
         self._active_tool_calls.clear()
         if chat_id not in self._sessions:
-            cached = history_cache.get(f"chat_history:{chat_id}")
-            if cached:
-                try:
-                    restored_messages = json.loads(cached)
-                    sanitized_messages, changed = self._sanitize_session_history(restored_messages)
-                    self._sessions[chat_id] = sanitized_messages
-                    logger.info(
-                        "history_restored_from_cache",
-                        chat_id=chat_id,
-                        messages=len(self._sessions[chat_id]),
-                    )
-                    if changed:
-                        try:
-                            history_cache.set(
-                                f"chat_history:{chat_id}",
-                                json.dumps(self._sessions[chat_id], ensure_ascii=False),
-                                ttl=HISTORY_CACHE_TTL,
-                            )
-                            logger.info(
-                                "history_cache_rewritten_after_restore",
-                                chat_id=chat_id,
-                                messages=len(self._sessions[chat_id]),
-                            )
-                        except Exception as exc:  # noqa: BLE001
-                            logger.warning(
-                                "history_cache_restore_rewrite_failed",
-                                chat_id=chat_id,
-                                error=str(exc),
-                            )
-                except (json.JSONDecodeError, TypeError):
-                    self._sessions[chat_id] = []
-            else:
-                self._sessions[chat_id] = []
+            self._sessions[chat_id] = self._restore_persisted_history(chat_id)
 
             # Добавляем Gemini prompt-cache nonce (если установлен через !reset),
             # чтобы инвалидировать cache без перезапуска рантайма.
@@ -5319,6 +5353,7 @@ class OpenClawClient:
         if chat_id in self._sessions:
             del self._sessions[chat_id]
         self._lm_native_chat_state.pop(chat_id, None)
+        history_log.delete(chat_id)
         history_cache.delete(f"chat_history:{chat_id}")
 
         # Persistent session-файлы OpenClaw: best-effort cleanup.
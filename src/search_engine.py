@@ -20,7 +20,7 @@ async def search_brave(query: str) -> str:
     """
     try:
         # Check cache (TTL 1 hour) — кэш-хиты не идут в counters (нет внешнего вызова).
-        cached = search_cache.get(query)
+        cached = await search_cache.aget(query)
         if cached:
             logger.info("search_cache_hit", query=query)
             return f"{cached}\n\n_(восстановлено из кэша)_"
@@ -36,7 +36,7 @@ async def search_brave(query: str) -> str:
 
         # Cache result
         if results and "❌" not in results:
-            search_cache.set(query, results, ttl=3600)
+            await search_cache.aset(query, results, ttl=3600)
             record_search_call("brave", "ok", BRAVE_REQUEST_COST_EUR)
         else:
             # MCP вернул error-маркер без exception — считаем как error (не списываем cost).
@@ -16,7 +16,7 @@ from typing import Any
 from ..core.chat_capability_cache import chat_capability_cache
 from ..core.logger import get_logger
 from ..core.telegram_outgoing_throttle import telegram_outgoing_throttle
-from ..core.telegram_rate_limiter import telegram_rate_limiter
+from ..core.telegram_rate_limiter import current_telegram_lane, lane_label, telegram_rate_limiter
 
 logger = get_logger(__name__)
 
@@ -54,6 +54,9 @@ class _TelegramSendQueue:
         coro_factory — callable без аргументов, возвращающий корутину:
             lambda: client.send_message(chat_id, text)
 
+        Lane глобального rate limiter'а берётся из контекста вызывающего
+        (`current_telegram_lane`) — воркер чата живёт в своём контексте.
+
         При FLOOD_WAIT или TimeoutError выполняет до _MAX_RETRIES попыток
         с экспоненциальным откатом. Остальные исключения пробрасываются.
         """
@@ -61,7 +64,7 @@ class _TelegramSendQueue:
         self._ensure_worker_running(chat_id)
         loop = asyncio.get_running_loop()
         fut: asyncio.Future = loop.create_future()
-        await queue.put((coro_factory, fut))
+        await queue.put((coro_factory, fut, current_telegram_lane()))
         return await fut
 
     async def stop_all(self) -> None:
@@ -184,7 +187,7 @@ class _TelegramSendQueue:
             return
         while True:
             try:
-                coro_factory, fut = await asyncio.wait_for(queue.get(), timeout=30.0)
+                coro_factory, fut, lane = await asyncio.wait_for(queue.get(), timeout=30.0)
             except asyncio.TimeoutError:
                 # Очередь пустовала 30 с — воркер самоостанавливается.
                 self._workers.pop(chat_id, None)
@@ -199,13 +202,16 @@ class _TelegramSendQueue:
 
             for attempt in range(self._MAX_RETRIES):
                 try:
-                    # B.7: global API rate limit. acquire() → sleep если
-                    # aggregate rate превысил soft cap (default 20 req/s).
+                    # B.7: global API rate limit. acquire() → ждём токен своей
+                    # lane (owner > interactive > background > bulk).
                     # Ставим ДО coro_factory чтобы retry тоже учитывались.
-                    await telegram_rate_limiter.acquire(purpose="send_queue")
-                    # Wave 127: pre-emptive per-caller throttle (sliding 10s окно).
+                    await telegram_rate_limiter.acquire(purpose="send_queue", lane=lane)
+                    # Wave 127: pre-emptive per-caller throttle (sliding 10s окно),
+                    # caller — lane очереди; owner lane не притормаживается.
                     # Best-effort, не блокирует отправку при ошибке.
-                    await telegram_outgoing_throttle.acquire(caller="send_queue")
+                    await telegram_outgoing_throttle.acquire(
+                        caller=f"send_queue:{lane_label(lane)}", lane=lane
+                    )
                     result_val = await coro_factory()
                     # Фиксируем время успешной отправки для slowmode-трекинга.
                     self._slowmode_last_sent[chat_id] = time.monotonic()
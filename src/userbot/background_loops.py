@@ -8,11 +8,13 @@
   ``self._owner_notify_target``, ``self._idea_tick_state``.
 
 Контракт:
-- ``_idea_features_tick_loop`` — единый 30-секундный тик с 5 фичами:
+- ``_idea_features_tick_once`` — единый 30-секундный тик с 5 фичами:
   reply_scheduler / daily_brief (08:00) / channel_digest (09:00) /
   pattern_detector (6h) / skill_curator A/B (04:00 UTC).
   Каждая фича обёрнута в try/except → fail-open, не валит петлю.
-- ``_command_usage_save_loop`` — 5-минутный flush command counters на диск.
+- ``_command_usage_save_once`` — 5-минутный flush command counters на диск.
+- Оба тика в runtime гоняет ``periodic_scheduler`` (bootstrap в bridge.start());
+  ``*_loop`` — standalone-обёртки поверх тех же ``*_once``.
 - ``_evaluate_and_apply_skill_curator_proposals`` (module-level) — Wave 38-B
   cron callback, вызывается из tick'а.
 """
@@ -33,6 +35,11 @@ if TYPE_CHECKING:
 
 logger = structlog.get_logger("Krab.userbot.background_loops")
 
+# Шаг idea-features tick: 30 секунд (минимально для reply_scheduler)
+IDEA_TICK_INTERVAL_SEC = 30.0
+# Период flush счётчиков команд на диск
+COMMAND_USAGE_SAVE_INTERVAL_SEC = 300.0
+
 
 # ─── Module-level helpers ────────────────────────────────────────────────────
 
@@ -110,184 +117,189 @@ class BackgroundLoopsMixin:
         State (last_run timestamps) — в self._idea_tick_state.
         Каждая фича обёрнута в try/except: fail-open, не валит петлю.
         """
-        # Шаг тика: 30 секунд (минимально для reply_scheduler)
-        tick_interval = 30.0
-        # Периоды (секунды)
-        pattern_period = 6 * 3600  # 6 часов
-        daily_reentry_guard = 23 * 3600  # 23 часа — защита от двойного запуска
-
         while True:
             try:
-                await asyncio.sleep(tick_interval)
+                await asyncio.sleep(IDEA_TICK_INTERVAL_SEC)
             except asyncio.CancelledError:
                 raise
+            await self._idea_features_tick_once()
 
-            now_ts = time.time()
-            now_local = datetime.now().astimezone()
+    async def _idea_features_tick_once(self) -> None:
+        """Одна итерация idea-features tick (job ``idea_features_tick`` в periodic_scheduler)."""
+        # Периоды (секунды)
+        pattern_period = 6 * 3600  # 6 часов
+        daily_reentry_guard = 23 * 3600  # 23 часа — защита от двойного запуска
+        now_ts = time.time()
+        now_local = datetime.now().astimezone()
 
-            # ── 1. reply_scheduler.pop_due ─────────────────────────────
-            try:
-                from ..core.reply_scheduler import reply_scheduler  # noqa: PLC0415
-
-                due = reply_scheduler.pop_due()
-                for job in due:
-                    try:
-                        kwargs: dict[str, Any] = {}
-                        meta = dict(getattr(job, "metadata", {}) or {})
-                        rt = meta.get("reply_to_message_id")
-                        if rt is not None:
-                            try:
-                                kwargs["reply_to_message_id"] = int(rt)
-                            except (TypeError, ValueError):
-                                pass
-                        await self.client.send_message(job.chat_id, job.text, **kwargs)
-                        logger.info(
-                            "idea_tick_reply_sent",
-                            job_id=job.job_id,
-                            chat_id=job.chat_id,
-                        )
-                    except Exception as exc:  # noqa: BLE001
-                        logger.warning(
-                            "idea_tick_reply_send_failed",
-                            job_id=getattr(job, "job_id", "?"),
-                            error=str(exc),
-                            error_type=type(exc).__name__,
-                        )
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_reply_scheduler_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
-                )
+        # ── 1. reply_scheduler.pop_due ─────────────────────────────
+        try:
+            from ..core.reply_scheduler import reply_scheduler  # noqa: PLC0415
+
+            due = reply_scheduler.pop_due()
+            for job in due:
+                try:
+                    kwargs: dict[str, Any] = {}
+                    meta = dict(getattr(job, "metadata", {}) or {})
+                    rt = meta.get("reply_to_message_id")
+                    if rt is not None:
+                        try:
+                            kwargs["reply_to_message_id"] = int(rt)
+                        except (TypeError, ValueError):
+                            pass
+                    await self.client.send_message(job.chat_id, job.text, **kwargs)
+                    logger.info(
+                        "idea_tick_reply_sent",
+                        job_id=job.job_id,
+                        chat_id=job.chat_id,
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning(
+                        "idea_tick_reply_send_failed",
+                        job_id=getattr(job, "job_id", "?"),
+                        error=str(exc),
+                        error_type=type(exc).__name__,
+                    )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_reply_scheduler_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
-            # ── 2. daily_brief — 08:00 local в self-DM ─────────────────
-            try:
-                if os.getenv("KRAB_DAILY_BRIEF_ENABLED", "0").strip().lower() in (
-                    "1",
-                    "true",
-                    "yes",
+        # ── 2. daily_brief — 08:00 local в self-DM ─────────────────
+        try:
+            if os.getenv("KRAB_DAILY_BRIEF_ENABLED", "0").strip().lower() in (
+                "1",
+                "true",
+                "yes",
+            ):
+                last_run = float(self._idea_tick_state.get("daily_brief", 0.0))
+                if (
+                    now_local.hour == 8
+                    and (now_ts - last_run) > daily_reentry_guard
+                    and self.me is not None
                 ):
-                    last_run = float(self._idea_tick_state.get("daily_brief", 0.0))
-                    if (
-                        now_local.hour == 8
-                        and (now_ts - last_run) > daily_reentry_guard
-                        and self.me is not None
-                    ):
-                        from ..core.daily_brief import DailyBriefBuilder  # noqa: PLC0415
-
-                        builder = DailyBriefBuilder()
-                        text = await builder.build_brief()
-                        if text:
-                            await self.client.send_message(self._owner_notify_target, text)
-                            logger.info("idea_tick_daily_brief_sent", chars=len(text))
-                        else:
-                            logger.info("idea_tick_daily_brief_empty")
-                        self._idea_tick_state["daily_brief"] = now_ts
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_daily_brief_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
-                )
+                    from ..core.daily_brief import DailyBriefBuilder  # noqa: PLC0415
+
+                    builder = DailyBriefBuilder()
+                    text = await builder.build_brief()
+                    if text:
+                        await self.client.send_message(self._owner_notify_target, text)
+                        logger.info("idea_tick_daily_brief_sent", chars=len(text))
+                    else:
+                        logger.info("idea_tick_daily_brief_empty")
+                    self._idea_tick_state["daily_brief"] = now_ts
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_daily_brief_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
-            # ── 3. channel_digest — 09:00 local в configured chat ──────
-            try:
-                digest_chat = os.getenv("KRAB_CHANNEL_DIGEST_CHAT_ID", "").strip()
-                if digest_chat:
-                    last_run = float(self._idea_tick_state.get("channel_digest", 0.0))
-                    if now_local.hour == 9 and (now_ts - last_run) > daily_reentry_guard:
-                        from ..core.channel_digest import (  # noqa: PLC0415
-                            channel_digest_builder,
+        # ── 3. channel_digest — 09:00 local в configured chat ──────
+        try:
+            digest_chat = os.getenv("KRAB_CHANNEL_DIGEST_CHAT_ID", "").strip()
+            if digest_chat:
+                last_run = float(self._idea_tick_state.get("channel_digest", 0.0))
+                if now_local.hour == 9 and (now_ts - last_run) > daily_reentry_guard:
+                    from ..core.channel_digest import (  # noqa: PLC0415
+                        channel_digest_builder,
+                    )
+
+                    text = channel_digest_builder.build_digest()
+                    if text:
+                        try:
+                            target: int | str = int(digest_chat)
+                        except ValueError:
+                            target = digest_chat
+                        await self.client.send_message(target, text)
+                        logger.info(
+                            "idea_tick_channel_digest_sent",
+                            chat=digest_chat,
+                            chars=len(text),
                         )
+                    else:
+                        logger.info("idea_tick_channel_digest_empty")
+                    self._idea_tick_state["channel_digest"] = now_ts
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_channel_digest_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
-                        text = channel_digest_builder.build_digest()
-                        if text:
-                            try:
-                                target: int | str = int(digest_chat)
-                            except ValueError:
-                                target = digest_chat
-                            await self.client.send_message(target, text)
-                            logger.info(
-                                "idea_tick_channel_digest_sent",
-                                chat=digest_chat,
-                                chars=len(text),
-                            )
-                        else:
-                            logger.info("idea_tick_channel_digest_empty")
-                        self._idea_tick_state["channel_digest"] = now_ts
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_channel_digest_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
+        # ── 4. pattern_detector — каждые 6 часов ───────────────────
+        try:
+            last_run = float(self._idea_tick_state.get("pattern_detector", 0.0))
+            if (now_ts - last_run) >= pattern_period:
+                from ..core.proactive_suggestions import (  # noqa: PLC0415
+                    pattern_detector,
                 )
 
-            # ── 4. pattern_detector — каждые 6 часов ───────────────────
-            try:
-                last_run = float(self._idea_tick_state.get("pattern_detector", 0.0))
-                if (now_ts - last_run) >= pattern_period:
-                    from ..core.proactive_suggestions import (  # noqa: PLC0415
-                        pattern_detector,
-                    )
-
-                    suggestions = pattern_detector.detect_patterns()
-                    logger.info(
-                        "proactive_patterns_detected",
-                        count=len(suggestions),
-                    )
-                    self._idea_tick_state["pattern_detector"] = now_ts
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_pattern_detector_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
+                suggestions = pattern_detector.detect_patterns()
+                logger.info(
+                    "proactive_patterns_detected",
+                    count=len(suggestions),
                 )
+                self._idea_tick_state["pattern_detector"] = now_ts
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_pattern_detector_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
-            # ── 4b. Wave 44-F: spam_guard _flood_tracker cleanup — 1h ──
-            try:
-                spam_period = 3600.0  # 1 час
-                last_run = float(self._idea_tick_state.get("spam_guard_cleanup", 0.0))
-                if (now_ts - last_run) >= spam_period:
-                    from ..core.spam_guard import cleanup_stale_entries  # noqa: PLC0415
-
-                    removed = cleanup_stale_entries()
-                    logger.debug("spam_guard_cleanup_done", removed=removed)
-                    self._idea_tick_state["spam_guard_cleanup"] = now_ts
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_spam_guard_cleanup_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
-                )
+        # ── 4b. Wave 44-F: spam_guard _flood_tracker cleanup — 1h ──
+        try:
+            spam_period = 3600.0  # 1 час
+            last_run = float(self._idea_tick_state.get("spam_guard_cleanup", 0.0))
+            if (now_ts - last_run) >= spam_period:
+                from ..core.spam_guard import cleanup_stale_entries  # noqa: PLC0415
+
+                removed = cleanup_stale_entries()
+                logger.debug("spam_guard_cleanup_done", removed=removed)
+                self._idea_tick_state["spam_guard_cleanup"] = now_ts
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_spam_guard_cleanup_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
-            # ── 5. Wave 38-B: skill_curator A/B evaluation — 04:00 UTC ─
-            # SkillCurator Step 4: auto-apply если кандидат победил в A/B тесте.
-            # Запускается раз в сутки в 04:00 UTC. Гейт: KRAB_SKILL_CURATOR_CRON_ENABLED=1.
-            try:
-                if os.getenv("KRAB_SKILL_CURATOR_CRON_ENABLED", "0").strip().lower() in (
-                    "1",
-                    "true",
-                    "yes",
-                ):
-                    now_utc = datetime.now(timezone.utc)
-                    last_run = float(self._idea_tick_state.get("skill_curator_eval", 0.0))
-                    if now_utc.hour == 4 and (now_ts - last_run) > daily_reentry_guard:
-                        await _evaluate_and_apply_skill_curator_proposals()
-                        self._idea_tick_state["skill_curator_eval"] = now_ts
-            except Exception as exc:  # noqa: BLE001
-                logger.warning(
-                    "idea_tick_skill_curator_eval_failed",
-                    error=str(exc),
-                    error_type=type(exc).__name__,
-                )
+        # ── 5. Wave 38-B: skill_curator A/B evaluation — 04:00 UTC ─
+        # SkillCurator Step 4: auto-apply если кандидат победил в A/B тесте.
+        # Запускается раз в сутки в 04:00 UTC. Гейт: KRAB_SKILL_CURATOR_CRON_ENABLED=1.
+        try:
+            if os.getenv("KRAB_SKILL_CURATOR_CRON_ENABLED", "0").strip().lower() in (
+                "1",
+                "true",
+                "yes",
+            ):
+                now_utc = datetime.now(timezone.utc)
+                last_run = float(self._idea_tick_state.get("skill_curator_eval", 0.0))
+                if now_utc.hour == 4 and (now_ts - last_run) > daily_reentry_guard:
+                    await _evaluate_and_apply_skill_curator_proposals()
+                    self._idea_tick_state["skill_curator_eval"] = now_ts
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "idea_tick_skill_curator_eval_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
 
     async def _command_usage_save_loop(self) -> None:
         """Периодически (каждые 5 минут) сохраняет счётчики команд на диск."""
         while True:
-            await asyncio.sleep(300)  # 5 минут
-            try:
-                from ..core.command_registry import save_usage as _save_usage  # noqa: PLC0415
+            await asyncio.sleep(COMMAND_USAGE_SAVE_INTERVAL_SEC)
+            self._command_usage_save_once()
 
-                _save_usage()
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("command_usage_periodic_save_failed", error=str(exc))
+    @staticmethod
+    def _command_usage_save_once() -> None:
+        """Один flush счётчиков команд (job ``command_usage_save``)."""
+        try:
+            from ..core.command_registry import save_usage as _save_usage  # noqa: PLC0415
+
+            _save_usage()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("command_usage_periodic_save_failed", error=str(exc))
@@ -28,6 +28,7 @@ from typing import Any
 from ..config import config
 from ..core.inbox_service import inbox_service
 from ..core.logger import get_logger
+from ..core.telegram_rate_limiter import TelegramLane, telegram_rate_limiter
 
 logger = get_logger(__name__)
 
@@ -100,6 +101,9 @@ class BackgroundTasksMixin:
         try:
             while not stop_event.is_set():
                 try:
+                    await telegram_rate_limiter.acquire(
+                        purpose="typing", lane=TelegramLane.BACKGROUND
+                    )
                     await client.send_chat_action(chat_id, action)
                 except Exception:
                     pass
@@ -251,38 +255,45 @@ class BackgroundTasksMixin:
         while True:
             try:
                 await asyncio.sleep(reaper_interval)
-                tasks = getattr(self, "_chat_background_tasks", None) or {}
-                started_at_rows = getattr(self, "_chat_background_task_started_at", None) or {}
-                if not tasks:
-                    continue
-                stale_timeout_sec = max(
-                    60.0,
-                    float(
-                        getattr(config, "USERBOT_BACKGROUND_TASK_STALE_TIMEOUT_SEC", 900.0) or 900.0
-                    ),
-                )
-                now = time.monotonic()
-                stale_keys = []
-                for chat_key, task in list(tasks.items()):
-                    if task.done():
-                        continue
-                    started_at = float(started_at_rows.get(chat_key) or 0.0)
-                    if started_at <= 0.0:
-                        continue
-                    age_sec = now - started_at
-                    if age_sec > stale_timeout_sec:
-                        stale_keys.append((chat_key, age_sec, task))
-                for chat_key, age_sec, task in stale_keys:
-                    logger.warning(
-                        "background_task_reaper_cancelled",
-                        chat_id=chat_key,
-                        age_sec=round(age_sec, 1),
-                        stale_timeout_sec=stale_timeout_sec,
-                    )
-                    task.cancel()
-                    tasks.pop(chat_key, None)
-                    started_at_rows.pop(chat_key, None)
+                self._reap_stale_background_tasks()
             except asyncio.CancelledError:
                 break
             except Exception as exc:  # noqa: BLE001
                 logger.warning("background_task_reaper_error", error=repr(exc))
+
+    def _reap_stale_background_tasks(self) -> int:
+        """
+        Один проход reaper'а (job ``background_task_reaper`` в periodic_scheduler).
+
+        Возвращает число отменённых задач.
+        """
+        tasks = getattr(self, "_chat_background_tasks", None) or {}
+        started_at_rows = getattr(self, "_chat_background_task_started_at", None) or {}
+        if not tasks:
+            return 0
+        stale_timeout_sec = max(
+            60.0,
+            float(getattr(config, "USERBOT_BACKGROUND_TASK_STALE_TIMEOUT_SEC", 900.0) or 900.0),
+        )
+        now = time.monotonic()
+        stale_keys = []
+        for chat_key, task in list(tasks.items()):
+            if task.done():
+                continue
+            started_at = float(started_at_rows.get(chat_key) or 0.0)
+            if started_at <= 0.0:
+                continue
+            age_sec = now - started_at
+            if age_sec > stale_timeout_sec:
+                stale_keys.append((chat_key, age_sec, task))
+        for chat_key, age_sec, task in stale_keys:
+            logger.warning(
+                "background_task_reaper_cancelled",
+                chat_id=chat_key,
+                age_sec=round(age_sec, 1),
+                stale_timeout_sec=stale_timeout_sec,
+            )
+            task.cancel()
+            tasks.pop(chat_key, None)
+            started_at_rows.pop(chat_key, None)
+        return len(stale_keys)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass командный диспетчер для `KraabUserbot`.
+
+Раньше `_setup_handlers` регистрировал ~140 `on_message`-хендлеров вида
+`filters.command(name) & _make_command_filter(name)`: каждое входящее
+сообщение (в том числе обычный текст в группах) прогонялось через
+`filters.command` каждого хендлера — перебор префиксов и regex на команду.
+
+Здесь одна таблица `token → CommandRoute`:
+    1. быстрый отказ по первому символу (нет префикса → сразу None);
+    2. один раз выделяем токен команды после префикса (`!status@me` → `status`,
+       адресат `me` возвращается в `CommandMatch.addressed_to`);
+    3. dict-lookup; если токен неизвестен — один проход через alias resolver
+       (`command_aliases`) и повторный lookup;
+    4. аргументы разбираются тем же regex, что и в Pyrogram (`message.command`).
+
+ACL и blocklist проверяет вызывающий код (`_setup_handlers`) — ровно один
+раз на совпавшую команду.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+# Тот же разбор аргументов, что у `pyrogram.filters.command`: кавычки
+# группируют аргумент, экранированные кавычки раскрываются.
+_COMMAND_ARGS_RE = re.compile(r"([\"'])(.*?)(?<!\\)\1|(\S+)")
+_ESCAPED_QUOTE_RE = re.compile(r"\\([\"'])")
+
+
+@dataclass(frozen=True, slots=True)
+class CommandRoute:
+    """Зарегистрированная команда: handler + ключи ACL и blocklist."""
+
+    name: str
+    handler: Callable[..., Any]
+    acl_name: str
+    blocklist_keys: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CommandMatch:
+    """
+    Результат разбора: маршрут, `message.command`, текст (после алиаса)
+    и адресат из `!cmd@username` (lower, пусто — без адресата).
+    """
+
+    route: CommandRoute
+    command: list[str]
+    text: str
+    addressed_to: str = ""
+
+
+def parse_command_args(text: str) -> list[str]:
+    """Разбивает хвост команды на аргументы как Pyrogram."""
+    return [
+        _ESCAPED_QUOTE_RE.sub(r"\1", m.group(2) or m.group(3) or "")
+        for m in _COMMAND_ARGS_RE.finditer(text)
+    ]
+
+
+class CommandDispatcher:
+    """Таблица команд с разбором префикса за один проход."""
+
+    def __init__(
+        self,
+        prefixes: Iterable[str],
+        *,
+        alias_resolver: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        self._routes: dict[str, CommandRoute] = {}
+        self._alias_resolver = alias_resolver
+        # first char → префиксы, длинные первыми ("!краб" раньше "!").
+        self._prefixes_by_char: dict[str, tuple[str, ...]] = {}
+        for prefix in sorted({p for p in prefixes if p}, key=len, reverse=True):
+            bucket = self._prefixes_by_char.get(prefix[0], ())
+            self._prefixes_by_char[prefix[0]] = (*bucket, prefix)
+
+    def register(
+        self,
+        commands: str | Sequence[str],
+        handler: Callable[..., Any],
+        *,
+        acl_name: Optional[str] = None,
+        blocklist_keys: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        Регистрирует handler под одним или несколькими именами.
+
+        `acl_name` — имя для ACL/blocklist (по умолчанию первое имя),
+        `blocklist_keys` — все ключи blocklist, блокирующие команду.
+        """
+        names = [commands] if isinstance(commands, str) else list(commands)
+        if not names:
+            raise ValueError("command names required")
+        acl = acl_name or names[0]
+        keys = tuple(blocklist_keys) if blocklist_keys else (acl,)
+        for name in names:
+            key = name.lower()
+            if key in self._routes:
+                raise ValueError(f"command already registered: {key}")
+            self._routes[key] = CommandRoute(
+                name=key, handler=handler, acl_name=acl, blocklist_keys=keys
+            )
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self._routes
+
+    def route(self, name: str) -> Optional[CommandRoute]:
+        """Маршрут по каноническому имени (`message.command[0]`)."""
+        return self._routes.get(name.lower())
+
+    def _match_text(self, text: str) -> Optional[CommandMatch]:
+        candidates = self._prefixes_by_char.get(text[0])
+        if not candidates:
+            return None
+        for prefix in candidates:
+            if not text.startswith(prefix):
+                continue
+            without_prefix = text[len(prefix) :]
+            if not without_prefix or without_prefix[0].isspace():
+                continue
+            parts = without_prefix.split(maxsplit=1)
+            # `!status@krab_bot`: адресата проверяет вызывающий код.
+            token, sep, target = parts[0].lower().partition("@")
+            route = self._routes.get(token)
+            if route is None or (sep and not target):
+                continue
+            args = parse_command_args(parts[1]) if len(parts) > 1 else []
+            return CommandMatch(
+                route=route, command=[route.name, *args], text=text, addressed_to=target
+            )
+        return None
+
+    def match(self, text: str) -> Optional[CommandMatch]:
+        """Разбирает текст сообщения. None — это не зарегистрированная команда."""
+        if not text:
+            return None
+        found = self._match_text(text)
+        if found is not None or self._alias_resolver is None:
+            return found
+        if text[0] not in ("!", "/", "."):
+            return None
+        resolved = self._alias_resolver(text)
+        if not resolved or resolved == text:
+            return None
+        found = self._match_text(resolved)
+        if found is None:
+            return None
+        return CommandMatch(
+            route=found.route,
+            command=found.command,
+            text=resolved,
+            addressed_to=found.addressed_to,
+        )
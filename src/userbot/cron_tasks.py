@@ -23,6 +23,9 @@ from typing import TYPE_CHECKING
 
 import structlog
 
+from ..core.gateway_scheduler import gateway_priority
+from ..core.message_priority_dispatcher import Priority
+
 if TYPE_CHECKING:
     from pyrogram import Client
 
@@ -210,9 +213,11 @@ class CronTaskMixin:
                 logger.warning("cron_context_build_failed", error=str(ctx_exc))
                 context_block = ""
             augmented_prompt = f"{context_block}\n\n{prompt}" if context_block else prompt
-            full_reply = (
-                await asyncio.wait_for(adapter.route_query(augmented_prompt), timeout=90.0)
-            ).strip()
+            # Cron-дайджесты — фон (P2): не держат gateway-слоты owner-запросов.
+            with gateway_priority(Priority.P2_LOW):
+                full_reply = (
+                    await asyncio.wait_for(adapter.route_query(augmented_prompt), timeout=90.0)
+                ).strip()
             if not full_reply:
                 logger.warning("cron_job_empty_llm_reply", prompt_preview=prompt[:80])
                 return
@@ -36,6 +36,7 @@ from ..core.openclaw_task_poller import (
     format_task_progress_for_telegram,
     poll_active_tasks,
 )
+from ..core.stream_edit_coalescer import stream_edit_coalescer
 
 # Маркер reason для asyncio.CancelledError при стагнации LLM-call.
 # Ловим только эту reason-строку — generic CancelledError всё ещё пробрасываем выше.
@@ -553,7 +554,6 @@ class LLMFlowMixin:
 
         full_response = ""
         full_response_raw = ""
-        last_edit_time = 0.0
         timeout_error_was_sent = False
         _reaction_sent = False  # флаг: уже поставили ✅/❌ на исходное сообщение
         _agent_marked = False  # флаг: уже отметили agent_mode реакцией
@@ -970,6 +970,17 @@ class LLMFlowMixin:
         _codex_grace_grants: int = 0
         _max_codex_grace_grants: int = 3
 
+        # Промежуточные edit'ы стрима планирует общий coalescer (бюджет
+        # telegram_rate_limiter делится между всеми активными стримами).
+        _stream_edit_id = f"{chat_id}:{id(action_stop_event):x}"
+        stream_edit_coalescer.open_stream(
+            _stream_edit_id,
+            min_interval_sec=max(
+                0.25,
+                float(getattr(config, "TELEGRAM_STREAM_UPDATE_INTERVAL_SEC", 0.75) or 0.75),
+            ),
+        )
+
         try:
             while True:
                 if received_any_chunk:
@@ -1775,12 +1786,8 @@ class LLMFlowMixin:
                 if stream_display:
                     full_response = stream_display
 
-                update_interval = float(
-                    getattr(config, "TELEGRAM_STREAM_UPDATE_INTERVAL_SEC", 0.75) or 0.75
-                )
-                update_interval = max(0.25, update_interval)
-                if stream_display and (time.time() - last_edit_time > update_interval):
-                    last_edit_time = time.time()
+                if stream_display and stream_edit_coalescer.offer(_stream_edit_id, stream_display):
+                    stream_edit_coalescer.mark_edited(_stream_edit_id, stream_display)
                     try:
                         display = f"{stream_display} ▌"
                         if is_self:
@@ -1796,6 +1803,8 @@ class LLMFlowMixin:
                         )
                 next_chunk_task = asyncio.create_task(stream_iter.__anext__())
 
+            # Стрим закончен: финальный текст доставляется ниже сразу, без coalescer'а.
+            stream_edit_coalescer.close_stream(_stream_edit_id)
             if not full_response:
                 full_response = self._extract_live_stream_text(
                     full_response_raw, allow_reasoning=False
@@ -2339,6 +2348,7 @@ class LLMFlowMixin:
                             if os.path.exists(voice_path):
                                 os.remove(voice_path)
         finally:
+            stream_edit_coalescer.close_stream(_stream_edit_id)
             # Реакция ❌ — если ошибка и ещё не поставили ✅.
             if is_self and not _reaction_sent and (timeout_error_was_sent or not full_response):
                 asyncio.create_task(self._send_message_reaction(message, "❌"))
@@ -22,8 +22,11 @@ Persistent state:
 - Atomic write: tmp + os.replace.
 
 Контракт:
-- ``_load_last_seen() -> dict[int, int]`` — чтение state файла, fail-open {}.
-- ``_save_last_seen(chat_id, msg_id)`` — atomic write, fail-warning.
+- ``_load_last_seen() -> dict[int, int]`` — state файл + ещё не сброшенные
+  watermark'и из памяти (read-your-writes), fail-open {}.
+- ``_save_last_seen(chat_id, msg_id)`` — write-through: atomic write, fail-warning.
+- ``_flush_last_seen()`` / ``_drain_last_seen()`` — сброс pending watermark'ов
+  (stop() и shutdown_coordinator).
 - ``_catchup_chat_history(chat_id, *, max_lookback)`` — Wave 48-A:
   generic per-chat catchup; replay unseen messages.
 - ``_catchup_owner_dm(*, max_lookback)`` — Wave 46-A wrapper для owner DM.
@@ -38,6 +41,19 @@ Defensive design:
 - max_lookback default 20, override через env ``KRAB_STARTUP_CATCHUP_LIMIT``.
 - Target chats: ``KRAB_STARTUP_CATCHUP_CHATS`` (CSV), иначе owner DM + swarm group.
 
+Write-behind watermark'и (``LastSeenWatermarkWriter``):
+- ``_record_seen_message`` (горячий путь, каждое сообщение) — только
+  ``max()`` в in-memory dict; файл пишется одним read-merge-replace не чаще
+  раза в ``KRAB_LAST_SEEN_FLUSH_SEC`` (default 2.0s) для всех чатов сразу.
+- Flush планируется через ``loop.call_later`` при первом pending update;
+  вне event loop запись идёт сразу (write-through, как раньше).
+- Crash semantics: при SIGKILL/краше теряются только watermark'и последних
+  ≤ flush-interval секунд. Следующий startup catchup увидит более старый
+  last_seen и переиграет эти сообщения — т.е. потеря = повторная обработка
+  хвоста, а не пропуск сообщений. Merge с диском по max() гарантирует,
+  что watermark на диске никогда не уменьшается.
+- Ошибка записи (OSError) возвращает pending обратно — повтор на следующем flush.
+
 Wave 56-F: параллельный catchup через asyncio.gather + Semaphore.
 - ``_catchup_all_owner_chats`` теперь запускает все per-chat coroutines concurrently.
 - Semaphore (default 3) ограничивает число одновременных get_chat_history вызовов.
@@ -56,10 +72,14 @@ import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 
 import structlog
 
+from ..core.event_log import EventLog, get_event_log
+from ..core.gateway_scheduler import gateway_priority
+from ..core.message_priority_dispatcher import Priority
+
 # Wave 116: Prometheus instrumentation для startup catchup.
 # Import fail-safe: при отсутствии модуля helpers становятся no-op.
 try:
@@ -123,10 +143,23 @@ def _resolve_history_path() -> Path:
 # = одна запись; ~100 хватает на ~1-3 месяца наблюдаемости.
 _HISTORY_MAX_ENTRIES = 100
 
-# Wave 154: in-process lock для сериализации append+trim. OS-level append-mode
-# даёт atomic write для коротких строк (< PIPE_BUF=4KB на macOS/Linux), но
-# trim требует read-modify-write — отдельная защита от race внутри процесса.
-_HISTORY_LOCK = threading.Lock()
+
+def _history_log() -> EventLog:
+    """Общий EventLog истории: сегмент по ``_HISTORY_MAX_ENTRIES`` + один закрытый."""
+    return get_event_log(
+        _resolve_history_path(),
+        ts_field="completed_at_utc",
+        segment_max_records=_HISTORY_MAX_ENTRIES,
+        max_segments=1,
+    )
+
+
+def read_catchup_history(limit: int = _HISTORY_MAX_ENTRIES) -> list[dict[str, Any]]:
+    """Последние ``limit`` (≤ ``_HISTORY_MAX_ENTRIES``) записей, хронологически.
+
+    Malformed строки пропускаются; файла нет → пустой list.
+    """
+    return _history_log().tail(min(int(limit), _HISTORY_MAX_ENTRIES))
 
 
 def _record_catchup_history(
@@ -148,12 +181,11 @@ def _record_catchup_history(
 
     Поведение:
       - File path: ``_resolve_history_path()`` (KRAB_RUNTIME_STATE_DIR).
-      - Append mode (``a``) — короткая строка пишется atomic на POSIX.
-      - После append проверяется кол-во строк; если > ``_HISTORY_MAX_ENTRIES``,
-        выполняется FIFO trim (rewrite через tmp + os.replace).
-      - In-process lock сериализует append+trim — concurrent writers из одного
-        процесса не теряют записи и не портят trim.
-      - Любая OSError (включая ENOSPC) → warning + return; catchup не блокируется.
+      - Пишется через общий ``EventLog``: O(1) append одной строки, FIFO
+        реализован ротацией сегмента по ``_HISTORY_MAX_ENTRIES`` записей
+        (хранится не больше двух сегментов) — без read-modify-write.
+      - Читать историю — через ``read_catchup_history``.
+      - Любая ошибка IO (включая ENOSPC) → warning + return; catchup не блокируется.
     """
     duration_sec = round(max(0.0, float(completed_at) - float(started_at)), 3)
     started_iso = datetime.fromtimestamp(float(started_at), tz=timezone.utc).isoformat()
@@ -175,45 +207,9 @@ def _record_catchup_history(
         "total_skipped_self": total_skipped_self,
         "by_chat": list(per_chat_stats),
     }
-    line = json.dumps(entry, ensure_ascii=False)
-    path = _resolve_history_path()
-    try:
-        with _HISTORY_LOCK:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            # Append одной строки — atomic на POSIX для коротких записей.
-            with open(path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
-            # FIFO trim: если превысили лимит, переписываем файл с tail-ом.
-            try:
-                with open(path, encoding="utf-8") as f:
-                    lines = f.readlines()
-            except OSError:
-                return  # не критично — trim попробуем в следующий раз
-            if len(lines) > _HISTORY_MAX_ENTRIES:
-                tail = lines[-_HISTORY_MAX_ENTRIES:]
-                tmp_fd, tmp_path = tempfile.mkstemp(
-                    prefix=".catchup_history_",
-                    suffix=".jsonl.tmp",
-                    dir=str(path.parent),
-                )
-                try:
-                    with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
-                        f.writelines(tail)
-                    os.replace(tmp_path, path)
-                except OSError:
-                    # cleanup tmp при ошибке rewrite, не raise
-                    try:
-                        os.unlink(tmp_path)
-                    except OSError:
-                        pass
-                    raise
-    except OSError as exc:
-        logger.warning(
-            "catchup_history_write_failed",
-            path=str(path),
-            error=str(exc),
-            error_type=type(exc).__name__,
-        )
+    log = _history_log()
+    if not log.append(entry):
+        logger.warning("catchup_history_write_failed", path=str(log.path))
 
 
 def _resolve_max_lookback(default: int = 20) -> int:
@@ -355,6 +351,174 @@ def _parse_catchup_chats_env() -> list[int] | None:
     return result if result else None
 
 
+def _resolve_last_seen_flush_interval(default: float = 2.0) -> float:
+    """Debounce-интервал flush'а last_seen watermark'ов, секунды.
+
+    Env ``KRAB_LAST_SEEN_FLUSH_SEC`` (range 0.1-60, default 2.0).
+    """
+    raw = os.environ.get("KRAB_LAST_SEEN_FLUSH_SEC", "").strip()
+    if not raw:
+        return default
+    try:
+        v = float(raw)
+        return max(0.1, min(v, 60.0))
+    except ValueError:
+        return default
+
+
+def _read_last_seen_file(path: Path) -> dict[int, int]:
+    """Прочитать state файл. Fail-open: нет файла / битый JSON → {}."""
+    if not path.exists():
+        return {}
+    try:
+        raw = path.read_text(encoding="utf-8")
+        data = json.loads(raw) if raw.strip() else {}
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning(
+            "last_seen_load_failed",
+            path=str(path),
+            error=str(exc),
+        )
+        return {}
+    result: dict[int, int] = {}
+    if not isinstance(data, dict):
+        return result
+    for k, v in data.items():
+        try:
+            cid = int(k)
+            if isinstance(v, dict):
+                msg_id = int(v.get("last_seen_msg_id", 0) or 0)
+            else:
+                msg_id = int(v or 0)
+            if msg_id > 0:
+                result[cid] = msg_id
+        except (TypeError, ValueError):
+            continue
+    return result
+
+
+def _write_last_seen_file(path: Path, watermarks: dict[int, int]) -> None:
+    """Atomic write state файла (tmp + ``os.replace``). OSError пробрасывается."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    payload: dict[str, Any] = {
+        str(cid): {"last_seen_msg_id": mid, "updated_at_utc": updated_at}
+        for cid, mid in watermarks.items()
+    }
+    tmp_fd, tmp_path = tempfile.mkstemp(
+        prefix=".last_seen_", suffix=".json.tmp", dir=str(path.parent)
+    )
+    try:
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        # cleanup tmp при ошибке
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LastSeenWatermarkWriter:
+    """Write-behind буфер last_seen watermark'ов.
+
+    ``note()`` — горячий путь: только per-chat ``max()`` в dict. Первый pending
+    update планирует flush через ``loop.call_later(flush_interval)``; flush
+    сливает все накопленные чаты с диском одним read-merge-replace.
+    Без running event loop ``note()`` пишет сразу (write-through).
+    """
+
+    def __init__(
+        self,
+        path_fn: Callable[[], Path],
+        *,
+        flush_interval_sec: float | None = None,
+    ) -> None:
+        self._path_fn = path_fn
+        self._flush_interval_sec = (
+            _resolve_last_seen_flush_interval()
+            if flush_interval_sec is None
+            else max(0.0, float(flush_interval_sec))
+        )
+        self._pending: dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Сериализует read-merge-replace между timer-flush и явным flush().
+        self._io_lock = threading.Lock()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self.flush_count = 0
+
+    def note(self, chat_id: int, msg_id: int) -> None:
+        """Зафиксировать увиденное сообщение (coalescing по max на чат)."""
+        with self._lock:
+            if msg_id <= self._pending.get(chat_id, 0):
+                return
+            self._pending[chat_id] = msg_id
+        self._schedule_flush()
+
+    def pending(self) -> dict[int, int]:
+        """Копия ещё не сброшенных watermark'ов."""
+        with self._lock:
+            return dict(self._pending)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self._flush_interval_sec, self._on_flush_timer)
+
+    def _on_flush_timer(self) -> None:
+        self._flush_handle = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Сбросить pending на диск. Возвращает кол-во сброшенных чатов.
+
+        Merge с диском по max() — watermark на диске не уменьшается. При
+        OSError batch возвращается в pending (повтор на следующем flush).
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+        path = self._path_fn()
+        try:
+            with self._io_lock:
+                current = _read_last_seen_file(path)
+                changed = False
+                for cid, mid in batch.items():
+                    if mid > current.get(cid, 0):
+                        current[cid] = mid
+                        changed = True
+                if changed:
+                    _write_last_seen_file(path, current)
+                    self.flush_count += 1
+        except OSError as exc:
+            with self._lock:
+                for cid, mid in batch.items():
+                    if mid > self._pending.get(cid, 0):
+                        self._pending[cid] = mid
+            logger.warning(
+                "last_seen_save_failed",
+                chats=len(batch),
+                error=str(exc),
+            )
+            return 0
+        return len(batch)
+
+    def close(self) -> int:
+        """Отменить отложенный flush и сбросить pending немедленно."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        return self.flush()
+
+
 class MessageCatchupMixin:
     """Mixin: startup catch-up + persistent last_seen_message_id."""
 
@@ -371,91 +535,53 @@ class MessageCatchupMixin:
         """Путь к JSON state файлу (overridable через env)."""
         return _resolve_state_path()
 
+    def _last_seen_writer(self) -> LastSeenWatermarkWriter:
+        """Lazy write-behind writer (mixin без __init__)."""
+        writer = getattr(self, "_last_seen_writer_instance", None)
+        if writer is None:
+            writer = LastSeenWatermarkWriter(self._last_seen_state_path)
+            self._last_seen_writer_instance = writer
+        return writer
+
     def _load_last_seen(self) -> dict[int, int]:
-        """Прочитать state с диска. Возвращает {chat_id_int: last_seen_msg_id}.
+        """Прочитать state. Возвращает {chat_id_int: last_seen_msg_id}.
 
-        Fail-open: если файла нет / битый JSON / ошибка чтения — {}.
+        Диск + pending watermark'и writer'а (ещё не сброшенные), по max.
+        Fail-open: если файла нет / битый JSON / ошибка чтения — {} с диска.
         """
-        path = self._last_seen_state_path()
-        if not path.exists():
-            return {}
-        try:
-            raw = path.read_text(encoding="utf-8")
-            data = json.loads(raw) if raw.strip() else {}
-        except (OSError, json.JSONDecodeError) as exc:
-            logger.warning(
-                "last_seen_load_failed",
-                path=str(path),
-                error=str(exc),
-            )
-            return {}
-        result: dict[int, int] = {}
-        if not isinstance(data, dict):
-            return result
-        for k, v in data.items():
-            try:
-                cid = int(k)
-                if isinstance(v, dict):
-                    msg_id = int(v.get("last_seen_msg_id", 0) or 0)
-                else:
-                    msg_id = int(v or 0)
-                if msg_id > 0:
-                    result[cid] = msg_id
-            except (TypeError, ValueError):
-                continue
+        result = _read_last_seen_file(self._last_seen_state_path())
+        for cid, mid in self._last_seen_writer().pending().items():
+            if mid > result.get(cid, 0):
+                result[cid] = mid
         return result
 
     def _save_last_seen(self, chat_id: int, msg_id: int) -> None:
-        """Atomic write обновления для одного чата.
+        """Write-through обновление для одного чата.
 
-        Стратегия: read-modify-write через tmp + ``os.replace``. Под нагрузкой
-        горячего пути (каждое сообщение) это OK — файл небольшой (десятки чатов),
-        write < 1ms на SSD.
+        Используется catchup'ом после replay: watermark должен лечь на диск
+        сразу, вместе со всем накопленным pending других чатов.
         """
         if msg_id <= 0:
             return
-        try:
-            path = self._last_seen_state_path()
-            path.parent.mkdir(parents=True, exist_ok=True)
-            current = self._load_last_seen()
-            existing = current.get(int(chat_id), 0)
-            if msg_id <= existing:
-                return  # монотонно растущий id; не пишем
-            current[int(chat_id)] = int(msg_id)
-            payload: dict[str, Any] = {
-                str(cid): {
-                    "last_seen_msg_id": mid,
-                    "updated_at_utc": datetime.now(timezone.utc).isoformat(),
-                }
-                for cid, mid in current.items()
-            }
-            # Atomic replace
-            tmp_fd, tmp_path = tempfile.mkstemp(
-                prefix=".last_seen_", suffix=".json.tmp", dir=str(path.parent)
-            )
-            try:
-                with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
-                    json.dump(payload, f, ensure_ascii=False, indent=2)
-                os.replace(tmp_path, path)
-            except OSError:
-                # cleanup tmp при ошибке
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass
-                raise
-        except OSError as exc:
-            logger.warning(
-                "last_seen_save_failed",
-                chat_id=chat_id,
-                msg_id=msg_id,
-                error=str(exc),
-            )
+        writer = self._last_seen_writer()
+        writer.note(int(chat_id), int(msg_id))
+        writer.flush()
+
+    def _flush_last_seen(self) -> int:
+        """Сбросить pending watermark'и на диск (stop / shutdown)."""
+        writer = getattr(self, "_last_seen_writer_instance", None)
+        if writer is None:
+            return 0
+        return writer.close()
+
+    async def _drain_last_seen(self) -> None:
+        """DrainFn для ``shutdown_coordinator``."""
+        self._flush_last_seen()
 
     def _record_seen_message(self, chat_id: int | str, msg_id: int) -> None:
         """Hook вызывается из ``_process_message`` после успешной ingestion.
 
-        Wrapper над ``_save_last_seen`` с защитой от bad input.
+        Горячий путь: только in-memory update; на диск — debounced flush.
         """
         try:
             cid = int(chat_id)
@@ -464,7 +590,7 @@ class MessageCatchupMixin:
             return
         if mid <= 0:
             return
-        self._save_last_seen(cid, mid)
+        self._last_seen_writer().note(cid, mid)
 
     # ────────────────────────────────────────────────────────────────────
     # Owner chat resolution
@@ -758,7 +884,9 @@ class MessageCatchupMixin:
             except Exception:  # noqa: BLE001 - возраст не критичен
                 pass
             try:
-                await self._process_message(msg)
+                # Replay — фоновая работа: не занимаем gateway-слоты owner'а.
+                with gateway_priority(Priority.P2_LOW):
+                    await self._process_message(msg)
                 replayed += 1
                 if mid > max_id:
                     max_id = mid
@@ -6,15 +6,14 @@
   cohesive ~95 LOC (alert delivery + ensure-start + capture loop).
 - Mixin использует: ``self.client``, ``self._owner_notify_target``,
   ``self._split_message``, ``self._proactive_watch_task``,
-  ``self._error_digest_task``, ``self._weekly_digest_task``,
   ``self._nightly_summary_task``, ``self._openclaw_health_alert_task``.
 
 Контракт:
 - ``_send_proactive_watch_alert`` — primary (userbot) → fallback reserve_bot.
   Raises RuntimeError если оба недоступны (caller должен поймать).
 - ``_ensure_proactive_watch_started`` — idempotent boot всех related loops:
-  proactive_watch, error_digest, weekly_digest, nightly_summary,
-  openclaw_health_alert. Гейт по config.PROACTIVE_WATCH_ENABLED.
+  proactive_watch, nightly_summary, openclaw_health_alert; error_digest и
+  weekly_digest — job'ы ``periodic_scheduler``. Гейт по config.PROACTIVE_WATCH_ENABLED.
 - ``_run_proactive_watch_loop`` — baseline-aware capture loop. Первый
   pass = baseline без alert, последующие — только при переходах состояния.
 """
@@ -27,6 +26,7 @@ from typing import TYPE_CHECKING
 import structlog
 
 from ..config import config
+from ..core.periodic_scheduler import periodic_scheduler
 from ..core.proactive_watch import proactive_watch
 from ..reserve_bot import reserve_bot
 
@@ -43,7 +43,6 @@ class ProactiveWatchMixin:
     client: "Client | None"
     _owner_notify_target: int | str
     _proactive_watch_task: asyncio.Task | None
-    _error_digest_task: asyncio.Task | None
 
     async def _send_proactive_watch_alert(self, text: str) -> None:
         """
@@ -69,17 +68,22 @@ class ProactiveWatchMixin:
         if self._proactive_watch_task and not self._proactive_watch_task.done():
             return
         self._proactive_watch_task = asyncio.create_task(self._run_proactive_watch_loop())
-        # Запускаем периодическую сводку ошибок (каждые 6 часов)
-        if self._error_digest_task is None or self._error_digest_task.done():
-            self._error_digest_task = proactive_watch.start_error_digest_loop()
-        # WeeklyDigest: подключаем Telegram delivery callback + запускаем loop
+        # Периодическая сводка ошибок (раз в сутки) — job общего periodic_scheduler
+        periodic_scheduler.register(
+            "error_digest",
+            proactive_watch.run_error_digest,
+            proactive_watch.ERROR_DIGEST_INTERVAL_SEC,
+            initial_delay_sec=proactive_watch.ERROR_DIGEST_FIRST_RUN_DELAY_SEC,
+        )
+        logger.info(
+            "error_digest_loop_started", interval_sec=proactive_watch.ERROR_DIGEST_INTERVAL_SEC
+        )
+        # WeeklyDigest: подключаем Telegram delivery callback + регистрируем job
         try:
             from ..core.weekly_digest import weekly_digest  # noqa: PLC0415
 
             weekly_digest.set_telegram_callback(self._send_proactive_watch_alert)
-            wdt = getattr(self, "_weekly_digest_task", None)
-            if wdt is None or wdt.done():
-                self._weekly_digest_task = weekly_digest.start_weekly_digest_loop()
+            weekly_digest.register_periodic(periodic_scheduler)
         except Exception as exc:  # noqa: BLE001
             logger.warning("weekly_digest_setup_failed", error=str(exc))
 
@@ -32,6 +32,7 @@ import structlog
 from ..config import config
 from ..core.cron_native_scheduler import cron_native_scheduler
 from ..core.memory_indexer_worker import get_indexer
+from ..core.periodic_scheduler import periodic_scheduler
 from ..core.scheduler import krab_scheduler
 from ..core.silence_mode import silence_manager
 from ..core.silence_schedule import silence_schedule_manager
@@ -268,7 +269,7 @@ class ServiceOrchestrationMixin:
             # Native cron scheduler — fallback когда OpenClaw CLI недоступен
             cron_native_scheduler.bind_sender(self._run_cron_prompt_and_send)
             if not cron_native_scheduler.is_running:
-                cron_native_scheduler.start()
+                cron_native_scheduler.start(periodic_scheduler)
                 logger.info("cron_native_scheduler_runtime_started")
 
             # Wave 49-F: периодические snapshots критичных state-файлов
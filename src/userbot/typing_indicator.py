@@ -53,6 +53,7 @@ from ..core.metrics.typing_indicator import (
     record_typing_floodwait,
     record_typing_started,
 )
+from ..core.telegram_rate_limiter import TelegramLane, telegram_rate_limiter
 
 logger = get_logger(__name__)
 
@@ -153,6 +154,8 @@ async def _keep_alive_loop(
     try:
         while not stop_event.is_set():
             try:
+                # Typing — background lane: под нагрузкой уступает ответам.
+                await telegram_rate_limiter.acquire(purpose="typing", lane=TelegramLane.BACKGROUND)
                 await client.send_chat_action(chat_id, action)
             except Exception as exc:  # noqa: BLE001
                 # FloodWait / network — best-effort: лог и продолжаем.
@@ -11,6 +11,7 @@ Userbot Bridge - Мост между Telegram и OpenClaw/AI
 
 import asyncio
 import base64
+import importlib
 import os
 import re
 import sys
@@ -34,13 +35,16 @@ from .core.chat_ban_cache import chat_ban_cache
 from .core.chat_capability_cache import chat_capability_cache
 from .core.chat_filter_config import chat_filter_config
 from .core.chat_window_manager import chat_window_manager
+from .core.command_aliases import alias_service
 from .core.command_blocklist import command_blocklist
 from .core.cron_native_scheduler import cron_native_scheduler
 from .core.exceptions import KrabError, UserInputError
+from .core.gateway_scheduler import gateway_priority
 from .core.inbox_service import inbox_service  # noqa: F401 — re-export, monkey-patched в tests
 from .core.logger import bind_contextvars, clear_contextvars, get_logger
 from .core.memory_indexer_worker import get_indexer
 from .core.message_priority_dispatcher import Priority, classify_priority
+from .core.periodic_scheduler import periodic_scheduler
 from .core.routing_errors import RouterError, user_message_for_surface
 from .core.scheduler import krab_scheduler
 from .core.sender_context import _extract_forward_origin_parts
@@ -49,7 +53,7 @@ from .core.spam_filter import is_bulk_sender as _is_bulk_sender_ext
 from .core.swarm_auto_executor import swarm_auto_executor
 from .core.swarm_channels import swarm_channels
 from .core.swarm_scheduler import swarm_scheduler
-from .core.telegram_rate_limiter import telegram_rate_limiter
+from .core.telegram_rate_limiter import TelegramLane, telegram_lane, telegram_rate_limiter
 from .employee_templates import ROLES
 
 # Wave 15 content commands re-exported через handlers/__init__.py
@@ -193,11 +197,14 @@ from .userbot._send_queue import telegram_send_queue as _telegram_send_queue
 from .userbot.access_control import AccessControlMixin
 from .userbot.auto_translate import AutoTranslateMixin
 from .userbot.background_loops import (
+    COMMAND_USAGE_SAVE_INTERVAL_SEC,
+    IDEA_TICK_INTERVAL_SEC,
     BackgroundLoopsMixin,
     _evaluate_and_apply_skill_curator_proposals,  # noqa: F401 — re-export для tests
 )
 from .userbot.background_tasks import BackgroundTasksMixin
 from .userbot.callback_handler import CallbackHandlerMixin
+from .userbot.command_dispatcher import CommandDispatcher
 from .userbot.cron_tasks import CronTaskMixin
 from .userbot.delivery_helpers import DeliveryHelpersMixin
 from .userbot.llm_flow import (
@@ -448,18 +455,14 @@ class KraabUserbot(
         self.perceptor = perceptor
         self.maintenance_task: Optional[asyncio.Task] = None
         self._telegram_watchdog_task: Optional[asyncio.Task] = None
-        self._background_task_reaper_task: Optional[asyncio.Task] = None
         self._proactive_watch_task: Optional[asyncio.Task] = None
         self._memory_indexer_task: Optional[asyncio.Task] = None
-        self._error_digest_task: Optional[asyncio.Task] = None
         self._silence_schedule_task: Optional[asyncio.Task] = None
-        self._command_usage_save_task: Optional[asyncio.Task] = None
         # Wave 36-B: проактивный heartbeat — GetUsers([Self]) каждые 4 минуты
         self._telegram_heartbeat_task: Optional[asyncio.Task] = None
         # Wave 36-D: macOS sleep/wake детектор — форсированный reinit после sleep
         self._macos_sleep_detect_task: Optional[asyncio.Task] = None
         # Idea-features periodic tick (reply_scheduler / daily_brief / channel_digest / patterns)
-        self._idea_features_task: Optional[asyncio.Task] = None
         self._idea_tick_state: dict[str, float] = {}
         self._swarm_team_clients: dict[str, Any] = {}  # team → Pyrogram Client
         self._session_recovery_lock = asyncio.Lock()
@@ -523,38 +526,178 @@ class KraabUserbot(
 
         self._known_commands = set(USERBOT_KNOWN_COMMANDS)
 
-        def _make_command_filter(command_name: str):
-            """Создаёт per-command ACL-фильтр без дублирования правил в декораторах."""
-
-            def check_access(_, __, m):
-                if not m.from_user:
-                    return False
-                # Per-chat blocklist — silent skip (не логировать как ошибку).
-                # H6: для "silence" проверяем и legacy-ключ "тишина" (ACL skew).
-                _blocklist_keys = (command_name,)
-                if command_name == "silence":
-                    _blocklist_keys = ("silence", "тишина")
-                if any(command_blocklist.is_blocked(m.chat.id, key) for key in _blocklist_keys):
-                    logger.debug(
-                        "command_blocklist_skip",
-                        command=command_name,
-                        chat=m.chat.id,
-                    )
-                    return False
-                result = self._has_command_access(m.from_user, command_name)
-                if not result:
-                    access_profile = self._get_access_profile(m.from_user)
-                    logger.warning(
-                        "command_access_denied",
-                        command=command_name,
-                        access_level=access_profile.level.value,
-                        user=(m.from_user.username or "").lower(),
-                        id=str(m.from_user.id),
-                        chat=m.chat.id,
-                    )
-                return result
-
-            return filters.create(check_access)
+        def _lazy_handler(module: str, attr: str):
+            """Handler с ленивым импортом модуля (тяжёлые/опциональные команды)."""
+
+            async def _call(bot, m):
+                handler = getattr(importlib.import_module(module, __package__), attr)
+                await handler(bot, m)
+
+            # run_cmd берёт имя для bump_command / логов из __name__.
+            _call.__name__ = attr
+            return _call
+
+        def _own_usernames(client) -> set[str]:
+            """Username'ы аккаунта для `!cmd@username` (как в filters.command)."""
+            me = getattr(client, "me", None)
+            names = {str(getattr(me, "username", "") or "").lower()}
+            for extra in getattr(me, "usernames", None) or ():
+                names.add(str(getattr(extra, "username", "") or "").lower())
+            names.discard("")
+            return names
+
+        # Таблица команд: (имена, handler[, acl_name[, blocklist_keys]]).
+        # acl_name по умолчанию — первое имя; blocklist_keys — (acl_name,).
+        command_table = (
+            ("status", handle_status),
+            ("swarm", handle_swarm),
+            ("model", handle_model),
+            ("models", handle_models),
+            ("clear", handle_clear),
+            ("forget", handle_forget),
+            ("clear_session", handle_forget),
+            ("config", handle_config),
+            ("set", handle_set),
+            ("role", handle_role),
+            ("voice", handle_voice),
+            ("notify", handle_notify),
+            ("chatban", handle_chatban),
+            ("chatpolicy", handle_chatpolicy),
+            # Wave 39-B: !proactive — управление proactive event detection per chat.
+            ("proactive", _lazy_handler(".handlers.commands.proactive", "handle_proactive")),
+            # Wave 44-N-cli: !dreaming — OpenClaw Dreaming integration (owner-only).
+            ("dreaming", _lazy_handler(".handlers.commands.dreaming", "handle_dreaming")),
+            ("block", handle_cmdblock),
+            ("unblock", handle_cmdunblock),
+            ("blocklist", handle_blocklist),
+            # Session 32 audit-3: !filter — алиас !listen для per-chat filter mode (Chado §3 P2)
+            ("filter", handle_filter),
+            # Session 32 Wave 4: !chado — cross-AI sync с Chado (status/ping/digest)
+            ("chado", handle_chado),
+            # Session 32 audit-3: !mem — быстрый доступ к Memory Layer (HybridRetriever)
+            ("mem", handle_mem),
+            # Session 32 audit-3: !setpanelauth — bcrypt-пароль для Krab Panel (owner-only)
+            ("setpanelauth", handle_setpanelauth),
+            # Session 32 audit-3: !top — лидерборд активности чата
+            ("top", handle_top),
+            ("translator", handle_translator),
+            ("web", handle_web),
+            ("mac", handle_macos),
+            ("screenshot", handle_screenshot),
+            ("cap", handle_cap),
+            (["тишина", "silence"], handle_silence, "silence", ("silence", "тишина")),
+            ("version", handle_version),
+            ("diag", handle_diag),
+            ("stats", handle_stats),
+            ("who", handle_who),
+            ("whois", handle_whois),
+            ("contacts", handle_contacts),
+            ("emoji", handle_emoji),
+            ("costs", handle_costs),
+            ("curator", handle_curator),
+            ("budget", handle_budget),
+            ("digest", handle_digest),
+            ("report", handle_report),
+            ("watch", handle_watch),
+            ("quota", handle_quota),
+            ("metrics", handle_metrics),
+            ("routes", handle_routes),
+            ("routing", handle_routing),
+            ("mcp", handle_mcp),
+            ("skills", handle_skills),
+            ("test", handle_test),
+            ("memory", handle_memory),
+            ("inbox", handle_inbox),
+            ("id", handle_id),
+            ("sysinfo", handle_sysinfo),
+            ("panel", handle_panel),
+            (["loglevel", "verbose", "debug_level"], handle_loglevel),
+            ("restart", handle_restart),
+            ("search", handle_search),
+            ("explain", handle_explain),
+            # Wave 15 content commands (Session 40 fix — раньше handler'ы существовали
+            # но не были attached к pyrogram filters, из-за чего `!yt`/`!img`/`!ocr`/
+            # `!media`/`!snippet`/`!template` молчали в DM).
+            ("yt", handle_yt),
+            ("img", handle_img),
+            ("ocr", handle_ocr),
+            ("media", handle_media),
+            ("snippet", handle_snippet),
+            ("template", handle_template),
+            ("news", handle_news),
+            ("rate", handle_rate),
+            ("grep", handle_grep),
+            ("ask", handle_ask),
+            ("fix", handle_fix),
+            ("rewrite", handle_rewrite),
+            ("shop", handle_shop),
+            ("memo", handle_memo),
+            ("note", handle_note),
+            (["bookmark", "bm"], handle_bookmark),
+            ("remember", handle_remember),
+            ("recall", handle_recall),
+            ("todo", handle_todo),
+            ("proactivity", handle_proactivity),
+            ("trust", handle_trust),
+            ("e2e_smoke", handle_e2e_smoke),
+            ("ls", handle_ls),
+            ("read", handle_read),
+            ("write", handle_write),
+            ("agent", handle_agent),
+            # CLI runner команды
+            ("codex", handle_codex),
+            ("gemini", handle_gemini_cli),
+            ("claude_cli", handle_claude_cli),
+            ("opencode", handle_opencode),
+            ("hs", handle_hs),
+            ("acl", handle_acl),
+            ("scope", handle_scope),
+            # Alias для тех, кто интуитивно ищет именно access-management.
+            ("access", handle_acl),
+            ("reasoning", handle_reasoning),
+            ("debug", handle_debug),
+            ("diagnose", handle_diagnose),
+            ("bench", handle_bench),
+            ("uptime", handle_uptime),
+            ("archive", handle_archive),
+            ("unarchive", handle_unarchive),
+            ("health", handle_health),
+            ("context", handle_context),
+            ("pin", handle_pin),
+            ("unpin", handle_unpin),
+            ("fwd", handle_fwd),
+            ("collect", handle_collect),
+            ("help", handle_help),
+            ("remind", handle_remind),
+            ("reminders", handle_reminders),
+            ("rm_remind", handle_rm_remind),
+            ("cronstatus", handle_cronstatus),
+            ("schedule", handle_schedule),
+            ("tor", handle_tor),
+            ("browser", handle_browser),
+            ("monitor", handle_monitor),
+            # Управление сообщениями: !del, !purge, !autodel
+            ("del", handle_del),
+            ("purge", handle_purge),
+            ("autodel", handle_autodel),
+            ("summary", handle_summary),
+            ("catchup", handle_catchup),
+            # Wave 49-D: !replay — manual on-demand message replay (owner-only).
+            ("replay", handle_replay),
+            ("translate", handle_translate),
+            ("export", handle_export),
+            ("react", handle_react),
+            ("poll", handle_poll),
+            ("quiz", handle_quiz),
+            ("alias", handle_alias),
+            ("timer", handle_timer),
+            ("stopwatch", handle_stopwatch),
+            ("qr", handle_qr),
+            # Тихая отправка сообщения от имени юзербота
+            ("say", handle_say),
+            ("backup", handle_backup),
+            ("eval", handle_eval),
+        )
 
         async def run_cmd(handler, m):
             # Учёт вызовов команд (аналитика)
@@ -585,896 +728,62 @@ class KraabUserbot(
             finally:
                 m.stop_propagation()
 
-        # Регистрация командных оберток (Фаза 4.4: модульные хендлеры)
-        @self.client.on_message(
-            filters.command("status", prefixes=prefixes) & _make_command_filter("status"), group=-1
-        )
-        async def wrap_status(c, m):
-            await run_cmd(handle_status, m)
-
-        @self.client.on_message(
-            filters.command("swarm", prefixes=prefixes) & _make_command_filter("swarm"), group=-1
-        )
-        async def wrap_swarm(c, m):
-            await run_cmd(handle_swarm, m)
-
-        @self.client.on_message(
-            filters.command("model", prefixes=prefixes) & _make_command_filter("model"), group=-1
-        )
-        async def wrap_model(c, m):
-            await run_cmd(handle_model, m)
-
-        @self.client.on_message(
-            filters.command("models", prefixes=prefixes) & _make_command_filter("models"), group=-1
-        )
-        async def wrap_models(c, m):
-            await run_cmd(handle_models, m)
-
-        @self.client.on_message(
-            filters.command("clear", prefixes=prefixes) & _make_command_filter("clear"), group=-1
-        )
-        async def wrap_clear(c, m):
-            await run_cmd(handle_clear, m)
-
-        @self.client.on_message(
-            filters.command("forget", prefixes=prefixes) & _make_command_filter("forget"), group=-1
-        )
-        async def wrap_forget(c, m):
-            await run_cmd(handle_forget, m)
-
-        @self.client.on_message(
-            filters.command("clear_session", prefixes=prefixes)
-            & _make_command_filter("clear_session"),
-            group=-1,
-        )
-        async def wrap_clear_session(c, m):
-            await run_cmd(handle_forget, m)
-
-        @self.client.on_message(
-            filters.command("config", prefixes=prefixes) & _make_command_filter("config"), group=-1
-        )
-        async def wrap_config(c, m):
-            await run_cmd(handle_config, m)
-
-        @self.client.on_message(
-            filters.command("set", prefixes=prefixes) & _make_command_filter("set"), group=-1
-        )
-        async def wrap_set(c, m):
-            await run_cmd(handle_set, m)
-
-        @self.client.on_message(
-            filters.command("role", prefixes=prefixes) & _make_command_filter("role"), group=-1
-        )
-        async def wrap_role(c, m):
-            await run_cmd(handle_role, m)
-
-        @self.client.on_message(
-            filters.command("voice", prefixes=prefixes) & _make_command_filter("voice"), group=-1
-        )
-        async def wrap_voice(c, m):
-            await run_cmd(handle_voice, m)
-
-        @self.client.on_message(
-            filters.command("notify", prefixes=prefixes) & _make_command_filter("notify"), group=-1
-        )
-        async def wrap_notify(c, m):
-            await run_cmd(handle_notify, m)
-
-        @self.client.on_message(
-            filters.command("chatban", prefixes=prefixes) & _make_command_filter("chatban"),
-            group=-1,
-        )
-        async def wrap_chatban(c, m):
-            await run_cmd(handle_chatban, m)
-
-        @self.client.on_message(
-            filters.command("chatpolicy", prefixes=prefixes) & _make_command_filter("chatpolicy"),
-            group=-1,
-        )
-        async def wrap_chatpolicy(c, m):
-            await run_cmd(handle_chatpolicy, m)
-
-        # Wave 39-B: !proactive — управление proactive event detection per chat.
-        @self.client.on_message(
-            filters.command("proactive", prefixes=prefixes) & _make_command_filter("proactive"),
-            group=-1,
-        )
-        async def wrap_proactive(c, m):
-            from .handlers.commands.proactive import handle_proactive  # noqa: PLC0415
-
-            await run_cmd(handle_proactive, m)
-
-        # Wave 44-N-cli: !dreaming — OpenClaw Dreaming integration (owner-only).
-        @self.client.on_message(
-            filters.command("dreaming", prefixes=prefixes) & _make_command_filter("dreaming"),
-            group=-1,
-        )
-        async def wrap_dreaming(c, m):
-            from .handlers.commands.dreaming import handle_dreaming  # noqa: PLC0415
-
-            await run_cmd(handle_dreaming, m)
-
-        @self.client.on_message(
-            filters.command("block", prefixes=prefixes) & _make_command_filter("block"), group=-1
-        )
-        async def wrap_block(c, m):
-            await run_cmd(handle_cmdblock, m)
-
-        @self.client.on_message(
-            filters.command("unblock", prefixes=prefixes) & _make_command_filter("unblock"),
-            group=-1,
-        )
-        async def wrap_unblock(c, m):
-            await run_cmd(handle_cmdunblock, m)
-
-        @self.client.on_message(
-            filters.command("blocklist", prefixes=prefixes) & _make_command_filter("blocklist"),
-            group=-1,
-        )
-        async def wrap_blocklist(c, m):
-            await run_cmd(handle_blocklist, m)
-
-        # Session 32 audit-3: !filter — алиас !listen для per-chat filter mode (Chado §3 P2)
-        @self.client.on_message(
-            filters.command("filter", prefixes=prefixes) & _make_command_filter("filter"),
-            group=-1,
-        )
-        async def wrap_filter(c, m):
-            await run_cmd(handle_filter, m)
-
-        # Session 32 Wave 4: !chado — cross-AI sync с Chado (status/ping/digest)
-        @self.client.on_message(
-            filters.command("chado", prefixes=prefixes) & _make_command_filter("chado"),
-            group=-1,
-        )
-        async def wrap_chado(c, m):
-            await run_cmd(handle_chado, m)
-
-        # Session 32 audit-3: !mem — быстрый доступ к Memory Layer (HybridRetriever)
-        @self.client.on_message(
-            filters.command("mem", prefixes=prefixes) & _make_command_filter("mem"),
-            group=-1,
-        )
-        async def wrap_mem(c, m):
-            await run_cmd(handle_mem, m)
-
-        # Session 32 audit-3: !setpanelauth — bcrypt-пароль для Krab Panel (owner-only)
-        @self.client.on_message(
-            filters.command("setpanelauth", prefixes=prefixes)
-            & _make_command_filter("setpanelauth"),
-            group=-1,
-        )
-        async def wrap_setpanelauth(c, m):
-            await run_cmd(handle_setpanelauth, m)
-
-        # Session 32 audit-3: !top — лидерборд активности чата
-        @self.client.on_message(
-            filters.command("top", prefixes=prefixes) & _make_command_filter("top"),
-            group=-1,
-        )
-        async def wrap_top(c, m):
-            await run_cmd(handle_top, m)
-
-        @self.client.on_message(
-            filters.command("translator", prefixes=prefixes) & _make_command_filter("translator"),
-            group=-1,
-        )
-        async def wrap_translator(c, m):
-            await run_cmd(handle_translator, m)
-
-        @self.client.on_message(
-            filters.command("web", prefixes=prefixes) & _make_command_filter("web"), group=-1
-        )
-        async def wrap_web(c, m):
-            await run_cmd(handle_web, m)
-
-        @self.client.on_message(
-            filters.command("mac", prefixes=prefixes) & _make_command_filter("mac"), group=-1
-        )
-        async def wrap_mac(c, m):
-            await run_cmd(handle_macos, m)
-
-        @self.client.on_message(
-            filters.command("screenshot", prefixes=prefixes) & _make_command_filter("screenshot"),
-            group=-1,
-        )
-        async def wrap_screenshot(c, m):
-            await run_cmd(handle_screenshot, m)
-
-        @self.client.on_message(
-            filters.command("cap", prefixes=prefixes) & _make_command_filter("cap"), group=-1
-        )
-        async def wrap_cap(c, m):
-            await run_cmd(handle_cap, m)
-
-        @self.client.on_message(
-            filters.command(["тишина", "silence"], prefixes=prefixes)
-            & _make_command_filter("silence"),
-            group=-1,
-        )
-        async def wrap_silence(c, m):
-            await run_cmd(handle_silence, m)
-
-        @self.client.on_message(
-            filters.command("version", prefixes=prefixes) & _make_command_filter("version"),
-            group=-1,
-        )
-        async def wrap_version(c, m):
-            await run_cmd(handle_version, m)
-
-        @self.client.on_message(
-            filters.command("diag", prefixes=prefixes) & _make_command_filter("diag"),
-            group=-1,
-        )
-        async def wrap_diag(c, m):
-            await run_cmd(handle_diag, m)
-
-        @self.client.on_message(
-            filters.command("stats", prefixes=prefixes) & _make_command_filter("stats"),
-            group=-1,
-        )
-        async def wrap_stats(c, m):
-            await run_cmd(handle_stats, m)
-
-        @self.client.on_message(
-            filters.command("who", prefixes=prefixes) & _make_command_filter("who"), group=-1
-        )
-        async def wrap_who(c, m):
-            await run_cmd(handle_who, m)
-
-        @self.client.on_message(
-            filters.command("whois", prefixes=prefixes) & _make_command_filter("whois"), group=-1
-        )
-        async def wrap_whois(c, m):
-            await run_cmd(handle_whois, m)
-
-        @self.client.on_message(
-            filters.command("contacts", prefixes=prefixes) & _make_command_filter("contacts"),
-            group=-1,
-        )
-        async def wrap_contacts(c, m):
-            await run_cmd(handle_contacts, m)
-
-        @self.client.on_message(
-            filters.command("emoji", prefixes=prefixes) & _make_command_filter("emoji"), group=-1
-        )
-        async def wrap_emoji(c, m):
-            await run_cmd(handle_emoji, m)
-
-        @self.client.on_message(
-            filters.command("costs", prefixes=prefixes) & _make_command_filter("costs"), group=-1
-        )
-        async def wrap_costs(c, m):
-            await run_cmd(handle_costs, m)
-
-        @self.client.on_message(
-            filters.command("curator", prefixes=prefixes) & _make_command_filter("curator"),
-            group=-1,
-        )
-        async def wrap_curator(c, m):
-            await run_cmd(handle_curator, m)
-
-        @self.client.on_message(
-            filters.command("budget", prefixes=prefixes) & _make_command_filter("budget"), group=-1
-        )
-        async def wrap_budget(c, m):
-            await run_cmd(handle_budget, m)
-
-        @self.client.on_message(
-            filters.command("digest", prefixes=prefixes) & _make_command_filter("digest"), group=-1
-        )
-        async def wrap_digest(c, m):
-            await run_cmd(handle_digest, m)
-
-        @self.client.on_message(
-            filters.command("report", prefixes=prefixes) & _make_command_filter("report"), group=-1
-        )
-        async def wrap_report(c, m):
-            await run_cmd(handle_report, m)
-
-        @self.client.on_message(
-            filters.command("watch", prefixes=prefixes) & _make_command_filter("watch"), group=-1
-        )
-        async def wrap_watch(c, m):
-            await run_cmd(handle_watch, m)
-
-        @self.client.on_message(
-            filters.command("quota", prefixes=prefixes) & _make_command_filter("quota"), group=-1
-        )
-        async def wrap_quota(c, m):
-            await run_cmd(handle_quota, m)
-
-        @self.client.on_message(
-            filters.command("metrics", prefixes=prefixes) & _make_command_filter("metrics"),
-            group=-1,
-        )
-        async def wrap_metrics(c, m):
-            await run_cmd(handle_metrics, m)
-
-        @self.client.on_message(
-            filters.command("routes", prefixes=prefixes) & _make_command_filter("routes"),
-            group=-1,
-        )
-        async def wrap_routes(c, m):
-            await run_cmd(handle_routes, m)
-
-        @self.client.on_message(
-            filters.command("routing", prefixes=prefixes) & _make_command_filter("routing"),
-            group=-1,
-        )
-        async def wrap_routing(c, m):
-            await run_cmd(handle_routing, m)
-
-        @self.client.on_message(
-            filters.command("mcp", prefixes=prefixes) & _make_command_filter("mcp"),
-            group=-1,
-        )
-        async def wrap_mcp(c, m):
-            await run_cmd(handle_mcp, m)
-
-        @self.client.on_message(
-            filters.command("skills", prefixes=prefixes) & _make_command_filter("skills"),
-            group=-1,
-        )
-        async def wrap_skills(c, m):
-            await run_cmd(handle_skills, m)
-
-        @self.client.on_message(
-            filters.command("test", prefixes=prefixes) & _make_command_filter("test"),
-            group=-1,
-        )
-        async def wrap_test(c, m):
-            await run_cmd(handle_test, m)
-
-        @self.client.on_message(
-            filters.command("memory", prefixes=prefixes) & _make_command_filter("memory"), group=-1
-        )
-        async def wrap_memory(c, m):
-            await run_cmd(handle_memory, m)
-
-        @self.client.on_message(
-            filters.command("inbox", prefixes=prefixes) & _make_command_filter("inbox"), group=-1
-        )
-        async def wrap_inbox(c, m):
-            await run_cmd(handle_inbox, m)
-
-        @self.client.on_message(
-            filters.command("id", prefixes=prefixes) & _make_command_filter("id"), group=-1
-        )
-        async def wrap_id(c, m):
-            await run_cmd(handle_id, m)
-
-        @self.client.on_message(
-            filters.command("sysinfo", prefixes=prefixes) & _make_command_filter("sysinfo"),
-            group=-1,
-        )
-        async def wrap_sysinfo(c, m):
-            await run_cmd(handle_sysinfo, m)
-
-        @self.client.on_message(
-            filters.command("panel", prefixes=prefixes) & _make_command_filter("panel"), group=-1
-        )
-        async def wrap_panel(c, m):
-            await run_cmd(handle_panel, m)
-
-        @self.client.on_message(
-            filters.command(["loglevel", "verbose", "debug_level"], prefixes=prefixes)
-            & _make_command_filter("loglevel"),
-            group=-1,
-        )
-        async def wrap_loglevel(c, m):
-            await run_cmd(handle_loglevel, m)
-
-        @self.client.on_message(
-            filters.command("restart", prefixes=prefixes) & _make_command_filter("restart"),
-            group=-1,
-        )
-        async def wrap_restart(c, m):
-            await run_cmd(handle_restart, m)
-
-        @self.client.on_message(
-            filters.command("search", prefixes=prefixes) & _make_command_filter("search"), group=-1
-        )
-        async def wrap_search(c, m):
-            await run_cmd(handle_search, m)
-
-        @self.client.on_message(
-            filters.command("explain", prefixes=prefixes) & _make_command_filter("explain"),
-            group=-1,
-        )
-        async def wrap_explain(c, m):
-            await run_cmd(handle_explain, m)
-
-        # Wave 15 content commands (Session 40 fix — раньше handler'ы существовали
-        # но не были attached к pyrogram filters, из-за чего `!yt`/`!img`/`!ocr`/
-        # `!media`/`!snippet`/`!template` молчали в DM).
-        @self.client.on_message(
-            filters.command("yt", prefixes=prefixes) & _make_command_filter("yt"), group=-1
-        )
-        async def wrap_yt(c, m):
-            await run_cmd(handle_yt, m)
-
-        @self.client.on_message(
-            filters.command("img", prefixes=prefixes) & _make_command_filter("img"), group=-1
-        )
-        async def wrap_img(c, m):
-            await run_cmd(handle_img, m)
-
-        @self.client.on_message(
-            filters.command("ocr", prefixes=prefixes) & _make_command_filter("ocr"), group=-1
-        )
-        async def wrap_ocr(c, m):
-            await run_cmd(handle_ocr, m)
-
-        @self.client.on_message(
-            filters.command("media", prefixes=prefixes) & _make_command_filter("media"), group=-1
-        )
-        async def wrap_media(c, m):
-            await run_cmd(handle_media, m)
-
-        @self.client.on_message(
-            filters.command("snippet", prefixes=prefixes) & _make_command_filter("snippet"),
-            group=-1,
-        )
-        async def wrap_snippet(c, m):
-            await run_cmd(handle_snippet, m)
-
-        @self.client.on_message(
-            filters.command("template", prefixes=prefixes) & _make_command_filter("template"),
-            group=-1,
-        )
-        async def wrap_template(c, m):
-            await run_cmd(handle_template, m)
-
-        @self.client.on_message(
-            filters.command("news", prefixes=prefixes) & _make_command_filter("news"), group=-1
-        )
-        async def wrap_news(c, m):
-            await run_cmd(handle_news, m)
-
-        @self.client.on_message(
-            filters.command("rate", prefixes=prefixes) & _make_command_filter("rate"), group=-1
-        )
-        async def wrap_rate(c, m):
-            await run_cmd(handle_rate, m)
-
-        @self.client.on_message(
-            filters.command("grep", prefixes=prefixes) & _make_command_filter("grep"), group=-1
-        )
-        async def wrap_grep(c, m):
-            await run_cmd(handle_grep, m)
-
-        @self.client.on_message(
-            filters.command("ask", prefixes=prefixes) & _make_command_filter("ask"), group=-1
-        )
-        async def wrap_ask(c, m):
-            await run_cmd(handle_ask, m)
-
-        @self.client.on_message(
-            filters.command("fix", prefixes=prefixes) & _make_command_filter("fix"), group=-1
-        )
-        async def wrap_fix(c, m):
-            await run_cmd(handle_fix, m)
-
-        @self.client.on_message(
-            filters.command("rewrite", prefixes=prefixes) & _make_command_filter("rewrite"),
-            group=-1,
-        )
-        async def wrap_rewrite(c, m):
-            await run_cmd(handle_rewrite, m)
-
-        @self.client.on_message(
-            filters.command("shop", prefixes=prefixes) & _make_command_filter("shop"), group=-1
-        )
-        async def wrap_shop(c, m):
-            await run_cmd(handle_shop, m)
-
-        @self.client.on_message(
-            filters.command("memo", prefixes=prefixes) & _make_command_filter("memo"), group=-1
-        )
-        async def wrap_memo(c, m):
-            await run_cmd(handle_memo, m)
-
-        @self.client.on_message(
-            filters.command("note", prefixes=prefixes) & _make_command_filter("note"), group=-1
-        )
-        async def wrap_note(c, m):
-            await run_cmd(handle_note, m)
-
-        @self.client.on_message(
-            filters.command(["bookmark", "bm"], prefixes=prefixes)
-            & _make_command_filter("bookmark"),
-            group=-1,
-        )
-        async def wrap_bookmark(c, m):
-            await run_cmd(handle_bookmark, m)
-
-        @self.client.on_message(
-            filters.command("remember", prefixes=prefixes) & _make_command_filter("remember"),
-            group=-1,
-        )
-        async def wrap_remember(c, m):
-            await run_cmd(handle_remember, m)
-
-        @self.client.on_message(
-            filters.command("recall", prefixes=prefixes) & _make_command_filter("recall"), group=-1
-        )
-        async def wrap_recall(c, m):
-            await run_cmd(handle_recall, m)
-
-        @self.client.on_message(
-            filters.command("todo", prefixes=prefixes) & _make_command_filter("todo"), group=-1
-        )
-        async def wrap_todo(c, m):
-            await run_cmd(handle_todo, m)
-
-        @self.client.on_message(
-            filters.command("proactivity", prefixes=prefixes) & _make_command_filter("proactivity"),
-            group=-1,
-        )
-        async def wrap_proactivity(c, m):
-            await run_cmd(handle_proactivity, m)
-
-        @self.client.on_message(
-            filters.command("trust", prefixes=prefixes) & _make_command_filter("trust"), group=-1
-        )
-        async def wrap_trust(c, m):
-            await run_cmd(handle_trust, m)
-
-        @self.client.on_message(
-            filters.command("e2e_smoke", prefixes=prefixes) & _make_command_filter("e2e_smoke"),
-            group=-1,
-        )
-        async def wrap_e2e_smoke(c, m):
-            await run_cmd(handle_e2e_smoke, m)
-
-        @self.client.on_message(
-            filters.command("ls", prefixes=prefixes) & _make_command_filter("ls"), group=-1
-        )
-        async def wrap_ls(c, m):
-            await run_cmd(handle_ls, m)
-
-        @self.client.on_message(
-            filters.command("read", prefixes=prefixes) & _make_command_filter("read"), group=-1
-        )
-        async def wrap_read(c, m):
-            await run_cmd(handle_read, m)
-
-        @self.client.on_message(
-            filters.command("write", prefixes=prefixes) & _make_command_filter("write"), group=-1
-        )
-        async def wrap_write(c, m):
-            await run_cmd(handle_write, m)
-
-        @self.client.on_message(
-            filters.command("agent", prefixes=prefixes) & _make_command_filter("agent"), group=-1
-        )
-        async def wrap_agent(c, m):
-            await run_cmd(handle_agent, m)
-
-        # CLI runner команды
-        @self.client.on_message(
-            filters.command("codex", prefixes=prefixes) & _make_command_filter("codex"), group=-1
-        )
-        async def wrap_codex(c, m):
-            await run_cmd(handle_codex, m)
-
-        @self.client.on_message(
-            filters.command("gemini", prefixes=prefixes) & _make_command_filter("gemini"), group=-1
-        )
-        async def wrap_gemini_cli(c, m):
-            await run_cmd(handle_gemini_cli, m)
-
-        @self.client.on_message(
-            filters.command("claude_cli", prefixes=prefixes) & _make_command_filter("claude_cli"),
-            group=-1,
-        )
-        async def wrap_claude_cli(c, m):
-            await run_cmd(handle_claude_cli, m)
-
-        @self.client.on_message(
-            filters.command("opencode", prefixes=prefixes) & _make_command_filter("opencode"),
-            group=-1,
-        )
-        async def wrap_opencode(c, m):
-            await run_cmd(handle_opencode, m)
-
-        @self.client.on_message(
-            filters.command("hs", prefixes=prefixes) & _make_command_filter("hs"), group=-1
-        )
-        async def wrap_hs(c, m):
-            await run_cmd(handle_hs, m)
-
-        @self.client.on_message(
-            filters.command("acl", prefixes=prefixes) & _make_command_filter("acl"), group=-1
-        )
-        async def wrap_acl(c, m):
-            await run_cmd(handle_acl, m)
-
-        @self.client.on_message(
-            filters.command("scope", prefixes=prefixes) & _make_command_filter("scope"), group=-1
-        )
-        async def wrap_scope(c, m):
-            await run_cmd(handle_scope, m)
-
-        @self.client.on_message(
-            filters.command("access", prefixes=prefixes) & _make_command_filter("access"), group=-1
-        )
-        async def wrap_access(c, m):
-            # Alias для тех, кто интуитивно ищет именно access-management.
-            await run_cmd(handle_acl, m)
-
-        @self.client.on_message(
-            filters.command("reasoning", prefixes=prefixes) & _make_command_filter("reasoning"),
-            group=-1,
-        )
-        async def wrap_reasoning(c, m):
-            await run_cmd(handle_reasoning, m)
-
-        @self.client.on_message(
-            filters.command("debug", prefixes=prefixes) & _make_command_filter("debug"),
-            group=-1,
-        )
-        async def wrap_debug(c, m):
-            await run_cmd(handle_debug, m)
-
-        @self.client.on_message(
-            filters.command("diagnose", prefixes=prefixes) & _make_command_filter("diagnose"),
-            group=-1,
-        )
-        async def wrap_diagnose(c, m):
-            await run_cmd(handle_diagnose, m)
-
-        @self.client.on_message(
-            filters.command("bench", prefixes=prefixes) & _make_command_filter("bench"),
-            group=-1,
-        )
-        async def wrap_bench(c, m):
-            await run_cmd(handle_bench, m)
-
-        @self.client.on_message(
-            filters.command("uptime", prefixes=prefixes) & _make_command_filter("uptime"),
-            group=-1,
-        )
-        async def wrap_uptime(c, m):
-            await run_cmd(handle_uptime, m)
-
-        @self.client.on_message(
-            filters.command("archive", prefixes=prefixes) & _make_command_filter("archive"),
-            group=-1,
-        )
-        async def wrap_archive(c, m):
-            await run_cmd(handle_archive, m)
-
-        @self.client.on_message(
-            filters.command("unarchive", prefixes=prefixes) & _make_command_filter("unarchive"),
-            group=-1,
-        )
-        async def wrap_unarchive(c, m):
-            await run_cmd(handle_unarchive, m)
-
-        @self.client.on_message(
-            filters.command("health", prefixes=prefixes) & _make_command_filter("health"),
-            group=-1,
-        )
-        async def wrap_health(c, m):
-            await run_cmd(handle_health, m)
-
-        @self.client.on_message(
-            filters.command("context", prefixes=prefixes) & _make_command_filter("context"),
-            group=-1,
-        )
-        async def wrap_context(c, m):
-            await run_cmd(handle_context, m)
-
-        @self.client.on_message(
-            filters.command("pin", prefixes=prefixes) & _make_command_filter("pin"), group=-1
-        )
-        async def wrap_pin(c, m):
-            await run_cmd(handle_pin, m)
-
-        @self.client.on_message(
-            filters.command("unpin", prefixes=prefixes) & _make_command_filter("unpin"), group=-1
-        )
-        async def wrap_unpin(c, m):
-            await run_cmd(handle_unpin, m)
-
-        @self.client.on_message(
-            filters.command("fwd", prefixes=prefixes) & _make_command_filter("fwd"), group=-1
-        )
-        async def wrap_fwd(c, m):
-            await run_cmd(handle_fwd, m)
-
-        @self.client.on_message(
-            filters.command("collect", prefixes=prefixes) & _make_command_filter("collect"),
-            group=-1,
-        )
-        async def wrap_collect(c, m):
-            await run_cmd(handle_collect, m)
-
-        @self.client.on_message(
-            filters.command("help", prefixes=prefixes) & _make_command_filter("help"), group=-1
-        )
-        async def wrap_help(c, m):
-            await run_cmd(handle_help, m)
-
-        @self.client.on_message(
-            filters.command("remind", prefixes=prefixes) & _make_command_filter("remind"), group=-1
-        )
-        async def wrap_remind(c, m):
-            await run_cmd(handle_remind, m)
-
-        @self.client.on_message(
-            filters.command("reminders", prefixes=prefixes) & _make_command_filter("reminders"),
-            group=-1,
-        )
-        async def wrap_reminders(c, m):
-            await run_cmd(handle_reminders, m)
-
-        @self.client.on_message(
-            filters.command("rm_remind", prefixes=prefixes) & _make_command_filter("rm_remind"),
-            group=-1,
-        )
-        async def wrap_rm_remind(c, m):
-            await run_cmd(handle_rm_remind, m)
-
-        @self.client.on_message(
-            filters.command("cronstatus", prefixes=prefixes) & _make_command_filter("cronstatus"),
-            group=-1,
-        )
-        async def wrap_cronstatus(c, m):
-            await run_cmd(handle_cronstatus, m)
-
-        @self.client.on_message(
-            filters.command("schedule", prefixes=prefixes) & _make_command_filter("schedule"),
-            group=-1,
-        )
-        async def wrap_schedule(c, m):
-            await run_cmd(handle_schedule, m)
-
-        @self.client.on_message(
-            filters.command("tor", prefixes=prefixes) & _make_command_filter("tor"), group=-1
-        )
-        async def wrap_tor(c, m):
-            await run_cmd(handle_tor, m)
-
-        @self.client.on_message(
-            filters.command("browser", prefixes=prefixes) & _make_command_filter("browser"),
-            group=-1,
-        )
-        async def wrap_browser(c, m):
-            await run_cmd(handle_browser, m)
-
-        @self.client.on_message(
-            filters.command("monitor", prefixes=prefixes) & _make_command_filter("monitor"),
-            group=-1,
-        )
-        async def wrap_monitor(c, m):
-            await run_cmd(handle_monitor, m)
-
-        # Управление сообщениями: !del, !purge, !autodel
-        @self.client.on_message(
-            filters.command("del", prefixes=prefixes) & _make_command_filter("del"), group=-1
-        )
-        async def wrap_del(c, m):
-            await run_cmd(handle_del, m)
-
-        @self.client.on_message(
-            filters.command("purge", prefixes=prefixes) & _make_command_filter("purge"), group=-1
-        )
-        async def wrap_purge(c, m):
-            await run_cmd(handle_purge, m)
-
-        @self.client.on_message(
-            filters.command("autodel", prefixes=prefixes) & _make_command_filter("autodel"),
-            group=-1,
-        )
-        async def wrap_autodel(c, m):
-            await run_cmd(handle_autodel, m)
-
-        @self.client.on_message(
-            filters.command("summary", prefixes=prefixes) & _make_command_filter("summary"),
-            group=-1,
-        )
-        async def wrap_summary(c, m):
-            await run_cmd(handle_summary, m)
-
-        @self.client.on_message(
-            filters.command("catchup", prefixes=prefixes) & _make_command_filter("catchup"),
-            group=-1,
-        )
-        async def wrap_catchup(c, m):
-            await run_cmd(handle_catchup, m)
-
-        # Wave 49-D: !replay — manual on-demand message replay (owner-only).
-        @self.client.on_message(
-            filters.command("replay", prefixes=prefixes) & _make_command_filter("replay"),
-            group=-1,
-        )
-        async def wrap_replay(c, m):
-            await run_cmd(handle_replay, m)
-
-        @self.client.on_message(
-            filters.command("translate", prefixes=prefixes) & _make_command_filter("translate"),
-            group=-1,
-        )
-        async def wrap_translate(c, m):
-            await run_cmd(handle_translate, m)
-
-        @self.client.on_message(
-            filters.command("export", prefixes=prefixes) & _make_command_filter("export"),
-            group=-1,
-        )
-        async def wrap_export(c, m):
-            await run_cmd(handle_export, m)
-
-        @self.client.on_message(
-            filters.command("react", prefixes=prefixes) & _make_command_filter("react"),
-            group=-1,
-        )
-        async def wrap_react(c, m):
-            await run_cmd(handle_react, m)
-
-        @self.client.on_message(
-            filters.command("poll", prefixes=prefixes) & _make_command_filter("poll"),
-            group=-1,
-        )
-        async def wrap_poll(c, m):
-            await run_cmd(handle_poll, m)
-
-        @self.client.on_message(
-            filters.command("quiz", prefixes=prefixes) & _make_command_filter("quiz"),
-            group=-1,
-        )
-        async def wrap_quiz(c, m):
-            await run_cmd(handle_quiz, m)
-
-        @self.client.on_message(
-            filters.command("alias", prefixes=prefixes) & _make_command_filter("alias"),
-            group=-1,
-        )
-        async def wrap_alias(c, m):
-            await run_cmd(handle_alias, m)
-
-        @self.client.on_message(
-            filters.command("timer", prefixes=prefixes) & _make_command_filter("timer"),
-            group=-1,
-        )
-        async def wrap_timer(c, m):
-            await run_cmd(handle_timer, m)
-
-        @self.client.on_message(
-            filters.command("stopwatch", prefixes=prefixes) & _make_command_filter("stopwatch"),
-            group=-1,
-        )
-        async def wrap_stopwatch(c, m):
-            await run_cmd(handle_stopwatch, m)
-
-        @self.client.on_message(
-            filters.command("qr", prefixes=prefixes) & _make_command_filter("qr"), group=-1
-        )
-        async def wrap_qr(c, m):
-            await run_cmd(handle_qr, m)
-
-        # Тихая отправка сообщения от имени юзербота
-        @self.client.on_message(
-            filters.command("say", prefixes=prefixes) & _make_command_filter("say"), group=-1
-        )
-        async def wrap_say(c, m):
-            await run_cmd(handle_say, m)
-
-        @self.client.on_message(
-            filters.command("backup", prefixes=prefixes) & _make_command_filter("backup"),
-            group=-1,
-        )
-        async def wrap_backup(c, m):
-            await run_cmd(handle_backup, m)
+        dispatcher = CommandDispatcher(prefixes, alias_resolver=alias_service.resolve)
+        for entry in command_table:
+            names, handler, *rest = entry
+            dispatcher.register(
+                names,
+                handler,
+                acl_name=rest[0] if rest else None,
+                blocklist_keys=rest[1] if len(rest) > 1 else None,
+            )
+        self._command_dispatcher = dispatcher
+
+        async def check_command(_, client, m):
+            """
+            Single-pass фильтр команд: один разбор, один blocklist lookup и
+            одна ACL-проверка на сообщение. False → сообщение уходит в group 0
+            (`_process_message`), где отвечает fallback deny/unknown-путь.
+            """
+            match = dispatcher.match(m.text or m.caption or "")
+            if match is None or not m.from_user:
+                return False
+            if match.addressed_to and match.addressed_to not in _own_usernames(client):
+                return False
+            route = match.route
+            # Per-chat blocklist — silent skip (не логировать как ошибку).
+            # H6: для "silence" проверяем и legacy-ключ "тишина" (ACL skew).
+            if any(command_blocklist.is_blocked(m.chat.id, key) for key in route.blocklist_keys):
+                logger.debug(
+                    "command_blocklist_skip",
+                    command=route.acl_name,
+                    chat=m.chat.id,
+                )
+                return False
+            if not self._has_command_access(m.from_user, route.acl_name):
+                access_profile = self._get_access_profile(m.from_user)
+                logger.warning(
+                    "command_access_denied",
+                    command=route.acl_name,
+                    access_level=access_profile.level.value,
+                    user=(m.from_user.username or "").lower(),
+                    id=str(m.from_user.id),
+                    chat=m.chat.id,
+                )
+                return False
+            if match.text != (m.text or m.caption or "") and m.text:
+                # Алиас: !t привет → !translate привет (handler читает message.text).
+                m.text = match.text
+            m.command = match.command
+            return True
 
-        @self.client.on_message(
-            filters.command("eval", prefixes=prefixes) & _make_command_filter("eval"), group=-1
-        )
-        async def wrap_eval(c, m):
-            await run_cmd(handle_eval, m)
+        # Регистрация командных оберток (Фаза 4.4: модульные хендлеры) —
+        # один on_message вместо отдельного хендлера на каждую команду.
+        @self.client.on_message(filters.create(check_command), group=-1)
+        async def wrap_command(c, m):
+            route = dispatcher.route(m.command[0])
+            if route is not None:
+                await run_cmd(route.handler, m)
 
         # Хендлер для реакций других пользователей на сообщения Краба
         @self.client.on_message_reaction_updated()
@@ -1784,6 +1093,22 @@ class KraabUserbot(
                     error=str(_mal_exc),
                     error_type=type(_mal_exc).__name__,
                 )
+            # Cost analytics: rollup'ы и сырые вызовы в sqlite (переживают рестарт).
+            try:
+                from .core.cost_analytics import (  # noqa: PLC0415
+                    cost_analytics as _ca_singleton,
+                )
+
+                await asyncio.to_thread(
+                    _ca_singleton.configure_default_path,
+                    _runtime_state_dir / "cost_analytics.db",
+                )
+            except Exception as _ca_exc:  # noqa: BLE001
+                logger.warning(
+                    "cost_analytics_bootstrap_failed",
+                    error=str(_ca_exc),
+                    error_type=type(_ca_exc).__name__,
+                )
             # Wave 22-H: async-ified JSON loads для больших state-файлов.
             # Singleton уже загрузил state при import; здесь перечитываем
             # в thread, чтобы event-loop не тормозил на 100+ items.
@@ -2224,6 +1549,17 @@ class KraabUserbot(
             asyncio.create_task(self._run_startup_catchup_safe(), name="startup_catchup")
         except Exception as exc:  # noqa: BLE001
             logger.warning("startup_catchup_schedule_failed", error=str(exc))
+        # Write-behind last_seen watermark'и: сброс на SIGTERM через coordinator
+        # (unregister — start() повторяется при restart без дубля drain'а).
+        try:
+            from .bootstrap.shutdown_coordinator import shutdown_coordinator  # noqa: PLC0415
+
+            shutdown_coordinator.unregister("last_seen_watermarks")
+            shutdown_coordinator.register(
+                "last_seen_watermarks", self._drain_last_seen, timeout_sec=2.0
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("last_seen_drain_register_failed", error=str(exc))
         # Smart Routing Phase 5: сообщить feedback_tracker owner_id
         try:
             from .core.feedback_tracker import get_tracker  # noqa: PLC0415
@@ -2295,11 +1631,17 @@ class KraabUserbot(
         # Запуск фоновых задач (Safe Start)
         self._ensure_maintenance_started()
         self._telegram_watchdog_task = asyncio.create_task(self._telegram_session_watchdog())
-        self._background_task_reaper_task = asyncio.create_task(self._background_task_reaper())
+        # Периодические тики — job'ы общего heap-планировщика (один wakeup на
+        # ближайший due вместо N независимых `while True: sleep` петель).
+        periodic_scheduler.register(
+            "background_task_reaper", self._reap_stale_background_tasks, 60.0
+        )
         self._ensure_proactive_watch_started()
         self._ensure_silence_schedule_started()
         self._ensure_memory_indexer_started()
-        self._command_usage_save_task = asyncio.create_task(self._command_usage_save_loop())
+        periodic_scheduler.register(
+            "command_usage_save", self._command_usage_save_once, COMMAND_USAGE_SAVE_INTERVAL_SEC
+        )
         # Монитор сетевого offline: алерт если нет TG-событий >KRAB_NETWORK_OFFLINE_ALERT_SEC сек
         if int(getattr(config, "KRAB_NETWORK_OFFLINE_ALERT_SEC", 60) or 60) > 0:
             self._last_telegram_event_ts = time.time()  # сбрасываем к моменту старта
@@ -2321,14 +1663,18 @@ class KraabUserbot(
             self._macos_sleep_detect_loop(), name="macos_sleep_detect"
         )
         # Idea-features periodic tick: reply_scheduler / daily_brief / channel_digest / patterns
-        if self._idea_features_task is None or self._idea_features_task.done():
-            self._idea_features_task = asyncio.create_task(self._idea_features_tick_loop())
+        if not periodic_scheduler.is_registered("idea_features_tick"):
+            periodic_scheduler.register(
+                "idea_features_tick", self._idea_features_tick_once, IDEA_TICK_INTERVAL_SEC
+            )
             logger.info("idea_features_tick_started")
 
         # Wave 29-YY: chat_ban_cache periodic cleanup (follow-up 29-TT)
         # Фоновый sweep_expired каждые 5 минут, удаляет записи с истёкшим expires_at.
         if os.getenv("CHAT_BAN_PERIODIC_CLEANUP_ENABLED", "1") == "1":
-            asyncio.create_task(chat_ban_cache.periodic_cleanup(interval_seconds=300))
+            periodic_scheduler.register(
+                "chat_ban_cache_cleanup", chat_ban_cache.sweep_expired, 300.0, run_in_thread=True
+            )
             logger.info("chat_ban_periodic_cleanup_started", interval_sec=300)
 
         # Wave 214: memory leak detector (Wave 205) — снапшоты RSS каждые ~15 мин,
@@ -2336,12 +1682,10 @@ class KraabUserbot(
         if os.getenv("KRAB_MEMORY_LEAK_DETECTOR_ENABLED", "1").strip() != "0":
             try:
                 from .core.memory_leak_detector import (  # noqa: PLC0415
-                    background_loop as _memleak_loop,
+                    register_periodic as _memleak_register,
                 )
 
-                self._memory_leak_detector_task = asyncio.create_task(
-                    _memleak_loop(), name="memory_leak_detector"
-                )
+                _memleak_register(periodic_scheduler)
                 logger.info("memory_leak_detector_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2350,6 +1694,21 @@ class KraabUserbot(
                     error_type=type(exc).__name__,
                 )
 
+        # Smart Routing Stage 4a: переобучение embedding-классификатора триггеров
+        # по логу вердиктов LLM (активируется только после holdout-гейта).
+        try:
+            from .core.trigger_embedding_classifier import (  # noqa: PLC0415
+                register_periodic as _trigger_embed_register,
+            )
+
+            _trigger_embed_register(periodic_scheduler)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "trigger_embed_classifier_bootstrap_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
         # Wave 93/97: cost budget monitor loop — default-ON (observability-only,
         # шлёт alert только при ok→warning|critical транзиции).
         if os.getenv("KRAB_COST_BUDGET_MONITOR_ENABLED", "1").strip() != "0":
@@ -2370,12 +1729,10 @@ class KraabUserbot(
                             error_type=type(exc).__name__,
                         )
 
-                asyncio.create_task(
-                    cost_budget_monitor.run_loop(
-                        interval_sec=300,
-                        notifier=_cost_budget_notifier,
-                    ),
-                    name="cost_budget_monitor",
+                cost_budget_monitor.register_periodic(
+                    periodic_scheduler,
+                    notifier=_cost_budget_notifier,
+                    interval_sec=300,
                 )
                 logger.info("cost_budget_monitor_started", interval_sec=300)
             except Exception as exc:  # noqa: BLE001
@@ -2385,9 +1742,33 @@ class KraabUserbot(
                     error_type=type(exc).__name__,
                 )
 
+        # ACL snapshot: poll-watcher вместо stat на каждой per-message проверке.
+        try:
+            from .core.access_control import acl_snapshot_cache  # noqa: PLC0415
+
+            acl_snapshot_cache.register_periodic(periodic_scheduler, interval_sec=2.0)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "acl_snapshot_watcher_bootstrap_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
+        # Cost analytics write-behind flush (no-op без сконфигурированного sqlite).
+        try:
+            from .core.cost_analytics import cost_analytics as _ca_flush  # noqa: PLC0415
+
+            _ca_flush.register_periodic(periodic_scheduler, interval_sec=30)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(
+                "cost_analytics_flush_bootstrap_failed",
+                error=str(exc),
+                error_type=type(exc).__name__,
+            )
+
         # Wave 29-RR: LM Studio idle watcher — выгружает модель после N сек простоя
         if os.getenv("LM_STUDIO_IDLE_WATCHER_ENABLED", "1").strip().lower() in ("1", "true", "yes"):
-            _lm_idle_watcher.configure(model_manager)
+            _lm_idle_watcher.configure(model_manager, scheduler=periodic_scheduler)
             logger.info("lm_studio_idle_watcher_bootstrap_done")
 
         # Wave 133: LM Studio registry probe — visibility loaded models + RAM
@@ -2401,7 +1782,7 @@ class KraabUserbot(
                     configure as _lm_registry_configure,
                 )
 
-                _lm_registry_configure()
+                _lm_registry_configure(scheduler=periodic_scheduler)
                 logger.info("lm_studio_registry_probe_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2420,7 +1801,7 @@ class KraabUserbot(
             try:
                 from src.core.launchd_health_monitor import launchd_health_monitor
 
-                launchd_health_monitor.start()
+                launchd_health_monitor.register_periodic(periodic_scheduler)
                 logger.info("launchd_health_monitor_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2438,7 +1819,7 @@ class KraabUserbot(
             try:
                 from src.core.mcp_health_probe import mcp_health_probe
 
-                mcp_health_probe.start_background()
+                mcp_health_probe.register_periodic(periodic_scheduler)
                 logger.info("mcp_health_probe_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2454,12 +1835,9 @@ class KraabUserbot(
             "yes",
         ):
             try:
-                from src.core.disk_space_monitor import disk_space_monitor_loop
+                from src.core.disk_space_monitor import register_disk_space_monitor
 
-                asyncio.create_task(
-                    disk_space_monitor_loop(),
-                    name="krab_disk_space_monitor",
-                )
+                register_disk_space_monitor(periodic_scheduler)
                 logger.info("disk_space_monitor_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2478,7 +1856,7 @@ class KraabUserbot(
             try:
                 from src.core.krab_ear_health_probe import krab_ear_health_probe
 
-                krab_ear_health_probe.start()
+                krab_ear_health_probe.register_periodic(periodic_scheduler)
                 logger.info("krab_ear_health_probe_bootstrap_done")
             except Exception as exc:  # noqa: BLE001
                 logger.warning(
@@ -2664,7 +2042,14 @@ class KraabUserbot(
             except Exception as exc:  # noqa: BLE001
                 logger.warning("cron_native_scheduler_stop_failed", error=str(exc), non_fatal=True)
         await self._cancel_background_task("_telegram_watchdog_task")
-        await self._cancel_background_task("_background_task_reaper_task")
+        await periodic_scheduler.stop()
+        # Без poll-job ACL-снимок снова валидируется по mtime/inode.
+        try:
+            from .core.access_control import acl_snapshot_cache  # noqa: PLC0415
+
+            acl_snapshot_cache.reset()
+        except Exception:  # noqa: BLE001
+            pass
         await self._cancel_background_task("_proactive_watch_task")
         await self._cancel_background_task("_silence_schedule_task")
         await self._cancel_background_task("_memory_indexer_task")
@@ -2683,6 +2068,8 @@ class KraabUserbot(
             await self._safe_stop_client(reason="runtime_stop")
         except Exception as exc:  # noqa: BLE001
             logger.warning("telegram_stop_failed", error=str(exc), non_fatal=True)
+        # Клиент остановлен — новых сообщений не будет, сбрасываем watermark'и.
+        self._flush_last_seen()
         # Останавливаем idle watcher до закрытия model_manager
         _w = _lm_idle_watcher.get_watcher()
         if _w is not None:
@@ -2731,7 +2118,7 @@ class KraabUserbot(
             cmd_word = text.lstrip().split()[0].lstrip("!/.").lower()
             if cmd_word in self._known_commands:
                 # W32 — blocklist silent skip даже в fallback dispatcher-пути.
-                # Раньше blocklist проверялся только в _make_command_filter; если
+                # Раньше blocklist проверялся только в командном фильтре; если
                 # filter не attached (команда известна, но правило per-chat
                 # отключает её), сообщение попадало сюда и генерировало deny-reply
                 # с текстом «!status доступна только…» — spam-бот ловил в нём
@@ -2895,6 +2282,12 @@ class KraabUserbot(
                 from .core.trigger_detector import (  # noqa: PLC0415
                     detect_smart_trigger,
                 )
+                from .core.trigger_embedding_classifier import (  # noqa: PLC0415
+                    get_embedding_classifier as _get_embed_classifier,
+                )
+                from .core.trigger_embedding_classifier import (  # noqa: PLC0415
+                    is_enabled as _embed_classifier_enabled,
+                )
 
                 # Build chat_context — последние сообщения чата (best-effort).
                 # 27.04.2026 fix: ChatWindow теперь хранит sender_name → LLM
@@ -2946,6 +2339,9 @@ class KraabUserbot(
                         llm_classifier=_get_intent_classifier(),
                         has_media=_has_media_for_trigger,
                         user_id=_trigger_user_id,
+                        embed_classifier=(
+                            _get_embed_classifier() if _embed_classifier_enabled() else None
+                        ),
                     )
                     has_implicit_trigger = bool(smart_trigger_result.should_respond)
                     logger.info(
@@ -4341,18 +3737,29 @@ class KraabUserbot(
                 )
                 return
 
-            if _msg_priority == Priority.P0_INSTANT:
-                # Не ждём lock — P0 обрабатывается немедленно.
-                logger.debug(
-                    "p0_instant_bypass",
-                    chat_id=chat_id,
-                    reason=_msg_priority_reason,
-                    message_id=str(getattr(message, "id", "") or ""),
-                )
-                await self._process_message_serialized(**_process_kwargs)
+            # Тот же приоритет получают слоты OpenClaw gateway (GatewayScheduler):
+            # P0 обходит очередь фоновых запросов (catchup/cron — P2).
+            # Telegram-вызовы ответа идут в lane глобального rate limiter'а:
+            # P2 — background, owner — своя lane, остальное — interactive.
+            if _msg_priority == Priority.P2_LOW:
+                _tg_lane = TelegramLane.BACKGROUND
+            elif access_profile.level == AccessLevel.OWNER:
+                _tg_lane = TelegramLane.OWNER
             else:
-                async with self._get_chat_processing_lock(chat_id):
+                _tg_lane = TelegramLane.INTERACTIVE
+            with gateway_priority(_msg_priority), telegram_lane(_tg_lane):
+                if _msg_priority == Priority.P0_INSTANT:
+                    # Не ждём lock — P0 обрабатывается немедленно.
+                    logger.debug(
+                        "p0_instant_bypass",
+                        chat_id=chat_id,
+                        reason=_msg_priority_reason,
+                        message_id=str(getattr(message, "id", "") or ""),
+                    )
                     await self._process_message_serialized(**_process_kwargs)
+                else:
+                    async with self._get_chat_processing_lock(chat_id):
+                        await self._process_message_serialized(**_process_kwargs)
 
         except KrabError as e:
             logger.warning("provider_error", error=str(e), retryable=e.retryable)
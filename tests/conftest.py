@@ -406,6 +406,31 @@ def _reset_krab_global_state() -> Iterator[None]:
     except Exception:  # noqa: BLE001
         pass
 
+    # tool_result_cache singleton — call_tool_unified кэширует web_search &co,
+    # иначе mock-результат одного теста отдаётся следующему.
+    try:
+        from src.core.tool_result_cache import tool_result_cache as _trc  # noqa: PLC0415
+
+        _trc.reset()
+    except Exception:  # noqa: BLE001
+        pass
+
+    # ACL snapshot cache — тесты переписывают ACL-файлы по одним и тем же путям.
+    try:
+        from src.core.access_control import acl_snapshot_cache as _acl_cache  # noqa: PLC0415
+
+        _acl_cache.reset()
+    except Exception:  # noqa: BLE001
+        pass
+
+    # periodic_scheduler singleton — jobs / driver привязаны к event loop теста.
+    try:
+        from src.core.periodic_scheduler import periodic_scheduler as _ps  # noqa: PLC0415
+
+        _ps.reset()
+    except Exception:  # noqa: BLE001
+        pass
+
     # _TelegramSendQueue singleton — содержит asyncio.Queue привязанные к конкретному
     # event loop. После смены loop (следующий тест) они вызывают RuntimeError:
     # "Queue is bound to a different event loop".
@@ -193,6 +193,28 @@ def _isolate_persistent_runtime_state(
     except Exception:  # noqa: BLE001
         pass
 
+    # 8. history_log — append-only лог истории чатов (history_log.db).
+    # `!clear cache` / `!reset` и OpenClawClient пишут/стирают его напрямую;
+    # без redirect тесты чистили бы реальную историю на dev машине.
+    try:
+        import sys as _sys  # noqa: PLC0415
+
+        from src import cache_manager as _cm
+
+        monkeypatch.setattr(_cm, "_CACHE_DIR", tmp_root / "cache")
+        _isolated_log = _cm.ChatHistoryLog("history_log.db")
+        for _mod_name in (
+            "src.cache_manager",
+            "src.openclaw_client",
+            "src.handlers.command_handlers",
+            "src.handlers.commands.state_commands",
+        ):
+            _mod = _sys.modules.get(_mod_name)
+            if _mod is not None and hasattr(_mod, "history_log"):
+                monkeypatch.setattr(_mod, "history_log", _isolated_log)
+    except Exception:  # noqa: BLE001
+        pass
+
     yield
 
     # Post-test: ещё раз чистим LRU чтобы следующий test видел пустой cache
@@ -20,6 +20,8 @@ from src.core.access_control import (
     PARTIAL_ACCESS_COMMANDS,
     USERBOT_KNOWN_COMMANDS,
     AccessLevel,
+    AclSnapshotCache,
+    acl_snapshot_cache,
     build_command_access_matrix,
     get_effective_owner_label,
     get_effective_owner_subjects,
@@ -194,3 +196,65 @@ def test_update_acl_subject_rejects_unsupported_level(
     monkeypatch.setattr(config, "USERBOT_ACL_FILE", tmp_path / "acl.json", raising=False)
     with pytest.raises(ValueError, match="unsupported_acl_level"):
         update_acl_subject("guest", "@reader", add=True)
+
+
+def test_acl_snapshot_reloads_only_on_file_change(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    acl_path = tmp_path / "acl.json"
+    acl_path.write_text('{"full":["reader"]}', encoding="utf-8")
+    monkeypatch.setattr(config, "USERBOT_ACL_FILE", acl_path, raising=False)
+    acl_snapshot_cache.invalidate(acl_path)
+    loads_before = acl_snapshot_cache.stats()["loads"]
+
+    for _ in range(5):
+        profile = resolve_access_profile(user_id=1, username="reader", self_user_id=777)
+        assert profile.level == AccessLevel.FULL
+    assert acl_snapshot_cache.stats()["loads"] == loads_before + 1
+
+    acl_path.write_text('{"partial":["reader"]}', encoding="utf-8")
+    profile = resolve_access_profile(user_id=1, username="reader", self_user_id=777)
+    assert profile.level == AccessLevel.PARTIAL
+
+
+def test_acl_snapshot_is_write_through(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    acl_path = tmp_path / "acl.json"
+    monkeypatch.setattr(config, "USERBOT_ACL_FILE", acl_path, raising=False)
+    assert resolve_access_profile(user_id=5, username="x", self_user_id=777).level == (
+        AccessLevel.GUEST
+    )
+    loads_before = acl_snapshot_cache.stats()["loads"]
+    update_acl_subject("owner", "5", add=True)
+    assert resolve_access_profile(user_id=5, username="x", self_user_id=777).level == (
+        AccessLevel.OWNER
+    )
+    assert acl_snapshot_cache.stats()["loads"] == loads_before
+
+
+def test_acl_snapshot_watching_mode_skips_stat_until_refresh(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import src.core.access_control as acl_module
+
+    acl_path = tmp_path / "acl.json"
+    acl_path.write_text('{"owner":["42"]}', encoding="utf-8")
+    cache = AclSnapshotCache()
+    assert "42" in cache.get(acl_path).ids["owner"]
+
+    class _Scheduler:
+        def register(self, name, func, interval_sec, **kwargs):  # noqa: ANN001, ANN003
+            self.job = func
+
+    scheduler = _Scheduler()
+    cache.register_periodic(scheduler)  # type: ignore[arg-type]
+    acl_path.write_text('{"owner":["43"]}', encoding="utf-8")
+
+    def _no_stat(path):  # noqa: ANN001
+        raise AssertionError("stat on read path")
+
+    monkeypatch.setattr(acl_module, "_acl_file_signature", _no_stat)
+    assert "42" in cache.get(acl_path).ids["owner"]
+    monkeypatch.undo()
+
+    assert scheduler.job() == 1
+    assert cache.get(acl_path).ids["owner"] == frozenset({"43"})
@@ -420,3 +420,56 @@ def test_aggregate_perf_exclude_expected_keeps_successes(tmp_path: Path) -> None
     # Success запись остаётся даже если error_message содержит "quota"
     assert result["total_calls"] == 1
     assert result["by_kind"]["cli"]["count"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Sketch-rollup: инкрементальное догоняние лога и точность перцентилей
+# ---------------------------------------------------------------------------
+
+
+def test_aggregate_perf_picks_up_new_records_incrementally(tmp_path: Path) -> None:
+    """Повторный запрос видит и record_bypass_call, и внешние дозаписи."""
+    log_file = tmp_path / "bypass_perf.jsonl"
+    now = time.time()
+    log_file.write_text(
+        json.dumps({"ts": now - 10, "kind": "cli", "model": "m", "duration_sec": 1.0,
+                    "success": True}) + "\n"
+    )
+
+    with patch("src.integrations._bypass_perf.PERF_LOG", log_file):
+        assert aggregate_perf(window_sec=3600)["total_calls"] == 1
+        record_bypass_call(kind="cli", model="m", duration_sec=2.0, success=False)
+        with log_file.open("a") as fh:
+            fh.write(json.dumps({"ts": now, "kind": "gemma", "model": "g",
+                                 "duration_sec": 3.0, "success": True}) + "\n")
+        result = aggregate_perf(window_sec=3600)
+
+    assert result["total_calls"] == 3
+    assert result["total_failures"] == 1
+    assert result["by_kind"]["cli"]["p99"] == 2.0
+    assert result["by_model"]["g"]["count"] == 1
+
+
+def test_aggregate_perf_large_window_percentiles_within_1pct(tmp_path: Path) -> None:
+    """На тысячах записей перцентили из sketch'ей в пределах 1% от точных."""
+    import random
+
+    log_file = tmp_path / "bypass_perf.jsonl"
+    now = time.time()
+    rnd = random.Random(3)
+    durs = [round(rnd.lognormvariate(0.3, 1.0), 3) for _ in range(5000)]
+    records = [
+        {"ts": now - 7000 + i, "kind": "cli", "model": "m", "duration_sec": d, "success": True}
+        for i, d in enumerate(durs)
+    ]
+    log_file.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+    with patch("src.integrations._bypass_perf.PERF_LOG", log_file):
+        stats = aggregate_perf(window_sec=7200)["by_kind"]["cli"]
+
+    ordered = sorted(durs)
+    for key, pct in (("p50", 50), ("p95", 95), ("p99", 99)):
+        exact = ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+        assert abs(stats[key] - exact) / exact <= 0.011
+    assert stats["count"] == 5000
+    assert stats["mean"] == pytest.approx(sum(durs) / len(durs), abs=1e-3)
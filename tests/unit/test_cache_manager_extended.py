@@ -14,7 +14,7 @@ import unittest.mock as mock
 
 import pytest
 
-from src.cache_manager import DEFAULT_TTL_SECONDS, CacheManager
+from src.cache_manager import DEFAULT_TTL_SECONDS, CacheManager, ChatHistoryLog
 from src.core.exceptions import CacheError
 
 # ---------------------------------------------------------------------------
@@ -224,3 +224,165 @@ class TestConcurrentAccess:
         # Все записанные ключи должны читаться корректно
         for key, val in written.items():
             assert cache.get(key) == val
+
+
+# ---------------------------------------------------------------------------
+# 7. Persistent WAL-соединение и async-фасад
+# ---------------------------------------------------------------------------
+
+
+class TestPersistentBackend:
+    def test_single_connection_reused(self, cache):
+        """Все операции идут через одно long-lived соединение."""
+        cache.set("k", "v", ttl=60)
+        conn = cache._conn
+        assert conn is not None
+        cache.get("k")
+        cache.delete("k")
+        assert cache._conn is conn
+
+    def test_wal_journal_mode(self, cache):
+        mode = cache._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_close_then_reopen(self, cache):
+        cache.set("persist", "yes", ttl=60)
+        cache.close()
+        assert cache._conn is None
+        assert cache.get("persist") == "yes"
+
+    def test_sweep_deletes_in_batches(self, cache, monkeypatch):
+        """clear_expired() проходит пачками и удаляет всё просроченное."""
+        monkeypatch.setattr(type(cache), "_SWEEP_BATCH", 3)
+        for i in range(10):
+            cache.set(f"old_{i}", "x", ttl=-1)
+        cache.set("fresh", "y", ttl=60)
+        cache.clear_expired()
+        count = cache._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        assert count == 1
+
+    def test_periodic_sweep_on_set(self, cache, monkeypatch):
+        """set() запускает sweep, когда прошёл _SWEEP_INTERVAL_SEC."""
+        cache.set("stale", "x", ttl=-1)
+        cache._last_sweep_at = 0.0
+        monkeypatch.setattr(type(cache), "_SWEEP_INTERVAL_SEC", 0.0)
+        cache.set("trigger", "y", ttl=60)
+        assert cache._backend_get("stale") is None
+
+
+class TestAsyncFacade:
+    @pytest.mark.asyncio
+    async def test_aset_aget_adelete(self, cache):
+        await cache.aset("async_key", "async_val", ttl=60)
+        assert await cache.aget("async_key") == "async_val"
+        await cache.adelete("async_key")
+        assert await cache.aget("async_key") is None
+
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop_thread(self, cache):
+        """Операции выполняются в выделенном executor-потоке, не в loop."""
+        seen: list[str] = []
+        original = cache._backend_get
+
+        def _spy(key):
+            seen.append(threading.current_thread().name)
+            return original(key)
+
+        with mock.patch.object(cache, "_backend_get", side_effect=_spy):
+            await cache.aget("x")
+        assert seen and seen[0].startswith("krab_cache")
+
+    @pytest.mark.asyncio
+    async def test_aset_propagates_cache_error(self, cache):
+        with mock.patch.object(cache, "_backend_set", side_effect=sqlite3.Error("boom")):
+            with pytest.raises(CacheError):
+                await cache.aset("k", "v", ttl=60)
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Изолированный ChatHistoryLog во временной директории."""
+    import src.cache_manager as cm_mod
+
+    monkeypatch.setattr(cm_mod, "_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(cm_mod, "_CACHE_DIR_FALLBACK", tmp_path / "fallback")
+    return ChatHistoryLog("history_test.db")
+
+
+def _log_seqs(log: ChatHistoryLog, chat_id: str) -> list[int]:
+    rows = log._conn.execute(
+        "SELECT seq FROM chat_history_log WHERE chat_id = ? ORDER BY seq", (chat_id,)
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+class TestChatHistoryLog:
+    def test_persist_appends_only_new_messages(self, history):
+        session = [{"role": "system", "content": "sys"}, {"role": "user", "content": "u1"}]
+        assert history.persist("c", session) == 1
+        session.append({"role": "assistant", "content": "a1"})
+        session.append({"role": "user", "content": "u2"})
+        assert history.persist("c", session) == 2
+        assert history.persist("c", session) == 0
+        assert _log_seqs(history, "c") == [0, 1, 2]
+
+    def test_sliding_window_advances_watermark(self, history):
+        """Обрезка головы окна удаляет старые строки, не переписывая хвост."""
+        session = [{"role": "system", "content": "sys"}]
+        session += [{"role": "user", "content": f"m{i}"} for i in range(5)]
+        history.persist("c", session)
+        session = [session[0], *session[3:], {"role": "assistant", "content": "new"}]
+        assert history.persist("c", session) == 1
+        assert _log_seqs(history, "c") == [2, 3, 4, 5]
+        loaded = history.load("c")
+        assert [m["content"] for m in loaded] == ["sys", "m2", "m3", "m4", "new"]
+
+    def test_non_append_change_rewrites_window(self, history):
+        session = [{"role": "user", "content": "a"}, {"role": "user", "content": "b"}]
+        history.persist("c", session)
+        session[0] = {"role": "user", "content": "a-edited"}
+        assert history.persist("c", session) == 2
+        # seq продолжают расти, старые строки удалены.
+        assert _log_seqs(history, "c") == [2, 3]
+        assert [m["content"] for m in history.load("c")] == ["a-edited", "b"]
+
+    def test_in_place_edit_of_persisted_message_rewrites_window(self, history):
+        """Правка уже сохранённого dict'а (тот же объект) не теряется."""
+        session = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}]
+        history.persist("c", session)
+        session[1]["content"] = "b-sanitized"
+        session.append({"role": "user", "content": "c"})
+        assert history.persist("c", session) == 3
+        assert _log_seqs(history, "c") == [2, 3, 4]
+        assert [m["content"] for m in history.load("c")] == ["a", "b-sanitized", "c"]
+
+    def test_system_prompt_stored_in_head(self, history):
+        session = [{"role": "system", "content": "v1"}, {"role": "user", "content": "u"}]
+        history.persist("c", session)
+        session[0]["content"] = "v2"  # in-place правка (nonce)
+        assert history.persist("c", session) == 0
+        assert history.load("c")[0]["content"] == "v2"
+
+    def test_load_then_persist_appends_after_restart(self, history, tmp_path):
+        history.persist("c", [{"role": "user", "content": "u1"}])
+        history.close()
+        restored = ChatHistoryLog("history_test.db")
+        session = restored.load("c")
+        session.append({"role": "assistant", "content": "a1"})
+        assert restored.persist("c", session) == 1
+        assert _log_seqs(restored, "c") == [0, 1]
+
+    def test_expired_history_is_dropped(self, history):
+        history.ttl = -1
+        history.persist("c", [{"role": "user", "content": "u"}])
+        assert history.has("c") is False
+        assert history.load("c") is None
+
+    def test_delete_and_clear_all(self, history):
+        history.persist("a", [{"role": "user", "content": "x"}])
+        history.persist("b", [{"role": "user", "content": "y"}])
+        history.delete("a")
+        assert history.has("a") is False
+        assert history.has("b") is True
+        assert history.clear_all() == 1
+        assert history.load("b") is None
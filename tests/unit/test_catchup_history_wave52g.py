@@ -2,7 +2,7 @@
 """Wave 52-G: тесты для catchup history persistence + endpoint.
 
 Покрывает:
-- ``_record_catchup_history`` — append + trim FIFO + defensive write.
+- ``_record_catchup_history`` — append + FIFO (ротация EventLog) + defensive write.
 - GET /api/observability/catchup-history — tail JSONL, malformed handling.
 - E2E: _catchup_all_owner_chats записывает запись в JSONL.
 """
@@ -78,7 +78,11 @@ def test_record_catchup_appends_to_jsonl(temp_runtime_state: Path) -> None:
 
 
 def test_record_catchup_trims_to_max_100(temp_runtime_state: Path) -> None:
-    """После записи 105 entries файл должен содержать только последние 100."""
+    """После записи 105 entries история отдаёт только последние 100.
+
+    FIFO реализован ротацией сегментов EventLog: на диске держится не больше
+    двух сегментов по 100 записей, reader отдаёт хвост из 100.
+    """
     for i in range(105):
         mc._record_catchup_history(
             started_at=1_700_000_000.0 + i,
@@ -87,14 +91,14 @@ def test_record_catchup_trims_to_max_100(temp_runtime_state: Path) -> None:
             per_chat_stats=[{"chat_id": i, "caught_up": i, "skipped_self": 0, "history_size": 1}],
         )
 
-    path = temp_runtime_state / "catchup_history.jsonl"
-    lines = path.read_text(encoding="utf-8").splitlines()
-    assert len(lines) == 100
+    entries = mc.read_catchup_history(limit=1000)
+    assert len(entries) == 100
     # Первая запись теперь — index 5 (отброшены 0..4).
-    first = json.loads(lines[0])
-    assert first["by_chat"][0]["chat_id"] == 5
-    last = json.loads(lines[-1])
-    assert last["by_chat"][0]["chat_id"] == 104
+    assert entries[0]["by_chat"][0]["chat_id"] == 5
+    assert entries[-1]["by_chat"][0]["chat_id"] == 104
+    # Сегментов на диске не больше двух (активный + один закрытый).
+    segments = sorted(temp_runtime_state.glob("catchup_history*.jsonl"))
+    assert len(segments) <= 2
 
 
 def test_record_catchup_atomic_on_concurrent_writes(temp_runtime_state: Path) -> None:
@@ -129,18 +133,19 @@ def test_record_catchup_atomic_on_concurrent_writes(temp_runtime_state: Path) ->
 
     path = temp_runtime_state / "catchup_history.jsonl"
     lines = path.read_text(encoding="utf-8").splitlines()
-    # Все 50 записей записаны (FIFO trim не сработал — лимит 100).
+    # Все 50 записей записаны (ротация не сработала — лимит 100).
     assert len(lines) == 50
     # Каждая строка — valid JSON dict.
     for raw in lines:
         parsed = json.loads(raw)
         assert isinstance(parsed, dict)
         assert "by_chat" in parsed
+    assert len(mc.read_catchup_history()) == 50
 
 
 def test_record_catchup_failure_doesnt_block_catchup(temp_runtime_state: Path, caplog) -> None:
     """Если open() падает с OSError — функция логирует warning, не raise."""
-    with patch("src.userbot.message_catchup.open", side_effect=OSError("disk full")):
+    with patch.object(Path, "open", side_effect=OSError("disk full")):
         # Не должно быть exception.
         mc._record_catchup_history(
             started_at=1.0,
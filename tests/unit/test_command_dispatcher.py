@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Тесты single-pass командного диспетчера (src/userbot/command_dispatcher.py)."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from pyrogram import filters
+
+from src.userbot.command_dispatcher import CommandDispatcher, parse_command_args
+
+PREFIXES = ["!краб", "Краб", "/", "!", "."]
+
+
+async def _handle_status(bot, m):  # noqa: ANN001, ANN202
+    return None
+
+
+async def _handle_silence(bot, m):  # noqa: ANN001, ANN202
+    return None
+
+
+def _dispatcher(alias_resolver=None) -> CommandDispatcher:  # noqa: ANN001
+    d = CommandDispatcher(PREFIXES, alias_resolver=alias_resolver)
+    d.register("status", _handle_status)
+    d.register(
+        ["тишина", "silence"],
+        _handle_silence,
+        acl_name="silence",
+        blocklist_keys=("silence", "тишина"),
+    )
+    d.register(["loglevel", "verbose"], _handle_status)
+    return d
+
+
+def test_plain_text_is_rejected() -> None:
+    d = _dispatcher()
+    assert d.match("привет, как дела?") is None
+    assert d.match("") is None
+    assert d.match("!unknown arg") is None
+
+
+def test_route_carries_acl_and_blocklist_keys() -> None:
+    match = _dispatcher().match("!тишина 30")
+    assert match is not None
+    assert match.route.acl_name == "silence"
+    assert match.route.blocklist_keys == ("silence", "тишина")
+    assert match.command == ["тишина", "30"]
+
+
+def test_secondary_name_uses_first_name_as_acl() -> None:
+    match = _dispatcher().match(".verbose on")
+    assert match is not None
+    assert match.route.acl_name == "loglevel"
+    assert match.command == ["verbose", "on"]
+
+
+def test_addressed_command_reports_target() -> None:
+    match = _dispatcher().match("/status@Krab_Bot now")
+    assert match is not None
+    assert match.addressed_to == "krab_bot"
+    assert _dispatcher().match("/status@ now") is None
+
+
+def test_alias_is_resolved_once() -> None:
+    calls: list[str] = []
+
+    def resolver(text: str) -> str:
+        calls.append(text)
+        return text.replace("!st", "!status", 1) if text.startswith("!st ") else text
+
+    d = _dispatcher(resolver)
+    match = d.match("!st full")
+    assert match is not None
+    assert match.route.name == "status"
+    assert match.text == "!status full"
+    assert match.command == ["status", "full"]
+    # Известная команда и обычный текст резолвер не трогают.
+    d.match("!status")
+    d.match("hello")
+    assert calls == ["!st full"]
+
+
+def test_duplicate_registration_rejected() -> None:
+    d = _dispatcher()
+    with pytest.raises(ValueError):
+        d.register("silence", _handle_status)
+
+
+def test_parse_command_args_handles_quotes() -> None:
+    assert parse_command_args('a "b c" \'d\' e\\"f') == ["a", "b c", "d", 'e"f']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "text",
+    [
+        "!status",
+        "!STATUS arg1 'quoted arg' tail",
+        "/status@krab_bot x",
+        "/status@other x",
+        "!status@",
+        "Крабstatus now",
+        "!краб status",
+        "!statusx",
+        "! status",
+        ".тишина 5",
+        "!silence",
+        "обычный текст",
+    ],
+)
+async def test_parity_with_pyrogram_command_filter(text: str) -> None:
+    """Совпадение и `message.command` такие же, как у filters.command."""
+    client = SimpleNamespace(me=SimpleNamespace(username="krab_bot", usernames=None))
+    message = SimpleNamespace(text=text, caption=None, command=None)
+    expected = None
+    for names in ("status", ["тишина", "silence"]):
+        flt = filters.command(names, prefixes=PREFIXES)
+        if await flt(client, message):
+            expected = message.command
+            break
+
+    match = _dispatcher().match(text)
+    if match is not None and match.addressed_to and match.addressed_to != "krab_bot":
+        match = None
+    assert (match.command if match else None) == expected
@@ -135,3 +135,73 @@ class TestDetectLanguageExtra:
             "объёму: алгоритм не должен давать ложных срабатываний на длинных текстах."
         )
         assert detect_language(long_ru) == "ru"
+
+
+# ------------------------------------------------------------------
+# detect_language — script fast path и LRU
+# ------------------------------------------------------------------
+
+
+class TestDetectLanguageTiers:
+    # conftest выгружает src.core.language_detect перед каждым тестом, поэтому
+    # кэш/патчи проверяем на модуле, импортированном внутри теста.
+    @pytest.fixture
+    def ld(self):
+        import src.core.language_detect as module
+
+        module.clear_language_cache()
+        yield module
+        module.clear_language_cache()
+
+    @pytest.mark.parametrize(
+        ("text", "lang"),
+        [
+            ("Привет, как ты? Всё хорошо 🙂", "ru"),
+            ("안녕하세요, 잘 지내세요?", "ko"),
+            ("今日はとても良い天気ですね", "ja"),
+            ("Καλημέρα, τι κάνεις;", "el"),
+            ("שלום, מה שלומך היום", "he"),
+        ],
+    )
+    def test_unambiguous_script_skips_langdetect(self, ld, monkeypatch, text, lang) -> None:
+        monkeypatch.setattr(ld, "detect", lambda text: pytest.fail("langdetect called"))
+        assert ld.detect_language(text) == lang
+        assert ld.language_cache_stats()["misses"] == 0
+
+    def test_non_russian_cyrillic_goes_to_langdetect(self, ld) -> None:
+        assert ld.detect_language("Привіт, як справи? Що нового у тебе сьогодні?") == "uk"
+        assert ld.language_cache_stats()["misses"] == 1
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            # Болгарский: чистый «русский» алфавит, но без ы/э/ё.
+            "Здравей, как си? Искам да попитам нещо за утре вечерта.",
+            # Казахский: ы/э есть, но и буквы из U+0490–U+04FF.
+            "Сәлеметсіз бе, қалыңыз қалай? Бүгін ауа райы жақсы.",
+            # Русский без маркеров — тоже через langdetect, не угадываем.
+            "Привет, как дела?",
+        ],
+    )
+    def test_ambiguous_cyrillic_goes_to_langdetect(self, ld, monkeypatch, text) -> None:
+        monkeypatch.setattr(ld, "detect", lambda text: "xx")
+        assert ld.detect_language(text) == "xx"
+        assert ld.language_cache_stats()["misses"] == 1
+
+    def test_bulgarian_is_not_labelled_russian(self, ld) -> None:
+        text = "Здравей, как си? Искам да попитам нещо за утре вечерта."
+        assert ld.detect_language(text) == "bg"
+
+    def test_latin_is_cached(self, ld, monkeypatch) -> None:
+        text = "Hola, ¿qué tal estás? Nos vemos mañana"
+        assert ld.detect_language(text) == "es"
+        monkeypatch.setattr(ld, "detect", lambda text: pytest.fail("langdetect called"))
+        assert ld.detect_language(f"  {text} ") == "es"
+        assert ld.language_cache_stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_cache_is_bounded(self, ld, monkeypatch) -> None:
+        monkeypatch.setattr(ld, "_CACHE_MAX_SIZE", 3)
+        monkeypatch.setattr(ld, "detect", lambda text: "en")
+        for i in range(10):
+            ld.detect_language(f"message number {i}")
+        assert ld.language_cache_stats()["size"] == 3
@@ -136,7 +136,7 @@ class TestMonthlyFiltering:
         """Вызовы с timestamp прошлого месяца не входят в monthly cost."""
         ca = CostAnalytics()
         # Добавляем запись вручную с очень старым timestamp
-        ca._calls.append(
+        ca.record_call(
             CallRecord(
                 model_id="google/x",
                 input_tokens=1_000_000,
@@ -157,7 +157,7 @@ class TestMonthlyFiltering:
     def test_session_cost_includes_all_calls(self) -> None:
         """get_cost_so_far_usd включает ВСЕ записи, включая старые."""
         ca = CostAnalytics()
-        ca._calls.append(
+        ca.record_call(
             CallRecord(
                 model_id="google/x",
                 input_tokens=0,
@@ -191,7 +191,7 @@ class TestForecastExtended:
     def test_forecast_with_only_old_calls(self) -> None:
         """Если все вызовы старые (не этот месяц), forecast = 0.0."""
         ca = CostAnalytics()
-        ca._calls.append(
+        ca.record_call(
             CallRecord(
                 model_id="google/x",
                 input_tokens=100,
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты rollup-агрегатов и SQLite-персистентности src/core/cost_analytics.py.
+
+Покрываем: часовые бакеты (cost_usd_since), месячные итоги без скана истории,
+write-behind flush + восстановление после рестарта, компакцию сырых записей,
+ограничение окна _calls.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from src.core.cost_analytics import BUCKET_SEC, CallRecord, CostAnalytics
+
+
+def _usage(inp: int = 1_000_000, out: int = 0) -> dict:
+    return {"prompt_tokens": inp, "completion_tokens": out}
+
+
+def test_monthly_cost_ignores_old_records_without_rescan() -> None:
+    ca = CostAnalytics()
+    ca.record_call(CallRecord("google/x", 0, 0, 7.0, timestamp=1_000_000.0))
+    ca.record_usage(_usage(), model_id="google/x")
+    assert ca.get_monthly_cost_usd() == pytest.approx(ca.get_cost_so_far_usd() - 7.0)
+    assert ca.build_usage_report_dict()["by_model"]["google/x"]["calls"] == 2
+
+
+def test_cost_usd_since_uses_hour_buckets() -> None:
+    ca = CostAnalytics()
+    now = time.time()
+    ca.record_call(CallRecord("google/x", 0, 0, 1.0, timestamp=now))
+    ca.record_call(CallRecord("google/x", 0, 0, 2.0, timestamp=now - 3 * BUCKET_SEC))
+    assert ca.cost_usd_since(now) == 1.0
+    assert ca.cost_usd_since(now - 3 * BUCKET_SEC) == 3.0
+
+
+def test_flush_and_restore_survive_restart(tmp_path: Path) -> None:
+    db = tmp_path / "cost_analytics.db"
+    ca = CostAnalytics(storage_path=db)
+    ca.record_usage(_usage(), model_id="google/x", channel="telegram")
+    ca.record_usage(_usage(), model_id="google/x", channel="telegram")
+    assert ca.flush() == 2
+    assert ca.flush() == 0
+    month_cost = ca.get_monthly_cost_usd()
+    ca.close()
+
+    restored = CostAnalytics(monthly_budget_usd=month_cost, storage_path=db)
+    assert restored.get_monthly_cost_usd() == month_cost
+    assert restored.check_budget_ok() is False
+    # Сессионные счётчики после рестарта начинаются с нуля.
+    assert restored.get_cost_so_far_usd() == 0.0
+    assert len(restored._calls) == 2
+    assert restored.monthly_calls_forecast() is not None
+    restored.close()
+
+
+def test_rollup_rows_are_upserted(tmp_path: Path) -> None:
+    db = tmp_path / "cost_analytics.db"
+    ca = CostAnalytics(storage_path=db)
+    ca.record_usage(_usage(), model_id="google/x", channel="web", tool_calls_count=2)
+    ca.flush()
+    ca.record_usage(_usage(), model_id="google/x", channel="web", is_fallback=True)
+    ca.close()
+    rows = (
+        sqlite3.connect(db)
+        .execute("SELECT calls, tool_calls, fallbacks FROM cost_rollup_hourly")
+        .fetchall()
+    )
+    assert rows == [(2, 2, 1)]
+
+
+def test_flush_compacts_raw_records_but_keeps_rollups(tmp_path: Path) -> None:
+    db = tmp_path / "cost_analytics.db"
+    ca = CostAnalytics(storage_path=db, raw_retention_days=1)
+    ca.record_call(CallRecord("google/x", 0, 0, 4.0, timestamp=time.time() - 3 * 86400))
+    ca.record_usage(_usage(), model_id="google/x")
+    ca.close()
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM cost_calls").fetchone() == (1,)
+    assert conn.execute("SELECT COUNT(*) FROM cost_rollup_hourly").fetchone() == (2,)
+
+
+def test_raw_window_is_bounded() -> None:
+    ca = CostAnalytics(max_raw_records=10)
+    for _ in range(25):
+        ca.record_usage(_usage(10, 5), model_id="google/x")
+    assert len(ca._calls) == 10
+    assert ca.build_usage_report_dict()["by_model"]["google/x"]["calls"] == 25
+
+
+def test_without_storage_flush_is_noop() -> None:
+    ca = CostAnalytics()
+    ca.record_usage(_usage(), model_id="google/x")
+    assert ca.flush() == 0
+
+
+def test_report_breakdowns_survive_restart(tmp_path: Path) -> None:
+    db = tmp_path / "cost_analytics.db"
+    ca = CostAnalytics(storage_path=db)
+    ca.record_usage(_usage(), model_id="google/x", channel="telegram")
+    ca.record_usage(_usage(), model_id="google/y")
+    ca.close()
+
+    restored = CostAnalytics(storage_path=db)
+    restored.record_usage(_usage(), model_id="google/x", channel="telegram")
+    report = restored.build_usage_report_dict()
+    assert report["by_model"]["google/x"]["calls"] == 2
+    assert report["by_model"]["google/y"]["calls"] == 1
+    assert report["by_channel"] == {"telegram": 2}
+    restored.close()
+
+
+def test_calls_before_configure_are_persisted(tmp_path: Path) -> None:
+    db = tmp_path / "cost_analytics.db"
+    ca = CostAnalytics()
+    ca.record_usage(_usage(), model_id="google/x")
+    ca.configure_default_path(db)
+    ca.close()
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM cost_calls").fetchone() == (1,)
+    assert conn.execute("SELECT SUM(calls) FROM cost_rollup_hourly").fetchone() == (1,)
+
+
+def test_reconfigure_does_not_merge_rollups_twice(tmp_path: Path) -> None:
+    first = tmp_path / "first.db"
+    ca = CostAnalytics(storage_path=first)
+    ca.record_usage(_usage(), model_id="google/x")
+    ca.close()
+
+    restored = CostAnalytics(storage_path=first)
+    month_cost = restored.get_monthly_cost_usd()
+    restored.configure_default_path(tmp_path / "second.db")
+    restored.configure_default_path(first)
+    assert restored.get_monthly_cost_usd() == month_cost
+    assert restored.build_usage_report_dict()["by_model"]["google/x"]["calls"] == 1
+    restored.close()
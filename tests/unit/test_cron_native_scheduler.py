@@ -1,10 +1,9 @@
-"""Тесты для CronNativeScheduler — selection criteria в _tick().
+"""Тесты для CronNativeScheduler — due-индекс (min-heap) в _tick().
 
-Семантика scheduler (formalized Wave 14-G session-33): **look-ahead**.
-Trigger когда ``due_ts <= now + _POLL_INTERVAL`` (до 30s раньше wall-clock
-due-time). Это by-design — ``cron_native_store.next_due()`` всегда возвращает
-будущее время (>= now+60), strict-режим ``due_ts <= now`` никогда бы не fired
-(5-day regression в Session 31, восстановлено c510347).
+Семантика: fire строго при ``due_ts <= now``; тик возвращает задержку до
+головы heap и спит ровно до неё. ``next_due`` считается при сборке индекса и
+один раз после каждого fire; изменения cron_native_store будят тик раньше.
+Прежнее look-ahead окно ``now + _POLL_INTERVAL`` (fire до 30s раньше) убрано.
 """
 
 from __future__ import annotations
@@ -12,7 +11,7 @@ from __future__ import annotations
 import asyncio
 import time
 from typing import Any
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -141,20 +140,8 @@ async def test_tick_cooldown_prevents_double_fire() -> None:
 
 
 @pytest.mark.asyncio
-async def test_tick_look_ahead_window_boundary() -> None:
-    """Wave 14-G: formalize look-ahead boundary semantics.
-
-    Scheduler triggers когда ``due_ts <= now + _POLL_INTERVAL`` (30s).
-    Verifies:
-    * due_ts = now + 30 (== _POLL_INTERVAL) → fires (внутри окна, граничный
-      случай ``<=``).
-    * due_ts = now + 31 (> _POLL_INTERVAL) → не fires (за окном).
-
-    Look-ahead by-design: ``cron_native_store.next_due()`` всегда возвращает
-    >= now+60, strict ``<= now`` не fired бы никогда (см. commit c510347).
-    Production impact: digest/notification jobs срабатывают до 30s раньше
-    wall-clock — допустимо для не-realtime tasks.
-    """
+async def test_tick_fires_strictly_at_due_time() -> None:
+    """due_ts = now + 30 больше не fire (look-ahead убран) — тик ждёт ровно до due."""
     sched = CronNativeScheduler()
     job = _make_job()
     now = time.time()
@@ -163,32 +150,82 @@ async def test_tick_look_ahead_window_boundary() -> None:
     async def fake_run(j: dict) -> None:
         fired.append(str(j.get("id")))
 
-    # Case A: due_ts = now + 30 — на границе окна (_POLL_INTERVAL), должен fire.
     with (
         patch.object(scheduler_module.cron_native_store, "list_jobs", return_value=[job]),
         patch.object(scheduler_module.cron_native_store, "next_due", return_value=now + 30),
         patch.object(sched, "_run_job", side_effect=fake_run),
     ):
-        await sched._tick()
+        delay = await sched._tick()
         await asyncio.sleep(0)
 
-    assert fired == ["j1"], (
-        "due_ts == now + _POLL_INTERVAL должен trigger (look-ahead окно inclusive)"
-    )
+    assert fired == []
+    assert 29.0 < delay <= 30.0
+    assert sched.next_fire_at() == pytest.approx(now + 30)
+
 
-    # Case B: due_ts = now + 31 — за границей окна, НЕ должен fire.
-    sched2 = CronNativeScheduler()
-    fired2: list[str] = []
+@pytest.mark.asyncio
+async def test_next_due_computed_once_per_fire_not_per_tick(tmp_path, monkeypatch) -> None:
+    """Холостые тики не перечитывают store и не пересчитывают next_due."""
+    monkeypatch.setattr(scheduler_module.cron_native_store, "_storage_path", tmp_path / "j.json")
+    scheduler_module.cron_native_store.add_job("* * * * *", "p", job_id="j1")
+    sched = CronNativeScheduler()
+    real_next_due = scheduler_module.cron_native_store.next_due
+    calls = {"list": 0, "next": 0}
 
-    async def fake_run2(j: dict) -> None:
-        fired2.append(str(j.get("id")))
+    def counting_list() -> list[dict]:
+        calls["list"] += 1
+        return scheduler_module.cron_native_store._load()
 
-    with (
-        patch.object(scheduler_module.cron_native_store, "list_jobs", return_value=[job]),
-        patch.object(scheduler_module.cron_native_store, "next_due", return_value=now + 31),
-        patch.object(sched2, "_run_job", side_effect=fake_run2),
-    ):
-        await sched2._tick()
+    def counting_next(job: dict, now: Any = None) -> float | None:
+        calls["next"] += 1
+        return real_next_due(job, now=now)
+
+    monkeypatch.setattr(scheduler_module.cron_native_store, "list_jobs", counting_list)
+    monkeypatch.setattr(scheduler_module.cron_native_store, "next_due", counting_next)
+    for _ in range(5):
+        await sched._tick()
+    assert calls == {"list": 1, "next": 1}
+
+    # Сдвигаем due в прошлое → один fire и ровно один пересчёт next_due.
+    due_ts, job_id = sched._heap[0]
+    sched._heap[0] = (time.time() - 1, job_id)
+    with patch.object(sched, "_run_job", new=AsyncMock()) as run_job:
+        await sched._tick()
         await asyncio.sleep(0)
+    run_job.assert_awaited_once()
+    assert calls == {"list": 1, "next": 2}
+    assert sched.next_fire_at() is not None and sched.next_fire_at() > time.time()
 
-    assert fired2 == [], "due_ts > now + _POLL_INTERVAL должен НЕ trigger (за пределами look-ahead)"
+
+@pytest.mark.asyncio
+async def test_store_change_rebuilds_index_and_wakes_scheduler(tmp_path, monkeypatch) -> None:
+    """add/toggle в store → индекс пересобран, job планировщика запущен сразу."""
+    from src.core.periodic_scheduler import PeriodicScheduler
+
+    monkeypatch.setattr(scheduler_module.cron_native_store, "_storage_path", tmp_path / "j.json")
+    periodic = PeriodicScheduler(max_idle_sec=1.0)
+    sched = CronNativeScheduler()
+    sched.start(periodic)
+    try:
+        await asyncio.sleep(0.01)
+        assert sched.next_fire_at() is None
+        runs_before = periodic.stats()["jobs"]["cron_native_scheduler"]["runs"]
+
+        scheduler_module.cron_native_store.add_job("0 9 * * *", "digest", job_id="d1")
+        await asyncio.sleep(0.01)
+        assert periodic.stats()["jobs"]["cron_native_scheduler"]["runs"] > runs_before
+        assert set(sched._jobs) == {"d1"}
+        first_due = sched.next_fire_at()
+
+        # Добавление другого job не пересчитывает due у неизменного d1.
+        scheduler_module.cron_native_store.add_job("*/5 * * * *", "poll", job_id="p1")
+        await asyncio.sleep(0.01)
+        assert dict((jid, due) for due, jid in sched._heap)["d1"] == first_due
+
+        scheduler_module.cron_native_store.toggle_job("d1", False)
+        await asyncio.sleep(0.01)
+        assert set(sched._jobs) == {"p1"}
+    finally:
+        sched.stop()
+        await periodic.stop()
+    assert not sched.is_running
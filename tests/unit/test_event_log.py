@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты src/core/event_log.py — сегментированный append-only JSONL-лог.
+
+Покрываем: ротацию по записям/байтам, retention (сегменты/объём/возраст),
+iter_since с пропуском блоков по индексу, tail/iter_reverse через границы
+сегментов, внешние дозаписи/перезапись файла, переживание рестарта (индекс).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from src.core.event_log import EventLog, coerce_ts, get_event_log
+
+
+def _names(log: EventLog) -> list[str]:
+    return [p.name for p in log.segments()]
+
+
+def test_append_rotates_by_records_and_keeps_max_segments(tmp_path: Path) -> None:
+    log = EventLog(tmp_path / "events.jsonl", segment_max_records=3, max_segments=1)
+    for i in range(8):
+        assert log.append({"ts": float(i), "i": i})
+    # 8 записей: закрытые [0..2] удалён retention'ом, [3..5] живёт, активный [6, 7].
+    assert _names(log) == ["events.000002.jsonl", "events.jsonl"]
+    assert [r["i"] for r in log.tail(10)] == [3, 4, 5, 6, 7]
+    assert log.stats()["records"] == 5
+
+
+def test_rotation_by_bytes_and_total_bytes_retention(tmp_path: Path) -> None:
+    log = EventLog(tmp_path / "events.jsonl", segment_max_bytes=200, max_total_bytes=600)
+    for i in range(100):
+        log.append({"ts": float(i), "pad": "x" * 40})
+    assert log.stats()["bytes"] <= 600 + 200
+    assert log.tail(1)[0]["ts"] == 99.0
+
+
+def test_iter_since_skips_old_blocks_and_segments(tmp_path: Path) -> None:
+    log = EventLog(tmp_path / "events.jsonl", segment_max_records=50, index_every=8)
+    for i in range(200):
+        log.append({"ts": float(i)})
+    got = [r["ts"] for r in log.iter_since(180.0)]
+    # Фильтр блочный: отдаётся хвост с начала блока, все свежие записи на месте.
+    assert got[-20:] == [float(i) for i in range(180, 200)]
+    assert len(got) < 30
+
+
+def test_records_without_ts_are_never_skipped(tmp_path: Path) -> None:
+    log = EventLog(tmp_path / "events.jsonl", index_every=2)
+    log.append({"ts": 1.0})
+    log.append({"note": "no ts"})
+    log.append({"ts": 2.0})
+    assert {"note": "no ts"} in list(log.iter_since(100.0))
+
+
+def test_iso_timestamps_are_indexed() -> None:
+    assert coerce_ts("1970-01-01T00:00:10+00:00") == 10.0
+    assert coerce_ts("2026-05-10T00:00:00Z") == coerce_ts("2026-05-10T00:00:00+00:00")
+    assert coerce_ts("garbage") is None
+    assert coerce_ts(True) is None
+
+
+def test_max_age_retention_drops_old_sealed_segments(tmp_path: Path) -> None:
+    now = time.time()
+    log = EventLog(tmp_path / "events.jsonl", segment_max_records=2, max_age_sec=3600)
+    log.append({"ts": now - 7200})
+    log.append({"ts": now - 7100})  # ротация: закрытый сегмент целиком старше часа
+    log.append({"ts": now})
+    log.append({"ts": now})
+    assert [r["ts"] for r in log.tail(10)] == [now, now]
+
+
+def test_enforce_retention_ages_out_quiet_active_segment(tmp_path: Path) -> None:
+    now = time.time()
+    log = EventLog(tmp_path / "events.jsonl", max_age_sec=3600)
+    log.append({"ts": now - 7200})
+    log.append({"ts": now - 7100})
+    # Редкий лог: активный сегмент не ротируется по размеру, но стареет.
+    assert log.enforce_retention() == 1
+    assert log.tail(10) == []
+    log.append({"ts": now - 7200})
+    log.append({"ts": now})
+    assert log.enforce_retention() == 0  # закрыт, но ещё с живой записью
+    assert len(log.segments()) == 1
+
+
+def test_external_appends_and_partial_tail(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    log = EventLog(path)
+    log.append({"ts": 1.0, "src": "log"})
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps({"ts": 2.0, "src": "external"}) + "\n")
+        fh.write('{"ts": 3.0, "src": "torn"')  # недописанная строка
+    log.append({"ts": 4.0, "src": "log"})
+    assert [r["src"] for r in log.iter_since(0.0)] == ["log", "external", "log"]
+
+
+def test_file_rewritten_externally_is_rescanned(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    log = EventLog(path)
+    log.append({"ts": 1.0})
+    path.write_text(json.dumps({"ts": 5.0, "fresh": True}) + "\n", encoding="utf-8")
+    assert list(log.iter_since(4.0)) == [{"ts": 5.0, "fresh": True}]
+
+
+def test_index_survives_restart(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    log = EventLog(path, segment_max_records=10)
+    for i in range(35):
+        log.append({"ts": float(i)})
+    assert (tmp_path / "events.index.json").exists()
+
+    reopened = EventLog(path, segment_max_records=10)
+    assert [r["ts"] for r in reopened.iter_since(30.0)] == [float(i) for i in range(30, 35)]
+    assert reopened.stats()["records"] == 35
+    reopened.append({"ts": 35.0})
+    assert reopened.tail(1) == [{"ts": 35.0}]
+
+
+def test_malformed_lines_are_skipped(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"ts": 1}\n{{broken\n[1, 2]\n{"ts": 2}\n', encoding="utf-8")
+    log = EventLog(path)
+    assert log.tail(10) == [{"ts": 1}, {"ts": 2}]
+    assert list(log.iter_since(0.0)) == [{"ts": 1}, {"ts": 2}]
+
+
+def test_get_event_log_shares_instance_per_path(tmp_path: Path) -> None:
+    path = tmp_path / "shared.jsonl"
+    first = get_event_log(path, segment_max_records=5)
+    second = get_event_log(path)
+    assert first is second
+    assert second.segment_max_records == 5
+    get_event_log(path, segment_max_records=7)
+    assert first.segment_max_records == 7
+
+
+def test_read_after_returns_only_new_records_across_rotation(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    log = EventLog(path, segment_max_records=3)
+    log.append({"ts": 1.0})
+    records, cursor = log.snapshot_since(None)
+    assert records == [{"ts": 1.0}]
+    for i in range(2, 6):
+        log.append({"ts": float(i)})  # ротация после 3-й записи
+    delta = log.read_after(cursor)
+    assert delta is not None
+    assert [r["ts"] for r in delta[0]] == [2.0, 3.0, 4.0, 5.0]
+    assert log.read_after(delta[1]) == ([], delta[1])
+    # Перезапись файла извне инвалидирует курсор.
+    path.write_text(json.dumps({"ts": 9.0, "pad": "x" * 40}) + "\n", encoding="utf-8")
+    assert log.read_after(delta[1]) is None
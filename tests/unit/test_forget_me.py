@@ -16,6 +16,8 @@ if str(_SCRIPTS_DIR) not in sys.path:
 
 import forget_me  # noqa: E402
 
+from src.core.event_log import EventLog  # noqa: E402
+
 # ---------------------------------------------------------------------------
 # Фикстуры
 # ---------------------------------------------------------------------------
@@ -144,6 +146,22 @@ def audit_log(tmp_path: Path) -> Path:
     return tmp_path / "forget_me_audit.log"
 
 
+@pytest.fixture(autouse=True)
+def decisions_log(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Default --decisions-log → tmp_path: тесты не трогают ~/.openclaw."""
+    path = tmp_path / "trigger_decisions.jsonl"
+    monkeypatch.setattr(forget_me, "_DEFAULT_DECISIONS_LOG", path)
+    return path
+
+
+def _fill_decisions(path: Path) -> None:
+    log = EventLog(path, segment_max_records=2)
+    for i, (chat, sender) in enumerate(
+        [("A", "100"), ("B", "100"), ("A", "200"), ("B", "200"), ("B", None)]
+    ):
+        log.append({"ts": float(i), "chat_id": chat, "sender_id": sender, "text": f"t{i}"})
+
+
 # ---------------------------------------------------------------------------
 # Tests
 # ---------------------------------------------------------------------------
@@ -345,3 +363,56 @@ def test_audit_log_appended_jsonl(archive_db: Path, audit_log: Path) -> None:
 
     # Каждая строка — валидный JSON, есть timestamp.
     assert "timestamp" in first and "timestamp" in second
+
+
+def test_also_vec_chunks_clears_quantized_copy(archive_db: Path, audit_log: Path) -> None:
+    """--also-vec-chunks чистит и vec_chunks_q (квантизованную копию векторов)."""
+    conn = sqlite3.connect(str(archive_db))
+    conn.execute("CREATE TABLE vec_chunks_q (rowid INTEGER PRIMARY KEY, embedding BLOB);")
+    conn.execute("INSERT INTO vec_chunks_q SELECT rowid, embedding FROM vec_chunks;")
+    conn.commit()
+    conn.close()
+
+    rc = forget_me.main(
+        [
+            "--chat-id", "A",
+            "--db", str(archive_db),
+            "--audit-log", str(audit_log),
+            "--apply",
+            "--also-vec-chunks",
+        ]
+    )
+    assert rc == 0
+    conn = sqlite3.connect(str(archive_db))
+    try:
+        remaining = conn.execute("SELECT rowid FROM vec_chunks_q;").fetchall()
+        expected = conn.execute("SELECT id FROM chunks;").fetchall()
+        assert remaining == expected  # остался только вектор c3 (chat B)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize(
+    ("target", "kept"),
+    [
+        (["--chat-id", "A"], ["t1", "t3", "t4"]),
+        # Запись без sender_id не атрибутируема — удаляется консервативно.
+        (["--user-id", "100"], ["t2", "t3"]),
+    ],
+)
+def test_apply_purges_trigger_decisions_log(
+    archive_db: Path, audit_log: Path, decisions_log: Path, target: list[str], kept: list[str]
+) -> None:
+    """trigger_decisions.jsonl (все сегменты EventLog) чистится по цели."""
+    _fill_decisions(decisions_log)
+    assert len(EventLog(decisions_log).segments()) == 3
+
+    argv = [*target, "--db", str(archive_db), "--audit-log", str(audit_log)]
+    assert forget_me.main(argv) == 0
+    texts = [r["text"] for r in EventLog(decisions_log).iter_since(0.0)]
+    assert texts == [f"t{i}" for i in range(5)]
+
+    assert forget_me.main([*argv, "--apply"]) == 0
+    assert [r["text"] for r in EventLog(decisions_log).iter_since(0.0)] == kept
+    payload = json.loads(audit_log.read_text(encoding="utf-8").splitlines()[-1])
+    assert payload["decision_log_count"] == 5 - len(kept)
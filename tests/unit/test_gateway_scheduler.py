@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты priority-aware планировщика слотов OpenClaw gateway
+(src/core/gateway_scheduler.py) и его интеграции в `_gateway_slot`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.gateway_scheduler import (
+    GatewayScheduler,
+    current_gateway_priority,
+    gateway_priority,
+)
+from src.core.message_priority_dispatcher import Priority
+from src.core.metrics import gateway_queue
+
+P0, P1, P2 = Priority.P0_INSTANT, Priority.P1_NORMAL, Priority.P2_LOW
+
+
+async def _occupy(sched: GatewayScheduler, prio: Priority, release: asyncio.Event) -> None:
+    await sched.acquire(prio)
+    try:
+        await release.wait()
+    finally:
+        sched.release(prio)
+
+
+@pytest.mark.asyncio
+async def test_p0_jumps_queue_ahead_of_background() -> None:
+    sched = GatewayScheduler(1, aging_sec=60)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_occupy(sched, P1, release))
+    await asyncio.sleep(0)
+
+    order: list[str] = []
+
+    async def _req(name: str, prio: Priority) -> None:
+        await sched.acquire(prio)
+        order.append(name)
+        sched.release(prio)
+
+    waiters = [
+        asyncio.create_task(_req("bg1", P2)),
+        asyncio.create_task(_req("bg2", P2)),
+        asyncio.create_task(_req("normal", P1)),
+    ]
+    await asyncio.sleep(0)
+    waiters.append(asyncio.create_task(_req("owner", P0)))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    assert order == ["owner", "normal", "bg1", "bg2"]
+
+
+@pytest.mark.asyncio
+async def test_background_cap_keeps_slot_for_foreground() -> None:
+    sched = GatewayScheduler(3, class_caps={P2: 2}, aging_sec=60)
+    release = asyncio.Event()
+    bg = [asyncio.create_task(_occupy(sched, P2, release)) for _ in range(4)]
+    await asyncio.sleep(0)
+    snap = sched.snapshot()
+    assert snap["active"]["p2"] == 2
+    assert snap["waiting"]["p2"] == 2
+
+    # Третий слот свободен для P0 — без ожидания фона.
+    await asyncio.wait_for(sched.acquire(P0), timeout=0.1)
+    sched.release(P0)
+    release.set()
+    await asyncio.gather(*bg)
+    assert sched.snapshot()["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_aging_promotes_starved_background() -> None:
+    sched = GatewayScheduler(1, aging_sec=0.01)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_occupy(sched, P1, release))
+    await asyncio.sleep(0)
+
+    order: list[str] = []
+
+    async def _req(name: str, prio: Priority) -> None:
+        await sched.acquire(prio)
+        order.append(name)
+        sched.release(prio)
+
+    old_bg = asyncio.create_task(_req("bg", P2))
+    await asyncio.sleep(0.03)  # bg успел «состариться» до P1
+    fresh = asyncio.create_task(_req("normal", P1))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, old_bg, fresh)
+    assert order == ["bg", "normal"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_removes_waiter_and_keeps_accounting() -> None:
+    sched = GatewayScheduler(1, aging_sec=60)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_occupy(sched, P0, release))
+    await asyncio.sleep(0)
+    with pytest.raises(asyncio.TimeoutError):
+        await sched.acquire(P2, timeout=0.02)
+    assert sched.snapshot()["waiting"]["p2"] == 0
+    release.set()
+    await holder
+    assert sched.snapshot()["in_use"] == 0
+
+
+def test_gateway_priority_context_only_demotes() -> None:
+    assert current_gateway_priority() == P1
+    with gateway_priority(P2):
+        with gateway_priority(P0) as inner:
+            assert inner == P2
+            assert current_gateway_priority() == P2
+    with gateway_priority(P0):
+        assert current_gateway_priority() == P0
+    assert current_gateway_priority() == P1
+
+
+@pytest.mark.asyncio
+async def test_gateway_slot_uses_context_priority_and_records_wait(monkeypatch) -> None:
+    import src.openclaw_client as mod
+
+    monkeypatch.setattr(mod, "_gateway_scheduler", GatewayScheduler(2, aging_sec=60))
+    monkeypatch.setattr(gateway_queue, "_GATEWAY_QUEUE_WAIT", {})
+    with gateway_priority(P2):
+        async with mod._gateway_slot(chat_id="bg") as slot:
+            assert slot._priority == P2
+            assert mod._gateway_scheduler.snapshot()["active"]["p2"] == 1
+    assert gateway_queue._GATEWAY_QUEUE_WAIT["p2"]["count"] == 1
+    text = "\n".join(gateway_queue.render_gateway_queue_wait())
+    assert 'krab_gateway_queue_wait_seconds_count{priority="p2"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_owner_wait_bounded_under_background_burst() -> None:
+    """Бурст фона (10 × 50ms) при capacity=3: P0 ждёт максимум один слот."""
+    sched = GatewayScheduler(3, aging_sec=60)
+
+    async def _bg() -> None:
+        await sched.acquire(P2)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            sched.release(P2)
+
+    burst = [asyncio.create_task(_bg()) for _ in range(10)]
+    await asyncio.sleep(0)
+    started = time.monotonic()
+    await sched.acquire(P0)
+    waited = time.monotonic() - started
+    sched.release(P0)
+    await asyncio.gather(*burst)
+    assert waited < 0.03
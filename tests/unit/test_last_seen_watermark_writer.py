@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Write-behind last_seen watermark'и (LastSeenWatermarkWriter).
+
+Проверяем:
+- горячий путь (_record_seen_message) внутри event loop не пишет файл сразу
+- coalescing per-chat maxima → один os.replace на flush
+- debounced flush по таймеру
+- _load_last_seen видит pending (read-your-writes)
+- crash semantics: без flush на диске остаётся прежний watermark
+- OSError при flush возвращает batch в pending
+- _flush_last_seen / _drain_last_seen сбрасывают pending (stop / shutdown)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src.userbot import message_catchup as mc
+from src.userbot.message_catchup import LastSeenWatermarkWriter, MessageCatchupMixin
+
+
+class _Host(MessageCatchupMixin):
+    def __init__(self, state_path: Path):
+        self._state_path = state_path
+        self.client = None
+        self.me = None
+        self._owner_notify_target: int | str = "me"
+
+    def _last_seen_state_path(self) -> Path:
+        return self._state_path
+
+
+def _disk(path: Path) -> dict[int, int]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {int(k): v["last_seen_msg_id"] for k, v in data.items()}
+
+
+@pytest.mark.asyncio
+async def test_record_in_loop_is_memory_only(tmp_path: Path) -> None:
+    path = tmp_path / "last.json"
+    host = _Host(path)
+    host._last_seen_writer_instance = LastSeenWatermarkWriter(
+        host._last_seen_state_path, flush_interval_sec=60
+    )
+    for mid in range(1, 200):
+        host._record_seen_message(100, mid)
+    assert not path.exists()
+    assert host._load_last_seen() == {100: 199}
+    host._flush_last_seen()
+
+
+@pytest.mark.asyncio
+async def test_flush_coalesces_chats_into_single_replace(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "last.json"
+    writer = LastSeenWatermarkWriter(lambda: path, flush_interval_sec=60)
+    replaces: list[str] = []
+    real_replace = mc.os.replace
+
+    def _counting_replace(src, dst):  # noqa: ANN001, ANN202
+        replaces.append(str(dst))
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(mc.os, "replace", _counting_replace)
+    for mid in (5, 9, 7):
+        writer.note(100, mid)
+    writer.note(-200, 3)
+    assert writer.close() == 2
+    assert len(replaces) == 1
+    assert _disk(path) == {100: 9, -200: 3}
+
+
+@pytest.mark.asyncio
+async def test_debounced_flush_fires_after_interval(tmp_path: Path) -> None:
+    path = tmp_path / "last.json"
+    writer = LastSeenWatermarkWriter(lambda: path, flush_interval_sec=0.01)
+    writer.note(100, 42)
+    writer.note(100, 43)
+    assert not path.exists()
+    await asyncio.sleep(0.05)
+    assert _disk(path) == {100: 43}
+    assert writer.pending() == {}
+    assert writer.flush_count == 1
+
+
+def test_note_without_loop_writes_through(tmp_path: Path) -> None:
+    path = tmp_path / "last.json"
+    writer = LastSeenWatermarkWriter(lambda: path, flush_interval_sec=60)
+    writer.note(100, 11)
+    assert _disk(path) == {100: 11}
+
+
+@pytest.mark.asyncio
+async def test_crash_before_flush_keeps_previous_watermark(tmp_path: Path) -> None:
+    """Crash до flush: теряется только хвост — catchup переиграет его."""
+    path = tmp_path / "last.json"
+    host = _Host(path)
+    host._save_last_seen(100, 10)
+    host._last_seen_writer_instance._flush_interval_sec = 60
+    host._record_seen_message(100, 15)
+    # «Crash»: новый процесс, pending потерян.
+    restarted = _Host(path)
+    assert restarted._load_last_seen() == {100: 10}
+    host._flush_last_seen()
+    assert restarted._load_last_seen() == {100: 15}
+
+
+def test_flush_never_lowers_disk_watermark(tmp_path: Path) -> None:
+    path = tmp_path / "last.json"
+    path.write_text(json.dumps({"100": {"last_seen_msg_id": 50}}), encoding="utf-8")
+    writer = LastSeenWatermarkWriter(lambda: path, flush_interval_sec=60)
+    writer.note(100, 20)
+    writer.note(200, 1)
+    assert _disk(path) == {100: 50, 200: 1}
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_restores_pending(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "last.json"
+    writer = LastSeenWatermarkWriter(lambda: path, flush_interval_sec=60)
+    writer.note(100, 7)
+
+    def _boom(*_a, **_kw):  # noqa: ANN202
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mc, "_write_last_seen_file", _boom)
+    assert writer.flush() == 0
+    writer.note(100, 8)
+    assert writer.pending() == {100: 8}
+    monkeypatch.undo()
+    assert writer.close() == 1
+    assert _disk(path) == {100: 8}
+
+
+@pytest.mark.asyncio
+async def test_drain_flushes_pending(tmp_path: Path) -> None:
+    path = tmp_path / "last.json"
+    host = _Host(path)
+    host._last_seen_writer_instance = LastSeenWatermarkWriter(
+        host._last_seen_state_path, flush_interval_sec=60
+    )
+    host._record_seen_message(100, 3)
+    await host._drain_last_seen()
+    assert _disk(path) == {100: 3}
+
+
+def test_flush_interval_env_clamped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("KRAB_LAST_SEEN_FLUSH_SEC", "0")
+    assert mc._resolve_last_seen_flush_interval() == 0.1
+    monkeypatch.setenv("KRAB_LAST_SEEN_FLUSH_SEC", "bad")
+    assert mc._resolve_last_seen_flush_interval() == 2.0
+    monkeypatch.setenv("KRAB_LAST_SEEN_FLUSH_SEC", "999")
+    assert mc._resolve_last_seen_flush_interval() == 60.0
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш MCP tool manifest: параллельный list_tools, per-server кэш с
+инвалидацией (рестарт сессии / notifications/tools/list_changed) и
+memoized итоговый список.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import src.config as _cfg_mod
+from src.mcp_client import MCPClientManager
+
+
+def _session(*tool_names: str, delay: float = 0.0) -> AsyncMock:
+    tools = [
+        SimpleNamespace(name=n, description=n, inputSchema={"type": "object"}) for n in tool_names
+    ]
+
+    async def _list_tools():
+        await asyncio.sleep(delay)
+        return SimpleNamespace(tools=tools)
+
+    session = AsyncMock()
+    session.list_tools = AsyncMock(side_effect=_list_tools)
+    return session
+
+
+@pytest.mark.asyncio
+async def test_list_tools_runs_concurrently_across_servers() -> None:
+    manager = MCPClientManager()
+    for i in range(5):
+        manager.sessions[f"s{i}"] = _session(f"t{i}", delay=0.05)
+    started = time.monotonic()
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", False):
+        manifest = await manager.get_tool_manifest()
+    assert time.monotonic() - started < 0.2
+    names = {e["function"]["name"] for e in manifest}
+    assert {f"s{i}__t{i}" for i in range(5)} <= names
+
+
+@pytest.mark.asyncio
+async def test_manifest_memoized_and_list_tools_called_once() -> None:
+    manager = MCPClientManager()
+    session = _session("a", "b")
+    manager.sessions["srv"] = session
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", False):
+        first = await manager.get_tool_manifest()
+        second = await manager.get_tool_manifest()
+    assert first is second
+    assert session.list_tools.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_new_session_and_flag_change_rebuild_manifest() -> None:
+    manager = MCPClientManager()
+    manager.sessions["srv"] = _session("old")
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", False):
+        first = await manager.get_tool_manifest()
+        manager.sessions["srv"] = _session("new")  # «рестарт» сервера
+        second = await manager.get_tool_manifest()
+    names = {e["function"]["name"] for e in second}
+    assert "srv__new" in names and "srv__old" not in names
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", True):
+        third = await manager.get_tool_manifest()
+    assert first is not second
+    assert "tor_fetch" in {e["function"]["name"] for e in third}
+
+
+@pytest.mark.asyncio
+async def test_tools_list_changed_notification_invalidates_server() -> None:
+    manager = MCPClientManager()
+    session = _session("a")
+    manager.sessions["srv"] = session
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", False):
+        first = await manager.get_tool_manifest()
+        handler = manager._make_message_handler("srv")
+        await handler(SimpleNamespace(method="notifications/progress"))
+        assert await manager.get_tool_manifest() is first
+        # mcp 1.x: ServerNotification(root=ToolListChangedNotification)
+        await handler(
+            SimpleNamespace(root=SimpleNamespace(method="notifications/tools/list_changed"))
+        )
+        second = await manager.get_tool_manifest()
+    assert second is not first
+    assert session.list_tools.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_list_tools_is_retried_next_call() -> None:
+    manager = MCPClientManager()
+    session = _session("a")
+    session.list_tools.side_effect = [RuntimeError("boom"), SimpleNamespace(tools=[])]
+    manager.sessions["srv"] = session
+    with patch.object(_cfg_mod.config, "TOR_ENABLED", False):
+        await manager.get_tool_manifest()
+        await manager.get_tool_manifest()
+        await manager.get_tool_manifest()
+    assert session.list_tools.await_count == 2
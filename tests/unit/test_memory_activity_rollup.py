@@ -0,0 +1,216 @@
+"""Тесты activity rollup (message_activity_hourly) Memory Layer.
+
+Главный инвариант: heatmap и stats, прочитанные из rollup'а, совпадают
+с прежними прямыми запросами к `messages`.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.core.memory_activity_rollup import (
+    ROLLUP_READY_META_KEY,
+    backfill_activity_rollup,
+    hour_bucket,
+    invalidate_activity_rollup,
+    is_rollup_ready,
+)
+from src.core.memory_archive import ArchivePaths, create_schema, open_archive
+from src.core.memory_indexer_worker import MemoryIndexerWorker, QueuedMessage
+from src.core.memory_stats import collect_memory_stats
+from src.core.memory_whitelist import MemoryWhitelist, WhitelistConfig
+from src.core.reset_helpers import clear_archive_db_for_chat
+from src.modules.web_app_heatmap import collect_heatmap
+
+_ROWS = [
+    ("1", "chat_a", "2026-04-10T08:00:00Z"),
+    ("2", "chat_a", "2026-04-10T08:59:59Z"),
+    ("3", "chat_a", "2026-04-10T09:00:00Z"),
+    ("4", "chat_a", "2026-04-11T23:30:00Z"),
+    ("5", "chat_a", "2026-04-18T01:00:00Z"),
+    ("6", "chat_b", "2026-04-10T08:15:00Z"),
+    ("7", "chat_b", "2026-04-12T12:00:00Z"),
+    ("8", "chat_c", "2026-03-31T22:10:00+02:00"),
+]
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> ArchivePaths:
+    paths = ArchivePaths.under(tmp_path)
+    conn = open_archive(paths)
+    create_schema(conn)
+    for chat_id in ("chat_a", "chat_b", "chat_c"):
+        conn.execute(
+            "INSERT INTO chats (chat_id, title, chat_type, message_count) VALUES (?, ?, 'group', 0);",
+            (chat_id, chat_id.upper()),
+        )
+    conn.executemany(
+        "INSERT INTO messages (message_id, chat_id, sender_id, timestamp, text_redacted) "
+        "VALUES (?, ?, 'u1', ?, 'txt');",
+        _ROWS,
+    )
+    conn.commit()
+    conn.close()
+    return paths
+
+
+def _connect(paths: ArchivePaths) -> sqlite3.Connection:
+    return sqlite3.connect(str(paths.db))
+
+
+def _without_generated_at(payload: dict) -> dict:
+    return {k: v for k, v in payload.items() if k != "generated_at"}
+
+
+class TestHourBucket:
+    @pytest.mark.parametrize(
+        "ts",
+        [
+            "2026-04-10T08:59:59Z",
+            "2026-04-10T09:00:00",
+            "2026-03-31T22:10:00+02:00",
+            "2026-04-10T08:15:00.123456Z",
+        ],
+    )
+    def test_matches_sqlite_strftime(self, ts: str) -> None:
+        conn = sqlite3.connect(":memory:")
+        (epoch,) = conn.execute("SELECT CAST(strftime('%s', ?) AS INTEGER);", (ts,)).fetchone()
+        assert hour_bucket(ts) == epoch - epoch % 3600
+
+    def test_unparseable_returns_none(self) -> None:
+        assert hour_bucket("") is None
+        assert hour_bucket("not a date") is None
+
+
+class TestBackfill:
+    def test_backfill_matches_group_by_and_sets_ready(self, archive: ArchivePaths) -> None:
+        conn = _connect(archive)
+        try:
+            assert is_rollup_ready(conn) is False
+            rows = backfill_activity_rollup(conn)
+            assert is_rollup_ready(conn) is True
+            rollup = conn.execute(
+                "SELECT chat_id, bucket, msg_count FROM message_activity_hourly "
+                "ORDER BY chat_id, bucket;"
+            ).fetchall()
+            expected = sorted(
+                (chat_id, bucket, n) for (chat_id, bucket), n in _expected_counts().items()
+            )
+            assert rollup == expected
+            assert rows == len(expected)
+            # Повторный backfill — идемпотентен.
+            assert backfill_activity_rollup(conn) == rows
+        finally:
+            conn.close()
+
+    def test_invalidate_drops_ready_flag(self, archive: ArchivePaths) -> None:
+        conn = _connect(archive)
+        try:
+            backfill_activity_rollup(conn)
+            invalidate_activity_rollup(conn)
+            conn.commit()
+            assert is_rollup_ready(conn) is False
+            assert (
+                conn.execute(
+                    "SELECT 1 FROM meta WHERE key = ?;", (ROLLUP_READY_META_KEY,)
+                ).fetchone()
+                is None
+            )
+        finally:
+            conn.close()
+
+
+def _expected_counts() -> dict[tuple[str, int], int]:
+    counts: dict[tuple[str, int], int] = {}
+    for _, chat_id, ts in _ROWS:
+        key = (chat_id, hour_bucket(ts))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+class TestReadersParity:
+    @pytest.mark.parametrize("bucket_hours", [1, 6, 24, 168])
+    def test_heatmap_rollup_equals_messages_scan(
+        self, archive: ArchivePaths, bucket_hours: int
+    ) -> None:
+        legacy = collect_heatmap(archive.db, bucket_hours, 20)
+        conn = _connect(archive)
+        backfill_activity_rollup(conn)
+        conn.close()
+        rollup = collect_heatmap(archive.db, bucket_hours, 20)
+        assert _without_generated_at(rollup) == _without_generated_at(legacy)
+        assert rollup["chats"][0]["chat_id"] == "chat_a"
+
+    def test_stats_rollup_equals_messages_scan(self, archive: ArchivePaths) -> None:
+        legacy = collect_memory_stats(archive.db)
+        assert legacy["activity_source"] == "messages"
+        conn = _connect(archive)
+        backfill_activity_rollup(conn)
+        conn.close()
+        rollup = collect_memory_stats(archive.db)
+        assert rollup["activity_source"] == "rollup"
+        for key in ("total_messages", "oldest_message_ts", "newest_message_ts", "top_chats"):
+            assert rollup[key] == legacy[key], key
+
+
+class TestMaintenance:
+    def test_indexer_flush_increments_only_new_messages(
+        self, archive: ArchivePaths, tmp_path: Path
+    ) -> None:
+        conn = _connect(archive)
+        backfill_activity_rollup(conn)
+        conn.close()
+
+        worker = MemoryIndexerWorker(
+            archive_paths=archive,
+            whitelist=MemoryWhitelist(
+                config_path=tmp_path / "nonexistent_whitelist.json",
+                config=WhitelistConfig(allow_ids={"chat_b"}),
+            ),
+            embedder=None,
+        )
+        ts = datetime(2026, 4, 12, 12, 40, tzinfo=timezone.utc)
+        batch = [
+            # "7" уже в архиве (INSERT OR IGNORE) — не должен удвоить счётчик.
+            QueuedMessage("chat_b", "CHAT_B", "group", "7", "u1", "dup", ts, None),
+            QueuedMessage("chat_b", "CHAT_B", "group", "9", "u1", "new", ts, None),
+        ]
+        worker._sync_flush_to_db([], {"chat_b": "9"}, batch, {"chat_b": ("CHAT_B", "group")})
+
+        conn = _connect(archive)
+        try:
+            bucket = hour_bucket("2026-04-12T12:00:00Z")
+            (count,) = conn.execute(
+                "SELECT msg_count FROM message_activity_hourly WHERE chat_id = ? AND bucket = ?;",
+                ("chat_b", bucket),
+            ).fetchone()
+            assert count == 2
+        finally:
+            conn.close()
+        stats = collect_memory_stats(archive.db)
+        assert stats["activity_source"] == "rollup"
+        assert stats["total_messages"] == len(_ROWS) + 1
+
+    def test_clear_chat_drops_its_rollup_rows(self, archive: ArchivePaths) -> None:
+        conn = _connect(archive)
+        backfill_activity_rollup(conn)
+        conn.close()
+
+        assert clear_archive_db_for_chat("chat_a", db_path=archive.db) == 5
+
+        conn = _connect(archive)
+        try:
+            assert is_rollup_ready(conn) is True
+            chats = {
+                r[0]
+                for r in conn.execute(
+                    "SELECT DISTINCT chat_id FROM message_activity_hourly;"
+                ).fetchall()
+            }
+            assert chats == {"chat_b", "chat_c"}
+        finally:
+            conn.close()
@@ -33,10 +33,15 @@ import pytest
 
 from src.core.memory_archive import ArchivePaths, create_schema, open_archive
 from src.core.memory_embedder import (
+    CHAT_VEC_TABLE,
     DEFAULT_DIM,
     EmbedStats,
     MemoryEmbedder,
+    backfill_chat_partitions,
+    chat_partition_ready,
     create_vec_table,
+    insert_chunk_vectors,
+    reset_chat_partitions,
     serialize_f32,
 )
 
@@ -397,6 +402,123 @@ class TestEmbedSpecific:
             emb.close()
 
 
+# ---------------------------------------------------------------------------
+# Per-chat партиции (vec_chunks_chat).
+# ---------------------------------------------------------------------------
+
+
+def _seed_second_chat(conn: sqlite3.Connection, chat_id: str = "-100222") -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO chats(chat_id, title, chat_type) VALUES (?, ?, ?);",
+        (chat_id, f"chat {chat_id}", "group"),
+    )
+    for i in range(2):
+        text = f"other chat text {i}"
+        conn.execute(
+            """
+            INSERT INTO chunks(chunk_id, chat_id, start_ts, end_ts,
+                               message_count, char_len, text_redacted)
+            VALUES (?, ?, ?, ?, ?, ?, ?);
+            """,
+            (f"other_{i}", chat_id, "2026-04-01T10:00:00Z", "2026-04-01T10:00:00Z", 1, 10, text),
+        )
+    conn.commit()
+
+
+class TestChatPartitions:
+    def test_embed_writes_partitions_and_marks_ready(self, tmp_path: Path) -> None:
+        paths, conn = _make_archive(tmp_path)
+        _seed_chunks(conn, count=3)
+        _seed_second_chat(conn)
+        conn.close()
+
+        emb = MemoryEmbedder(archive_paths=paths, _model=FakeEmbedModel())
+        try:
+            emb.embed_all_unindexed()
+            c = emb._conn  # noqa: SLF001
+            rows = c.execute(
+                f"SELECT chat_id, COUNT(*) FROM {CHAT_VEC_TABLE} GROUP BY chat_id ORDER BY chat_id;"
+            ).fetchall()
+            assert rows == [("-100111", 3), ("-100222", 2)]
+            assert chat_partition_ready(c) is True
+
+            # Re-index не дублирует строки в партиции.
+            emb.embed_specific(["chunk_000", "other_1"])
+            cnt = c.execute(f"SELECT COUNT(*) FROM {CHAT_VEC_TABLE};").fetchone()[0]
+            assert cnt == 5
+        finally:
+            emb.close()
+
+    def test_backfill_migrates_legacy_archive(self, tmp_path: Path) -> None:
+        """Архив без партиций: backfill копирует векторы без re-encode."""
+        paths, conn = _make_archive(tmp_path)
+        _seed_chunks(conn, count=4)
+        conn.close()
+
+        emb = MemoryEmbedder(archive_paths=paths, _model=FakeEmbedModel())
+        try:
+            emb.embed_all_unindexed()
+            c = emb._conn  # noqa: SLF001
+            # Имитируем архив до миграции.
+            reset_chat_partitions(c)
+            create_vec_table(c, dim=DEFAULT_DIM)
+            assert chat_partition_ready(c) is False
+            assert c.execute(f"SELECT COUNT(*) FROM {CHAT_VEC_TABLE};").fetchone()[0] == 0
+
+            assert backfill_chat_partitions(c, batch_size=3) == 4
+            assert chat_partition_ready(c) is True
+            # Идемпотентно.
+            assert backfill_chat_partitions(c) == 0
+
+            # Вектор в партиции — тот же, что в vec_chunks.
+            same = c.execute(
+                f"SELECT COUNT(*) FROM vec_chunks v JOIN {CHAT_VEC_TABLE} p "
+                "ON p.rowid = v.rowid WHERE p.vector = v.vector;"
+            ).fetchone()[0]
+            assert same == 4
+        finally:
+            emb.close()
+
+    def test_embed_all_backfills_when_not_ready(self, tmp_path: Path) -> None:
+        paths, conn = _make_archive(tmp_path)
+        _seed_chunks(conn, count=2)
+        conn.close()
+
+        emb = MemoryEmbedder(archive_paths=paths, _model=FakeEmbedModel())
+        try:
+            emb.embed_all_unindexed()
+            c = emb._conn  # noqa: SLF001
+            reset_chat_partitions(c)
+            create_vec_table(c, dim=DEFAULT_DIM)
+
+            stats = emb.embed_all_unindexed()
+            assert stats.chunks_processed == 0
+            assert chat_partition_ready(c) is True
+            assert c.execute(f"SELECT COUNT(*) FROM {CHAT_VEC_TABLE};").fetchone()[0] == 2
+        finally:
+            emb.close()
+
+    def test_insert_chunk_vectors_resolves_chat_for_legacy_rows(self, tmp_path: Path) -> None:
+        """3-tuple строки (как в encode_memory_phase2) тоже попадают в партицию."""
+        paths, conn = _make_archive(tmp_path)
+        _seed_chunks(conn, count=2)
+        _seed_second_chat(conn)
+        create_vec_table(conn, dim=DEFAULT_DIM)
+        rows = conn.execute(
+            "SELECT id, chunk_id, text_redacted FROM chunks ORDER BY id;"
+        ).fetchall()
+        insert_chunk_vectors(conn, rows, FakeEmbedModel().encode([r[2] for r in rows]))
+        conn.commit()
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM vec_chunks;").fetchone()[0] == 4
+            parts = conn.execute(
+                f"SELECT chat_id, COUNT(*) FROM {CHAT_VEC_TABLE} GROUP BY chat_id ORDER BY chat_id;"
+            ).fetchall()
+            assert parts == [("-100111", 2), ("-100222", 2)]
+        finally:
+            conn.close()
+
+
 # ---------------------------------------------------------------------------
 # Vector search smoke.
 # ---------------------------------------------------------------------------
@@ -81,115 +81,21 @@ def _build_app_with_db(db_path: Path) -> FastAPI:
 
     @app.get("/api/memory/heatmap")
     async def memory_heatmap(bucket_hours: int = 24, top_chats: int = 20):
-        import sqlite3 as _sqlite3
-        from collections import defaultdict
-        from datetime import datetime, timezone
+        import asyncio
 
         from fastapi.responses import JSONResponse
 
-        from src.modules.web_app_heatmap import build_bucket_sql_expr
+        from src.modules.web_app_heatmap import HeatmapUnavailableError, collect_heatmap
 
         bucket_hours = max(1, min(int(bucket_hours), 8760))
 
         # Позволяем подменять путь через атрибут приложения (инъекция в тест)
         db_path_inner: Path = app.state.archive_db  # type: ignore[attr-defined]
 
-        if not db_path_inner.exists():
-            return JSONResponse(
-                status_code=503,
-                content={"error": f"archive.db not found: {db_path_inner}"},
-            )
-
-        try:
-            uri = f"file:{db_path_inner}?mode=ro"
-            conn = _sqlite3.connect(uri, uri=True)
-        except _sqlite3.OperationalError as exc:
-            return JSONResponse(
-                status_code=503,
-                content={"error": f"archive.db open failed: {exc}"},
-            )
-
         try:
-            try:
-                top_rows = conn.execute(
-                    """
-                    SELECT chat_id, COUNT(*) as cnt
-                    FROM messages
-                    GROUP BY chat_id
-                    ORDER BY cnt DESC
-                    LIMIT ?
-                    """,
-                    (max(1, top_chats),),
-                ).fetchall()
-            except _sqlite3.DatabaseError as exc:
-                return JSONResponse(
-                    status_code=503,
-                    content={"error": f"archive.db malformed: {exc}"},
-                )
-
-            if not top_rows:
-                return {
-                    "bucket_hours": bucket_hours,
-                    "chats": [],
-                    "generated_at": datetime.now(timezone.utc).isoformat(),
-                }
-
-            top_chat_ids = [r[0] for r in top_rows]
-
-            chat_titles: dict[str, str] = {}
-            try:
-                placeholders = ",".join("?" * len(top_chat_ids))
-                title_rows = conn.execute(
-                    f"SELECT chat_id, title FROM chats WHERE chat_id IN ({placeholders})",
-                    top_chat_ids,
-                ).fetchall()
-                chat_titles = {r[0]: r[1] for r in title_rows if r[1]}
-            except _sqlite3.DatabaseError:
-                pass
-
-            bucket_expr = build_bucket_sql_expr(bucket_hours)
-            try:
-                placeholders = ",".join("?" * len(top_chat_ids))
-                density_rows = conn.execute(
-                    f"""
-                    SELECT chat_id,
-                           {bucket_expr} AS bucket_ts,
-                           COUNT(*) AS cnt
-                    FROM messages
-                    WHERE chat_id IN ({placeholders})
-                    GROUP BY chat_id, bucket_ts
-                    ORDER BY chat_id, bucket_ts
-                    """,
-                    top_chat_ids,
-                ).fetchall()
-            except _sqlite3.DatabaseError as exc:
-                return JSONResponse(
-                    status_code=503,
-                    content={"error": f"archive.db malformed on density query: {exc}"},
-                )
-
-            buckets_by_chat: dict[str, list[dict]] = defaultdict(list)
-            for chat_id, bucket_ts, cnt in density_rows:
-                buckets_by_chat[chat_id].append({"ts": bucket_ts, "count": cnt})
-
-            chats_out = []
-            for chat_id in top_chat_ids:
-                chats_out.append(
-                    {
-                        "chat_id": chat_id,
-                        "chat_title": chat_titles.get(chat_id, chat_id),
-                        "buckets": buckets_by_chat.get(chat_id, []),
-                    }
-                )
-
-            return {
-                "bucket_hours": bucket_hours,
-                "chats": chats_out,
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-        finally:
-            conn.close()
+            return await asyncio.to_thread(collect_heatmap, db_path_inner, bucket_hours, top_chats)
+        except HeatmapUnavailableError as exc:
+            return JSONResponse(status_code=503, content={"error": str(exc)})
 
     app.state.archive_db = db_path
     return app
@@ -280,6 +280,115 @@ def test_materialize_jaccard_fallback_when_model_none(monkeypatch):
     assert "jaccard" in modes
 
 
+def _random_vecs(rng, n, dim, none_every=0):
+    vecs = []
+    for i in range(n):
+        if none_every and i % none_every == 0:
+            vecs.append(None)
+        else:
+            vecs.append([rng.uniform(-1.0, 1.0) for _ in range(dim)])
+    return vecs
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+@pytest.mark.parametrize("none_every", [0, 5])
+def test_mmr_numpy_matches_pure_python(monkeypatch, seed, none_every):
+    """NumPy-ядро даёт тот же порядок, что pure-Python эталон."""
+    import random
+
+    pytest.importorskip("numpy")
+    rng = random.Random(seed)
+    n, dim = 40, 16
+    query = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+    vecs = _random_vecs(rng, n, dim, none_every)
+    ids = [f"c{i}" for i in range(n)]
+    rrf = [rng.random() for _ in range(n)]
+
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "0")
+    pure = mmr_rerank(query, vecs, ids, rrf_scores=rrf, top_k=10, lambda_=0.6)
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "1")
+    fast = mmr_rerank(query, vecs, ids, rrf_scores=rrf, top_k=10, lambda_=0.6)
+    assert fast == pure
+    assert len(fast) == 10
+
+
+def test_mmr_numpy_accepts_frombuffer_rows(monkeypatch):
+    """Строки из decode_f32_blob (np.frombuffer) дают тот же результат, что списки."""
+    import random
+
+    np = pytest.importorskip("numpy")
+    from src.core.memory_embedder import serialize_f32
+    from src.core.memory_mmr import decode_f32_blob
+
+    rng = random.Random(42)
+    vecs = _random_vecs(rng, 20, 8)
+    query = [rng.uniform(-1.0, 1.0) for _ in range(8)]
+    ids = [f"c{i}" for i in range(20)]
+    # Эталон — списки после float32 round-trip (как в vec_chunks).
+    as_lists = [np.asarray(v, dtype=np.float32).tolist() for v in vecs]
+    blobs = [decode_f32_blob(serialize_f32(v)) for v in vecs]
+    assert isinstance(blobs[0], np.ndarray)
+
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "0")
+    expected = mmr_rerank(query, as_lists, ids, top_k=7)
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "1")
+    assert mmr_rerank(query, blobs, ids, top_k=7) == expected
+
+
+def test_mmr_numpy_falls_back_on_ragged_vectors(monkeypatch):
+    """Векторы разной длины → pure-Python путь (cosine=0 для несовпадающих)."""
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "1")
+    out = mmr_rerank(
+        [1.0, 0.0],
+        [[1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0]],
+        ["a", "b", "c"],
+        rrf_scores=[0.1, 0.9, 0.5],
+        top_k=3,
+    )
+    assert out[0] == "a"
+    assert sorted(out) == ["a", "b", "c"]
+
+
+def test_mmr_pure_python_accepts_ndarray_rows(monkeypatch):
+    """np.ndarray из decode_f32_blob в pure-Python пути: без ValueError на truth value."""
+    np = pytest.importorskip("numpy")
+    from src.core.memory_mmr import _cosine
+
+    assert _cosine(np.array([1.0, 0.0]), np.array([2.0, 0.0])) == pytest.approx(1.0)
+    assert _cosine(np.array([]), np.array([1.0])) == 0.0
+
+    vecs = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]
+    ids = ["a", "b", "c"]
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "0")
+    expected = mmr_rerank([1.0, 0.0], vecs, ids, top_k=3, lambda_=0.5)
+    rows = [np.asarray(v, dtype=np.float32) for v in vecs]
+    assert mmr_rerank(np.array([1.0, 0.0]), rows, ids, top_k=3, lambda_=0.5) == expected
+    # Ragged-строки: numpy-ядро отказывается, pure-путь работает на ndarray.
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "1")
+    ragged = [*rows, np.zeros(3, dtype=np.float32)]
+    assert sorted(mmr_rerank([1.0, 0.0], ragged, [*ids, "d"], top_k=4)) == ["a", "b", "c", "d"]
+
+
+def test_mmr_without_numpy_uses_pure_python(monkeypatch):
+    """numpy не установлен → KRAB_RAG_MMR_NUMPY игнорируется, blob → list[float]."""
+    import random
+
+    from src.core import memory_mmr
+    from src.core.memory_embedder import serialize_f32
+
+    monkeypatch.setattr(memory_mmr, "np", None)
+    monkeypatch.setenv("KRAB_RAG_MMR_NUMPY", "1")
+    assert memory_mmr.mmr_numpy_enabled() is False
+    assert memory_mmr.decode_f32_blob(serialize_f32([0.5, -1.0])) == [0.5, -1.0]
+
+    rng = random.Random(7)
+    vecs = _random_vecs(rng, 12, 4, none_every=4)
+    query = [rng.uniform(-1.0, 1.0) for _ in range(4)]
+    ids = [f"c{i}" for i in range(12)]
+    expected = memory_mmr._mmr_rerank_py(query, vecs, 12, None, 5, 0.7)
+    assert mmr_rerank(query, vecs, ids, top_k=5, lambda_=0.7) == [ids[i] for i in expected]
+
+
 def _np(values):
     """Мини-shim: возвращает объект с .tolist() (имитирует np.ndarray.encode output)."""
 
@@ -293,7 +402,7 @@ def _np(values):
 @pytest.fixture(autouse=True)
 def _reset_env():
     """Не даём env от одного теста течь в другой."""
-    keys = ["KRAB_RAG_MMR_ENABLED", "KRAB_RAG_MMR_LAMBDA"]
+    keys = ["KRAB_RAG_MMR_ENABLED", "KRAB_RAG_MMR_LAMBDA", "KRAB_RAG_MMR_NUMPY"]
     saved = {k: os.environ.get(k) for k in keys}
     yield
     for k, v in saved.items():
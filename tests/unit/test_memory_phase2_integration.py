@@ -101,7 +101,9 @@ def _seed_chunk_row(
     return rowid
 
 
-def _build_phase2_archive(tmp_path: Path, n_chunks: int = 100) -> ArchivePaths:
+def _build_phase2_archive(
+    tmp_path: Path, n_chunks: int = 100, quantization: str = "none"
+) -> ArchivePaths:
     """
     Полный e2e setup:
       1. Чистая archive.db + create_schema().
@@ -137,6 +139,7 @@ def _build_phase2_archive(tmp_path: Path, n_chunks: int = 100) -> ArchivePaths:
         dim=DEFAULT_DIM,
         _model=_FakeEmbedModel(dim=DEFAULT_DIM),
         batch_size=64,
+        quantization=quantization,
     )
     try:
         stats = embedder.embed_all_unindexed()
@@ -372,3 +375,126 @@ class TestMemoryPhase2Integration:
         finally:
             r.close()
         assert results == []
+
+
+# ---------------------------------------------------------------------------
+# Квантизованная первая стадия KNN (vec_chunks_q) + float32 rescoring.
+# ---------------------------------------------------------------------------
+
+
+class TestQuantizedVectorSearch:
+    @pytest.mark.parametrize("mode", ["int8", "binary"])
+    def test_quantized_search_finds_exact_chunk_and_matches_float(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mode: str
+    ) -> None:
+        monkeypatch.setenv("KRAB_RAG_PHASE2_ENABLED", "1")
+        paths = _build_phase2_archive(tmp_path, n_chunks=60, quantization=mode)
+        r = _make_retriever(paths)
+        try:
+            conn = r._ensure_connection()
+            assert r._vec_quantization == mode
+            query = "chunk 007 about embedding with unique marker alpha7"
+            quantized = r._vector_search(conn, query, None, limit=10)
+            monkeypatch.setenv("KRAB_VEC_QUANTIZED_SEARCH", "0")
+            exact = r._vector_search(conn, query, None, limit=10)
+        finally:
+            r.close()
+        assert quantized[0] == "a007"
+        # Rescoring float32 → тот же top-1 и высокий recall@10 к baseline.
+        assert quantized[0] == exact[0]
+        assert len(set(quantized) & set(exact)) >= 5
+
+    def test_meta_mismatch_falls_back_to_float_knn(self, tmp_path: Path, monkeypatch) -> None:
+        monkeypatch.setenv("KRAB_RAG_PHASE2_ENABLED", "1")
+        paths = _build_phase2_archive(tmp_path, n_chunks=20, quantization="int8")
+        conn = open_archive(paths)
+        conn.execute("UPDATE vec_chunks_meta SET value = 'binary' WHERE key = 'quantization';")
+        conn.commit()
+        conn.close()
+        r = _make_retriever(paths)
+        try:
+            conn = r._ensure_connection()
+            assert r._vec_available is True
+            assert r._vec_quantization == "none"
+            hits = r._vector_search(
+                conn, "chunk 003 about retrieval with unique marker alpha3", None, 5
+            )
+        finally:
+            r.close()
+        assert hits and hits[0] == "a003"
+
+    def test_quantized_table_dropped_after_connect_retries_float_knn(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from src.core.memory_embedder import drop_quantized_vectors
+
+        monkeypatch.setenv("KRAB_RAG_PHASE2_ENABLED", "1")
+        paths = _build_phase2_archive(tmp_path, n_chunks=20, quantization="int8")
+        r = _make_retriever(paths)
+        try:
+            conn = r._ensure_connection()
+            assert r._vec_quantization == "int8"
+            # Embedder с quantization="none" снёс vec_chunks_q у живого retriever'а.
+            other = open_archive(paths)
+            drop_quantized_vectors(other)
+            other.close()
+            hits = r._vector_search(
+                conn, "chunk 003 about retrieval with unique marker alpha3", None, 5
+            )
+            assert r._vec_quantization == "none"
+        finally:
+            r.close()
+        assert hits and hits[0] == "a003"
+
+    def test_disabling_quantization_drops_table_and_meta(self, tmp_path: Path) -> None:
+        from src.core.memory_embedder import QUANT_VEC_TABLE, stored_quantization
+
+        paths = _build_phase2_archive(tmp_path, n_chunks=10, quantization="int8")
+        embedder = MemoryEmbedder(
+            archive_paths=paths,
+            model_name="fake/test-model",
+            _model=_FakeEmbedModel(dim=DEFAULT_DIM),
+            quantization="none",
+        )
+        try:
+            conn = embedder._ensure_connection()
+            assert stored_quantization(conn) == "none"
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?;", (QUANT_VEC_TABLE,)
+            ).fetchone()
+            assert row is None
+        finally:
+            embedder.close()
+
+    def test_enabling_quantization_backfills_existing_float_vectors(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from src.core.memory_embedder import QUANT_VEC_TABLE, stored_quantization
+
+        monkeypatch.setenv("KRAB_RAG_PHASE2_ENABLED", "1")
+        paths = _build_phase2_archive(tmp_path, n_chunks=30, quantization="none")
+        embedder = MemoryEmbedder(
+            archive_paths=paths,
+            model_name="fake/test-model",
+            _model=_FakeEmbedModel(dim=DEFAULT_DIM),
+            quantization="int8",
+        )
+        try:
+            embedder.embed_all_unindexed()
+            conn = embedder._ensure_connection()
+            assert stored_quantization(conn) == "int8"
+            count = conn.execute(f"SELECT COUNT(*) FROM {QUANT_VEC_TABLE};").fetchone()[0]
+            expected = conn.execute("SELECT COUNT(*) FROM vec_chunks;").fetchone()[0]
+        finally:
+            embedder.close()
+        assert count == expected >= 30
+        r = _make_retriever(paths)
+        try:
+            conn = r._ensure_connection()
+            assert r._vec_quantization == "int8"
+            hits = r._vector_search(
+                conn, "chunk 003 about retrieval with unique marker alpha3", None, 5
+            )
+        finally:
+            r.close()
+        assert hits and hits[0] == "a003"
@@ -202,6 +202,23 @@ def test_apply_prune_deletes_orphan_data(db_with_mix: Path) -> None:
     assert remaining_chunks == 2
 
 
+def test_apply_prune_clears_quantized_vectors(db_with_mix: Path) -> None:
+    """Векторы orphan-чатов удаляются и из vec_chunks_q, если таблица есть."""
+
+    conn = sqlite3.connect(str(db_with_mix))
+    try:
+        conn.execute("CREATE TABLE vec_chunks_q (rowid INTEGER PRIMARY KEY, embedding BLOB)")
+        conn.execute("INSERT INTO vec_chunks_q SELECT id, x'00' FROM chunks")
+        conn.commit()
+        prune_mod.apply_prune(conn, ["200", "300"])
+        remaining = conn.execute("SELECT rowid FROM vec_chunks_q ORDER BY rowid").fetchall()
+        expected = conn.execute("SELECT id FROM chunks ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    assert remaining == expected
+    assert len(remaining) == 2
+
+
 def test_apply_prune_empty_list_returns_zero_outcome() -> None:
     """Wave 161: ранний выход на пустом списке без открытия транзакции."""
 
@@ -864,6 +864,38 @@ class TestVectorSearchC1:
         assert all(cid.startswith("v") for cid in scoped_a)
         r.close()
 
+    def test_vector_search_chat_partition_is_exact(
+        self,
+        archive_with_vec: ArchivePaths,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Legacy-путь берёт limit*3 глобальных соседей и теряет чат, чьи
+        векторы далеко от query; партиция vec_chunks_chat — точный KNN.
+        """
+        from src.core.memory_embedder import backfill_chat_partitions
+
+        monkeypatch.setenv("KRAB_RAG_PHASE2_ENABLED", "1")
+        r = HybridRetriever(archive_paths=archive_with_vec, model_name=None)
+        r._model = _FakeVecModel(dim=256)
+        r._model_name = "fake"
+        conn = r._ensure_connection()
+        assert conn is not None
+
+        # До миграции: legacy-путь, 3 глобальных соседа — все из -100aaa.
+        query = "dashboard redesign plan"
+        assert r._vector_search(conn, query, "-100bbb", limit=1) == []
+
+        assert backfill_chat_partitions(conn) == 7
+        scoped = r._vector_search(conn, query, "-100bbb", limit=1)
+        assert len(scoped) == 1 and scoped[0] in {"w1", "w2"}
+        assert set(r._vector_search(conn, query, "-100bbb", limit=5)) == {"w1", "w2"}
+
+        # Kill-switch возвращает legacy-поведение.
+        monkeypatch.setenv("KRAB_RAG_CHAT_PARTITION_ENABLED", "0")
+        assert r._vector_search(conn, query, "-100bbb", limit=1) == []
+        r.close()
+
     def test_vector_search_operational_error_graceful(
         self,
         archive_with_vec: ArchivePaths,
@@ -6,12 +6,15 @@ from pathlib import Path
 
 import pytest
 
+np = pytest.importorskip("numpy")
+
+from src.core import memory_topic_clusters  # noqa: E402
 from src.core.memory_archive import (
     ArchivePaths,
     create_schema,
     open_archive,
 )
-from src.core.memory_topic_clusters import (
+from src.core.memory_topic_clusters import (  # noqa: E402
     TopicClusterIndex,
     _cosine_distance,
     _kmeans_cosine,
@@ -106,6 +109,23 @@ def test_recluster_persists_and_expands(archive_dir: Path):
     assert all(eid in {"ch1", "ch2"} for eid in extras)
 
 
+def test_recluster_pure_python_without_numpy(archive_dir: Path, monkeypatch):
+    """Без numpy recluster/k-means идут pure-Python путём, matrix API недоступен."""
+    monkeypatch.setattr(memory_topic_clusters, "np", None)
+    index = TopicClusterIndex(ArchivePaths.under(archive_dir))
+    embeddings = {
+        "ch0": [1.0, 0.0, 0.0],
+        "ch1": [0.99, 0.05, 0.0],
+        "ch2": [0.0, 1.0, 0.0],
+        "ch3": [0.05, 0.99, 0.0],
+    }
+    stats = index.recluster(embeddings, num_clusters=2, seed=7)
+    assert stats.num_clusters == 2 and sum(stats.cluster_sizes.values()) == 4
+    assert index.expand_with_cluster(["ch0"], max_per_cluster=2) == ["ch1"]
+    with pytest.raises(RuntimeError, match="numpy"):
+        index.recluster_matrix(["ch0"], [[1.0, 0.0, 0.0]])
+
+
 def test_cluster_stats_empty_when_never_reclustered(tmp_path: Path):
     paths = ArchivePaths.under(tmp_path)
     conn = open_archive(paths)
@@ -118,3 +138,94 @@ def test_cluster_stats_empty_when_never_reclustered(tmp_path: Path):
     assert stats.num_clusters == 0
     assert stats.indexed_chunks == 0
     assert stats.cluster_sizes == {}
+
+
+# ---------------------------------------------------------------------------
+# NumPy k-means, matrix loader, incremental mode.
+# ---------------------------------------------------------------------------
+
+
+def _blobs(n_per: int, centers: int, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(centers, dim)).astype(np.float32)
+    points = np.repeat(base, n_per, axis=0) + 0.05 * rng.normal(size=(centers * n_per, dim))
+    return points.astype(np.float32), np.repeat(np.arange(centers), n_per)
+
+
+@pytest.mark.parametrize("batch_size", [None, 64])
+def test_kmeans_np_recovers_blobs(batch_size):
+    from src.core.memory_topic_clusters import _kmeans_cosine_np, _normalize_rows
+
+    points, truth = _blobs(200, 4)
+    labels, centroids = _kmeans_cosine_np(_normalize_rows(points), 4, seed=3, batch_size=batch_size)
+    assert centroids.shape == (4, 16)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    # Каждая истинная группа целиком в одном кластере, группы различаются.
+    mapping = {int(t): {int(lbl) for lbl in labels[truth == t]} for t in range(4)}
+    assert all(len(v) == 1 for v in mapping.values())
+    assert len({next(iter(v)) for v in mapping.values()}) == 4
+
+
+def _write_vectors(archive_dir: Path, vectors: dict[str, list[float]]) -> None:
+    """Обычная таблица vec_chunks(rowid=chunks.id, vector BLOB) вместо vec0."""
+    conn = open_archive(ArchivePaths.under(archive_dir))
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS vec_chunks(vector BLOB);")
+        for chunk_id, vec in vectors.items():
+            (row_id,) = conn.execute(
+                "SELECT id FROM chunks WHERE chunk_id = ?;", (chunk_id,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO vec_chunks(rowid, vector) VALUES (?, ?);",
+                (row_id, np.asarray(vec, dtype="<f4").tobytes()),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_load_embedding_matrix_reads_contiguous_float32(archive_dir: Path):
+    from src.core.memory_topic_clusters import load_embedding_matrix
+
+    _write_vectors(archive_dir, {"ch0": [1.0, 0.0, 0.0], "ch1": [0.0, 2.0, 0.0]})
+    conn = open_archive(ArchivePaths.under(archive_dir))
+    try:
+        chunk_ids, matrix = load_embedding_matrix(conn)
+    finally:
+        conn.close()
+    assert sorted(chunk_ids) == ["ch0", "ch1"]
+    assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+    assert matrix.shape == (2, 3)
+
+
+def test_incremental_assigns_new_chunks_to_existing_centroids(archive_dir: Path):
+    paths = ArchivePaths.under(archive_dir)
+    index = TopicClusterIndex(paths)
+    old = {
+        "ch0": [1.0, 0.0, 0.0],
+        "ch1": [0.99, 0.05, 0.0],
+        "ch3": [0.0, 1.0, 0.0],
+        "ch4": [0.05, 0.99, 0.0],
+    }
+    _write_vectors(archive_dir, old)
+    index.recluster_from_archive(num_clusters=2, seed=7)
+    assert index.needs_recluster() is False
+
+    # ch2 / ch5 «доэмбеддились» позже.
+    _write_vectors(archive_dir, {"ch2": [0.98, 0.01, 0.01], "ch5": [0.01, 0.98, 0.05]})
+    assert index.assign_unclustered_from_archive() == 2
+    assert index.get_cluster_id("ch2") == index.get_cluster_id("ch0")
+    assert index.get_cluster_id("ch5") == index.get_cluster_id("ch3")
+    stats = index.cluster_stats()
+    assert stats.indexed_chunks == 6
+    assert sum(stats.cluster_sizes.values()) == 6
+    # Повторный запуск — нечего приписывать.
+    assert index.assign_unclustered_from_archive() == 0
+    # 2 incremental из 6 > 25% → пора полный recluster.
+    assert index.needs_recluster() is True
+
+
+def test_incremental_without_centroids_is_noop(archive_dir: Path):
+    index = TopicClusterIndex(ArchivePaths.under(archive_dir))
+    assert index.needs_recluster() is True
+    assert index.assign_incremental(["ch0"], np.ones((1, 3), dtype=np.float32)) == 0
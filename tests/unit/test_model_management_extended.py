@@ -8,6 +8,7 @@
 
 from __future__ import annotations
 
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -20,7 +21,7 @@ from src.model_manager import ModelInfo, ModelManager, ModelType
 
 
 @pytest.fixture
-def manager() -> ModelManager:
+def manager(tmp_path: Path) -> ModelManager:
     """Изолированный ModelManager с замоканными HTTP-клиентами."""
     with patch("src.model_manager.config") as mock_config:
         mock_config.LM_STUDIO_URL = "http://mock-lm"
@@ -34,6 +35,7 @@ def manager() -> ModelManager:
         mock_config.LOCAL_PREFERRED_VISION_MODEL = ""
         mock_config.MODEL = "google/gemini-2.0-flash"
         mock_config.LOCAL_POST_LOAD_VERIFY_SEC = 90.0
+        mock_config.BASE_DIR = tmp_path  # lock-файл загрузки модели — не в cwd
         mm = ModelManager()
         mm._http_client = AsyncMock()
         mm._cloud_http_client = AsyncMock()
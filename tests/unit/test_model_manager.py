@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import time
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -12,7 +13,7 @@ from src.model_manager import ModelInfo, ModelManager, ModelType
 
 
 @pytest.fixture
-def manager() -> ModelManager:
+def manager(tmp_path: Path) -> ModelManager:
     with patch("src.model_manager.config") as mock_config:
         mock_config.LM_STUDIO_URL = "http://mock-url"
         mock_config.LM_STUDIO_API_KEY = ""
@@ -25,6 +26,7 @@ def manager() -> ModelManager:
         mock_config.LOCAL_PREFERRED_VISION_MODEL = ""
         mock_config.MODEL = "google/gemini-2.0-flash"
         mock_config.LOCAL_POST_LOAD_VERIFY_SEC = 90.0
+        mock_config.BASE_DIR = tmp_path  # lock-файл загрузки модели — не в cwd
         mm = ModelManager()
         mm._http_client = AsyncMock()
         mm._cloud_http_client = AsyncMock()
@@ -429,9 +431,10 @@ async def test_health_check_uses_lightweight_availability_probe_when_loaded_cach
 
 
 @pytest.mark.asyncio
-async def test_get_best_model_cloud_when_force_cloud(manager: ModelManager) -> None:
+async def test_get_best_model_cloud_when_force_cloud(manager: ModelManager, tmp_path: Path) -> None:
     with patch("src.model_manager.config") as mock_config:
         mock_config.FORCE_CLOUD = True
+        mock_config.BASE_DIR = tmp_path
         mock_config.LM_STUDIO_URL = "http://mock-url"
         mock_config.LM_STUDIO_API_KEY = ""
         mock_config.MAX_RAM_GB = 24
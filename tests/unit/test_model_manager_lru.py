@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import time
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -12,7 +13,7 @@ from src.model_manager import ModelInfo, ModelManager, ModelType
 
 
 @pytest.fixture
-def manager_with_lru() -> ModelManager:
+def manager_with_lru(tmp_path: Path) -> ModelManager:
     """Fixture для ModelManager с LRU-политикой."""
     with patch("src.model_manager.config") as mock_config:
         mock_config.LM_STUDIO_URL = "http://mock-url"
@@ -26,6 +27,7 @@ def manager_with_lru() -> ModelManager:
         mock_config.LOCAL_PREFERRED_VISION_MODEL = ""
         mock_config.MODEL = "google/gemini-2.0-flash"
         mock_config.LOCAL_POST_LOAD_VERIFY_SEC = 90.0
+        mock_config.BASE_DIR = tmp_path  # lock-файл загрузки модели — не в cwd
         mock_config.KRAB_LRU_EVICT_AFTER_SEC = 300.0  # 5 min
         mm = ModelManager()
         mm._http_client = AsyncMock()
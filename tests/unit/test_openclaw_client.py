@@ -11,6 +11,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
 import pytest
 
+import src.openclaw_client as openclaw_client_module
 from src.core.cloud_key_probe import CloudProbeResult
 from src.core.exceptions import ProviderAuthError, ProviderError
 from src.openclaw_client import OpenClawClient
@@ -398,7 +399,7 @@ async def test_send_message_stream_sanitizes_restored_history_cache(client: Open
     )
 
     with patch("src.openclaw_client.history_cache.get", return_value=cached_history):
-        with patch("src.openclaw_client.history_cache.set") as cache_set:
+        with patch("src.openclaw_client.history_cache.delete") as legacy_delete:
             with patch.object(
                 model_manager,
                 "get_best_model",
@@ -416,9 +417,12 @@ async def test_send_message_stream_sanitizes_restored_history_cache(client: Open
 
     assert "".join(chunks) == "Новый ответ"
     assert client._sessions["chat-restored-cache"][1]["content"] == "🦀 Уже очищенный смысл."
-    persisted_payloads = [call.args[1] for call in cache_set.call_args_list if len(call.args) >= 2]
-    assert persisted_payloads
-    assert all("Thinking Process" not in payload for payload in persisted_payloads)
+    # Legacy-ключ мигрирован в append-only лог и удалён.
+    legacy_delete.assert_any_call("chat_history:chat-restored-cache")
+    persisted = openclaw_client_module.history_log.load("chat-restored-cache")
+    assert persisted is not None
+    assert [m["content"] for m in persisted[1:]] == ["🦀 Уже очищенный смысл.", "Hi", "Новый ответ"]
+    assert "Thinking Process" not in json.dumps(persisted, ensure_ascii=False)
 
 
 @pytest.mark.asyncio
@@ -435,7 +439,11 @@ async def test_send_message_stream_sanitizes_existing_in_memory_session(
         },
     ]
 
-    with patch("src.openclaw_client.history_cache.set") as cache_set:
+    with patch.object(
+        openclaw_client_module.history_log,
+        "persist",
+        wraps=openclaw_client_module.history_log.persist,
+    ) as log_persist:
         with patch.object(
             model_manager, "get_best_model", new=AsyncMock(return_value="google/gemini-2.5-flash")
         ):
@@ -449,7 +457,9 @@ async def test_send_message_stream_sanitizes_existing_in_memory_session(
 
     assert "".join(chunks) == "OK"
     assert client._sessions["chat-existing-session"][1]["content"] == "🦀 Сохраняем только это."
-    persisted_payloads = [call.args[1] for call in cache_set.call_args_list if len(call.args) >= 2]
+    persisted_payloads = [
+        json.dumps(call.args[1], ensure_ascii=False) for call in log_persist.call_args_list
+    ]
     assert persisted_payloads
     assert all("The model is thinking" not in payload for payload in persisted_payloads)
 
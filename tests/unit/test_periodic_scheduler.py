@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+PeriodicScheduler: heap-driver, skip-if-running / deferral, coalescing после
+сна хоста, adaptive-задержка, попутный запуск по slack и рендер в /metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.core.periodic_scheduler import PeriodicScheduler, periodic_scheduler
+
+
+class _Clock:
+    """Ручные monotonic + wall часы."""
+
+    def __init__(self) -> None:
+        self.mono = 1000.0
+        self.wall = 1_700_000_000.0
+
+    def advance(self, sec: float, *, slept: bool = False) -> None:
+        self.wall += sec
+        if not slept:
+            self.mono += sec
+
+
+async def _spin(n: int = 5) -> None:
+    for _ in range(n):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_runs_periodically_and_records_stats() -> None:
+    sched = PeriodicScheduler(max_idle_sec=1.0)
+    calls: list[int] = []
+    sched.register("tick", lambda: calls.append(1), 0.02, initial_delay_sec=0)
+    try:
+        await asyncio.sleep(0.13)
+    finally:
+        await sched.stop()
+    assert len(calls) >= 4
+    stats = sched.stats()["jobs"]["tick"]
+    assert stats["runs"] == len(calls)
+    assert stats["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_skip_if_running_never_overlaps() -> None:
+    sched = PeriodicScheduler(max_idle_sec=1.0)
+    active = {"now": 0, "max": 0}
+
+    async def _slow() -> None:
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.05)
+        active["now"] -= 1
+
+    sched.register("slow", _slow, 0.01, initial_delay_sec=0, slack_sec=0)
+    try:
+        await asyncio.sleep(0.12)
+    finally:
+        await sched.stop()
+    assert active["max"] == 1
+    assert sched.stats()["jobs"]["slow"]["skipped"] > 0
+
+
+@pytest.mark.asyncio
+async def test_deferred_rerun_when_not_skipping() -> None:
+    sched = PeriodicScheduler(max_idle_sec=1.0)
+    gate = asyncio.Event()
+    calls = {"n": 0}
+
+    async def _job() -> None:
+        calls["n"] += 1
+        if calls["n"] == 1:
+            await gate.wait()
+
+    sched.register("j", _job, 100.0, initial_delay_sec=0, skip_if_running=False)
+    await _spin()
+    assert sched.trigger("j")  # первый запуск ещё идёт → отложенный повтор
+    assert sched.trigger("j")  # повторы схлопываются в один
+    gate.set()
+    await _spin(10)
+    await sched.stop()
+    assert calls["n"] == 2
+    assert sched.stats()["jobs"]["j"]["skipped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_counted_and_job_keeps_running() -> None:
+    sched = PeriodicScheduler(max_idle_sec=1.0)
+
+    def _boom() -> None:
+        raise RuntimeError("probe down")
+
+    sched.register("boom", _boom, 0.01, initial_delay_sec=0)
+    try:
+        await asyncio.sleep(0.06)
+    finally:
+        await sched.stop()
+    stats = sched.stats()["jobs"]["boom"]
+    assert stats["failures"] >= 2
+    assert stats["last_error"] == "RuntimeError: probe down"
+
+
+@pytest.mark.asyncio
+async def test_host_sleep_coalesces_missed_ticks_into_one_run() -> None:
+    clock = _Clock()
+    sched = PeriodicScheduler(clock=lambda: clock.mono, wall_clock=lambda: clock.wall)
+    calls = {"n": 0}
+    sched.register("hourly", lambda: calls.__setitem__("n", calls["n"] + 1), 3600.0)
+    await _spin()
+    assert calls["n"] == 0
+
+    clock.advance(5 * 3600 + 10, slept=True)  # ноутбук спал 5 часов
+    sched._wakeup.set()
+    await _spin()
+    await sched.stop()
+    assert calls["n"] == 1
+    stats = sched.stats()
+    assert stats["sleep_gaps"] == 1
+    assert stats["jobs"]["hourly"]["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_adaptive_numeric_return_overrides_next_delay() -> None:
+    clock = _Clock()
+    sched = PeriodicScheduler(clock=lambda: clock.mono, wall_clock=lambda: clock.wall)
+    sched.register("backoff", lambda: 900.0, 60.0, initial_delay_sec=0, adaptive=True)
+    sched.register("counter", lambda: 0, 60.0, initial_delay_sec=0)
+    await _spin()
+    backoff, counter = sched._jobs["backoff"], sched._jobs["counter"]
+    await sched.stop()
+    assert backoff.runs == counter.runs == 1
+    assert backoff.next_due == pytest.approx(clock.mono + 900.0)
+    # Без adaptive результат (счётчик) не трогает расписание.
+    assert counter.next_due == pytest.approx(clock.mono + 60.0)
+
+
+@pytest.mark.asyncio
+async def test_slack_lets_nearby_job_piggyback_on_wakeup() -> None:
+    clock = _Clock()
+    sched = PeriodicScheduler(clock=lambda: clock.mono, wall_clock=lambda: clock.wall)
+    fired: list[str] = []
+    sched.register("a", lambda: fired.append("a"), 60.0)
+    sched.register("b", lambda: fired.append("b"), 600.0, initial_delay_sec=80.0, slack_sec=30.0)
+    await _spin()
+    clock.advance(60.0)
+    sched._wakeup.set()
+    await _spin()
+    await sched.stop()
+    assert sorted(fired) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_reregister_keeps_counters_and_unregister_stops_runs() -> None:
+    sched = PeriodicScheduler(max_idle_sec=1.0)
+    calls = {"n": 0}
+
+    def _inc() -> None:
+        calls["n"] += 1
+
+    sched.register("x", _inc, 100.0, initial_delay_sec=0)
+    await _spin()
+    sched.register("x", _inc, 100.0, initial_delay_sec=0)
+    await _spin()
+    assert sched.stats()["jobs"]["x"]["runs"] == 2
+    assert sched.unregister("x")
+    assert not sched.trigger("x")
+    await sched.stop()
+    assert calls["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_render_periodic_job_counters() -> None:
+    from src.core.metrics.collect import collect_metrics
+
+    periodic_scheduler.register("metrics_probe", lambda: None, 100.0, initial_delay_sec=0)
+    await _spin()
+    text = collect_metrics()
+    assert 'krab_periodic_job_runs_total{job="metrics_probe"} 1' in text
+    assert 'krab_periodic_job_duration_seconds_total{job="metrics_probe"}' in text
+    assert "krab_periodic_scheduler_wakeups_total" in text
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты src/core/quantile_sketch.py — mergeable quantile sketch.
+
+Точность документируется против точных перцентилей (sort-based правило
+``sorted(v)[min(int(n*q), n-1)]``, которым раньше считал aggregate_perf):
+для log-normal latency относительная ошибка p50/p95/p99 ≤ 1%.
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.core.quantile_sketch import QuantileSketch
+
+
+def _exact(values: list[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(int(len(s) * q + 1e-9), len(s) - 1)]
+
+
+def _latencies(n: int, seed: int) -> list[float]:
+    rnd = random.Random(seed)
+    # Log-normal с тяжёлым хвостом: медиана ~1.6s, p99 ~ десятки секунд.
+    return [rnd.lognormvariate(0.5, 1.2) for _ in range(n)]
+
+
+def test_small_sketch_is_exact() -> None:
+    sk = QuantileSketch()
+    sk.extend(float(i) for i in range(1, 11))
+    assert sk.is_exact
+    assert (sk.quantile(0.5), sk.quantile(0.95), sk.quantile(0.99)) == (6.0, 10.0, 10.0)
+    assert sk.total / sk.count == 5.5
+
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.95, 0.99])
+def test_relative_error_within_accuracy(q: float) -> None:
+    values = _latencies(50_000, seed=7)
+    sk = QuantileSketch(relative_accuracy=0.01)
+    sk.extend(values)
+    assert not sk.is_exact
+    exact = _exact(values, q)
+    assert abs(sk.quantile(q) - exact) / exact <= 0.01
+
+
+def test_merged_buckets_match_single_sketch() -> None:
+    values = _latencies(20_000, seed=11)
+    whole = QuantileSketch()
+    whole.extend(values)
+    merged = QuantileSketch()
+    for start in range(0, len(values), 1_000):
+        part = QuantileSketch()
+        part.extend(values[start : start + 1_000])
+        merged.merge(part)
+    assert merged.count == whole.count
+    assert merged.total == pytest.approx(whole.total)
+    for q in (0.5, 0.95, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+        assert abs(merged.quantile(q) - _exact(values, q)) / _exact(values, q) <= 0.01
+
+
+def test_merge_of_small_sketches_stays_exact() -> None:
+    a, b = QuantileSketch(), QuantileSketch()
+    a.extend([1.0, 3.0])
+    b.extend([2.0, 4.0])
+    a.merge(b)
+    assert a.is_exact
+    assert a.quantile(0.5) == 3.0
+
+
+def test_zero_and_bounds() -> None:
+    sk = QuantileSketch(exact_limit=0)
+    sk.extend([0.0, 0.0, 5.0, 7.0])
+    assert sk.quantile(0.0) == 0.0
+    assert sk.quantile(1.0) <= 7.0
+    assert QuantileSketch().quantile(0.5) == 0.0
+
+
+def test_merge_rejects_different_accuracy() -> None:
+    a = QuantileSketch(relative_accuracy=0.01)
+    b = QuantileSketch(relative_accuracy=0.05)
+    b.add(1.0)
+    with pytest.raises(ValueError):
+        a.merge(b)
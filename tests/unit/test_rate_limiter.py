@@ -9,6 +9,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 
 import pytest
 
@@ -183,8 +184,9 @@ async def test_concurrent_acquires_no_race(tight_limiter: GlobalTelegramRateLimi
 
 @pytest.mark.asyncio
 async def test_concurrent_does_not_exceed_window(tight_limiter: GlobalTelegramRateLimiter) -> None:
-    """При конкурентных acquire current_in_window никогда не превышает max_per_sec."""
+    """Конкурентные acquire сверх burst'а выдаются не быстрее пополнения bucket'а."""
     limit = tight_limiter.stats()["max_per_sec"]
+    window = tight_limiter.stats()["window_sec"]
 
     max_seen: list[int] = []
 
@@ -192,8 +194,31 @@ async def test_concurrent_does_not_exceed_window(tight_limiter: GlobalTelegramRa
         await tight_limiter.acquire()
         max_seen.append(tight_limiter.stats()["current_in_window"])
 
+    start = time.monotonic()
     tasks = [asyncio.create_task(acquire_and_check()) for _ in range(limit + 2)]
     await asyncio.gather(*tasks)
-    # После sleep внутри acquire окно частично истекает, но в момент записи
-    # не должно превышать лимит + 1 (один новый слот только что добавлен)
+    elapsed = time.monotonic() - start
+    # Burst (= limit) сразу, ещё 2 — не раньше, чем освободится окно.
+    assert elapsed >= 2 * window / limit * 0.8
+    # В момент записи окно не превышает лимит + 1 (один слот только что добавлен).
     assert max(max_seen) <= limit + 1
+
+
+@pytest.mark.asyncio
+async def test_full_bucket_plus_refill_respects_window(
+    tight_limiter: GlobalTelegramRateLimiter,
+) -> None:
+    """Полный bucket + пополнение не пропускают 2× лимита за одно окно."""
+    limit = tight_limiter.stats()["max_per_sec"]
+    window = tight_limiter.stats()["window_sec"]
+    grants: list[float] = []
+
+    async def acquire_and_mark() -> None:
+        await tight_limiter.acquire()
+        grants.append(time.monotonic())
+
+    await asyncio.gather(*[acquire_and_mark() for _ in range(2 * limit)])
+    grants.sort()
+    # Любые limit + 1 подряд выданных токенов растянуты минимум на окно.
+    spans = [grants[i + limit] - grants[i] for i in range(len(grants) - limit)]
+    assert min(spans) >= window * 0.9
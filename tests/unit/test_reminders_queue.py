@@ -11,6 +11,7 @@
 6) check_event_match — regex-совпадения
 7) persistence: load/save через tmp_path
 8) fired reminders не срабатывают повторно
+9) due-индекс (min-heap): reschedule, сон loop'а до ближайшего fire_at
 """
 
 from __future__ import annotations
@@ -190,6 +191,70 @@ class TestCheckTimeReminders:
         assert count["n"] == 1  # сработал ровно один раз
 
 
+# ─── Due-индекс ───────────────────────────────────────────────────────────────
+
+
+class TestDueIndex:
+    def test_next_fire_at_skips_cancelled_and_fired(self, queue: RemindersQueue) -> None:
+        now = int(time.time())
+        first = queue.add_time_reminder(owner_id="42", fire_at=now + 100, action="a")
+        queue.add_time_reminder(owner_id="42", fire_at=now + 200, action="b")
+        queue.add_event_reminder(owner_id="42", chat_id="-1", pattern="x", action="c")
+        assert queue.next_fire_at() == now + 100
+        queue.cancel(first)
+        assert queue.next_fire_at() == now + 200
+
+    def test_reschedule_moves_fire_time(self, queue: RemindersQueue) -> None:
+        now = int(time.time())
+        rid = queue.add_time_reminder(owner_id="42", fire_at=now + 3600, action="x")
+        assert asyncio.run(queue.check_time_reminders()) == []
+        assert queue.reschedule(rid, now - 1)
+        assert asyncio.run(queue.check_time_reminders()) == [rid]
+        # Старая запись heap (now + 3600) устарела и не сработает повторно.
+        assert queue.next_fire_at() is None
+        assert not queue.reschedule(rid, now + 10)
+
+    def test_index_rebuilt_on_load(self, state_path: Path) -> None:
+        now = int(time.time())
+        q1 = RemindersQueue(state_path=state_path)
+        q1.add_time_reminder(owner_id="42", fire_at=now + 50, action="x")
+        q1.add_time_reminder(owner_id="42", fire_at=now - 5, action="y")
+        q2 = RemindersQueue(state_path=state_path)
+        assert q2.next_fire_at() == now - 5
+        assert len(asyncio.run(q2.check_time_reminders())) == 1
+        assert q2.next_fire_at() == now + 50
+
+    def test_seconds_until_next_due_capped(self, queue: RemindersQueue) -> None:
+        from src.core.reminders_queue import MAX_IDLE_SEC
+
+        now = time.time()
+        assert queue.seconds_until_next_due(now) == MAX_IDLE_SEC
+        queue.add_time_reminder(owner_id="42", fire_at=int(now) + 10, action="x")
+        assert 0 < queue.seconds_until_next_due(now) <= 10
+        queue.add_time_reminder(owner_id="42", fire_at=int(now) - 10, action="y")
+        assert queue.seconds_until_next_due(now) == 0.0
+
+    def test_loop_wakes_early_on_add(self, queue: RemindersQueue) -> None:
+        fired: list[str] = []
+
+        async def cb(r: Reminder) -> None:
+            fired.append(r.id)
+
+        async def scenario() -> str:
+            queue.set_fire_callback(cb)
+            task = asyncio.create_task(queue.start_loop())
+            await asyncio.sleep(0.01)  # loop уснул на MAX_IDLE_SEC — очередь пуста
+            rid = queue.add_time_reminder(owner_id="42", fire_at=int(time.time()) - 1, action="now")
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return rid
+
+        rid = asyncio.run(scenario())
+        assert fired == [rid]
+
+
 # ─── check_event_match ────────────────────────────────────────────────────────
 
 
@@ -238,6 +303,65 @@ class TestCheckEventMatch:
         assert queue.get(rid).status == ReminderStatus.FIRED
 
 
+class TestEventMatcherIndex:
+    def test_returns_all_matching_in_chat_including_grouped_patterns(
+        self, queue: RemindersQueue
+    ) -> None:
+        a = queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"btc", action="a")
+        b = queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"rally", action="b")
+        # Backreference: в общей альтернации нумерация групп сломалась бы.
+        c = queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"(\w+) \1", action="c")
+        queue.add_event_reminder(owner_id="42", chat_id="-200", pattern=r"btc", action="d")
+        assert [r.id for r in queue.check_event_match("-100", "BTC rally rally")] == [a, b, c]
+        assert [r.id for r in queue.check_event_match("-100", "go go")] == [c]
+        assert queue.check_event_match("-100", "nothing here") == []
+
+    def test_inline_flag_pattern_falls_back_without_prefilter(self, queue: RemindersQueue) -> None:
+        a = queue.add_event_reminder(
+            owner_id="42", chat_id="-1", pattern=r"(?s)foo.bar", action="a"
+        )
+        b = queue.add_event_reminder(owner_id="42", chat_id="-1", pattern=r"baz", action="b")
+        assert [r.id for r in queue.check_event_match("-1", "foo\nbar baz")] == [a, b]
+
+    def test_no_compilation_per_message_and_index_invalidated(
+        self, queue: RemindersQueue, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import re
+
+        from src.core import reminders_queue as rq_module
+
+        rid = queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"foo", action="a")
+        queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"bar", action="b")
+        queue.check_event_match("-100", "warm up")  # первичная сборка matcher'а
+        calls = {"n": 0}
+        real_compile = re.compile
+
+        def counting_compile(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+            calls["n"] += 1
+            return real_compile(*args, **kwargs)
+
+        monkeypatch.setattr(rq_module.re, "compile", counting_compile)
+        monkeypatch.setattr(rq_module.re, "search", counting_compile)
+        for _ in range(50):
+            queue.check_event_match("-100", "foo bar")
+        assert calls["n"] == 0
+
+        queue.cancel(rid)
+        assert [r.action_payload for r in queue.check_event_match("-100", "foo bar")] == ["b"]
+
+    def test_fired_event_reminder_leaves_index(self, queue: RemindersQueue) -> None:
+        queue.add_event_reminder(owner_id="42", chat_id="-100", pattern=r"foo", action="a")
+        (r,) = queue.check_event_match("-100", "foo")
+        asyncio.run(queue.fire_event_reminder(r))
+        assert queue.check_event_match("-100", "foo") == []
+
+    def test_index_rebuilt_on_load(self, state_path: Path) -> None:
+        q1 = RemindersQueue(state_path=state_path)
+        rid = q1.add_event_reminder(owner_id="42", chat_id=-100, pattern=r"foo", action="a")
+        q2 = RemindersQueue(state_path=state_path)
+        assert [r.id for r in q2.check_event_match(-100, "FOO!")] == [rid]
+
+
 # ─── Persistence ──────────────────────────────────────────────────────────────
 
 
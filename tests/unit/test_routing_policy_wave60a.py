@@ -307,14 +307,17 @@ async def test_decisions_persisted_to_jsonl(tmp_path: Path) -> None:
 
 @pytest.mark.asyncio
 async def test_decisions_log_capped_at_200(tmp_path: Path) -> None:
-    """Лог обрезается до последних 200 записей."""
+    """Лог отдаёт только последние 200 записей; на диске не больше 2 сегментов."""
     log_file = tmp_path / "routing_decisions.jsonl"
-    # Записываем 210 записей напрямую
+    # Записываем 410 записей напрямую
     with patch("src.core.routing_policy._DECISIONS_LOG", log_file):
-        for i in range(210):
+        for i in range(410):
             _append_decision({"ts": float(i), "task_type": f"task_{i}", "backend": "cloud", "reason": "test"})
-        lines = log_file.read_text(encoding="utf-8").strip().splitlines()
-    assert len(lines) == 200
+        result = read_recent_decisions(1000)
+    assert len(result) == 200
+    assert result[0]["task_type"] == "task_210"
+    assert result[-1]["task_type"] == "task_409"
+    assert len(list(tmp_path.glob("routing_decisions*.jsonl"))) <= 2
 
 
 @pytest.mark.asyncio
@@ -83,7 +83,8 @@ class TestSearchBraveMetricsWiring:
     @pytest.mark.asyncio
     async def test_ok_path_records_call_and_cost(self) -> None:
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="Хороший результат")
@@ -107,7 +108,8 @@ class TestSearchBraveMetricsWiring:
     async def test_cache_hit_does_not_record_call(self) -> None:
         """Кэш-хит — внешнего вызова нет, метрики не двигаются."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = "cached payload"
+        mock_cache.aget = AsyncMock(return_value="cached payload")
+        mock_cache.aset = AsyncMock()
 
         calls_before = _counter_value(krab_search_calls_total, provider="brave", status="ok")
         cost_before = _counter_value(krab_search_cost_eur_total, provider="brave")
@@ -122,7 +124,8 @@ class TestSearchBraveMetricsWiring:
     @pytest.mark.asyncio
     async def test_exception_path_records_error_without_cost(self) -> None:
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(side_effect=OSError("connection refused"))
@@ -148,7 +151,8 @@ class TestSearchBraveMetricsWiring:
     @pytest.mark.asyncio
     async def test_timeout_path_records_timeout_status(self) -> None:
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(side_effect=asyncio.TimeoutError())
@@ -177,7 +181,8 @@ class TestSearchBraveMetricsWiring:
     async def test_error_marker_result_records_error_without_cost(self) -> None:
         """MCP вернул `❌ ...` без exception — error status, cost не списан."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="❌ rate limit")
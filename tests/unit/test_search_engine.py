@@ -31,7 +31,8 @@ class TestSearchBrave:
     async def test_cache_hit_returns_cached_with_marker(self) -> None:
         """Кэш-хит: возвращается кэшированный результат с пометкой '_(восстановлено из кэша)_'."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = "Результат из кэша"
+        mock_cache.aget = AsyncMock(return_value="Результат из кэша")
+        mock_cache.aset = AsyncMock()
 
         with patch.object(search_engine_module, "search_cache", mock_cache):
             result = await search_brave("тест запрос")
@@ -43,7 +44,8 @@ class TestSearchBrave:
     async def test_cache_miss_calls_mcp_manager(self) -> None:
         """Промах кэша: вызывается mcp_manager.search_web."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="Свежий результат")
@@ -61,7 +63,8 @@ class TestSearchBrave:
     async def test_successful_result_is_cached(self) -> None:
         """Успешный результат сохраняется в кэш с TTL 3600."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="Хороший результат")
@@ -72,13 +75,14 @@ class TestSearchBrave:
         ):
             await search_brave("запрос для кэша")
 
-        mock_cache.set.assert_called_once_with("запрос для кэша", "Хороший результат", ttl=3600)
+        mock_cache.aset.assert_called_once_with("запрос для кэша", "Хороший результат", ttl=3600)
 
     @pytest.mark.asyncio
     async def test_error_result_not_cached(self) -> None:
         """Результат с ❌ не кэшируется."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="❌ Ошибка поиска")
@@ -89,14 +93,15 @@ class TestSearchBrave:
         ):
             result = await search_brave("провальный запрос")
 
-        mock_cache.set.assert_not_called()
+        mock_cache.aset.assert_not_called()
         assert result == "❌ Ошибка поиска"
 
     @pytest.mark.asyncio
     async def test_empty_result_not_cached(self) -> None:
         """Пустой результат не кэшируется."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(return_value="")
@@ -107,13 +112,14 @@ class TestSearchBrave:
         ):
             await search_brave("пустой запрос")
 
-        mock_cache.set.assert_not_called()
+        mock_cache.aset.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_os_error_returns_error_string(self) -> None:
         """OSError из mcp_manager обрабатывается — возвращается строка с ❌."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(side_effect=OSError("connection refused"))
@@ -131,7 +137,8 @@ class TestSearchBrave:
     async def test_value_error_returns_error_string(self) -> None:
         """ValueError из mcp_manager обрабатывается — возвращается строка с ❌."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(side_effect=ValueError("invalid query"))
@@ -149,7 +156,8 @@ class TestSearchBrave:
     async def test_attribute_error_returns_error_string(self) -> None:
         """AttributeError (например, mcp не запущен) обрабатывается — строка с ❌."""
         mock_cache = MagicMock()
-        mock_cache.get.return_value = None
+        mock_cache.aget = AsyncMock(return_value=None)
+        mock_cache.aset = AsyncMock()
 
         mock_mcp = MagicMock()
         mock_mcp.search_web = AsyncMock(side_effect=AttributeError("NoneType has no attribute"))
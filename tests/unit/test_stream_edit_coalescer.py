@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Тесты StreamEditCoalescer: бюджет edit'ов между стримами, tiny-diff, счётчики."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.core.stream_edit_coalescer import StreamEditCoalescer, visible_delta
+from src.core.telegram_rate_limiter import GlobalTelegramRateLimiter
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, sec: float) -> None:
+        self.now += sec
+
+
+class _FakeLimiter:
+    def __init__(self, capacity: float = 20.0, headroom: float = 1.0) -> None:
+        self.capacity = capacity
+        self.free = headroom
+
+    def capacity_per_sec(self) -> float:
+        return self.capacity
+
+    def headroom(self) -> float:
+        return self.free
+
+
+def _make(limiter: _FakeLimiter | None = None, **kwargs) -> tuple[StreamEditCoalescer, _FakeClock]:
+    clock = _FakeClock()
+    coalescer = StreamEditCoalescer(
+        rate_limiter=limiter or _FakeLimiter(),  # type: ignore[arg-type]
+        clock=clock,
+        **kwargs,
+    )
+    return coalescer, clock
+
+
+def _text(n: int) -> str:
+    return "x" * n
+
+
+class TestVisibleDelta:
+    def test_append_counts_tail_without_whitespace(self) -> None:
+        assert visible_delta("hello", "hello   world  ") == 5
+
+    def test_rewrite_counts_as_large(self) -> None:
+        assert visible_delta("hello world", "hullo world") == len("hullo world")
+
+
+class TestOffer:
+    def test_first_edit_is_immediate(self) -> None:
+        c, _ = _make()
+        c.open_stream("s1", min_interval_sec=0.75)
+        assert c.offer("s1", _text(40)) is True
+
+    def test_interval_floor_respected(self) -> None:
+        c, clock = _make()
+        c.open_stream("s1", min_interval_sec=0.75)
+        assert c.offer("s1", _text(40))
+        c.mark_edited("s1", _text(40))
+        clock.advance(0.5)
+        assert c.offer("s1", _text(80)) is False
+        clock.advance(0.3)
+        assert c.offer("s1", _text(120)) is True
+
+    def test_small_diff_dropped_until_enough_text(self) -> None:
+        c, clock = _make(min_visible_delta=16)
+        c.open_stream("s1", min_interval_sec=0.0)
+        c.mark_edited("s1", _text(40))
+        clock.advance(10)
+        assert c.offer("s1", _text(45)) is False
+        assert c.offer("s1", _text(56)) is True
+        stats = c.stream_stats("s1")
+        assert stats is not None
+        assert stats["dropped_small_diff"] == 1
+
+    def test_interval_grows_with_active_streams(self) -> None:
+        # capacity 20/s * share 0.5 = 10 edits/s на всех.
+        c, _ = _make(budget_share=0.5, max_interval_sec=100)
+        for i in range(20):
+            c.open_stream(f"s{i}", min_interval_sec=0.75)
+        assert c.interval_for("s0") == pytest.approx(2.0)
+
+    def test_interval_grows_when_limiter_busy(self) -> None:
+        limiter = _FakeLimiter(headroom=1.0)
+        c, _ = _make(limiter, budget_share=0.5, max_interval_sec=6.0)
+        for i in range(10):
+            c.open_stream(f"s{i}", min_interval_sec=0.75)
+        assert c.interval_for("s0") == pytest.approx(1.0)
+        limiter.free = 0.25
+        assert c.interval_for("s0") == pytest.approx(4.0)
+        limiter.free = 0.0
+        assert c.interval_for("s0") == pytest.approx(6.0)
+
+    def test_global_cap_staggers_simultaneous_streams(self) -> None:
+        # 4 edits/s на всех: из 10 стримов, стартовавших разом, сразу проходят 4.
+        c, clock = _make(_FakeLimiter(capacity=8.0), budget_share=0.5)
+        allowed = 0
+        for i in range(10):
+            c.open_stream(f"s{i}")
+            if c.offer(f"s{i}", _text(40)):
+                c.mark_edited(f"s{i}", _text(40))
+                allowed += 1
+        assert allowed == 4
+        clock.advance(1.01)
+        assert c.offer("s9", _text(40)) is True
+
+    def test_unknown_stream_is_opened_implicitly(self) -> None:
+        c, _ = _make()
+        assert c.offer("adhoc", _text(40)) is True
+        assert c.stats()["active_streams"] == 1
+
+
+class TestLifecycleAndStats:
+    def test_close_returns_counters_and_removes_stream(self) -> None:
+        c, clock = _make()
+        c.open_stream("s1", min_interval_sec=1.0)
+        for n in range(1, 11):
+            text = _text(40 * n)
+            if c.offer("s1", text):
+                c.mark_edited("s1", text)
+            clock.advance(0.3)
+        result = c.close_stream("s1")
+        assert result is not None
+        assert result["offered"] == 10
+        assert result["edits"] + result["dropped"] == 10
+        assert result["edits"] == 3
+        assert c.stats()["active_streams"] == 0
+        assert c.close_stream("s1") is None
+
+    def test_aggregate_stats(self) -> None:
+        c, _ = _make()
+        c.open_stream("a")
+        c.open_stream("b")
+        assert c.offer("a", _text(40))
+        c.mark_edited("a", _text(40))
+        assert c.offer("a", _text(41)) is False
+        stats = c.stats()
+        assert stats["total_streams"] == 2
+        assert stats["total_edits"] == 1
+        assert stats["total_dropped"] == 1
+        assert {s["stream_id"] for s in stats["streams"]} == {"a", "b"}
+        c.reset_counters()
+        assert c.stats()["total_edits"] == 0
+
+
+class TestLimiterHeadroom:
+    @pytest.mark.asyncio
+    async def test_headroom_tracks_bucket(self) -> None:
+        limiter = GlobalTelegramRateLimiter(max_per_sec=4, window_sec=60.0)
+        assert limiter.headroom() == 1.0
+        for _ in range(3):
+            await limiter.acquire(purpose="test")
+        assert limiter.headroom() == pytest.approx(0.25, abs=0.01)
+        assert limiter.capacity_per_sec() == pytest.approx(4 / 60.0)
@@ -7,8 +7,8 @@ rate limiter для исходящих Telegram API вызовов.
 
 1. **Under cap → no wait.** acquire() N раз, где N <= max_per_sec, должен
    завершиться мгновенно (< 50ms суммарно, плюс фиксированные накладные).
-2. **Over cap → wait.** acquire() max_per_sec+1 раз в одно окно должен
-   разбудить блокирующий sleep.
+2. **Over cap → wait.** acquire() max_per_sec+1 раз в одно окно ждёт, пока
+   из sliding window выпадет старейший вызов.
 3. **Window slides forward.** После прохождения window_sec секунд старые
    записи покидают окно и лимит снова разрешает.
 4. **Stats counters** корректно отслеживают total_acquired / total_waited /
@@ -20,7 +20,7 @@ rate limiter для исходящих Telegram API вызовов.
    per-purpose.
 
 Тесты используют маленький `max_per_sec=5` и короткое `window_sec=0.2` чтобы
-не тормозить pytest. Это не меняет семантику — sliding window масштабируется.
+не тормозить pytest. Это не меняет семантику — bucket и окно масштабируются.
 """
 
 from __future__ import annotations
@@ -52,7 +52,7 @@ async def test_under_cap_no_wait() -> None:
 
 @pytest.mark.asyncio
 async def test_over_cap_triggers_wait() -> None:
-    """6-й acquire при max=5 должен разбудить asyncio.sleep."""
+    """6-й acquire при max=5 ждёт, пока освободится место в окне."""
     limiter = GlobalTelegramRateLimiter(max_per_sec=5, window_sec=0.2)
     for _ in range(5):
         await limiter.acquire(purpose="burst")
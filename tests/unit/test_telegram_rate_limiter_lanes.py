@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Priority lanes GlobalTelegramRateLimiter: WFQ, ContextVar, throttle, send queue.
+
+Bucket маленький (burst=1, 100 токенов/с), чтобы contention создавался
+мгновенно и тесты шли десятки миллисекунд.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.core.gateway_scheduler import gateway_priority
+from src.core.message_priority_dispatcher import Priority
+from src.core.metrics.telegram_lanes import render_telegram_lane_wait
+from src.core.telegram_outgoing_throttle import TelegramOutgoingThrottle
+from src.core.telegram_rate_limiter import (
+    GlobalTelegramRateLimiter,
+    TelegramLane,
+    current_telegram_lane,
+    telegram_lane,
+)
+
+
+def _drained_limiter() -> GlobalTelegramRateLimiter:
+    limiter = GlobalTelegramRateLimiter(max_per_sec=100, window_sec=1.0, burst=1)
+    limiter._tokens = 0.0  # noqa: SLF001 — стартуем без токенов, все встают в очередь
+    return limiter
+
+
+async def _grant_order(
+    limiter: GlobalTelegramRateLimiter, lanes: list[TelegramLane]
+) -> list[TelegramLane]:
+    order: list[TelegramLane] = []
+
+    async def one(lane: TelegramLane) -> None:
+        await limiter.acquire(purpose="test", lane=lane)
+        order.append(lane)
+
+    await asyncio.gather(*(one(lane) for lane in lanes))
+    return order
+
+
+@pytest.mark.asyncio
+async def test_owner_overtakes_queued_bulk() -> None:
+    limiter = _drained_limiter()
+    lanes = [TelegramLane.BULK] * 5 + [TelegramLane.OWNER]
+    order = await _grant_order(limiter, lanes)
+    # Owner встал в очередь последним, но получает токен раньше хвоста bulk.
+    assert order.index(TelegramLane.OWNER) <= 1
+
+
+@pytest.mark.asyncio
+async def test_weighted_share_under_contention() -> None:
+    limiter = _drained_limiter()
+    lanes = [TelegramLane.OWNER] * 16 + [TelegramLane.BULK] * 16
+    order = await _grant_order(limiter, lanes)
+    first = order[:18]
+    # 8:1 — из первых 18 токенов owner берёт ~16, но bulk не голодает.
+    assert first.count(TelegramLane.OWNER) >= 14
+    assert first.count(TelegramLane.BULK) >= 1
+
+
+@pytest.mark.asyncio
+async def test_fifo_within_lane() -> None:
+    limiter = _drained_limiter()
+    order: list[int] = []
+
+    async def one(idx: int) -> None:
+        await limiter.acquire(purpose=f"n{idx}", lane=TelegramLane.INTERACTIVE)
+        order.append(idx)
+
+    await asyncio.gather(*(one(i) for i in range(5)))
+    assert order == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_consume_token() -> None:
+    limiter = _drained_limiter()
+    task = asyncio.create_task(limiter.acquire(lane=TelegramLane.BULK))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.wait_for(limiter.acquire(lane=TelegramLane.BULK), timeout=1.0)
+    assert limiter.lane_stats()["bulk"]["acquired"] == 1
+
+
+def test_lane_context_and_nesting() -> None:
+    assert current_telegram_lane() is TelegramLane.INTERACTIVE
+    with telegram_lane(TelegramLane.BACKGROUND) as lane:
+        assert lane is TelegramLane.BACKGROUND
+        # Внутри background нельзя поднять приоритет до owner.
+        with telegram_lane(TelegramLane.OWNER) as inner:
+            assert inner is TelegramLane.BACKGROUND
+        with telegram_lane(TelegramLane.BULK) as inner:
+            assert inner is TelegramLane.BULK
+        assert current_telegram_lane() is TelegramLane.BACKGROUND
+    assert current_telegram_lane() is TelegramLane.INTERACTIVE
+
+
+def test_lane_falls_back_to_gateway_priority() -> None:
+    with gateway_priority(Priority.P2_LOW):
+        assert current_telegram_lane() is TelegramLane.BACKGROUND
+        with telegram_lane(TelegramLane.OWNER):
+            assert current_telegram_lane() is TelegramLane.OWNER
+    with gateway_priority(Priority.P0_INSTANT):
+        assert current_telegram_lane() is TelegramLane.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_lane_stats_and_metrics_render() -> None:
+    limiter = _drained_limiter()
+    await _grant_order(limiter, [TelegramLane.OWNER, TelegramLane.BULK])
+    stats = limiter.lane_stats()
+    assert set(stats) == {"owner", "interactive", "background", "bulk"}
+    assert stats["owner"]["acquired"] == 1
+    assert stats["owner"]["waited"] == 1
+    assert stats["bulk"]["weight"] == 1.0
+    assert stats["interactive"]["waiting"] == 0
+    assert limiter.stats()["total_acquired"] == 2
+
+    rendered = "\n".join(render_telegram_lane_wait())
+    assert 'krab_telegram_lane_wait_seconds_bucket{lane="owner"' in rendered
+    assert 'krab_telegram_lane_wait_seconds_count{lane="bulk"}' in rendered
+
+
+@pytest.mark.asyncio
+async def test_throttle_never_delays_owner_lane() -> None:
+    th = TelegramOutgoingThrottle(max_rps=2.0, window_sec=1.0, delay_sec=0.05, enabled=True)
+    for _ in range(4):
+        await th.acquire(caller="send_queue:owner", lane=TelegramLane.OWNER)
+    assert await th.acquire(caller="send_queue:owner", lane=TelegramLane.OWNER) is False
+    assert await th.acquire(caller="send_queue:owner", lane=TelegramLane.BULK) is True
+
+
+@pytest.mark.asyncio
+async def test_send_queue_passes_caller_lane_to_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.userbot import _send_queue as send_queue_module
+
+    seen: list[TelegramLane | None] = []
+
+    async def fake_acquire(purpose: str = "unknown", *, lane: TelegramLane | None = None) -> None:
+        seen.append(lane)
+
+    monkeypatch.setattr(send_queue_module.telegram_rate_limiter, "acquire", fake_acquire)
+    queue = send_queue_module._TelegramSendQueue()
+
+    async def call() -> str:
+        return "ok"
+
+    try:
+        with telegram_lane(TelegramLane.OWNER):
+            assert await queue.run(42, call) == "ok"
+        assert await queue.run(42, call) == "ok"
+    finally:
+        await queue.stop_all()
+    assert seen == [TelegramLane.OWNER, TelegramLane.INTERACTIVE]
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+ToolResultCache в tool loop: single-flight в `acached_tool_call`, wire-up в
+`MCPClientManager.call_tool_unified` (allowlist, ошибки не кэшируются,
+swarm guard раньше кэша) и счётчики в /metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.tool_result_cache import (
+    ToolResultCache,
+    acached_tool_call,
+    is_cacheable_tool,
+    tool_result_cache,
+)
+from src.mcp_client import MCPClientManager
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution() -> None:
+    cache = ToolResultCache()
+    calls = {"n": 0}
+    gate = asyncio.Event()
+
+    async def _slow() -> str:
+        calls["n"] += 1
+        await gate.wait()
+        return "sunny"
+
+    tasks = [
+        asyncio.create_task(acached_tool_call("weather", {"city": "Madrid"}, _slow, cache=cache))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    assert await asyncio.gather(*tasks) == ["sunny"] * 5
+    assert calls["n"] == 1
+    stats = cache.stats()
+    assert stats["coalesced"] == 4
+    assert stats["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_leader_exception_propagates_to_followers_and_is_not_cached() -> None:
+    cache = ToolResultCache()
+    gate = asyncio.Event()
+
+    async def _boom() -> str:
+        await gate.wait()
+        raise RuntimeError("provider down")
+
+    tasks = [
+        asyncio.create_task(acached_tool_call("weather", {"city": "X"}, _boom, cache=cache))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_lets_follower_execute() -> None:
+    cache = ToolResultCache()
+    calls = {"n": 0}
+    gate = asyncio.Event()
+
+    async def _fn() -> str:
+        calls["n"] += 1
+        await gate.wait()
+        return "ok"
+
+    leader = asyncio.create_task(acached_tool_call("weather", {"c": 1}, _fn, cache=cache))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(acached_tool_call("weather", {"c": 1}, _fn, cache=cache))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    gate.set()
+    assert await follower == "ok"
+    assert leader.cancelled()
+    assert calls["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_should_cache_predicate_skips_error_results() -> None:
+    cache = ToolResultCache()
+    fn = AsyncMock(return_value="❌ Ошибка поиска: timeout")
+    for _ in range(2):
+        await acached_tool_call(
+            "web_search", {"query": "q"}, fn, cache=cache, should_cache=lambda r: "❌" not in r
+        )
+    assert fn.await_count == 2
+
+
+def test_allowlist_only_idempotent_tools(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert is_cacheable_tool("web_search")
+    assert is_cacheable_tool("brave-search__brave_web_search")
+    assert not is_cacheable_tool("tor_fetch")
+    assert not is_cacheable_tool("github__create_issue")
+    monkeypatch.setenv("KRAB_TOOL_CACHE_EXTRA_TOOLS", "context7__get-library-docs, x")
+    assert is_cacheable_tool("context7__get-library-docs")
+
+
+@pytest.mark.asyncio
+async def test_call_tool_unified_caches_web_search_by_normalized_query() -> None:
+    manager = MCPClientManager()
+    manager.search_web = AsyncMock(return_value="krab results")
+
+    first = await manager.call_tool_unified("web_search", {"query": "Krab  bot"})
+    second = await manager.call_tool_unified("web_search", {"query": "krab bot "})
+    assert first == second == "krab results"
+    manager.search_web.assert_awaited_once_with("Krab  bot")
+    assert tool_result_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_tool_unified_does_not_cache_errors_or_non_allowlisted() -> None:
+    manager = MCPClientManager()
+    manager.search_web = AsyncMock(side_effect=RuntimeError("brave 503"))
+    for _ in range(2):
+        assert (await manager.call_tool_unified("web_search", {"query": "q"})).startswith("❌")
+    assert manager.search_web.await_count == 2
+
+    manager.call_tool = AsyncMock(return_value={"content": []})
+    manager._format_tool_result = lambda _r: "created"
+    for _ in range(2):
+        await manager.call_tool_unified("github__create_issue", {"title": "t"})
+    assert manager.call_tool.await_count == 2
+    assert tool_result_cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_swarm_blocked_team_never_gets_cached_result(monkeypatch) -> None:
+    from src.core import swarm_tool_allowlist as allow
+
+    manager = MCPClientManager()
+    manager.search_web = AsyncMock(return_value="secret results")
+    await manager.call_tool_unified("web_search", {"query": "q"})
+
+    monkeypatch.setattr(allow, "get_current_team", lambda: "coders")
+    monkeypatch.setattr(allow, "is_tool_allowed", lambda _tool, _team: False)
+    blocked = await manager.call_tool_unified("web_search", {"query": "q"})
+    assert blocked.startswith("❌")
+    assert "secret" not in blocked
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled_by_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("KRAB_TOOL_RESULT_CACHE_ENABLED", "0")
+    manager = MCPClientManager()
+    manager.search_web = AsyncMock(return_value="r")
+    await manager.call_tool_unified("web_search", {"query": "q"})
+    await manager.call_tool_unified("web_search", {"query": "q"})
+    assert manager.search_web.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_render_tool_cache_counters() -> None:
+    from src.core.metrics.collect import collect_metrics
+
+    manager = MCPClientManager()
+    manager.search_web = AsyncMock(return_value="r")
+    await manager.call_tool_unified("web_search", {"query": "q"})
+    await manager.call_tool_unified("web_search", {"query": "q"})
+    text = collect_metrics()
+    assert "krab_tool_result_cache_hits_total 1" in text
+    assert "krab_tool_result_cache_misses_total 1" in text
+    assert "krab_tool_result_cache_coalesced_total 0" in text
+
+
+@pytest.mark.asyncio
+async def test_empty_result_from_failed_call_is_not_cached() -> None:
+    from types import SimpleNamespace
+
+    manager = MCPClientManager()
+    ok = SimpleNamespace(content=[SimpleNamespace(text="krab docs")])
+    # Первый вызов падает (call_tool → None → _format_tool_result → ""), второй успешен.
+    manager.call_tool = AsyncMock(side_effect=[None, ok, ok])
+    args = {"query": "krab"}
+    assert await manager.call_tool_unified("brave-search__brave_web_search", args) == ""
+    assert await manager.call_tool_unified("brave-search__brave_web_search", args) == "krab docs"
+    assert await manager.call_tool_unified("brave-search__brave_web_search", args) == "krab docs"
+    assert manager.call_tool.await_count == 2
+    assert tool_result_cache.stats()["hits"] == 1
@@ -110,6 +110,7 @@ def test_atomic_persist_and_reload(env_on: None, tmp_path: Path) -> None:
     """Persist → читаемый JSON; новый cache на том же path подхватывает entries."""
     cache1 = _make_cache(tmp_path)
     cache1.store("hello", "ru", "привет")
+    assert cache1.persist()
     storage = tmp_path / "translation_cache.json"
     assert storage.exists()
     # Файл — валидный JSON со схемой {entries: ...}.
@@ -170,3 +171,56 @@ def test_load_skips_expired_entries(env_on: None, tmp_path: Path) -> None:
     )
     # Только fresh загружен.
     assert cache.stats()["size"] == 1
+
+
+def test_store_appends_journal_without_snapshot(env_on: None, tmp_path: Path) -> None:
+    """store() пишет только journal; новый cache поднимает state из replay."""
+    cache1 = _make_cache(tmp_path)
+    cache1.store("hello", "ru", "привет")
+    cache1.store("bye", "ru", "пока")
+    assert cache1.flush()
+    assert not (tmp_path / "translation_cache.json").exists()
+    journal = tmp_path / "translation_cache.json.journal"
+    assert len(journal.read_text(encoding="utf-8").splitlines()) == 2
+    cache2 = _make_cache(tmp_path)
+    assert cache2.lookup("hello", "ru") == "привет"
+    assert cache2.lookup("bye", "ru") == "пока"
+
+
+def test_compaction_truncates_journal(env_on: None, tmp_path: Path) -> None:
+    """Каждые compact_every событий — snapshot + пустой journal."""
+    storage = tmp_path / "translation_cache.json"
+    cache1 = TranslationCache(storage_path=storage, now_fn=lambda: 1_000_000.0, compact_every=3)
+    for i in range(4):
+        cache1.store(f"t{i}", "ru", f"v{i}")
+    assert cache1.flush()
+    payload = json.loads(storage.read_text(encoding="utf-8"))
+    assert set(payload["entries"]) == {_hash_key(f"t{i}", "ru") for i in range(3)}
+    journal = storage.with_name(storage.name + ".journal")
+    assert len(journal.read_text(encoding="utf-8").splitlines()) == 1
+    cache2 = TranslationCache(storage_path=storage, now_fn=lambda: 1_000_000.0)
+    assert cache2.stats()["size"] == 4
+
+
+def test_replay_applies_evictions_and_skips_torn_tail(env_on: None, tmp_path: Path) -> None:
+    """Evict журналируется как del; недописанная последняя строка игнорируется."""
+    cache1 = _make_cache(tmp_path, max_entries=2)
+    for word in ("a", "b", "c"):
+        cache1.store(word, "ru", word.upper())
+    assert cache1.flush()
+    journal = tmp_path / "translation_cache.json.journal"
+    with journal.open("a", encoding="utf-8") as fh:
+        fh.write('{"op": "put", "k": "torn')
+    cache2 = _make_cache(tmp_path, max_entries=2)
+    assert cache2.lookup("a", "ru") is None
+    assert cache2.lookup("b", "ru") == "B"
+    assert cache2.lookup("c", "ru") == "C"
+
+
+def test_clear_persists_empty_snapshot(env_on: None, tmp_path: Path) -> None:
+    cache1 = _make_cache(tmp_path)
+    cache1.store("x", "ru", "Икс")
+    cache1.clear()
+    assert cache1.flush()
+    cache2 = _make_cache(tmp_path)
+    assert cache2.stats()["size"] == 0
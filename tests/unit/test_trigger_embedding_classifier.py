@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты src/core/trigger_embedding_classifier.py — Stage 4a Smart Routing.
+
+Encoder подменяется детерминированным bag-of-words (без Model2Vec): проверяем
+лог вердиктов LLM, holdout-гейт активации, уверенный/неуверенный classify,
+переобучение после активации (shadow-сэмплы, без смещённых uncertain) и
+интеграцию в detect_smart_trigger (embed_yes без вызова LLM, запись примеров).
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.core import trigger_embedding_classifier
+from src.core.chat_response_policy import ChatResponsePolicyStore
+from src.core.chat_sensitivity import SensitiveChatRegistry
+from src.core.llm_intent_classifier import IntentResult
+from src.core.metrics.smart_routing import map_smart_routing_path
+from src.core.trigger_detector import detect_smart_trigger
+from src.core.trigger_embedding_classifier import (
+    LinearTriggerModel,
+    TriggerEmbeddingClassifier,
+    evaluate,
+    train_logistic,
+)
+
+_VOCAB = ["краб", "помоги", "подскажи", "бот", "футбол", "обед", "погода", "мем"]
+_YES = _VOCAB[:4]
+_NO = _VOCAB[4:]
+
+
+def _encoder(texts):
+    out = []
+    for text in texts:
+        words = text.lower().split()
+        out.append([float(words.count(w)) for w in _VOCAB] + [0.1])
+    return out
+
+
+def _records(n: int, seed: int = 3) -> list[dict]:
+    rnd = random.Random(seed)
+    records = []
+    for i in range(n):
+        yes = rnd.random() < 0.4
+        words = rnd.sample(_YES if yes else _NO, 2)
+        records.append(
+            {
+                "ts": float(i),
+                "text": " ".join(words),
+                "regex_score": 0.4,
+                "should_respond": yes,
+                "latency_ms": 300.0 + i % 50,
+            }
+        )
+    return records
+
+
+def _classifier(tmp_path: Path, shadow_rate: float = 0.0) -> TriggerEmbeddingClassifier:
+    return TriggerEmbeddingClassifier(
+        encoder=_encoder,
+        log_path=tmp_path / "trigger_decisions.jsonl",
+        model_path=tmp_path / "trigger_embed_classifier.json",
+        confidence=0.85,
+        shadow_rate=shadow_rate,
+    )
+
+
+def _fill_log(
+    clf: TriggerEmbeddingClassifier, records: list[dict], *, shadow: bool = False
+) -> None:
+    for rec in records:
+        clf.record_llm_decision(
+            rec["text"],
+            chat_id="-100",
+            regex_score=rec["regex_score"],
+            intent=IntentResult(rec["should_respond"], 0.9, "", latency_ms=rec["latency_ms"]),
+            shadow_of=IntentResult(rec["should_respond"], 0.95, "") if shadow else None,
+        )
+
+
+def test_record_skips_cached_and_errors(tmp_path: Path) -> None:
+    clf = _classifier(tmp_path)
+    clf.record_llm_decision(
+        "краб помоги", chat_id="1", regex_score=0.3, intent=IntentResult(True, 0.9, "", cached=True)
+    )
+    clf.record_llm_decision(
+        "краб помоги",
+        chat_id="1",
+        regex_score=0.3,
+        intent=IntentResult(False, 0.0, "", error="timeout"),
+    )
+    clf.record_llm_decision(
+        "краб помоги",
+        chat_id="1",
+        regex_score=0.3,
+        intent=IntentResult(True, 0.8, "", latency_ms=412.0),
+    )
+    [rec] = clf.read_decisions()
+    assert rec["should_respond"] is True and rec["latency_ms"] == 412.0
+
+
+def test_record_redacts_pii_and_skips_no_archive_chats(tmp_path: Path) -> None:
+    registry = SensitiveChatRegistry(storage_path=tmp_path / "sensitive_chats.json")
+    registry.mark_sensitive("-200", reason="finance")
+    clf = TriggerEmbeddingClassifier(
+        encoder=_encoder,
+        log_path=tmp_path / "trigger_decisions.jsonl",
+        model_path=tmp_path / "trigger_embed_classifier.json",
+        shadow_rate=0.0,
+        sensitivity_registry=registry,
+    )
+    intent = IntentResult(True, 0.8, "", latency_ms=300.0)
+    text = "краб, напиши на alice@example.com"
+    clf.record_llm_decision(text, chat_id="-200", regex_score=0.3, intent=intent)
+    clf.record_llm_decision(text, chat_id="-100", regex_score=0.3, intent=intent, sender_id=42)
+    [rec] = clf.read_decisions()
+    assert rec["chat_id"] == "-100" and rec["sender_id"] == "42"
+    assert "alice@example.com" not in rec["text"] and "[REDACTED:EMAIL]" in rec["text"]
+
+
+def test_retrain_drops_decisions_past_max_age(tmp_path: Path, monkeypatch) -> None:
+    clf = _classifier(tmp_path)
+    _fill_log(clf, _records(250))
+    clf.retrain()
+    assert clf.is_active
+    later = time.time() + trigger_embedding_classifier.DECISIONS_MAX_AGE_SEC + 60
+    monkeypatch.setattr(time, "time", lambda: later)
+    report = clf.retrain()
+    assert clf.read_decisions() == []
+    assert not report.passed and not clf.is_active
+
+
+def test_retrain_activates_model_and_classify_is_confident(tmp_path: Path) -> None:
+    clf = _classifier(tmp_path)
+    _fill_log(clf, _records(250))
+    report = clf.retrain()
+    assert report.passed
+    assert report.agreement_confident == 1.0
+    assert clf.is_active
+
+    verdict = clf.classify("краб подскажи", regex_score=0.4)
+    assert verdict is not None and verdict.should_respond and verdict.confidence >= 0.85
+    assert clf.classify("погода мем", regex_score=0.4).should_respond is False
+    # Ни одного известного слова — неуверенно → None (решает LLM).
+    assert clf.classify("непонятно", regex_score=0.4) is None
+
+    # Модель переживает рестарт (JSON на диске).
+    assert _classifier(tmp_path).is_active
+
+
+def test_retrain_after_activation_uses_only_unbiased_records(tmp_path: Path) -> None:
+    clf = _classifier(tmp_path)
+    _fill_log(clf, _records(250))
+    assert clf.retrain().passed and clf.is_active
+
+    # Модель активна: в LLM доходят только неуверенные — и LLM с ними «спорит».
+    # Такие записи смещены и не должны ни обучать, ни гейтить модель.
+    uncertain = _records(300, seed=5)
+    for rec in uncertain:
+        rec["should_respond"] = not rec["should_respond"]
+    _fill_log(clf, uncertain)
+    _fill_log(clf, _records(50, seed=9), shadow=True)
+
+    sources = [rec["source"] for rec in clf.read_decisions()]
+    assert sources.count("inactive") == 250
+    assert sources.count("uncertain") == 300
+    assert sources.count("shadow") == 50
+    shadow = clf.read_decisions(unbiased_only=True)[-1]
+    assert shadow["embed_should_respond"] == shadow["should_respond"]
+
+    report = clf.retrain()
+    assert report.train_samples + report.holdout_samples == 300
+    assert report.passed and clf.is_active
+
+
+def test_retrain_gate_blocks_small_sample(tmp_path: Path) -> None:
+    clf = _classifier(tmp_path)
+    _fill_log(clf, _records(50))
+    report = clf.retrain()
+    assert not report.passed
+    assert not clf.is_active
+    assert clf.classify("краб помоги", regex_score=0.4) is None
+
+
+def test_failed_retrain_deactivates_previous_model(tmp_path: Path) -> None:
+    clf = _classifier(tmp_path)
+    clf._save(LinearTriggerModel(weights=[0.0] * 10, bias=5.0, active=True))
+    assert clf.is_active
+    clf.retrain()  # пустой лог → гейт не пройден
+    assert not _classifier(tmp_path).is_active
+
+
+def test_evaluate_reports_agreement_coverage_and_latency() -> None:
+    records = _records(300)
+    # Шум в holdout: LLM «передумал» на 10 свежих сообщениях.
+    for rec in records[-10:]:
+        rec["should_respond"] = not rec["should_respond"]
+    report = evaluate(records, _encoder, holdout_fraction=0.2)
+    assert report.holdout_samples == 60
+    assert report.coverage == 1.0
+    assert report.agreement_all == pytest.approx(50 / 60)
+    assert not report.passed  # 83% < MIN_AGREEMENT
+    assert report.classifier_p99_ms >= report.classifier_p50_ms > 0.0
+    assert 300.0 <= report.llm_p50_ms <= report.llm_p99_ms < 350.0
+
+
+def test_evaluate_without_encoder_is_skipped() -> None:
+    report = evaluate(_records(300), lambda texts: None)
+    assert not report.passed
+    assert report.extra["reason"] == "encoder_unavailable"
+
+
+@pytest.mark.asyncio
+async def test_smart_trigger_uses_embed_verdict_and_records_llm(tmp_path: Path) -> None:
+    store = ChatResponsePolicyStore(path=tmp_path / "policies.json")
+    llm = MagicMock()
+    llm.classify_intent_for_krab = AsyncMock(
+        return_value=IntentResult(True, 0.9, "ok", latency_ms=250.0)
+    )
+    clf = _classifier(tmp_path)
+    kwargs = dict(
+        chat_id="-100",
+        is_reply_to_me=False,
+        has_explicit_mention=False,
+        has_command=False,
+        chat_context=[],
+        policy_store=store,
+        llm_classifier=llm,
+        embed_classifier=clf,
+    )
+    text = "а кто знает ответ?"  # borderline regex → Stage 4
+
+    # Модели ещё нет → LLM, вердикт записан как обучающий пример.
+    first = await detect_smart_trigger(text, **kwargs)
+    assert first.decision_path == "llm_yes"
+    assert [r["text"] for r in clf.read_decisions()] == [text]
+
+    clf._save(LinearTriggerModel(weights=[0.0] * 10, bias=5.0, active=True))
+    clf._loaded = False
+    llm.classify_intent_for_krab.reset_mock()
+    second = await detect_smart_trigger(text, **kwargs)
+    assert second.decision_path == "embed_yes"
+    assert second.should_respond is True
+    llm.classify_intent_for_krab.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_shadow_sample_sends_confident_verdict_to_llm(tmp_path: Path) -> None:
+    store = ChatResponsePolicyStore(path=tmp_path / "policies.json")
+    llm = MagicMock()
+    llm.classify_intent_for_krab = AsyncMock(
+        return_value=IntentResult(False, 0.9, "ok", latency_ms=250.0)
+    )
+    clf = _classifier(tmp_path, shadow_rate=1.0)
+    clf._save(LinearTriggerModel(weights=[0.0] * 10, bias=5.0, active=True))
+    kwargs = dict(
+        chat_id="-100",
+        is_reply_to_me=False,
+        has_explicit_mention=False,
+        has_command=False,
+        chat_context=[],
+        policy_store=store,
+        llm_classifier=llm,
+        embed_classifier=clf,
+    )
+    text = "а кто знает ответ?"
+
+    result = await detect_smart_trigger(text, **kwargs)
+    assert result.decision_path == "llm_no"
+    [rec] = clf.read_decisions()
+    assert rec["source"] == "shadow" and rec["embed_should_respond"] is True
+
+    # LLM упал на shadow-сэмпле — остаётся уверенный вердикт модели, не regex.
+    llm.classify_intent_for_krab.return_value = IntentResult(False, 0.0, "", error="timeout")
+    fallback = await detect_smart_trigger(text, **kwargs)
+    assert fallback.decision_path == "embed_yes"
+
+
+def test_training_without_numpy_matches_numpy(monkeypatch) -> None:
+    pytest.importorskip("numpy")
+    records = _records(120)
+    rows = [[float(v) for v in vec] + [0.4] for vec in _encoder([r["text"] for r in records])]
+    labels = [r["should_respond"] for r in records]
+    fast = train_logistic(rows, labels, epochs=50)
+    monkeypatch.setattr(trigger_embedding_classifier, "np", None)
+    slow = train_logistic(rows, labels, epochs=50)
+    assert slow.bias == pytest.approx(fast.bias, abs=1e-9)
+    assert slow.weights == pytest.approx(fast.weights, abs=1e-9)
+
+
+def test_embed_paths_map_to_own_stage() -> None:
+    assert map_smart_routing_path("embed_yes", True) == ("embed_classifier", "allow")
+    assert map_smart_routing_path("embed_no", False) == ("embed_classifier", "deny")